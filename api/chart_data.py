@@ -0,0 +1,337 @@
+"""Chart series (OHLCV plus EMA, RSI and average volume) served column-wise."""
+
+import logging
+import math
+import struct
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Chart timeframes: bar length in seconds and the exchange granularity to fetch them at
+TIMEFRAME_SECONDS = {
+    '1m': 60,
+    '5m': 300,
+    '15m': 900,
+    '1h': 3600,
+    '4h': 14400,
+    '1d': 86400
+}
+TIMEFRAME_GRANULARITY = {
+    '1m': 'ONE_MINUTE',
+    '5m': 'FIVE_MINUTE',
+    '15m': 'FIFTEEN_MINUTE',
+    '1h': 'ONE_HOUR',
+    # Coinbase public candles API doesn't support 4h directly; use 6h as the closest
+    '4h': 'SIX_HOUR',
+    '1d': 'ONE_DAY'
+}
+
+OHLCV_COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+INDICATOR_COLUMNS = ('ema', 'rsi', 'volume_avg')
+SERIES_COLUMNS = OHLCV_COLUMNS + INDICATOR_COLUMNS
+
+# Header: magic, format version, row count; then time (int64 seconds) and
+# one float64 column per remaining SERIES_COLUMNS entry, little-endian
+_HEADER = struct.Struct('<4sBI')
+_MAGIC = b'CHRT'
+_FORMAT_VERSION = 1
+
+
+def candle_time(candle: Dict) -> int:
+    """Get a candle's open time in epoch seconds, whichever key the source used."""
+    value = candle.get('timestamp', candle.get('time', candle.get('start', 0)))
+    if hasattr(value, 'timestamp'):
+        return int(value.timestamp())
+    return int(value or 0)
+
+
+def parse_chart_time(value: Optional[str]) -> Optional[int]:
+    """Parse a range bound given as epoch seconds or an ISO timestamp (UTC when naive)."""
+    if value is None or value == '':
+        return None
+    try:
+        return int(float(value))
+    except ValueError:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return int(parsed.timestamp())
+
+
+def candles_to_columns(candles: Iterable[Dict]) -> Dict[str, np.ndarray]:
+    """Convert candle dicts (ascending time) to OHLCV column arrays."""
+    candles = list(candles)
+    columns = {'time': np.fromiter((candle_time(c) for c in candles), dtype=np.int64, count=len(candles))}
+    for field in OHLCV_COLUMNS[1:]:
+        columns[field] = np.fromiter((float(c.get(field) or 0.0) for c in candles), dtype=np.float64, count=len(candles))
+    return columns
+
+
+def aggregate(columns: Dict[str, np.ndarray], seconds: int) -> Dict[str, np.ndarray]:
+    """
+    Merge bars into buckets of ``seconds`` (aligned to the epoch).
+
+    OHLCV combine as candles do (first open, highest high, lowest low, last
+    close, summed volume); any other column keeps its value at the bucket's
+    last bar, the one whose close the bucket ends on.
+    """
+    times = columns['time']
+    if len(times) == 0:
+        return {name: values[:0] for name, values in columns.items()}
+    buckets = times - times % seconds
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+    ends = np.concatenate((starts[1:], [len(times)])) - 1
+
+    merged = {'time': buckets[starts]}
+    for name, values in columns.items():
+        if name == 'time':
+            continue
+        if name == 'open':
+            merged[name] = values[starts]
+        elif name == 'high':
+            merged[name] = np.maximum.reduceat(values, starts)
+        elif name == 'low':
+            merged[name] = np.minimum.reduceat(values, starts)
+        elif name == 'volume':
+            merged[name] = np.add.reduceat(values, starts)
+        else:
+            merged[name] = values[ends]
+    return merged
+
+
+def add_indicators(columns: Dict[str, np.ndarray], ema_period: int, rsi_period: int,
+                   volume_period: int) -> Dict[str, np.ndarray]:
+    """
+    Add EMA, RSI and average volume series (NaN until enough bars are in).
+
+    Values match EMARSIStrategy.calculate_indicators at every bar: EMA with
+    adjust=False, RSI from rolling mean gains/losses (50 when flat) and the
+    average of the last ``volume_period`` volumes.
+    """
+    close = pd.Series(columns['close'])
+    volume = pd.Series(columns['volume'])
+    count = len(close)
+    ema = close.ewm(span=ema_period, adjust=False).mean().to_numpy(copy=True)
+    ema[:min(ema_period - 1, count)] = np.nan
+
+    delta = close.diff()
+    gain = delta.where(delta > 0, 0).rolling(window=rsi_period).mean()
+    loss = (-delta.where(delta < 0, 0)).rolling(window=rsi_period).mean()
+    rsi = (100 - (100 / (1 + gain / loss))).fillna(50).to_numpy(copy=True)
+    rsi[:min(rsi_period, count)] = np.nan
+
+    return {
+        **columns,
+        'ema': ema,
+        'rsi': rsi,
+        'volume_avg': volume.rolling(window=volume_period, min_periods=1).mean().to_numpy()
+    }
+
+
+class ChartSeries:
+    """Bars and indicators for one pair as parallel NumPy columns.
+
+    ``resolution`` is the bar length in seconds; it grows when the series
+    is downsampled, since bars are merged rather than dropped.
+    """
+
+    __slots__ = ('columns', 'resolution', 'source')
+
+    def __init__(self, columns: Dict[str, np.ndarray], resolution: int, source: str = 'local'):
+        self.columns = columns
+        self.resolution = resolution
+        self.source = source
+
+    def __len__(self) -> int:
+        return len(self.columns['time'])
+
+    def _take(self, index) -> 'ChartSeries':
+        return ChartSeries({name: values[index] for name, values in self.columns.items()}, self.resolution, self.source)
+
+    def between(self, start: Optional[int] = None, end: Optional[int] = None) -> 'ChartSeries':
+        """Get the bars opening in [start, end] (epoch seconds; None leaves a side open)."""
+        times = self.columns['time']
+        lo = 0 if start is None else int(np.searchsorted(times, start, side='left'))
+        hi = len(times) if end is None else int(np.searchsorted(times, end, side='right'))
+        return self._take(slice(lo, hi))
+
+    def tail(self, count: int) -> 'ChartSeries':
+        return self._take(slice(max(len(self) - count, 0), None))
+
+    def downsample(self, points: int) -> 'ChartSeries':
+        """Merge bars into coarser ones (a multiple of the resolution) until at most ``points`` remain."""
+        if points <= 0 or len(self) <= points:
+            return self
+        factor = math.ceil(len(self) / points)
+        while True:
+            seconds = self.resolution * factor
+            columns = aggregate(self.columns, seconds)
+            if len(columns['time']) <= points:
+                return ChartSeries(columns, seconds, self.source)
+            factor += 1
+
+    def last(self) -> Optional[Dict[str, Any]]:
+        """Get the newest bar as a dict (None if the series is empty)."""
+        if not len(self):
+            return None
+        row = {name: values[-1].item() for name, values in self.columns.items()}
+        return {name: None if isinstance(value, float) and math.isnan(value) else value for name, value in row.items()}
+
+    def to_candles(self) -> List[Dict[str, Any]]:
+        """Get the OHLCV bars as a list of dicts (legacy /api/charts/candles shape)."""
+        lists = [self.columns[name].tolist() for name in OHLCV_COLUMNS]
+        return [dict(zip(OHLCV_COLUMNS, row)) for row in zip(*lists)]
+
+    def to_json(self) -> Dict[str, List]:
+        """Get each column as a list (NaN warm-up values become null)."""
+        data = {}
+        for name in SERIES_COLUMNS:
+            values = self.columns[name]
+            if name in INDICATOR_COLUMNS and np.isnan(values).any():
+                data[name] = [None if value != value else value for value in values.tolist()]
+            else:
+                data[name] = values.tolist()
+        return data
+
+    def encode(self) -> bytes:
+        """Serialize to the binary column format (see _HEADER)."""
+        parts = [_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(self)), self.columns['time'].astype('<i8').tobytes()]
+        parts.extend(self.columns[name].astype('<f8').tobytes() for name in SERIES_COLUMNS[1:])
+        return b''.join(parts)
+
+    @classmethod
+    def decode(cls, data: bytes, resolution: int = 0) -> 'ChartSeries':
+        """Rebuild a series from ``encode`` output."""
+        magic, version, rows = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported chart blob (magic={magic!r}, version={version})")
+        offset = _HEADER.size
+        columns = {'time': np.frombuffer(data, dtype='<i8', count=rows, offset=offset)}
+        offset += rows * 8
+        for name in SERIES_COLUMNS[1:]:
+            columns[name] = np.frombuffer(data, dtype='<f8', count=rows, offset=offset)
+            offset += rows * 8
+        return cls(columns, resolution)
+
+
+class ChartDataService:
+    """Builds chart series from the bot's candle store, falling back to the exchange.
+
+    The bot keeps recent one-minute candles per pair in memory. Timeframes
+    that are a multiple of that granularity are aggregated from the buffer
+    when it reaches back far enough; longer ranges are fetched from the
+    exchange at the timeframe's granularity. Either way indicators are
+    computed once over the whole base series (so the first visible bars are
+    warmed up) and the result is cached until the buffer changes or, for
+    fetched ranges, for ``fetch_ttl`` seconds. Requests then only slice and
+    downsample arrays.
+    """
+
+    def __init__(self, bot, max_entries: int = 500, fetch_ttl: float = 60.0):
+        """
+        Initialize the service.
+
+        Args:
+            bot: Trading bot providing candle_cache, strategy and exchange
+            max_entries: Base series kept cached (per pair, timeframe and source range)
+            fetch_ttl: Longest seconds a range fetched from the exchange is reused
+        """
+        self.bot = bot
+        self.fetch_ttl = fetch_ttl
+        self._cache = TTLCache(max_size=max_entries, ttl=fetch_ttl)
+        self.builds = 0
+        self.fetches = 0
+
+    def _periods(self):
+        strategy = getattr(self.bot, 'strategy', None)
+        config = getattr(self.bot, 'config', None)
+        return tuple(
+            getattr(strategy, name, None) or getattr(config, name.upper(), default)
+            for name, default in (('ema_period', 50), ('rsi_period', 14), ('volume_period', 20))
+        )
+
+    def _build(self, columns: Dict[str, np.ndarray], seconds: int, source: str) -> ChartSeries:
+        self.builds += 1
+        return ChartSeries(add_indicators(aggregate(columns, seconds), *self._periods()), seconds, source)
+
+    def _local_series(self, pair: str, timeframe: str, start: int) -> Optional[ChartSeries]:
+        """Series aggregated from the candle buffer, or None if it doesn't reach back to start."""
+        buffer = getattr(self.bot, 'candle_cache', {}).get(pair)
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        if not buffer or seconds % buffer.granularity_seconds:
+            return None
+        # Indicators need warm-up bars before the first visible one
+        warmup = max(self._periods()) * seconds
+        if candle_time(buffer[0]) > start - warmup:
+            return None
+
+        # The forming bar is replaced (never mutated) on every update, so its identity versions the buffer
+        last = buffer.last()
+        key = ('local', pair, timeframe)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] is last and entry[1] == len(buffer):
+            return entry[2]
+        series = self._build(candles_to_columns(buffer), seconds, 'local')
+        self._cache.set(key, (last, len(buffer), series))
+        return series
+
+    async def _fetched_series(self, pair: str, timeframe: str, start: int, end: int) -> ChartSeries:
+        """Series fetched from the exchange for [start, end], reused for fetch_ttl seconds."""
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        warmup = max(self._periods()) * seconds
+        key = ('fetched', pair, timeframe, start // seconds, end // seconds)
+        series = self._cache.get(key)
+        if series is not None:
+            return series
+
+        candles = await self.bot.exchange.get_candles(
+            pair,
+            TIMEFRAME_GRANULARITY[timeframe],
+            datetime.utcfromtimestamp(start - warmup),
+            datetime.utcfromtimestamp(end)
+        )
+        self.fetches += 1
+        series = self._build(candles_to_columns(sorted(candles or [], key=candle_time)), seconds, 'exchange')
+        self._cache.set(key, series)
+        return series
+
+    async def get_series(self, pair: str, timeframe: str = '1h', start: Optional[int] = None,
+                         end: Optional[int] = None, limit: int = 100, points: int = 0) -> ChartSeries:
+        """
+        Get bars and indicators for a pair.
+
+        Args:
+            pair: Trading pair
+            timeframe: Bar length (key of TIMEFRAME_SECONDS)
+            start: First bar time in epoch seconds (None = ``limit`` bars before end)
+            end: Last bar time in epoch seconds (None = now)
+            limit: Bars returned when no start is given
+            points: Downsample to at most this many bars (0 keeps every bar)
+
+        Returns:
+            ChartSeries for the range
+        """
+        if timeframe not in TIMEFRAME_SECONDS:
+            raise ValueError(f"Unknown timeframe '{timeframe}'")
+        seconds = TIMEFRAME_SECONDS[timeframe]
+        end = int(end if end is not None else time.time())
+        range_start = int(start if start is not None else end - seconds * limit)
+
+        series = self._local_series(pair, timeframe, range_start)
+        if series is None:
+            series = await self._fetched_series(pair, timeframe, range_start, end)
+
+        series = series.between(start, end) if start is not None else series.between(None, end).tail(limit)
+        return series.downsample(points)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._cache.get_stats()
+        stats.update({'builds': self.builds, 'fetches': self.fetches})
+        return stats
@@ -0,0 +1,56 @@
+"""Client address resolution behind trusted reverse proxies."""
+
+import ipaddress
+import logging
+from typing import Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TrustedProxies:
+    """Resolves the real client address of a request.
+
+    ``request.remote`` is the peer that opened the connection, which behind a
+    load balancer or reverse proxy is the proxy. When that peer is one of the
+    trusted proxies, X-Forwarded-For is walked from the right (the hop the
+    proxy itself appended) past every trusted address; the first untrusted
+    hop is the client. Entries left of it are client-supplied and ignored, so
+    a client can't pick its own address. With no trusted proxies configured
+    the header is never read.
+    """
+
+    def __init__(self, proxies: Iterable[str] = ()):
+        """
+        Initialize the resolver.
+
+        Args:
+            proxies: Trusted proxy addresses or networks, e.g. '10.0.0.0/8' or '127.0.0.1'
+        """
+        self.networks: List[ipaddress._BaseNetwork] = []
+        for proxy in proxies:
+            try:
+                self.networks.append(ipaddress.ip_network(proxy.strip(), strict=False))
+            except ValueError:
+                logger.warning(f"Ignoring invalid trusted proxy: {proxy!r}")
+
+    def is_trusted(self, address: Optional[str]) -> bool:
+        if not address or not self.networks:
+            return False
+        try:
+            ip = ipaddress.ip_address(address)
+        except ValueError:
+            return False
+        return any(ip in network for network in self.networks)
+
+    def client_address(self, request) -> Optional[str]:
+        """Address of the client behind any trusted proxies (the peer address otherwise)."""
+        address = request.remote
+        if not self.is_trusted(address):
+            return address
+        hops = [hop.strip() for header in request.headers.getall('X-Forwarded-For', ())
+                for hop in header.split(',') if hop.strip()]
+        for hop in reversed(hops):
+            address = hop
+            if not self.is_trusted(hop):
+                break
+        return address
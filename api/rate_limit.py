@@ -0,0 +1,275 @@
+"""Token-bucket request rate limiting per user and per route."""
+
+import logging
+import math
+import re
+import time
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from aiohttp import web
+
+from utils.ttl_cache import TTLCache
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # Optional: limits are per process
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitPolicy(NamedTuple):
+    """Bucket refilling at ``rate`` tokens per second up to ``burst`` tokens."""
+
+    rate: float
+    burst: float
+
+    @classmethod
+    def per_minute(cls, count: float, burst: Optional[float] = None) -> 'RateLimitPolicy':
+        return cls(count / 60.0, burst if burst is not None else count)
+
+    @property
+    def refill_seconds(self) -> float:
+        """Seconds an empty bucket takes to fill (a bucket idle this long is full)."""
+        return self.burst / self.rate
+
+
+# A bucket charge: (key, policy, cost)
+Charge = Tuple[str, RateLimitPolicy, float]
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process.
+
+    A bucket is [tokens, updated_at]; tokens are refilled lazily from the
+    elapsed time when the bucket is next charged. Buckets live in a bounded
+    LRU and expire once they would be full again, since a missing bucket
+    and a full one behave the same.
+    """
+
+    def __init__(self, max_keys: int = 10000, ttl: float = 600.0, clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the store.
+
+        Args:
+            max_keys: Buckets tracked before the least recently used is forgotten
+            ttl: Seconds an idle bucket is kept (at least the longest refill time)
+            clock: Monotonic time source (overridable for tests)
+        """
+        self.clock = clock
+        self._buckets = TTLCache(max_size=max_keys, ttl=ttl, clock=clock)
+
+    async def take(self, charges: Sequence[Charge]) -> float:
+        """
+        Charge every bucket, or none of them if any is short.
+
+        Returns:
+            0 if the charges were taken, otherwise seconds until they could be
+        """
+        now = self.clock()
+        buckets: List[list] = []
+        wait = 0.0
+        for key, policy, cost in charges:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = [policy.burst, now]
+            else:
+                bucket[0] = min(policy.burst, bucket[0] + (now - bucket[1]) * policy.rate)
+                bucket[1] = now
+            buckets.append(bucket)
+            if bucket[0] < cost:
+                wait = max(wait, (cost - bucket[0]) / policy.rate)
+        # Refilled state is kept even when refusing, so the next check starts from now
+        for (key, _, cost), bucket in zip(charges, buckets):
+            if not wait:
+                bucket[0] -= cost
+            self._buckets.set(key, bucket)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# Same algorithm as MemoryBucketStore.take, atomic in Redis and timed by the
+# Redis clock so every worker agrees. ARGV holds (rate, burst, cost) per key.
+_TAKE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local tokens = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local rate, burst, cost = tonumber(ARGV[i * 3 - 2]), tonumber(ARGV[i * 3 - 1]), tonumber(ARGV[i * 3])
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local available = tonumber(state[1]) or burst
+    local updated = tonumber(state[2]) or now
+    available = math.min(burst, available + math.max(0, now - updated) * rate)
+    tokens[i] = available
+    if available < cost then
+        wait = math.max(wait, (cost - available) / rate)
+    end
+end
+if wait > 0 then
+    return tostring(wait)
+end
+for i, key in ipairs(KEYS) do
+    local rate, burst, cost = tonumber(ARGV[i * 3 - 2]), tonumber(ARGV[i * 3 - 1]), tonumber(ARGV[i * 3])
+    redis.call('HSET', key, 'tokens', tokens[i] - cost, 'ts', now)
+    redis.call('PEXPIRE', key, math.ceil(burst / rate * 1000))
+end
+return '0'
+"""
+
+
+class RedisBucketStore:
+    """Token buckets shared by every worker through Redis (requires ``redis``)."""
+
+    def __init__(self, url: str, prefix: str = 'ratelimit:'):
+        if redis is None:
+            raise RuntimeError("Shared rate limiting needs the redis package (pip install redis)")
+        self.prefix = prefix
+        self.client = redis.from_url(url)
+        self._script = self.client.register_script(_TAKE_SCRIPT)
+
+    async def take(self, charges: Sequence[Charge]) -> float:
+        keys = [self.prefix + key for key, _, _ in charges]
+        args: List[float] = []
+        for _, policy, cost in charges:
+            args.extend((policy.rate, policy.burst, cost))
+        return float(await self._script(keys=keys, args=args))
+
+
+class RequestRateLimiter:
+    """Rate limits API requests per client with token buckets.
+
+    Every request is charged its route's cost (1 unless configured) against
+    the client's own bucket: the signed-in user, or the client address when
+    signed out. Heavy routes can also have a per-client bucket of their own,
+    so a burst of backtests can't use up a user's whole budget and vice
+    versa. Charges are all-or-nothing; a refused request gets a 429 with
+    Retry-After and costs nothing. Buckets are in memory unless a shared
+    store (Redis) is given for multi-worker deployments; if that store
+    fails, limiting falls back to this process's buckets and the store is
+    retried with exponential backoff rather than on every request.
+    """
+
+    def __init__(self, client_policy: RateLimitPolicy, routes: Optional[Dict[str, Dict[str, float]]] = None,
+                 store=None, max_keys: int = 10000, clock: Callable[[], float] = time.monotonic,
+                 client_address: Optional[Callable[[Any], Optional[str]]] = None,
+                 store_retry: float = 1.0, max_store_retry: float = 60.0):
+        """
+        Initialize the limiter.
+
+        Args:
+            client_policy: Budget every client spends request costs from
+            routes: Path prefix -> {'cost': units charged, 'per_minute'/'burst': optional own request limit}
+            store: Shared bucket store (None keeps buckets in memory)
+            max_keys: Buckets tracked in memory
+            clock: Monotonic time source for the in-memory buckets and store retries
+            client_address: Resolves a signed-out request's client address (default: the peer address)
+            store_retry: Seconds before the shared store is retried after its first failure
+            max_store_retry: Upper bound on the doubling retry delay while the store stays down
+        """
+        self.client_policy = client_policy
+        self.routes: Dict[str, Tuple[float, Optional[RateLimitPolicy]]] = {}
+        for prefix, spec in (routes or {}).items():
+            policy = RateLimitPolicy.per_minute(spec['per_minute'], spec.get('burst')) if spec.get('per_minute') else None
+            # A cost above the bucket size could never be paid
+            self.routes[prefix] = (min(float(spec.get('cost', 1)), client_policy.burst), policy)
+        # Longest prefix wins, so '/api/ai/status' may override '/api/ai/'
+        prefixes = sorted(self.routes, key=len, reverse=True)
+        self._route_re = re.compile('|'.join(re.escape(prefix) for prefix in prefixes)) if prefixes else None
+
+        longest_refill = max([client_policy.refill_seconds] + [
+            policy.refill_seconds for _, policy in self.routes.values() if policy
+        ])
+        self.memory = MemoryBucketStore(max_keys=max_keys, ttl=longest_refill, clock=clock)
+        self.store = store
+        self.clock = clock
+        self.client_address = client_address or (lambda request: request.remote)
+        self.store_retry = store_retry
+        self.max_store_retry = max_store_retry
+        self._store_backoff = store_retry
+        self._store_retry_at: Optional[float] = None  # Set while the store is down
+        self.allowed = 0
+        self.limited = 0
+        self.store_errors = 0
+
+    def route_for(self, path: str) -> Optional[str]:
+        """Get the configured route prefix a path falls under (None if it has none)."""
+        match = self._route_re.match(path) if self._route_re else None
+        return match.group(0) if match else None
+
+    async def check(self, client: str, path: str) -> float:
+        """
+        Charge a request from ``client`` to ``path``.
+
+        Returns:
+            0 if it may proceed, otherwise seconds until it could
+        """
+        route = self.route_for(path)
+        cost, route_policy = self.routes[route] if route else (1.0, None)
+        charges: List[Charge] = [(client, self.client_policy, cost)]
+        if route_policy:
+            # The route's own bucket counts requests
+            charges.append((f"{client}|{route}", route_policy, 1.0))
+
+        wait = await self._take(charges)
+
+        if wait > 0:
+            self.limited += 1
+        else:
+            self.allowed += 1
+        return wait
+
+    async def _take(self, charges: Sequence[Charge]) -> float:
+        """Charge the shared store, or this process's buckets while it is down."""
+        if self.store is None:
+            return await self.memory.take(charges)
+        if self._store_retry_at is not None and self.clock() < self._store_retry_at:
+            return await self.memory.take(charges)
+
+        try:
+            wait = await self.store.take(charges)
+        except Exception as e:
+            self.store_errors += 1
+            if self._store_retry_at is None:
+                logger.warning(f"Shared rate limit store failed, using local limits: {e}")
+            else:
+                self._store_backoff = min(self._store_backoff * 2, self.max_store_retry)
+            self._store_retry_at = self.clock() + self._store_backoff
+            return await self.memory.take(charges)
+
+        if self._store_retry_at is not None:
+            logger.info("Shared rate limit store recovered")
+            self._store_retry_at = None
+            self._store_backoff = self.store_retry
+        return wait
+
+    def middleware(self):
+        """aiohttp middleware limiting /api requests (install after authentication)."""
+        @web.middleware
+        async def rate_limit_middleware(request, handler):
+            if not request.path.startswith('/api'):
+                return await handler(request)
+            user_id = request.get('user_id')
+            client = f"user:{user_id}" if user_id is not None else f"addr:{self.client_address(request)}"
+            wait = await self.check(client, request.path)
+            if wait > 0:
+                retry_after = max(1, math.ceil(wait))
+                return web.json_response(
+                    {'error': 'Rate limit exceeded, please slow down', 'retry_after': retry_after},
+                    status=429, headers={'Retry-After': str(retry_after)}
+                )
+            return await handler(request)
+
+        return rate_limit_middleware
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'shared_store': type(self.store).__name__ if self.store is not None else None,
+            'tracked_buckets': len(self.memory),
+            'allowed': self.allowed,
+            'limited': self.limited,
+            'store_errors': self.store_errors,
+            'store_down': self._store_retry_at is not None,
+        }
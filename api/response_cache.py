@@ -0,0 +1,153 @@
+"""TTL response cache with strong ETags for polled read-only endpoints."""
+
+import asyncio
+import hashlib
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from aiohttp import web
+
+from utils.ttl_cache import TTLCache
+
+
+class CachedResponse:
+    """A rendered response body plus what is needed to replay it."""
+
+    __slots__ = ('version', 'body', 'content_type', 'charset', 'etag')
+
+    def __init__(self, version: Hashable, body: bytes, content_type: str, charset: Optional[str]):
+        self.version = version
+        self.body = body
+        self.content_type = content_type
+        self.charset = charset
+        self.etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header value against a strong ETag."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    return any(candidate.strip() == etag for candidate in if_none_match.split(','))
+
+
+class ResponseCache:
+    """Caches successful GET responses per route, user and query string.
+
+    Each cached route has its own TTL. Entries also record the ``version``
+    of the underlying state when they were rendered (e.g. the position book
+    version); an entry whose version no longer matches is recomputed, so
+    opening or closing a position shows up immediately instead of after the
+    TTL. Concurrent misses for the same key share one handler call, so the
+    handler runs at most once per key per TTL however many tabs are polling.
+
+    Every response from a cached route carries a strong ETag, and requests
+    whose If-None-Match matches get an empty 304.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_size: int = 5000,
+                 version: Callable[[], Hashable] = lambda: None):
+        """
+        Initialize the cache.
+
+        Args:
+            ttls: Seconds each route path stays cached
+            max_size: Entries kept per route before the least recently used is evicted
+            version: Returns the current state version; entries from other versions are stale
+        """
+        self.version = version
+        self._caches: Dict[str, TTLCache] = {
+            path: TTLCache(max_size=max_size, ttl=ttl) for path, ttl in ttls.items() if ttl > 0
+        }
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.not_modified = 0
+        self.stale = 0
+
+    def is_cached_route(self, path: str) -> bool:
+        return path in self._caches
+
+    @staticmethod
+    def cache_key(request: web.Request) -> Hashable:
+        """Cache key: user id plus the sorted query string."""
+        return request.get('user_id'), tuple(sorted(request.query.items()))
+
+    def invalidate(self):
+        """Drop every cached response."""
+        for cache in self._caches.values():
+            cache.clear()
+
+    async def get_or_render(self, request: web.Request, handler) -> Any:
+        """Get the cached response for a request, rendering it through ``handler`` on a miss.
+
+        Returns a CachedResponse, or the handler's own response when it is
+        not cacheable (non-200, streamed or without a body).
+        """
+        cache = self._caches[request.path]
+        key = self.cache_key(request)
+        version = self.version()
+
+        entry = cache.get(key)
+        if entry is not None:
+            if entry.version == version:
+                return entry
+            cache.invalidate(key)
+            self.stale += 1
+
+        inflight_key = (request.path, key, version)
+        pending = self._inflight.get(inflight_key)
+        if pending is not None:
+            entry = await asyncio.shield(pending)
+            if entry is not None:
+                return entry
+            # The shared render was not cacheable; responses can't be sent twice
+            return await handler(request)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[inflight_key] = future
+        entry = None
+        try:
+            response = await handler(request)
+            if (response.status == 200 and isinstance(response, web.Response)
+                    and isinstance(response.body, bytes)):
+                entry = CachedResponse(version, response.body, response.content_type, response.charset)
+                cache.set(key, entry)
+                return entry
+            return response
+        finally:
+            future.set_result(entry)
+            del self._inflight[inflight_key]
+
+    def build_response(self, request: web.Request, entry: CachedResponse) -> web.Response:
+        """Turn a cached entry into a 200 or, when the client has it already, a 304."""
+        headers = {'ETag': entry.etag, 'Cache-Control': 'private, no-cache'}
+        if etag_matches(request.headers.get('If-None-Match', ''), entry.etag):
+            self.not_modified += 1
+            return web.Response(status=304, headers=headers)
+        return web.Response(body=entry.body, content_type=entry.content_type,
+                            charset=entry.charset, headers=headers)
+
+    def middleware(self):
+        """Build the aiohttp middleware (must run after authentication sets user_id)."""
+        @web.middleware
+        async def response_cache_middleware(request, handler):
+            if request.method == 'GET' and self.is_cached_route(request.path):
+                result = await self.get_or_render(request, handler)
+                if isinstance(result, CachedResponse):
+                    return self.build_response(request, result)
+                return result
+
+            response = await handler(request)
+            if request.method not in ('GET', 'HEAD') and request.path.startswith('/api/') and response.status < 400:
+                # Bot controls, settings and test trades can change anything the cached routes show
+                self.invalidate()
+            return response
+
+        return response_cache_middleware
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-route hit rates plus 304 and stale-version counts."""
+        return {
+            'routes': {path: cache.get_stats() for path, cache in self._caches.items()},
+            'not_modified': self.not_modified,
+            'stale_versions': self.stale,
+        }
@@ -1,21 +1,32 @@
 """REST API server for trading bot control and monitoring."""
 
 import logging
-import csv
-import io
-import json
+import math
+import os
 from datetime import datetime
 from typing import Optional, Dict
-from collections import defaultdict
 from aiohttp import web
 # CORS is handled manually via middleware to avoid route wrapping conflicts
 # from aiohttp_cors import setup as cors_setup, ResourceOptions
 from config import get_config
 from auth.auth_manager import AuthManager
+from utils.bounded_executor import ExecutorBusy
 from database.db_manager import DatabaseManager
+from monitoring.portfolio_analytics import PortfolioAnalytics
+from api.trade_export import EXPORT_FORMATS, export_filename, iter_trade_pages, parquet_available, write_trade_export
+from api.response_cache import ResponseCache
+from api.static_assets import StaticAssetStore
+from api.chart_data import ChartDataService, parse_chart_time
+from api.client_address import TrustedProxies
+from api.rate_limit import RateLimitPolicy, RedisBucketStore, RequestRateLimiter
+from api.route_policy import ROUTE_API, ROUTE_PUBLIC, ROUTE_STATIC, classify_route
+from utils.broadcaster import Broadcaster, EVENT_TOPICS, encode_event
+from utils.equity_curve import coerce_equity_curve
 
 logger = logging.getLogger(__name__)
 
+STATIC_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'static')
+
 
 class TradingBotAPI:
     """REST API server for trading bot."""
@@ -25,8 +36,32 @@ class TradingBotAPI:
         self.bot = bot_instance
         self.db_manager = db_manager
         self.auth_manager = AuthManager(self.config)
+        self.trusted_proxies = TrustedProxies(self.config.TRUSTED_PROXIES)
         self.app = web.Application()
+        self.response_cache: Optional[ResponseCache] = None
+        self.rate_limiter: Optional[RequestRateLimiter] = None
+        self.portfolio_analytics = PortfolioAnalytics(
+            db_manager,
+            max_users=self.config.PORTFOLIO_ANALYTICS_CACHE_USERS,
+            ttl=self.config.PORTFOLIO_ANALYTICS_CACHE_TTL_SECONDS,
+            history_points=self.config.PORTFOLIO_HISTORY_POINTS
+        ) if db_manager else None
+        self.chart_data = ChartDataService(
+            bot_instance,
+            max_entries=self.config.CHART_CACHE_SIZE,
+            fetch_ttl=self.config.CHART_CACHE_TTL_SECONDS
+        ) if bot_instance else None
+        self.static_assets = StaticAssetStore(STATIC_ROOT, gzip_level=self.config.STATIC_GZIP_LEVEL)
+        if os.path.isdir(STATIC_ROOT):
+            self.static_assets.load()
+        # Live events come from the bot; api-only mode still streams log lines
+        self.broadcaster = getattr(bot_instance, 'events', None) or Broadcaster(
+            max_queue=self.config.EVENT_STREAM_QUEUE_SIZE,
+            max_dropped=self.config.EVENT_STREAM_MAX_DROPPED
+        )
         self._setup_middleware()  # Setup middleware first
+        self._setup_rate_limit()  # Runs after auth so limits are per user
+        self._setup_response_cache()  # Runs after auth so responses are cached per user
         self._setup_routes()  # Setup all routes
         self._setup_cors()  # Setup CORS middleware (doesn't wrap routes)
         self._setup_static_blocker()  # Static blocker last
@@ -43,82 +78,71 @@ class TradingBotAPI:
                 sys.stderr.flush()
                 logger.info(f"🔵🔵🔵 MIDDLEWARE: POST to /api/backtest/run - Path: {request.path}")
             
-            # Public routes that don't require authentication
-            public_routes = [
-                '/api/auth/signup',
-                '/api/auth/signin',
-                '/api/status',  # Status endpoint for health checks
-                '/api/runtime',  # Runtime info endpoint
-                '/api/ai/status',  # AI status endpoint (public for diagnostics)
-                '/api/test/',   # All test endpoints (trading-health, force-trade, etc.)
-                '/landing',
-                '/signup',
-                '/signin',
-                '/test-runner',
-                '/favicon.ico'
-            ]
-            
-            # Allow static files and favicon (must be before other checks)
-            if request.path.startswith('/static') or request.path == '/favicon.ico':
-                is_public = True
+            route = classify_route(request.path)
+            if route == ROUTE_STATIC or route == ROUTE_PUBLIC:
                 return await handler(request)
             
-            # Check if route is public
-            is_public = any(request.path.startswith(route) for route in public_routes)
+            # Check for authentication token
+            auth_header = request.headers.get('Authorization', '')
+            token = self.auth_manager.extract_token_from_header(auth_header)
             
-            # Root path - check if authenticated
-            if request.path == '/':
-                # Try to get token
-                auth_header = request.headers.get('Authorization', '')
-                token = self.auth_manager.extract_token_from_header(auth_header)
-                if not token:
-                    token = request.cookies.get('auth_token') or request.query.get('token')
-                
-                if token:
-                    payload = self.auth_manager.verify_token(token)
-                    if payload:
-                        # User is authenticated, allow access to dashboard
-                        request['user_id'] = payload['user_id']
-                        request['user_email'] = payload['email']
-                        is_public = True  # Don't block, but we have user info
-                    else:
-                        # Invalid token, redirect to landing
-                        return web.Response(status=302, headers={'Location': '/landing'})
-                else:
-                    # No token, redirect to landing
-                    return web.Response(status=302, headers={'Location': '/landing'})
-                is_public = True
+            # Try to get token from cookie or query param (for browser requests)
+            if not token:
+                token = request.cookies.get('auth_token') or request.query.get('token')
             
-            if not is_public:
-                # Check for authentication token
-                auth_header = request.headers.get('Authorization', '')
-                token = self.auth_manager.extract_token_from_header(auth_header)
-                
-                # Try to get token from cookie or query param (for browser requests)
-                if not token:
-                    token = request.cookies.get('auth_token') or request.query.get('token')
-                
+            payload = self.auth_manager.verify_token(token) if token else None
+            if not payload:
+                # Dashboard pages (and the root) redirect to landing
+                if route != ROUTE_API:
+                    return web.Response(status=302, headers={'Location': '/landing'})
                 if not token:
-                    # Check if it's a dashboard route - redirect to landing
-                    if request.path.startswith('/') and not request.path.startswith('/api'):
-                        return web.Response(status=302, headers={'Location': '/landing'})
                     return web.json_response({'error': 'Authentication required'}, status=401)
-                
-                # Verify token
-                payload = self.auth_manager.verify_token(token)
-                if not payload:
-                    if request.path.startswith('/') and not request.path.startswith('/api'):
-                        return web.Response(status=302, headers={'Location': '/landing'})
-                    return web.json_response({'error': 'Invalid or expired token'}, status=401)
-                
-                # Store user info in request
-                request['user_id'] = payload['user_id']
-                request['user_email'] = payload['email']
+                return web.json_response({'error': 'Invalid or expired token'}, status=401)
+            
+            # Store user info in request
+            request['user_id'] = payload['user_id']
+            request['user_email'] = payload['email']
             
             return await handler(request)
         
         self.app.middlewares.append(auth_middleware)
     
+    def _setup_rate_limit(self):
+        """Rate limit /api requests per user and route (see RATE_LIMIT_*)."""
+        if not getattr(self.config, 'RATE_LIMIT_ENABLED', False):
+            return
+        store = None
+        if self.config.RATE_LIMIT_REDIS_URL:
+            try:
+                store = RedisBucketStore(self.config.RATE_LIMIT_REDIS_URL)
+            except Exception as e:
+                logger.warning(f"Rate limits stay per process: {e}")
+        self.rate_limiter = RequestRateLimiter(
+            RateLimitPolicy.per_minute(self.config.RATE_LIMIT_PER_MINUTE, self.config.RATE_LIMIT_BURST),
+            self.config.RATE_LIMIT_ROUTES,
+            store=store,
+            max_keys=self.config.RATE_LIMIT_MAX_KEYS,
+            client_address=self.trusted_proxies.client_address
+        )
+        self.app.middlewares.append(self.rate_limiter.middleware())
+    
+    def _setup_response_cache(self):
+        """Cache responses of the polled dashboard endpoints (see RESPONSE_CACHE_TTLS)."""
+        if not getattr(self.config, 'RESPONSE_CACHE_ENABLED', False):
+            return
+        self.response_cache = ResponseCache(
+            self.config.RESPONSE_CACHE_TTLS,
+            max_size=self.config.RESPONSE_CACHE_MAX_SIZE,
+            version=self._response_cache_version
+        )
+        self.app.middlewares.append(self.response_cache.middleware())
+    
+    def _response_cache_version(self):
+        """State version cached responses are tied to: opening or closing a position, or a bot status change, makes them stale."""
+        if not self.bot:
+            return None
+        return self.bot.positions.version, self.bot.status
+    
     def _setup_static_blocker(self):
         """Block requests for non-existent hashed CSS/JS files."""
         @web.middleware
@@ -192,12 +216,8 @@ class TradingBotAPI:
         self.app.router.add_get('/learn/strategy', self.serve_strategy_guide)
         self.app.router.add_get('/journal', self.serve_journal)
         
-        # Static files (if needed for additional assets)
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        static_path = os.path.join(project_root, 'static')
-        if os.path.exists(static_path):
-            self.app.router.add_static('/static', path=static_path, name='static')
+        # Static files: fingerprinted, precompressed and served from memory
+        self.app.router.add_get('/static/{name:.+}', self.serve_static, name='static')
         
         # PWA routes
         self.app.router.add_get('/manifest.json', self.serve_manifest)
@@ -228,6 +248,7 @@ class TradingBotAPI:
         # Advanced charting endpoints
         self.app.router.add_get('/api/charts/candles', self.get_chart_candles)
         self.app.router.add_get('/api/charts/indicators', self.get_chart_indicators)
+        self.app.router.add_get('/api/charts/series', self.get_chart_series)
         
         # Portfolio analytics endpoints
         self.app.router.add_get('/api/portfolio/analytics', self.get_portfolio_analytics)
@@ -257,6 +278,7 @@ class TradingBotAPI:
         
         # Logs endpoints
         self.app.router.add_get('/api/logs', self.get_logs)
+        self.app.router.add_get('/api/stream', self.stream_events)
         self.app.router.add_get('/api/logs/download', self.download_logs)
         
         # Trade export endpoints
@@ -290,6 +312,7 @@ class TradingBotAPI:
 
         # Diagnostics (helps confirm whether deployment is API-only or full-bot)
         self.app.router.add_get('/api/runtime', self.get_runtime_info)
+        self.app.router.add_get('/api/metrics/queries', self.get_query_metrics)
         self.app.router.add_get('/api/ai/status', self.ai_status)
         self.app.router.add_get('/api/test/openai-ai', self.test_openai_ai)  # Comprehensive OpenAI AI diagnostic
         logger.info("✅ Registered /api/test/openai-ai diagnostic endpoint")
@@ -318,37 +341,30 @@ class TradingBotAPI:
     
     async def serve_dashboard(self, request):
         """Serve the dashboard HTML page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        dashboard_path = os.path.join(project_root, 'static', 'dashboard.html')
-        
         # Fallback to index.html if dashboard.html doesn't exist
-        if not os.path.exists(dashboard_path):
-            dashboard_path = os.path.join(project_root, 'static', 'index.html')
-        
-        try:
-            if os.path.exists(dashboard_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(dashboard_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.error(f"Dashboard not found at: {dashboard_path} or {os.path.join(project_root, 'static', 'index.html')}")
-                return web.Response(
-                    text=f'Dashboard not found. Please ensure static/dashboard.html or static/index.html exists.',
-                    status=404
-                )
-        except Exception as e:
-            logger.error(f"Error serving dashboard: {e}", exc_info=True)
-            return web.Response(text=f'Error loading dashboard: {str(e)}', status=500)
+        asset = self.static_assets.get('dashboard.html') or self.static_assets.get('index.html')
+        if asset is None:
+            logger.error(f"Dashboard not found at: {os.path.join(STATIC_ROOT, 'dashboard.html')} or {os.path.join(STATIC_ROOT, 'index.html')}")
+            return web.Response(
+                text=f'Dashboard not found. Please ensure static/dashboard.html or static/index.html exists.',
+                status=404
+            )
+        return self.static_assets.response(request, asset)
+    
+    async def serve_static(self, request):
+        """Serve a static asset from memory (fingerprinted URLs are cached as immutable)."""
+        asset, immutable = self.static_assets.lookup(request.path)
+        if asset is None:
+            raise web.HTTPNotFound()
+        return self.static_assets.response(request, asset, immutable)
+    
+    def _serve_page(self, request, name: str, label: str) -> web.Response:
+        """Serve an HTML page from the static asset store (revalidated via ETag on every load)."""
+        asset = self.static_assets.get(name)
+        if asset is None:
+            logger.error(f"{label} not found at: {os.path.join(STATIC_ROOT, name)}")
+            return web.Response(text=f'{label} not found', status=404)
+        return self.static_assets.response(request, asset)
     
     async def serve_market_conditions(self, request):
         """Serve market conditions page (same as dashboard with routing)."""
@@ -438,12 +454,47 @@ class TradingBotAPI:
                 'has_coinbase_api_key': bool(getattr(cfg, 'COINBASE_API_KEY', '')),
                 'api_host': getattr(cfg, 'API_HOST', None),
                 'api_port': getattr(cfg, 'API_PORT', None),
+                'db_write_queue': self.db_manager.get_write_queue_stats() if self.db_manager else None,
+                'user_cache': self.db_manager.get_user_cache_stats() if self.db_manager else None,
+                'response_cache': self.response_cache.get_stats() if self.response_cache else None,
+                'rate_limit': self.rate_limiter.get_stats() if self.rate_limiter else None,
+                'auth_token_cache': self.auth_manager.get_token_cache_stats(),
+                'password_hashing': self.auth_manager.get_password_stats(),
+                'static_assets': self.static_assets.get_stats(),
+                'portfolio_analytics': self.portfolio_analytics.get_stats() if self.portfolio_analytics else None,
+                'chart_data': self.chart_data.get_stats() if self.chart_data else None,
+                'event_stream': self.broadcaster.get_stats(),
                 'timestamp': datetime.utcnow().isoformat()
             })
         except Exception as e:
             logger.error(f"Error getting runtime info: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
+    async def get_query_metrics(self, request):
+        """Get per-query call counts, latency histograms and slow-query plans.
+        
+        Query params: ``limit`` (statements returned, default 50) and ``sort``
+        (total_ms, calls, avg_ms, max_ms or slow_calls).
+        """
+        if not self.db_manager:
+            return web.json_response({'error': 'Database not initialized'}, status=500)
+        
+        try:
+            limit = min(int(request.query.get('limit', 50)), 500)
+            sort = request.query.get('sort', 'total_ms')
+            if sort not in ('total_ms', 'calls', 'avg_ms', 'max_ms', 'slow_calls'):
+                return web.json_response({'error': f'Invalid sort: {sort}'}, status=400)
+            
+            stats = self.db_manager.get_query_stats(limit, sort)
+            if stats is None:
+                return web.json_response({'error': 'Query stats are disabled (DB_QUERY_STATS=false)'}, status=404)
+            return web.json_response(stats)
+        except ValueError:
+            return web.json_response({'error': 'Invalid limit'}, status=400)
+        except Exception as e:
+            logger.error(f"Error getting query metrics: {e}", exc_info=True)
+            return web.json_response({'error': str(e)}, status=500)
+    
     async def ai_status(self, request):
         """Get AI configuration status for diagnostics."""
         try:
@@ -682,13 +733,25 @@ class TradingBotAPI:
             return web.json_response({'error': str(e)}, status=500)
     
     async def get_trades(self, request):
-        """Get recent trade history."""
+        """Get recent trade history.
+        
+        Supports keyset pagination: pass the returned ``next_cursor`` as
+        ``cursor`` to fetch the next (older) page.
+        """
         if not self.bot:
             return web.json_response({'error': 'Bot not initialized'}, status=500)
         
         try:
-            limit = int(request.query.get('limit', 50))
-            trades = await self.bot.db.get_recent_trades(limit)
+            limit = min(int(request.query.get('limit', 50)), 1000)
+            before = None
+            if request.query.get('cursor'):
+                try:
+                    before = self.bot.db.decode_trade_cursor(request.query['cursor'])
+                except ValueError:
+                    return web.json_response({'error': 'Invalid cursor'}, status=400)
+            
+            trades = await self.bot.db.get_recent_trades(limit, before=before)
+            next_cursor = self.bot.db.encode_trade_cursor(trades[-1]) if len(trades) == limit else None
             
             # Format trades for JSON response
             formatted_trades = []
@@ -707,21 +770,32 @@ class TradingBotAPI:
                     formatted_trade['notes'] = ''
                 formatted_trades.append(formatted_trade)
             
-            return web.json_response({'trades': formatted_trades})
+            return web.json_response({'trades': formatted_trades, 'next_cursor': next_cursor})
         except Exception as e:
             logger.error(f"Error getting trades: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
     async def export_trades(self, request):
-        """Export trades to CSV or JSON format."""
+        """Export trades as a streamed CSV, JSON or Parquet download.
+        
+        Rows are fetched in keyset pages between writes and encoded in chunks,
+        so memory use does not grow with the number of trades and no
+        connection is held while the client downloads. Pass ``gzip=true``
+        to gzip CSV/JSON output (Parquet is already compressed).
+        """
         if not self.bot:
             return web.json_response({'error': 'Bot not initialized'}, status=500)
         
+        response = None
+        trades = None
         try:
-            # Get format (csv or json)
+            # Get format (csv, json or parquet)
             export_format = request.query.get('format', 'csv').lower()
-            if export_format not in ['csv', 'json']:
-                return web.json_response({'error': 'Invalid format. Use csv or json'}, status=400)
+            if export_format not in EXPORT_FORMATS:
+                return web.json_response({'error': 'Invalid format. Use csv, json or parquet'}, status=400)
+            if export_format == 'parquet' and not parquet_available():
+                return web.json_response({'error': 'Parquet export requires pyarrow. Install with: pip install pyarrow'}, status=400)
+            compress = export_format != 'parquet' and request.query.get('gzip', '').lower() in ('1', 'true', 'yes')
             
             # Parse date range if provided
             start_date = None
@@ -740,83 +814,36 @@ class TradingBotAPI:
                 except ValueError:
                     return web.json_response({'error': 'Invalid end_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)'}, status=400)
             
-            # Fetch trades with date range
-            trades = await self.bot.db.get_trades_with_date_range(start_date, end_date, user_id)
-            
-            if not trades:
+            # Peek at the first trade so an empty export can still return 404
+            trades = iter_trade_pages(self.bot.db, start_date, end_date, user_id)
+            try:
+                first_trade = await trades.__anext__()
+            except StopAsyncIteration:
                 return web.json_response({'error': 'No trades found for the specified criteria'}, status=404)
             
-            # Format trades (convert datetime objects)
-            formatted_trades = []
-            for trade in trades:
-                formatted_trade = dict(trade)
-                for key in ['entry_time', 'exit_time', 'created_at']:
-                    if key in formatted_trade and formatted_trade[key]:
-                        if hasattr(formatted_trade[key], 'isoformat'):
-                            formatted_trade[key] = formatted_trade[key].isoformat()
-                formatted_trades.append(formatted_trade)
-            
-            # Generate export file
-            if export_format == 'csv':
-                # Create CSV
-                output = io.StringIO()
-                if formatted_trades:
-                    writer = csv.DictWriter(output, fieldnames=formatted_trades[0].keys())
-                    writer.writeheader()
-                    for trade in formatted_trades:
-                        writer.writerow(trade)
-                
-                csv_content = output.getvalue()
-                output.close()
-                
-                # Create filename with date range
-                filename = 'trades_export.csv'
-                if start_date or end_date:
-                    date_str = ''
-                    if start_date:
-                        date_str += start_date.strftime('%Y%m%d')
-                    date_str += '_to_'
-                    if end_date:
-                        date_str += end_date.strftime('%Y%m%d')
-                    else:
-                        date_str += 'now'
-                    filename = f'trades_export_{date_str}.csv'
-                
-                return web.Response(
-                    text=csv_content,
-                    headers={
-                        'Content-Type': 'text/csv',
-                        'Content-Disposition': f'attachment; filename="{filename}"'
-                    }
-                )
+            content_type = 'application/gzip' if compress else EXPORT_FORMATS[export_format][0]
+            filename = export_filename(export_format, start_date, end_date, compressed=compress)
+            response = web.StreamResponse(headers={
+                'Content-Type': content_type,
+                'Content-Disposition': f'attachment; filename="{filename}"'
+            })
+            response.enable_chunked_encoding()
+            await response.prepare(request)
             
-            else:  # JSON
-                json_content = json.dumps(formatted_trades, indent=2)
-                
-                # Create filename with date range
-                filename = 'trades_export.json'
-                if start_date or end_date:
-                    date_str = ''
-                    if start_date:
-                        date_str += start_date.strftime('%Y%m%d')
-                    date_str += '_to_'
-                    if end_date:
-                        date_str += end_date.strftime('%Y%m%d')
-                    else:
-                        date_str += 'now'
-                    filename = f'trades_export_{date_str}.json'
-                
-                return web.Response(
-                    text=json_content,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Content-Disposition': f'attachment; filename="{filename}"'
-                    }
-                )
+            count = await write_trade_export(response, first_trade, trades, export_format, compress)
+            await response.write_eof()
+            logger.info(f"Exported {count} trades as {filename}")
+            return response
                 
         except Exception as e:
             logger.error(f"Error exporting trades: {e}", exc_info=True)
+            if response is not None and response.prepared:
+                # Headers are already sent; the client sees a truncated download
+                return response
             return web.json_response({'error': str(e)}, status=500)
+        finally:
+            if trades is not None:
+                await trades.aclose()
     
     async def get_performance(self, request):
         """Get performance metrics."""
@@ -886,189 +913,81 @@ class TradingBotAPI:
             user_id = request.get('user_id')
             balance = await self.bot.exchange.get_account_balance()
             
-            # Get all trades
-            all_trades = await self.db_manager.get_trades_with_date_range(user_id=user_id)
-            
-            # Filter closed trades only
-            closed_trades = [t for t in all_trades if t.get('exit_price') is not None and t.get('pnl') is not None]
+            # Per-pair stats, allocation, streaks and realized history, cached until a trade closes
+            trade_analytics = await self.portfolio_analytics.get(user_id)
+            curve = trade_analytics['realized_pnl_curve']
+            initial_balance = float(self.bot.initial_balance)
             
-            # Calculate portfolio analytics
             analytics = {
                 'portfolio_value': float(balance),
-                'initial_balance': float(self.bot.initial_balance),
+                'initial_balance': initial_balance,
                 'total_pnl': float(balance - self.bot.initial_balance),
                 'roi_pct': float(((balance - self.bot.initial_balance) / self.bot.initial_balance) * 100) if self.bot.initial_balance > 0 else 0.0,
-                
-                # Asset allocation (by trading pair)
-                'asset_allocation': {},
-                
-                # P&L by trading pair
-                'pnl_by_pair': {},
-                
-                # Win/loss streaks
-                'win_streak': 0,
-                'loss_streak': 0,
-                'current_streak': 0,
-                'current_streak_type': None,
-                
-                # Trade statistics by pair
-                'trades_by_pair': {},
-                
-                # Portfolio value over time (from equity curve)
-                'portfolio_history': []
+                'asset_allocation': trade_analytics['asset_allocation'],
+                'pnl_by_pair': trade_analytics['pnl_by_pair'],
+                'win_streak': trade_analytics['win_streak'],
+                'loss_streak': trade_analytics['loss_streak'],
+                'current_streak': trade_analytics['current_streak'],
+                'current_streak_type': trade_analytics['current_streak_type'],
+                'trades_by_pair': trade_analytics['trades_by_pair'],
+                # Balance after each closed trade (initial balance plus realized P&L)
+                'portfolio_history': [
+                    {'timestamp': point['timestamp'], 'balance': initial_balance + point['balance']}
+                    for point in curve.to_points()
+                ] if curve is not None else []
             }
             
-            # Group trades by pair
-            trades_by_pair = defaultdict(list)
-            for trade in closed_trades:
-                pair = trade.get('pair', 'UNKNOWN')
-                trades_by_pair[pair].append(trade)
-            
-            # Calculate P&L and statistics by pair
-            total_volume_by_pair = defaultdict(float)
-            for pair, trades in trades_by_pair.items():
-                pair_pnl = sum(float(t.get('pnl', 0)) for t in trades)
-                pair_trades = len(trades)
-                winning = sum(1 for t in trades if float(t.get('pnl', 0)) > 0)
-                losing = pair_trades - winning
-                win_rate = (winning / pair_trades * 100) if pair_trades > 0 else 0.0
-                total_volume = sum(float(t.get('size', 0)) * float(t.get('entry_price', 0)) for t in trades)
-                
-                analytics['pnl_by_pair'][pair] = {
-                    'total_pnl': float(pair_pnl),
-                    'total_trades': pair_trades,
-                    'winning_trades': winning,
-                    'losing_trades': losing,
-                    'win_rate': float(win_rate),
-                    'total_volume': float(total_volume)
-                }
-                
-                total_volume_by_pair[pair] = float(total_volume)
-                analytics['trades_by_pair'][pair] = pair_trades
-            
-            # Calculate asset allocation (based on trading volume)
-            total_volume_all = sum(total_volume_by_pair.values())
-            if total_volume_all > 0:
-                for pair, volume in total_volume_by_pair.items():
-                    analytics['asset_allocation'][pair] = {
-                        'percentage': float((volume / total_volume_all) * 100),
-                        'volume': float(volume)
-                    }
-            
-            # Calculate win/loss streaks
-            if closed_trades:
-                # Sort by entry time
-                sorted_trades = sorted(closed_trades, key=lambda x: x.get('entry_time', datetime.min))
-                
-                current_streak = 0
-                current_streak_type = None
-                max_win_streak = 0
-                max_loss_streak = 0
-                
-                for trade in sorted_trades:
-                    pnl = float(trade.get('pnl', 0))
-                    is_win = pnl > 0
-                    
-                    if current_streak_type is None:
-                        current_streak_type = 'win' if is_win else 'loss'
-                        current_streak = 1
-                    elif (current_streak_type == 'win' and is_win) or (current_streak_type == 'loss' and not is_win):
-                        current_streak += 1
-                    else:
-                        # Streak broken
-                        if current_streak_type == 'win':
-                            max_win_streak = max(max_win_streak, current_streak)
-                        else:
-                            max_loss_streak = max(max_loss_streak, current_streak)
-                        current_streak_type = 'win' if is_win else 'loss'
-                        current_streak = 1
-                
-                # Check final streak
-                if current_streak_type == 'win':
-                    max_win_streak = max(max_win_streak, current_streak)
-                else:
-                    max_loss_streak = max(max_loss_streak, current_streak)
-                
-                analytics['win_streak'] = max_win_streak
-                analytics['loss_streak'] = max_loss_streak
-                analytics['current_streak'] = current_streak
-                analytics['current_streak_type'] = current_streak_type
-            
-            # Get portfolio history from equity curve
-            equity_curve = self.bot.performance_tracker.get_equity_curve(limit=100)
-            analytics['portfolio_history'] = [
-                {
-                    'timestamp': str(point.get('timestamp', '')),
-                    'balance': float(point.get('balance', self.bot.initial_balance))
-                }
-                for point in equity_curve
-            ]
-            
             return web.json_response(analytics)
         except Exception as e:
             logger.error(f"Error getting portfolio analytics: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
     async def get_tax_report(self, request):
-        """Generate tax report with FIFO/LIFO calculations."""
+        """Generate a tax report from the lots matched (FIFO, LIFO or HIFO) as trades closed."""
         if not self.bot or not self.db_manager:
             return web.json_response({'error': 'Bot or database not initialized'}, status=500)
         
         try:
-            from datetime import datetime, timedelta
+            from datetime import datetime
             user_id = request.get('user_id')
-            method = request.query.get('method', 'FIFO')  # FIFO or LIFO
+            method = request.query.get('method', 'FIFO').upper()
             year = request.query.get('year', str(datetime.utcnow().year))
+            if method not in self.db_manager.tax_lots.methods:
+                return web.json_response({
+                    'error': f"Unknown method '{method}'; use one of {', '.join(self.db_manager.tax_lots.methods)}"
+                }, status=400)
             
-            # Get all closed trades for the year
             start_date = datetime(int(year), 1, 1)
             end_date = datetime(int(year), 12, 31, 23, 59, 59)
-            trades = await self.db_manager.get_trades_with_date_range(
-                start_date=start_date,
-                end_date=end_date,
-                user_id=user_id
-            )
             
-            # Filter closed trades only
-            closed_trades = [t for t in trades if t.get('exit_price') is not None and t.get('exit_time') is not None]
+            # Lots realized this year, precomputed as trades closed
+            await self.db_manager.flush_writes()
+            lots = await self.db_manager.get_realized_lots(method, start_date, end_date, user_id=user_id)
             
-            # Calculate realized gains/losses
             realized_gains = []
             realized_losses = []
-            
-            for trade in closed_trades:
-                pnl = float(trade.get('pnl', 0))
-                entry_time = trade.get('entry_time')
-                exit_time = trade.get('exit_time')
-                pair = trade.get('pair', '')
-                size = float(trade.get('size', 0))
-                entry_price = float(trade.get('entry_price', 0))
-                exit_price = float(trade.get('exit_price', 0))
-                
-                if pnl > 0:
-                    realized_gains.append({
-                        'pair': pair,
-                        'entry_time': str(entry_time) if entry_time else '',
-                        'exit_time': str(exit_time) if exit_time else '',
-                        'size': float(size),
-                        'entry_price': float(entry_price),
-                        'exit_price': float(exit_price),
-                        'gain': float(pnl),
-                        'cost_basis': float(size * entry_price),
-                        'proceeds': float(size * exit_price)
-                    })
+            term_totals = {'short': 0.0, 'long': 0.0}
+            for lot in lots:
+                gain = float(lot['gain'])
+                term_totals[lot['term']] += gain
+                entry = {
+                    'pair': lot['pair'],
+                    'direction': lot['direction'],
+                    'entry_time': str(lot['opened_at']),
+                    'exit_time': str(lot['closed_at']),
+                    'size': float(lot['quantity']),
+                    'entry_price': float(lot['open_price']),
+                    'exit_price': float(lot['close_price']),
+                    'cost_basis': float(lot['cost_basis']),
+                    'proceeds': float(lot['proceeds']),
+                    'term': lot['term']
+                }
+                if gain > 0:
+                    entry['gain'] = gain
+                    realized_gains.append(entry)
                 else:
-                    realized_losses.append({
-                        'pair': pair,
-                        'entry_time': str(entry_time) if entry_time else '',
-                        'exit_time': str(exit_time) if exit_time else '',
-                        'size': float(size),
-                        'entry_price': float(entry_price),
-                        'exit_price': float(exit_price),
-                        'loss': float(abs(pnl)),
-                        'cost_basis': float(size * entry_price),
-                        'proceeds': float(size * exit_price)
-                    })
+                    entry['loss'] = abs(gain)
+                    realized_losses.append(entry)
             
             total_realized_gains = sum(g['gain'] for g in realized_gains)
             total_realized_losses = sum(l['loss'] for l in realized_losses)
@@ -1077,7 +996,7 @@ class TradingBotAPI:
             tax_report = {
                 'year': year,
                 'method': method,
-                'total_trades': len(closed_trades),
+                'total_trades': len({lot['close_trade_id'] for lot in lots}),
                 'realized_gains': {
                     'count': len(realized_gains),
                     'total': float(total_realized_gains),
@@ -1089,6 +1008,8 @@ class TradingBotAPI:
                     'trades': realized_losses
                 },
                 'net_realized': float(net_realized),
+                'short_term_net': term_totals['short'],
+                'long_term_net': term_totals['long'],
                 'generated_at': datetime.utcnow().isoformat()
             }
             
@@ -1188,181 +1109,46 @@ class TradingBotAPI:
             return web.json_response({'error': str(e)}, status=500)
     
     async def get_market_conditions(self, request):
-        """Get current market conditions and why trades aren't triggering."""
+        """Get current market conditions and why trades aren't triggering.
+        
+        Served from the snapshot the trading engine publishes each time it
+        evaluates signals; this never recomputes indicators or calls the exchange.
+        """
         if not self.bot:
             return web.json_response({'error': 'Bot not initialized'}, status=500)
         
         try:
+            snapshot = self.bot.market_snapshot
             conditions = {}
             
             for pair in self.bot.config.TRADING_PAIRS:
-                candles = self.bot.candle_cache.get(pair, [])
-                
-                if len(candles) < max(self.bot.config.EMA_PERIOD, self.bot.config.RSI_PERIOD, self.bot.config.VOLUME_PERIOD) + 1:
+                entry = snapshot.get(pair)
+                if entry is None:
                     conditions[pair] = {
-                        'status': 'insufficient_data',
-                        'message': f'Need at least {max(self.bot.config.EMA_PERIOD, self.bot.config.RSI_PERIOD, self.bot.config.VOLUME_PERIOD) + 1} candles, have {len(candles)}',
-                        'candles_count': len(candles),
-                        'required_candles': max(self.bot.config.EMA_PERIOD, self.bot.config.RSI_PERIOD, self.bot.config.VOLUME_PERIOD) + 1
+                        'status': 'pending',
+                        'message': 'Waiting for the trading engine to evaluate this pair'
                     }
                     continue
-                
-                # Get real-time price
-                market_data = await self.bot.exchange.get_market_data([pair])
-                real_time_price = market_data.get(pair, {}).get('price', 0) if market_data.get(pair) else 0
-                
-                # Update last candle with real-time price BEFORE calculating indicators
-                # This ensures EMA/RSI use the latest price data
-                if candles and real_time_price > 0:
-                    # Work with a copy to avoid modifying the cache directly
-                    candles = list(candles)  # Create a copy
-                    candles[-1] = candles[-1].copy()
-                    old_close = candles[-1].get('close', 0)
-                    candles[-1]['close'] = real_time_price
-                    # Update high/low if needed
-                    if real_time_price > candles[-1].get('high', 0):
-                        candles[-1]['high'] = real_time_price
-                    if real_time_price < candles[-1].get('low', float('inf')):
-                        candles[-1]['low'] = real_time_price
-                    
-                    # Log if there's a significant price difference (potential data issue)
-                    if abs(real_time_price - old_close) / old_close > 0.5:  # >50% difference
-                        logger.warning(f"⚠️ {pair}: Large price difference in cached candle - old_close=${old_close:.2f}, real_time=${real_time_price:.2f}. Candle cache may be stale.")
-                
-                # Calculate indicators with updated candle data
-                indicators = self.bot.strategy.calculate_indicators(candles)
-                if not indicators:
-                    conditions[pair] = {
-                        'status': 'error',
-                        'message': 'Failed to calculate indicators'
-                    }
+                if entry.get('status') != 'analyzing':
+                    conditions[pair] = entry
                     continue
                 
-                # Use real-time price if available, otherwise use last candle close
-                price = real_time_price if real_time_price > 0 else indicators['price']
-                ema = indicators['ema']
-                rsi = indicators['rsi']
-                volume_ratio = indicators['volume_ratio']
-                
-                # Validate EMA: if EMA is more than 30% away from current price, cache may be stale
-                # If stale, force refresh candle cache for this pair
-                if price > 0 and ema > 0:
-                    price_ema_ratio = abs(price - ema) / price
-                    if price_ema_ratio > 0.30:  # More than 30% difference suggests stale data
-                        logger.warning(f"⚠️ {pair}: EMA appears incorrect - Price=${price:.2f}, EMA=${ema:.2f} ({price_ema_ratio*100:.1f}% difference). Refreshing candle cache...")
-                        # Force refresh candle cache for this pair
-                        try:
-                            import asyncio
-                            from datetime import datetime, timedelta
-                            fresh_candles = await self.bot.exchange.get_candles(
-                                pair,
-                                granularity='ONE_MINUTE',
-                                start=datetime.utcnow() - timedelta(hours=24),
-                                end=datetime.utcnow()
-                            )
-                            if fresh_candles:
-                                self.bot.candle_cache[pair] = fresh_candles
-                                logger.info(f"✅ {pair}: Candle cache refreshed with {len(fresh_candles)} candles")
-                                # Recalculate indicators with fresh data
-                                indicators = self.bot.strategy.calculate_indicators(fresh_candles)
-                                if indicators:
-                                    old_ema = ema  # Save old EMA for logging
-                                    ema = indicators['ema']
-                                    rsi = indicators['rsi']
-                                    volume_ratio = indicators['volume_ratio']
-                                    logger.info(f"✅ {pair}: Recalculated EMA=${ema:.2f} (was ${old_ema:.2f}), should be closer to price=${price:.2f}")
-                        except Exception as refresh_error:
-                            logger.error(f"Failed to refresh candle cache for {pair}: {refresh_error}", exc_info=True)
-                
-                # Update indicators with real-time price
-                indicators['price'] = price
-                
-                # Check LONG conditions
-                long_price_ok = price > ema
-                long_rsi_ok = self.bot.config.RSI_LONG_MIN <= rsi <= self.bot.config.RSI_LONG_MAX
-                long_volume_ok = volume_ratio >= self.bot.config.VOLUME_MULTIPLIER
-                
-                if long_price_ok and long_rsi_ok and long_volume_ok:
-                    long_confidence = self.bot.strategy.calculate_confidence_score(indicators, 'LONG')
-                    long_confident = long_confidence >= self.bot.config.MIN_CONFIDENCE_SCORE
-                else:
-                    long_confidence = self.bot.strategy.calculate_confidence_score(indicators, 'LONG')
-                    long_confident = False
-                
-                # Check SHORT conditions
-                short_price_ok = price < ema
-                short_rsi_ok = self.bot.config.RSI_SHORT_MIN <= rsi <= self.bot.config.RSI_SHORT_MAX
-                short_volume_ok = volume_ratio >= self.bot.config.VOLUME_MULTIPLIER
-                
-                if short_price_ok and short_rsi_ok and short_volume_ok:
-                    short_confidence = self.bot.strategy.calculate_confidence_score(indicators, 'SHORT')
-                    short_confident = short_confidence >= self.bot.config.MIN_CONFIDENCE_SCORE
-                else:
-                    short_confidence = self.bot.strategy.calculate_confidence_score(indicators, 'SHORT')
-                    short_confident = False
-                
-                # Check if already has position
-                has_position = any(p['pair'] == pair for p in self.bot.positions)
-                
+                # Open positions change between evaluations, so they're applied per request
+                has_position = self.bot.positions.has_pair(pair)
+                blockers = list(entry['blockers'])
+                if has_position:
+                    blockers.insert(0, f'Already has position in {pair}')
                 conditions[pair] = {
-                    'status': 'analyzing',
-                    'indicators': {
-                        'price': price,
-                        'ema': ema,
-                        'rsi': rsi,
-                        'volume_ratio': volume_ratio,
-                        'volume_avg': indicators.get('volume_avg', 0),
-                        'current_volume': indicators.get('volume', 0)
-                    },
-                    'long_signal': {
-                        'conditions_met': long_price_ok and long_rsi_ok and long_volume_ok,
-                        'confidence': long_confidence,
-                        'meets_threshold': long_confident,
-                        'checks': {
-                            'price_above_ema': long_price_ok,
-                            'rsi_in_range': long_rsi_ok,
-                            'volume_sufficient': long_volume_ok
-                        },
-                        'rsi_range': f'{self.bot.config.RSI_LONG_MIN}-{self.bot.config.RSI_LONG_MAX}',
-                        'volume_required': f'{self.bot.config.VOLUME_MULTIPLIER}x average'
-                    },
-                    'short_signal': {
-                        'conditions_met': short_price_ok and short_rsi_ok and short_volume_ok,
-                        'confidence': short_confidence,
-                        'meets_threshold': short_confident,
-                        'checks': {
-                            'price_below_ema': short_price_ok,
-                            'rsi_in_range': short_rsi_ok,
-                            'volume_sufficient': short_volume_ok
-                        },
-                        'rsi_range': f'{self.bot.config.RSI_SHORT_MIN}-{self.bot.config.RSI_SHORT_MAX}',
-                        'volume_required': f'{self.bot.config.VOLUME_MULTIPLIER}x average'
-                    },
-                    'requirements': {
-                        'min_confidence': self.bot.config.MIN_CONFIDENCE_SCORE,
-                        'volume_multiplier': self.bot.config.VOLUME_MULTIPLIER
-                    },
-                    'blockers': [],
-                    'has_position': has_position
+                    **entry,
+                    'blockers': blockers,
+                    'has_position': has_position,
+                    'ready_to_trade': entry['ready_to_trade'] and not has_position
                 }
-                
-                # Identify blockers
-                blockers = []
-                if has_position:
-                    blockers.append(f'Already has position in {pair}')
-                if not long_confident and not short_confident:
-                    blockers.append('No valid signal meets confidence threshold')
-                if long_price_ok and long_rsi_ok and not long_volume_ok:
-                    blockers.append(f'Volume too low: {volume_ratio:.2f}x (need {self.bot.config.VOLUME_MULTIPLIER}x)')
-                if short_price_ok and short_rsi_ok and not short_volume_ok:
-                    blockers.append(f'Volume too low: {volume_ratio:.2f}x (need {self.bot.config.VOLUME_MULTIPLIER}x)')
-                
-                conditions[pair]['blockers'] = blockers
-                conditions[pair]['ready_to_trade'] = (long_confident or short_confident) and not has_position
             
             return web.json_response({
                 'bot_status': self.bot.status,
                 'bot_running': self.bot.status == 'running',
+                'evaluated_at': snapshot.evaluated_at.isoformat() if snapshot.evaluated_at else None,
                 'conditions': conditions,
                 'summary': {
                     'total_pairs': len(self.bot.config.TRADING_PAIRS),
@@ -1580,9 +1366,9 @@ class TradingBotAPI:
                 # If bot is running and pairs changed, reload trading pairs completely
                 if self.bot and trading_pairs_changed:
                     logger.info(f"✅ Trading pairs changed: {old_pairs} -> {new_pairs}")
-                    logger.info("Reloading trading pairs (WebSocket + candle data)...")
+                    logger.info("Reloading trading pairs (WebSocket subscriptions + candle data)...")
                     try:
-                        # Use the full reload method that updates WebSocket and candle data
+                        # Incremental reload: only added/removed pairs touch the feed and candle data
                         if hasattr(self.bot, 'reload_trading_pairs'):
                             await self.bot.reload_trading_pairs()
                         else:
@@ -1708,6 +1494,48 @@ class TradingBotAPI:
             logger.error(f"Error getting daily P&L: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
+    async def stream_events(self, request):
+        """Stream live events to the dashboard as server-sent events.
+        
+        ``?topics=`` selects a comma-separated subset of prices, positions,
+        fills, equity and logs (default: all). The current positions are sent
+        first so a (re)connecting client starts from a consistent state.
+        """
+        topics = [topic for topic in request.query.get('topics', '').split(',') if topic] or list(EVENT_TOPICS)
+        unknown = set(topics) - set(EVENT_TOPICS)
+        if unknown:
+            return web.json_response({'error': f"Unknown topics: {', '.join(sorted(unknown))}"}, status=400)
+        
+        if 'logs' in topics:
+            from utils.log_buffer import get_log_handler
+            get_log_handler().add_listener(self._publish_log)
+        
+        response = web.StreamResponse(headers={
+            'Content-Type': 'text/event-stream',
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Don't let proxies buffer the stream
+        })
+        await response.prepare(request)
+        
+        subscription = self.broadcaster.subscribe(topics)
+        heartbeat = self.config.EVENT_STREAM_HEARTBEAT_SECONDS
+        try:
+            await response.write(b'retry: 3000\n\n')
+            if 'positions' in topics and self.bot:
+                subscription.push(encode_event(0, 'positions', self.bot.positions.to_list()))
+            while not subscription.closed:
+                frames = await subscription.next_frames(timeout=heartbeat)
+                await response.write(b''.join(frames) if frames else b': keepalive\n\n')
+        except ConnectionResetError:
+            pass  # Client went away
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+        return response
+    
+    def _publish_log(self, log_entry: Dict):
+        """Log buffer listener that forwards log lines to streaming clients."""
+        self.broadcaster.publish('logs', log_entry)
+    
     async def get_logs(self, request):
         """Get system logs from in-memory buffer or log file."""
         try:
@@ -1942,84 +1770,15 @@ class TradingBotAPI:
 
     async def serve_landing(self, request):
         """Serve landing page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        landing_path = os.path.join(project_root, 'static', 'landing.html')
-        
-        try:
-            if os.path.exists(landing_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(landing_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.error(f"Landing page not found at: {landing_path}")
-                return web.Response(text='Landing page not found', status=404)
-        except Exception as e:
-            logger.error(f"Error serving landing page: {e}", exc_info=True)
-            return web.Response(text=f'Error loading landing page: {str(e)}', status=500)
+        return self._serve_page(request, 'landing.html', 'Landing page')
     
     async def serve_signup(self, request):
         """Serve signup page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        signup_path = os.path.join(project_root, 'static', 'signup.html')
-        
-        try:
-            if os.path.exists(signup_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(signup_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.error(f"Signup page not found at: {signup_path}")
-                return web.Response(text='Signup page not found', status=404)
-        except Exception as e:
-            logger.error(f"Error serving signup page: {e}", exc_info=True)
-            return web.Response(text=f'Error loading signup page: {str(e)}', status=500)
+        return self._serve_page(request, 'signup.html', 'Signup page')
     
     async def serve_signin(self, request):
         """Serve signin page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        signin_path = os.path.join(project_root, 'static', 'signin.html')
-        
-        try:
-            if os.path.exists(signin_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(signin_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.error(f"Signin page not found at: {signin_path}")
-                return web.Response(text='Signin page not found', status=404)
-        except Exception as e:
-            logger.error(f"Error serving signin page: {e}", exc_info=True)
-            return web.Response(text=f'Error loading signin page: {str(e)}', status=500)
+        return self._serve_page(request, 'signin.html', 'Signin page')
     
     async def serve_test_runner(self, request):
         """Serve test runner page."""
@@ -2034,59 +1793,15 @@ class TradingBotAPI:
     
     async def serve_settings(self, request):
         """Serve settings page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        settings_path = os.path.join(project_root, 'static', 'settings.html')
-        
-        try:
-            if os.path.exists(settings_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(settings_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.warning(f"Settings page not found at: {settings_path}, falling back to dashboard")
-                return await self.serve_dashboard(request)  # Fallback
-        except Exception as e:
-            logger.error(f"Error serving settings page: {e}", exc_info=True)
-            return await self.serve_dashboard(request)  # Fallback on error
+        if self.static_assets.get('settings.html') is None:
+            logger.warning(f"Settings page not found at: {os.path.join(STATIC_ROOT, 'settings.html')}, falling back to dashboard")
+            return await self.serve_dashboard(request)  # Fallback
+        return self._serve_page(request, 'settings.html', 'Settings page')
     
     async def serve_help(self, request):
         """Serve help page."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        help_path = os.path.join(project_root, 'static', 'help.html')
-        
-        try:
-            if os.path.exists(help_path):
-                # Read file content and serve as text to avoid FileResponse issues
-                with open(help_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                return web.Response(
-                    text=content,
-                    content_type='text/html',
-                    headers={
-                        'Cache-Control': 'no-cache, no-store, must-revalidate',
-                        'Pragma': 'no-cache',
-                        'Expires': '0'
-                    }
-                )
-            else:
-                logger.error(f"Help page not found at: {help_path}")
-                return web.Response(text='Help page not found', status=404)
-        except Exception as e:
-            logger.error(f"Error serving help page: {e}", exc_info=True)
-            return web.Response(text=f'Error loading help page: {str(e)}', status=500)
+        return self._serve_page(request, 'help.html', 'Help page')
     
-    # Authentication endpoints
     async def signup(self, request):
         """Handle user signup."""
         if not self.db_manager:
@@ -2109,13 +1824,18 @@ class TradingBotAPI:
             if len(password) < 8:
                 return web.json_response({'error': 'Password must be at least 8 characters'}, status=400)
             
+            limited = self._login_rate_limited(request, email)
+            if limited:
+                return limited
+            
             # Check if user already exists
             existing_user = await self.db_manager.get_user_by_email(email)
             if existing_user:
+                self.auth_manager.record_login_failure(self.trusted_proxies.client_address(request), email)
                 return web.json_response({'error': 'User with this email already exists'}, status=400)
             
             # Hash password
-            password_hash = self.auth_manager.hash_password(password)
+            password_hash = await self.auth_manager.hash_password_async(password)
             
             # Create user
             user_id = await self.db_manager.create_user(email, password_hash, full_name)
@@ -2141,6 +1861,10 @@ class TradingBotAPI:
             
             return response
             
+        except ExecutorBusy:
+            logger.warning("Signup rejected: password hashing queue is full")
+            return web.json_response({'error': 'Server busy, please try again shortly'},
+                                     status=503, headers={'Retry-After': '1'})
         except Exception as e:
             logger.error(f"Signup error: {e}", exc_info=True)
             return web.json_response({'error': 'Internal server error'}, status=500)
@@ -2162,18 +1886,26 @@ class TradingBotAPI:
             if not email or not password:
                 return web.json_response({'error': 'Email and password are required'}, status=400)
             
+            limited = self._login_rate_limited(request, email)
+            if limited:
+                return limited
+            
             # Get user
             user = await self.db_manager.get_user_by_email(email)
+            address = self.trusted_proxies.client_address(request)
             
             if not user:
+                self.auth_manager.record_login_failure(address, email)
                 return web.json_response({'error': 'Invalid email or password'}, status=401)
             
             if not user.get('is_active', True):
                 return web.json_response({'error': 'Account is inactive'}, status=403)
             
             # Verify password
-            if not self.auth_manager.verify_password(password, user['password_hash']):
+            if not await self.auth_manager.verify_password_async(password, user['password_hash']):
+                self.auth_manager.record_login_failure(address, email)
                 return web.json_response({'error': 'Invalid email or password'}, status=401)
+            self.auth_manager.record_login_success(address, email)
             
             # Update last login
             await self.db_manager.update_last_login(user['id'])
@@ -2196,10 +1928,24 @@ class TradingBotAPI:
             
             return response
             
+        except ExecutorBusy:
+            logger.warning("Signin rejected: password hashing queue is full")
+            return web.json_response({'error': 'Server busy, please try again shortly'},
+                                     status=503, headers={'Retry-After': '1'})
         except Exception as e:
             logger.error(f"Signin error: {e}", exc_info=True)
             return web.json_response({'error': 'Internal server error'}, status=500)
     
+    def _login_rate_limited(self, request, email: str) -> Optional[web.Response]:
+        """Record a sign-in/sign-up attempt; returns a 429 response when over the limit."""
+        address = self.trusted_proxies.client_address(request)
+        wait = self.auth_manager.check_login_rate(address, email)
+        if wait <= 0:
+            return None
+        logger.warning(f"Too many authentication attempts from {address} for {email}")
+        return web.json_response({'error': 'Too many attempts, please try again later'},
+                                 status=429, headers={'Retry-After': str(math.ceil(wait))})
+    
     async def verify_token(self, request):
         """Verify authentication token."""
         auth_header = request.headers.get('Authorization', '')
@@ -2859,12 +2605,12 @@ class TradingBotAPI:
                 start_date = datetime.utcnow() - timedelta(hours=24)
                 user_id = request.get('user_id')
                 
-                trades_24h = await self.db_manager.get_trades_with_date_range(
+                trades_24h_count = await self.db_manager.count_trades(
                     start_date=start_date,
                     user_id=user_id
                 )
                 results['trades_24h'] = {
-                    'count': len(trades_24h),
+                    'count': trades_24h_count,
                     'status': 'ok'
                 }
             else:
@@ -2996,12 +2742,26 @@ class TradingBotAPI:
             return web.json_response({'error': str(e)}, status=500)
     
     async def get_backtest_results(self, request):
-        """Get detailed results for a specific backtest."""
+        """Get detailed results for a specific backtest.
+        
+        The equity curve is downsampled to at most ``points`` points
+        (default BACKTEST_EQUITY_CURVE_POINTS), keeping its shape.
+        """
         if not self.db_manager:
             return web.json_response({'error': 'Database not initialized'}, status=500)
         
         try:
-            backtest_id = int(request.match_info['id'])
+            try:
+                backtest_id = int(request.match_info['id'])
+            except ValueError:
+                return web.json_response({'error': 'Invalid backtest id'}, status=400)
+            try:
+                equity_points = int(request.query.get('points', self.config.BACKTEST_EQUITY_CURVE_POINTS))
+            except ValueError:
+                return web.json_response({'error': 'Invalid points'}, status=400)
+            if equity_points < 1:
+                return web.json_response({'error': 'points must be positive'}, status=400)
+            equity_points = min(equity_points, self.config.BACKTEST_EQUITY_CURVE_MAX_POINTS)
             user_id = request.get('user_id')
             
             backtest = await self.db_manager.get_backtest_by_id(backtest_id, user_id)
@@ -3009,7 +2769,7 @@ class TradingBotAPI:
             if not backtest:
                 return web.json_response({'error': 'Backtest not found'}, status=404)
             
-            formatted = self._format_backtest_results(backtest)
+            formatted = self._format_backtest_results(backtest, equity_points)
             
             return web.json_response({'backtest': formatted})
             
@@ -3017,11 +2777,23 @@ class TradingBotAPI:
             logger.error(f"Error getting backtest results: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
-    def _format_backtest_results(self, backtest_data: Dict) -> Dict:
-        """Format backtest results for JSON response (handle datetime objects, Infinity, NaN, Decimal)."""
+    def _format_backtest_results(self, backtest_data: Dict, equity_points: Optional[int] = None) -> Dict:
+        """Format backtest results for JSON response (handle datetime objects, Infinity, NaN, Decimal).
+        
+        The equity curve is downsampled with LTTB to at most ``equity_points``
+        points (default BACKTEST_EQUITY_CURVE_POINTS).
+        """
         from decimal import Decimal
         formatted = dict(backtest_data)
         
+        if isinstance(formatted.get('results'), dict) and formatted['results'].get('equity_curve') is not None:
+            results = dict(formatted['results'])
+            curve = coerce_equity_curve(results['equity_curve'])
+            points = equity_points or self.config.BACKTEST_EQUITY_CURVE_POINTS
+            results['equity_curve'] = curve.downsample(max(points, 3)).to_points()
+            results['equity_curve_length'] = len(curve)
+            formatted['results'] = results
+        
         # Convert datetime objects to ISO strings
         for key in ['start_date', 'end_date', 'created_at']:
             if key in formatted and formatted[key]:
@@ -3422,137 +3194,78 @@ class TradingBotAPI:
 
     async def serve_manifest(self, request):
         """Serve PWA manifest.json."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        manifest_path = os.path.join(project_root, 'static', 'manifest.json')
-        
-        if os.path.exists(manifest_path):
-            return web.FileResponse(manifest_path, headers={'Content-Type': 'application/manifest+json'})
-        else:
+        asset = self.static_assets.get('manifest.json')
+        if asset is None:
             return web.Response(status=404, text='Manifest not found')
+        return self.static_assets.response(request, asset)
     
     async def serve_service_worker(self, request):
         """Serve service worker JavaScript."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        sw_path = os.path.join(project_root, 'static', 'service-worker.js')
-        
-        if os.path.exists(sw_path):
-            return web.FileResponse(sw_path, headers={'Content-Type': 'application/javascript'})
-        else:
+        asset = self.static_assets.get('service-worker.js')
+        if asset is None:
             return web.Response(status=404, text='Service worker not found')
+        # Never immutable: browsers must pick up a new worker on the next check
+        return self.static_assets.response(request, asset)
     
     async def serve_favicon(self, request):
         """Serve favicon.ico."""
-        import os
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        favicon_path = os.path.join(project_root, 'static', 'icon-192.png')
-        
         # Use icon-192.png as favicon, or return 204 No Content if not found
-        if os.path.exists(favicon_path):
-            return web.FileResponse(
-                favicon_path,
-                headers={'Content-Type': 'image/png', 'Cache-Control': 'public, max-age=31536000'}
-            )
+        asset = self.static_assets.get('icon-192.png')
+        if asset is not None:
+            return self.static_assets.response(request, asset, cache_control='public, max-age=31536000')
         else:
             # Return 204 No Content instead of 404/503 for favicon
             return web.Response(status=204)
     
+    async def _chart_series(self, request, default_points: int = 0):
+        """Get the chart series a request's pair/timeframe/start/end/limit/points select."""
+        query = request.query
+        max_bars = self.config.CHART_MAX_BARS
+        return await self.chart_data.get_series(
+            query.get('pair', 'BTC-USD'),
+            query.get('timeframe', '1h'),
+            start=parse_chart_time(query.get('start')),
+            end=parse_chart_time(query.get('end')),
+            limit=min(max(int(query.get('limit', '100')), 1), max_bars),
+            points=min(max(int(query.get('points', default_points)), 0), max_bars)
+        )
+    
     async def get_chart_candles(self, request):
         """Get candle data for advanced charting."""
         if not self.bot:
             return web.json_response({'error': 'Bot not initialized'}, status=500)
         
         try:
-            pair = request.query.get('pair', 'BTC-USD')
-            timeframe = request.query.get('timeframe', '1h')
-            limit = int(request.query.get('limit', '100'))
-            
-            # Map timeframe to granularity
-            timeframe_map = {
-                '1m': 'ONE_MINUTE',
-                '5m': 'FIVE_MINUTE',
-                '15m': 'FIFTEEN_MINUTE',
-                '1h': 'ONE_HOUR',
-                # Coinbase public candles API doesn't support 4h directly; use 6h as the closest
-                '4h': 'SIX_HOUR',
-                '1d': 'ONE_DAY'
-            }
-            granularity = timeframe_map.get(timeframe, 'ONE_HOUR')
-            
-            # Calculate time range
-            from datetime import timedelta
-            end_time = datetime.utcnow()
-            if timeframe == '1m':
-                start_time = end_time - timedelta(minutes=limit)
-            elif timeframe == '5m':
-                start_time = end_time - timedelta(minutes=limit * 5)
-            elif timeframe == '15m':
-                start_time = end_time - timedelta(minutes=limit * 15)
-            elif timeframe == '1h':
-                start_time = end_time - timedelta(hours=limit)
-            elif timeframe == '4h':
-                start_time = end_time - timedelta(hours=limit * 4)
-            elif timeframe == '1d':
-                start_time = end_time - timedelta(days=limit)
-            else:
-                start_time = end_time - timedelta(hours=limit)
-            
-            # Fetch candles (CoinbaseClient.get_candles signature: pair, granularity, start, end)
-            candles = await self.bot.exchange.get_candles(pair, granularity, start_time, end_time)
-            
-            # Format for charting library
-            formatted_candles = []
-            for candle in (candles[-limit:] if candles else []):  # Take last N candles
-                # Get time value - handle different formats
-                time_val = 0
-                if 'time' in candle:
-                    if hasattr(candle['time'], 'timestamp'):
-                        time_val = int(candle['time'].timestamp())
-                    elif isinstance(candle['time'], (int, float)):
-                        time_val = int(candle['time'])
-                elif 'timestamp' in candle:
-                    time_val = int(candle['timestamp'])
-                elif 'start' in candle and hasattr(candle['start'], 'timestamp'):
-                    time_val = int(candle['start'].timestamp())
-                
-                formatted_candles.append({
-                    'time': time_val,
-                    'open': float(candle.get('open', 0)),
-                    'high': float(candle.get('high', 0)),
-                    'low': float(candle.get('low', 0)),
-                    'close': float(candle.get('close', 0)),
-                    'volume': float(candle.get('volume', 0))
-                })
-            
+            series = await self._chart_series(request)
             return web.json_response({
-                'pair': pair,
-                'timeframe': timeframe,
-                'candles': formatted_candles
+                'pair': request.query.get('pair', 'BTC-USD'),
+                'timeframe': request.query.get('timeframe', '1h'),
+                'resolution': series.resolution,
+                'candles': series.to_candles()
             })
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error getting chart candles: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
     async def get_chart_indicators(self, request):
-        """Get technical indicators for chart overlay."""
+        """Get the latest indicator values for chart overlay."""
         if not self.bot:
             return web.json_response({'error': 'Bot not initialized'}, status=500)
         
         try:
             pair = request.query.get('pair', 'BTC-USD')
             timeframe = request.query.get('timeframe', '1h')
-            
-            # Get current market data which includes indicators
-            market_data_all = await self.bot.exchange.get_market_data([pair])
-            market_data = market_data_all.get(pair, {})
+            latest = (await self._chart_series(request)).last() or {}
             
             indicators = {
-                'price': float(market_data.get('price', 0)),
-                'ema_50': float(market_data.get('ema_50', 0)) if market_data.get('ema_50') else None,
-                'rsi': float(market_data.get('rsi', 0)) if market_data.get('rsi') else None,
-                'volume': float(market_data.get('volume', 0)),
-                'volume_avg': float(market_data.get('volume_avg', 0))
+                'price': latest.get('close'),
+                'ema': latest.get('ema'),
+                'ema_50': latest.get('ema'),  # Older dashboards read the EMA under this name
+                'rsi': latest.get('rsi'),
+                'volume': latest.get('volume'),
+                'volume_avg': latest.get('volume_avg')
             }
             
             return web.json_response({
@@ -3560,10 +3273,39 @@ class TradingBotAPI:
                 'timeframe': timeframe,
                 'indicators': indicators
             })
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
         except Exception as e:
             logger.error(f"Error getting chart indicators: {e}", exc_info=True)
             return web.json_response({'error': str(e)}, status=500)
     
+    async def get_chart_series(self, request):
+        """Get OHLCV, EMA, RSI and average volume series as columns (JSON or ?format=binary)."""
+        if not self.bot:
+            return web.json_response({'error': 'Bot not initialized'}, status=500)
+        
+        try:
+            series = await self._chart_series(request, default_points=self.config.CHART_MAX_BARS)
+            if request.query.get('format') == 'binary':
+                return web.Response(
+                    body=series.encode(),
+                    content_type='application/octet-stream',
+                    headers={'X-Chart-Resolution': str(series.resolution), 'X-Chart-Source': series.source}
+                )
+            return web.json_response({
+                'pair': request.query.get('pair', 'BTC-USD'),
+                'timeframe': request.query.get('timeframe', '1h'),
+                'resolution': series.resolution,
+                'source': series.source,
+                'count': len(series),
+                'columns': series.to_json()
+            })
+        except ValueError as e:
+            return web.json_response({'error': str(e)}, status=400)
+        except Exception as e:
+            logger.error(f"Error getting chart series: {e}", exc_info=True)
+            return web.json_response({'error': str(e)}, status=500)
+    
     async def create_advanced_order(self, request):
         """Create a new advanced order."""
         if not self.bot or not self.db_manager:
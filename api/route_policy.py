@@ -0,0 +1,39 @@
+"""Route classification for the authentication middleware."""
+
+import re
+
+# Path prefixes served without authentication
+PUBLIC_ROUTES = (
+    '/api/auth/signup',
+    '/api/auth/signin',
+    '/api/status',  # Status endpoint for health checks
+    '/api/runtime',  # Runtime info endpoint
+    '/api/ai/status',  # AI status endpoint (public for diagnostics)
+    '/api/test/',   # All test endpoints (trading-health, force-trade, etc.)
+    '/landing',
+    '/signup',
+    '/signin',
+    '/test-runner',
+    '/favicon.ico'
+)
+
+ROUTE_STATIC = 'static'  # Static files, served before any auth work
+ROUTE_ROOT = 'root'  # Dashboard root, needs a token but redirects instead of failing
+ROUTE_PUBLIC = 'public'
+ROUTE_API = 'api'  # Protected API route, 401 without a valid token
+ROUTE_PAGE = 'page'  # Protected page, redirects to /landing without a valid token
+
+# One anchored alternation compiled at import; the matching group names the class
+_ROUTE_RE = re.compile(
+    r'(?P<static>/static|/favicon\.ico$)'
+    r'|(?P<root>/$)'
+    r'|(?P<public>' + '|'.join(re.escape(route) for route in PUBLIC_ROUTES) + ')'
+)
+
+
+def classify_route(path: str) -> str:
+    """Classify a request path as static, root, public, api or page."""
+    match = _ROUTE_RE.match(path)
+    if match is not None:
+        return match.lastgroup
+    return ROUTE_API if path.startswith('/api') else ROUTE_PAGE
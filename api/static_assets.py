@@ -0,0 +1,203 @@
+"""In-memory, fingerprinted and precompressed static assets."""
+
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, Optional
+
+from aiohttp import web
+
+from api.response_cache import etag_matches
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Fingerprinted URLs never change content, so browsers may keep them for a year
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+# Pages and unversioned URLs are revalidated on every load (cheap with the ETag)
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json',
+                      'application/manifest+json', 'image/svg+xml')
+MIN_COMPRESS_SIZE = 512
+
+# Encodings in order of preference
+ENCODINGS = ('br', 'gzip')
+
+# "/static/<name>" inside HTML attributes, quoted with ' or "
+STATIC_REF_RE = re.compile(r'''(["'])/static/([^"'?#]+)\1''')
+
+
+def content_type_for(name: str) -> str:
+    if name.endswith('.json') and 'manifest' in name:
+        return 'application/manifest+json'
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    if content_type.startswith('text/') or content_type in ('application/json', 'application/javascript'):
+        content_type += '; charset=utf-8'
+    return content_type
+
+
+def fingerprint_name(name: str, digest: str) -> str:
+    """Insert a content digest before the extension: 'js/app.js' -> 'js/app.<digest>.js'."""
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def accepted_encodings(accept_encoding: str) -> set:
+    """Content codings the client accepts (ignoring any with q=0)."""
+    accepted = set()
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        if coding:
+            accepted.add(coding.strip())
+    return accepted
+
+
+class StaticAsset:
+    """One file's bytes, their precompressed variants and validators."""
+
+    __slots__ = ('name', 'url', 'content_type', 'digest', 'bodies')
+
+    def __init__(self, name: str, body: bytes, gzip_level: int = 9):
+        self.name = name
+        self.content_type = content_type_for(name)
+        self.digest = hashlib.blake2b(body, digest_size=5).hexdigest()
+        self.url = '/static/' + fingerprint_name(name, self.digest)
+        self.bodies: Dict[str, bytes] = {'identity': body}
+        if len(body) >= MIN_COMPRESS_SIZE and self.content_type.startswith(COMPRESSIBLE_TYPES):
+            self._compress(body, gzip_level)
+
+    def _compress(self, body: bytes, gzip_level: int):
+        variants = {'gzip': gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(body, quality=11)
+        for encoding, compressed in variants.items():
+            if len(compressed) < len(body):
+                self.bodies[encoding] = compressed
+
+    def etag(self, encoding: str) -> str:
+        return f'"{self.digest}"' if encoding == 'identity' else f'"{self.digest}-{encoding}"'
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """Pick the smallest representation the client accepts."""
+        if len(self.bodies) > 1 and accept_encoding:
+            accepted = accepted_encodings(accept_encoding)
+            for encoding in ENCODINGS:
+                if encoding in self.bodies and (encoding in accepted or '*' in accepted):
+                    return encoding
+        return 'identity'
+
+
+class StaticAssetStore:
+    """Every file under the static directory, loaded once at startup.
+
+    Each asset is reachable at its plain URL (``/static/styles.css``,
+    revalidated on every load) and at a fingerprinted URL containing its
+    content digest (``/static/styles.<digest>.css``, cached as immutable).
+    References to ``/static/...`` in HTML pages are rewritten to the
+    fingerprinted URLs, so a page revalidation is the only request a
+    returning browser makes until an asset actually changes. Compressible
+    assets are gzipped (and brotli-compressed when ``brotli`` is installed)
+    ahead of time and served according to Accept-Encoding.
+    """
+
+    def __init__(self, root: str, gzip_level: int = 9):
+        """
+        Initialize the store.
+
+        Args:
+            root: Static directory
+            gzip_level: gzip compression level for precompressed variants
+        """
+        self.root = root
+        self.gzip_level = gzip_level
+        self.assets: Dict[str, StaticAsset] = {}
+        self._by_url: Dict[str, tuple] = {}
+
+    def load(self) -> 'StaticAssetStore':
+        """Read, fingerprint and compress every file under the root."""
+        files = {}
+        for directory, _, names in os.walk(self.root):
+            for filename in names:
+                path = os.path.join(directory, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, '/')
+                with open(path, 'rb') as f:
+                    files[name] = f.read()
+
+        assets = {name: StaticAsset(name, body, self.gzip_level)
+                  for name, body in files.items() if not name.endswith('.html')}
+        # Pages are built last so their asset references can point at fingerprinted URLs
+        for name, body in files.items():
+            if name.endswith('.html'):
+                assets[name] = StaticAsset(name, self._rewrite_refs(body, assets), self.gzip_level)
+
+        self.assets = assets
+        self._by_url = {}
+        for asset in assets.values():
+            self._by_url['/static/' + asset.name] = (asset, False)
+            self._by_url[asset.url] = (asset, True)
+        total = sum(len(asset.bodies['identity']) for asset in assets.values())
+        logger.info(f"Loaded {len(assets)} static assets ({total / 1024:.0f} KiB, brotli={'on' if brotli else 'off'})")
+        return self
+
+    @staticmethod
+    def _rewrite_refs(body: bytes, assets: Dict[str, StaticAsset]) -> bytes:
+        def replace(match):
+            asset = assets.get(match.group(2))
+            if asset is None:
+                return match.group(0)
+            return f"{match.group(1)}{asset.url}{match.group(1)}"
+
+        try:
+            text = body.decode('utf-8')
+        except UnicodeDecodeError:
+            return body
+        return STATIC_REF_RE.sub(replace, text).encode('utf-8')
+
+    def get(self, name: str) -> Optional[StaticAsset]:
+        return self.assets.get(name)
+
+    def url_for(self, name: str) -> str:
+        """Fingerprinted URL of an asset (its plain URL if unknown)."""
+        asset = self.assets.get(name)
+        return asset.url if asset else '/static/' + name
+
+    def lookup(self, path: str):
+        """Get (asset, immutable) for a request path, or (None, False)."""
+        return self._by_url.get(path, (None, False))
+
+    def response(self, request: web.Request, asset: StaticAsset, immutable: bool = False,
+                 cache_control: Optional[str] = None) -> web.Response:
+        """Build a 200 or 304 for an asset, choosing the encoding from Accept-Encoding."""
+        encoding = asset.negotiate(request.headers.get('Accept-Encoding', ''))
+        etag = asset.etag(encoding)
+        headers = {
+            'ETag': etag,
+            'Cache-Control': cache_control or (IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL),
+        }
+        if len(asset.bodies) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if etag_matches(request.headers.get('If-None-Match', ''), etag):
+            return web.Response(status=304, headers=headers)
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        headers['Content-Type'] = asset.content_type
+        return web.Response(body=asset.bodies[encoding], headers=headers)
+
+    def get_stats(self):
+        return {
+            'assets': len(self.assets),
+            'bytes': sum(len(asset.bodies['identity']) for asset in self.assets.values()),
+            'compressed_bytes': sum(min(len(body) for body in asset.bodies.values())
+                                    for asset in self.assets.values()),
+            'brotli': brotli is not None,
+        }
@@ -0,0 +1,250 @@
+"""Streaming trade export encoders (CSV, JSON and Parquet)."""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+# format -> (content type, file extension)
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'json': ('application/json', 'json'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+}
+
+# Rows encoded per chunk written to the response (and per Parquet row group)
+EXPORT_BATCH_SIZE = 1000
+
+
+def parquet_available() -> bool:
+    """Check whether the optional pyarrow dependency is installed."""
+    try:
+        import pyarrow  # noqa: F401
+        import pyarrow.parquet  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def export_filename(export_format: str, start_date: Optional[datetime] = None,
+                    end_date: Optional[datetime] = None, compressed: bool = False) -> str:
+    """Build the download filename, including the date range if one was given."""
+    extension = EXPORT_FORMATS[export_format][1]
+    filename = 'trades_export'
+    if start_date or end_date:
+        date_str = start_date.strftime('%Y%m%d') if start_date else ''
+        date_str += '_to_'
+        date_str += end_date.strftime('%Y%m%d') if end_date else 'now'
+        filename = f'trades_export_{date_str}'
+    filename = f'{filename}.{extension}'
+    return f'{filename}.gz' if compressed else filename
+
+
+def _isoformat_times(trade: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy a trade with datetime values as ISO strings."""
+    return {
+        key: value.isoformat() if isinstance(value, (datetime, date)) else value
+        for key, value in trade.items()
+    }
+
+
+class CsvEncoder:
+    """Encodes trades as CSV, header first."""
+
+    def __init__(self, fieldnames: List[str]):
+        self.fieldnames = fieldnames
+
+    def header(self) -> bytes:
+        return self._encode(None)
+
+    def encode(self, trades: List[Dict[str, Any]]) -> bytes:
+        return self._encode(trades)
+
+    def footer(self) -> bytes:
+        return b''
+
+    def _encode(self, trades: Optional[List[Dict[str, Any]]]) -> bytes:
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=self.fieldnames, extrasaction='ignore')
+        if trades is None:
+            writer.writeheader()
+        else:
+            writer.writerows(_isoformat_times(trade) for trade in trades)
+        return output.getvalue().encode('utf-8')
+
+
+class JsonEncoder:
+    """Encodes trades as a JSON array, one element at a time."""
+
+    def __init__(self):
+        self.first = True
+
+    def header(self) -> bytes:
+        return b'['
+
+    def encode(self, trades: List[Dict[str, Any]]) -> bytes:
+        parts = []
+        for trade in trades:
+            parts.append('\n' if self.first else ',\n')
+            parts.append(json.dumps(_isoformat_times(trade), default=str))
+            self.first = False
+        return ''.join(parts).encode('utf-8')
+
+    def footer(self) -> bytes:
+        return b'\n]\n'
+
+
+class _ChunkSink:
+    """Write-only file object that hands back whatever was written since the last drain."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetEncoder:
+    """Encodes trades as Parquet, one row group per batch (requires pyarrow)."""
+
+    def __init__(self, fieldnames: List[str]):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        column_types = {
+            'id': pa.int64(),
+            'user_id': pa.int64(),
+            'entry_price': pa.float64(),
+            'exit_price': pa.float64(),
+            'size': pa.float64(),
+            'stop_loss': pa.float64(),
+            'take_profit': pa.float64(),
+            'pnl': pa.float64(),
+            'pnl_pct': pa.float64(),
+            'confidence_score': pa.float64(),
+            'entry_time': pa.timestamp('us'),
+            'exit_time': pa.timestamp('us'),
+            'created_at': pa.timestamp('us'),
+            'tags': pa.list_(pa.string()),
+        }
+        self.pa = pa
+        self.schema = pa.schema([(name, column_types.get(name, pa.string())) for name in fieldnames])
+        self.sink = _ChunkSink()
+        self.writer = pq.ParquetWriter(self.sink, self.schema, compression='snappy')
+
+    def header(self) -> bytes:
+        return self.sink.drain()
+
+    def encode(self, trades: List[Dict[str, Any]]) -> bytes:
+        table = self.pa.Table.from_pylist(trades, schema=self.schema)
+        self.writer.write_table(table)
+        return self.sink.drain()
+
+    def footer(self) -> bytes:
+        self.writer.close()
+        return self.sink.drain()
+
+
+async def iter_trade_pages(db, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                           user_id: Optional[int] = None,
+                           page_size: int = EXPORT_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Yield trades newest first, fetching one keyset page per query.
+
+    Each page is a short query whose pooled connection is released before
+    its rows are encoded and written, so a slow download holds neither a
+    connection nor an open read transaction.
+
+    Args:
+        db: Database manager providing get_trades_with_date_range
+        start_date: Optional lower bound on entry_time
+        end_date: Optional upper bound on entry_time
+        user_id: Optional user filter
+        page_size: Trades fetched per query
+    """
+    before = None
+    while True:
+        page = await db.get_trades_with_date_range(start_date, end_date, user_id, limit=page_size, before=before)
+        for trade in page:
+            yield trade
+        if len(page) < page_size:
+            return
+        before = (page[-1]['entry_time'], page[-1]['id'])
+
+
+async def write_trade_export(response, first_trade: Dict[str, Any], trades: AsyncIterator[Dict[str, Any]],
+                             export_format: str, compress: bool = False,
+                             batch_size: int = EXPORT_BATCH_SIZE) -> int:
+    """
+    Encode trades into a prepared StreamResponse chunk by chunk.
+
+    Args:
+        response: Prepared aiohttp StreamResponse
+        first_trade: First trade (already pulled from the iterator to decide on 404)
+        trades: Remaining trades
+        export_format: One of EXPORT_FORMATS
+        compress: Gzip the output stream
+        batch_size: Trades encoded per chunk
+
+    Returns:
+        Number of trades written
+    """
+    fieldnames = list(first_trade.keys())
+    if export_format == 'csv':
+        encoder = CsvEncoder(fieldnames)
+    elif export_format == 'json':
+        encoder = JsonEncoder()
+    else:
+        encoder = ParquetEncoder(fieldnames)
+
+    # wbits=31 produces a gzip container rather than a raw zlib stream
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    async def send(data: bytes):
+        if compressor:
+            data = compressor.compress(data)
+        if data:
+            await response.write(data)
+
+    await send(encoder.header())
+
+    count = 0
+    batch = [first_trade]
+    async for trade in trades:
+        batch.append(trade)
+        if len(batch) >= batch_size:
+            await send(encoder.encode(batch))
+            count += len(batch)
+            batch = []
+    if batch:
+        await send(encoder.encode(batch))
+        count += len(batch)
+
+    await send(encoder.footer())
+    if compressor:
+        await response.write(compressor.flush())
+    return count
@@ -55,7 +55,7 @@ except Exception as e:
     sys.exit(1)
 
 try:
-    from database.db_manager import DatabaseManager
+    from database import create_database_manager
     print("  ✅ database.db_manager OK", file=sys.stderr, flush=True)
 except Exception as e:
     print(f"  ❌ database.db_manager FAILED: {e}", file=sys.stderr, flush=True)
@@ -155,9 +155,9 @@ async def init_app():
         # Step 3: Create database manager
         print("init_app() Step 3: Creating DatabaseManager...", file=sys.stderr, flush=True)
         logger.info("Step 4: Creating database manager...")
-        print("  Instantiating DatabaseManager(config)...", file=sys.stderr, flush=True)
+        print("  Instantiating database manager for configured backend...", file=sys.stderr, flush=True)
         try:
-            db_manager = DatabaseManager(config)
+            db_manager = create_database_manager(config)
             print("  ✅ DatabaseManager created", file=sys.stderr, flush=True)
         except Exception as e:
             print(f"  ❌ DatabaseManager creation FAILED: {e}", file=sys.stderr, flush=True)
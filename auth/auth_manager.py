@@ -2,11 +2,16 @@
 
 import jwt
 import bcrypt
+import hashlib
 import secrets
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 import logging
 from config import get_config
+from utils.ttl_cache import TTLCache
+from utils.bounded_executor import BoundedExecutor
+from auth.login_limiter import LoginLimiter
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +28,32 @@ class AuthManager:
         self.secret_key = getattr(self.config, 'JWT_SECRET_KEY', SECRET_KEY)
         self.algorithm = 'HS256'
         self.token_expiry_hours = 24  # Tokens expire after 24 hours
+        # Verified payloads by token digest, so polling clients skip the HMAC check
+        self.token_cache = TTLCache(
+            max_size=getattr(self.config, 'JWT_CACHE_SIZE', 10000),
+            ttl=getattr(self.config, 'JWT_CACHE_TTL_SECONDS', 300)
+        )
+    
+        # bcrypt runs off the event loop on its own small pool
+        self.password_pool = BoundedExecutor(
+            max_workers=getattr(self.config, 'PASSWORD_HASH_WORKERS', 2),
+            max_pending=getattr(self.config, 'PASSWORD_HASH_MAX_PENDING', 16),
+            thread_name_prefix='bcrypt'
+        )
+        window = getattr(self.config, 'LOGIN_ATTEMPT_WINDOW_SECONDS', 300)
+        self.email_limiter = LoginLimiter(getattr(self.config, 'LOGIN_MAX_ATTEMPTS_PER_EMAIL', 10), window)
+        self.address_limiter = LoginLimiter(getattr(self.config, 'LOGIN_MAX_ATTEMPTS_PER_ADDRESS', 30), window)
+    
+    @property
+    def secret_key(self) -> str:
+        return self._secret_key
+    
+    @secret_key.setter
+    def secret_key(self, value: str):
+        # Tokens verified under the old key must be checked again
+        self._secret_key = value
+        if hasattr(self, 'token_cache'):
+            self.token_cache.clear()
     
     def hash_password(self, password: str) -> str:
         """Hash a password using bcrypt."""
@@ -38,6 +69,40 @@ class AuthManager:
             logger.error(f"Password verification error: {e}")
             return False
     
+    async def hash_password_async(self, password: str) -> str:
+        """Hash a password on the password pool (raises ExecutorBusy when it is full)."""
+        return await self.password_pool.run(self.hash_password, password)
+    
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """Verify a password on the password pool (raises ExecutorBusy when it is full)."""
+        return await self.password_pool.run(self.verify_password, password, hashed)
+    
+    def check_login_rate(self, address: Optional[str], email: str) -> float:
+        """
+        Record a sign-in or sign-up attempt against the client address and check the email's failures.
+        
+        Failures per email are counted per client address (see record_login_failure),
+        so repeated bad guesses from elsewhere can't lock a user out of their account.
+        
+        Returns:
+            0 if the attempt may proceed, otherwise seconds until it may
+        """
+        wait = self.address_limiter.hit(address)
+        if wait > 0:
+            return wait
+        wait = self.email_limiter.retry_after((address, email))
+        if wait > 0:
+            self.email_limiter.limited += 1
+        return wait
+    
+    def record_login_failure(self, address: Optional[str], email: str):
+        """Count a failed sign-in (or sign-up for a taken email) against the email from this address."""
+        self.email_limiter.hit((address, email))
+    
+    def record_login_success(self, address: Optional[str], email: str):
+        """Clear the email's failures from this address after a successful sign-in."""
+        self.email_limiter.reset((address, email))
+    
     def generate_token(self, user_id: int, email: str) -> str:
         """Generate a JWT token for a user."""
         payload = {
@@ -50,9 +115,24 @@ class AuthManager:
         return token
     
     def verify_token(self, token: str) -> Optional[Dict]:
-        """Verify and decode a JWT token."""
+        """Verify and decode a JWT token.
+        
+        Verified payloads are cached by token digest for up to
+        JWT_CACHE_TTL_SECONDS and never past their own ``exp``, so repeat
+        requests with the same token cost a hash and a dict lookup.
+        """
+        digest = hashlib.blake2b(token.encode('utf-8'), digest_size=16).digest()
+        payload = self.token_cache.get(digest)
+        if payload is not None:
+            if payload.get('exp', float('inf')) > time.time():
+                return payload
+            self.token_cache.invalidate(digest)
+            logger.warning("Token has expired")
+            return None
+        
         try:
             payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            self.token_cache.set(digest, payload)
             return payload
         except jwt.ExpiredSignatureError:
             logger.warning("Token has expired")
@@ -61,6 +141,18 @@ class AuthManager:
             logger.warning(f"Invalid token: {e}")
             return None
     
+    def get_token_cache_stats(self) -> Dict[str, Any]:
+        """Get verified-token cache metrics."""
+        return self.token_cache.get_stats()
+    
+    def get_password_stats(self) -> Dict[str, Any]:
+        """Get password pool and login rate-limit metrics."""
+        return {
+            'pool': self.password_pool.get_stats(),
+            'email_limiter': self.email_limiter.get_stats(),
+            'address_limiter': self.address_limiter.get_stats(),
+        }
+    
     def extract_token_from_header(self, auth_header: Optional[str]) -> Optional[str]:
         """Extract token from Authorization header (Bearer <token>)."""
         if not auth_header:
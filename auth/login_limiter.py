@@ -0,0 +1,77 @@
+"""Sliding-window limit on authentication attempts."""
+
+import time
+from collections import deque
+from typing import Any, Callable, Dict, Hashable
+
+from utils.ttl_cache import TTLCache
+
+
+class LoginLimiter:
+    """Counts attempts per key (client address, email) over a sliding window.
+
+    Each key keeps the timestamps of its recent attempts; a key with
+    ``max_attempts`` attempts inside ``window`` seconds is refused until the
+    oldest one ages out. Keys live in a bounded LRU, so a flood of distinct
+    addresses can't grow memory without limit.
+    """
+
+    def __init__(self, max_attempts: int = 10, window: float = 300.0, max_keys: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the limiter.
+
+        Args:
+            max_attempts: Attempts allowed per key within the window
+            window: Window length in seconds
+            max_keys: Keys tracked before the least recently used is forgotten
+            clock: Monotonic time source (overridable for tests)
+        """
+        self.max_attempts = max_attempts
+        self.window = window
+        self.clock = clock
+        self._attempts = TTLCache(max_size=max_keys, ttl=window, clock=clock)
+        self.limited = 0
+
+    def retry_after(self, key: Hashable) -> float:
+        """Seconds until ``key`` may try again (0 when it may try now)."""
+        attempts = self._attempts.get(key)
+        if not attempts:
+            return 0.0
+        now = self.clock()
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if len(attempts) < self.max_attempts:
+            return 0.0
+        return attempts[0] + self.window - now
+
+    def hit(self, key: Hashable) -> float:
+        """
+        Record an attempt for ``key`` unless it is over the limit.
+
+        Returns:
+            0 if the attempt is allowed, otherwise seconds until it would be
+        """
+        wait = self.retry_after(key)
+        if wait > 0:
+            self.limited += 1
+            return wait
+        attempts = self._attempts.get(key)
+        if attempts is None:
+            attempts = deque()
+        attempts.append(self.clock())
+        # Re-storing restarts the entry's expiry, so it lives a window past the last attempt
+        self._attempts.set(key, attempts)
+        return 0.0
+
+    def reset(self, key: Hashable):
+        """Forget ``key``'s attempts (e.g. after a successful sign-in)."""
+        self._attempts.invalidate(key)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'max_attempts': self.max_attempts,
+            'window_seconds': self.window,
+            'tracked_keys': len(self._attempts),
+            'limited': self.limited,
+        }
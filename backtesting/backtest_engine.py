@@ -7,6 +7,7 @@ from config import get_config
 from strategy import EMARSIStrategy
 from risk import RiskManager
 from monitoring import PerformanceTracker
+from utils.equity_curve import EquityCurve
 
 logger = logging.getLogger(__name__)
 
@@ -27,7 +28,7 @@ class BacktestEngine:
         # Backtest state
         self.positions: List[Dict] = []
         self.trades: List[Dict] = []
-        self.equity_curve: List[Dict] = []
+        self.equity_curve = EquityCurve()
         
         logger.info(f"BacktestEngine initialized with ${initial_balance:,.2f}")
     
@@ -52,11 +53,11 @@ class BacktestEngine:
         self.current_balance = self.initial_balance
         self.positions = []
         self.trades = []
-        self.equity_curve = []
         self.risk_manager.daily_pnl = 0.0
         
         # Process each candle
         min_candles = max(self.config.EMA_PERIOD, self.config.RSI_PERIOD, self.config.VOLUME_PERIOD) + 1
+        self.equity_curve = EquityCurve(capacity=len(candles) - min_candles)
         
         for i in range(min_candles, len(candles)):
             current_candle = candles[i]
@@ -270,10 +271,7 @@ class BacktestEngine:
     
     def _update_equity_curve(self, timestamp: datetime):
         """Update equity curve with current balance."""
-        self.equity_curve.append({
-            'timestamp': timestamp,
-            'balance': self.current_balance
-        })
+        self.equity_curve.append(timestamp, self.current_balance)
     
     def _generate_results(self) -> Dict:
         """Generate backtest results summary."""
@@ -294,14 +292,7 @@ class BacktestEngine:
         profit_factor = gross_profit / gross_loss if gross_loss > 0 else float('inf') if gross_profit > 0 else 0.0
         
         # Calculate max drawdown
-        max_drawdown = 0.0
-        peak = self.initial_balance
-        for point in self.equity_curve:
-            if point['balance'] > peak:
-                peak = point['balance']
-            drawdown = ((peak - point['balance']) / peak) * 100.0
-            if drawdown > max_drawdown:
-                max_drawdown = drawdown
+        max_drawdown = self.equity_curve.max_drawdown(self.initial_balance)
         
         # Get performance metrics from tracker
         perf_summary = self.performance_tracker.get_performance_summary(final_balance, self.initial_balance)
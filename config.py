@@ -82,6 +82,16 @@ class Config:
     
     # Trading Loop Settings
     LOOP_INTERVAL_SECONDS = 5  # Check every 5 seconds
+    CANDLE_HISTORY_DEPTH = int(os.getenv('CANDLE_HISTORY_DEPTH', '200'))  # Candles kept in memory per pair
+    CANDLE_FETCH_CONCURRENCY = int(os.getenv('CANDLE_FETCH_CONCURRENCY', '4'))  # Parallel candle requests during bootstrap
+    CANDLE_FETCH_PER_SECOND = float(os.getenv('CANDLE_FETCH_PER_SECOND', '5'))  # Candle request starts per second during bootstrap (0 = unpaced)
+    CANDLE_FETCH_MAX_RETRIES = int(os.getenv('CANDLE_FETCH_MAX_RETRIES', '3'))  # Retries with backoff when candles are rate limited (429)
+    
+    # State Snapshot Settings (fast warm restart)
+    STATE_SNAPSHOT_ENABLED = os.getenv('STATE_SNAPSHOT_ENABLED', 'true').lower() == 'true'
+    STATE_SNAPSHOT_PATH = os.getenv('STATE_SNAPSHOT_PATH', 'bot_state.snapshot')
+    STATE_SNAPSHOT_INTERVAL_SECONDS = 30  # How often to persist in-memory state
+    STATE_SNAPSHOT_MAX_AGE_HOURS = 24  # Ignore snapshots older than this on startup
     
     # Database Settings
     # Support DATABASE_URL (Railway, Heroku) or individual variables
@@ -102,11 +112,98 @@ class Config:
         DB_USER = os.getenv('DB_USER', 'postgres')
         DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     
+    # Storage backend: 'postgres', 'sqlite' (embedded, WAL mode) or 'auto'
+    # ('auto' uses SQLite for paper trading when no Postgres server is configured)
+    DB_BACKEND = os.getenv('DB_BACKEND', 'auto').lower()
+    POSTGRES_CONFIGURED = bool(_db_url or os.getenv('DB_HOST'))
+    SQLITE_PATH = os.getenv('SQLITE_PATH', 'tradingbot.db')
+    SQLITE_POOL_SIZE = 4  # Connections; WAL allows concurrent readers next to one writer
+    
+    # Write-behind batching for trade/log/metrics writes
+    DB_WRITE_BEHIND = os.getenv('DB_WRITE_BEHIND', 'true').lower() == 'true'
+    DB_WRITE_BATCH_SIZE = 100  # Max writes per executemany batch
+    DB_WRITE_FLUSH_INTERVAL_MS = 50  # Max time a write waits for its batch to fill
+    DB_WRITE_QUEUE_MAX = 10000  # Pending writes before callers are throttled
+    # Writes kept here while the database is unreachable, replayed when it is back ('' keeps them in memory)
+    DB_WRITE_JOURNAL_PATH = os.getenv('DB_WRITE_JOURNAL_PATH', 'db_writes.journal')
+    DB_WRITE_RETRY_MAX_BACKOFF_SECONDS = 60  # Longest wait between replays of the journal
+    DB_TRADE_ID_BLOCK_SIZE = 50  # Trade ids reserved per sequence round trip
+    DB_MAINTENANCE_INTERVAL_SECONDS = 3600  # Aggregate repair, partition and tax lot maintenance interval
+    
+    # Prepared statements and per-query latency stats
+    DB_STATEMENT_CACHE_SIZE = 256  # Prepared statements kept per connection
+    DB_QUERY_STATS = os.getenv('DB_QUERY_STATS', 'true').lower() == 'true'
+    DB_SLOW_QUERY_MS = int(os.getenv('DB_SLOW_QUERY_MS', '200'))  # Slower queries get their plan captured
+    DB_EXPLAIN_INTERVAL_SECONDS = 300  # Minimum time between plans for the same statement
+    DB_QUERY_STATS_MAX = 500  # Distinct statements tracked
+    
+    # Monthly partitions for trades and system_logs
+    DB_PARTITION_MONTHS_AHEAD = 2  # Partitions created ahead of the current month
+    DB_PARTITION_MOVE_BATCH_SIZE = 10000  # Rows per transaction when moving a converted table's rows into partitions
+    LOG_RETENTION_MONTHS = int(os.getenv('LOG_RETENTION_MONTHS', '3'))  # system_logs partitions kept
+    LOG_RETENTION_ARCHIVE = os.getenv('LOG_RETENTION_ARCHIVE', 'false').lower() == 'true'  # Detach instead of drop
+    
+    # Read-through cache for user profile and onboarding lookups
+    USER_CACHE_TTL_SECONDS = int(os.getenv('USER_CACHE_TTL_SECONDS', '300'))  # 0 disables the cache
+    USER_CACHE_MAX_SIZE = 10000  # Cached users before least recently used are evicted
+    
+    # Backtest equity curves are served downsampled (LTTB) to this many points
+    BACKTEST_EQUITY_CURVE_POINTS = 1000  # Default when the request has no ?points=
+    BACKTEST_EQUITY_CURVE_MAX_POINTS = 10000  # Upper bound for ?points=
+    
     # API Server Settings
     API_HOST = '0.0.0.0'
     API_PORT = 4000
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:8080']
     
+    # Response cache for endpoints every dashboard tab polls (seconds per route, 0 disables a route)
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_TTLS = {
+        '/api/status': 2,
+        '/api/prices': 3,
+        '/api/positions': 3,
+        '/api/performance': 5,
+        '/api/risk': 5,
+        '/api/market-conditions': 10,
+    }
+    RESPONSE_CACHE_MAX_SIZE = 5000  # Cached responses per route (one per user and query string)
+    
+    # API rate limiting: token buckets per user (per client address when signed out)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+    RATE_LIMIT_PER_MINUTE = 600  # Request cost units a client earns per minute
+    RATE_LIMIT_BURST = 120  # Units a client may spend at once
+    # Heavy routes (path prefixes): cost charged per request, plus an optional own limit in requests
+    RATE_LIMIT_ROUTES = {
+        '/api/backtest/run': {'cost': 20, 'per_minute': 6, 'burst': 2},
+        '/api/ai/': {'cost': 10, 'per_minute': 20, 'burst': 5},
+        '/api/ai/status': {'cost': 1},
+        '/api/market-conditions': {'cost': 2},
+        '/api/trades/export': {'cost': 10, 'per_minute': 10, 'burst': 3},
+    }
+    RATE_LIMIT_MAX_KEYS = 10000  # Buckets tracked in memory
+    RATE_LIMIT_REDIS_URL = os.getenv('RATE_LIMIT_REDIS_URL', '')  # Share limits across workers (needs redis)
+    
+    # Portfolio analytics (/api/portfolio/analytics), recomputed only after a trade closes
+    PORTFOLIO_ANALYTICS_CACHE_USERS = 1000
+    PORTFOLIO_ANALYTICS_CACHE_TTL_SECONDS = 3600
+    PORTFOLIO_HISTORY_POINTS = 200  # Realized P&L curve points returned (downsampled)
+    
+    # Chart series (/api/charts/*), built from the candle store and cached
+    CHART_CACHE_SIZE = 500  # Cached series (per pair, timeframe and fetched range)
+    CHART_CACHE_TTL_SECONDS = 60  # Longest a range fetched from the exchange is reused
+    CHART_MAX_BARS = 5000  # Upper bound for ?limit= and ?points=
+    
+    # Tax lots (/api/tax/report); every method listed is maintained as trades close
+    TAX_LOT_METHODS = ('FIFO', 'LIFO', 'HIFO')
+    
+    # Live event stream (/api/stream, server-sent events)
+    EVENT_STREAM_QUEUE_SIZE = 256  # Events buffered per client before the oldest are dropped
+    EVENT_STREAM_MAX_DROPPED = 1024  # Consecutive drops before a lagging client is disconnected
+    EVENT_STREAM_HEARTBEAT_SECONDS = 15  # Keep-alive comment interval for idle streams
+    
+    # Static assets (/static, pages): fingerprinted and precompressed at startup
+    STATIC_GZIP_LEVEL = 9  # Compressed once, so use the best ratio
+    
     # Paper Trading
     PAPER_TRADING = os.getenv('PAPER_TRADING', 'true').lower() == 'true'
     USE_REAL_MARKET_DATA = os.getenv('USE_REAL_MARKET_DATA', 'true').lower() == 'true'
@@ -151,6 +248,15 @@ class Config:
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', '')
     JWT_ALGORITHM = 'HS256'
     JWT_EXPIRY_HOURS = 24
+    JWT_CACHE_SIZE = 10000  # Verified tokens kept in memory
+    JWT_CACHE_TTL_SECONDS = 300  # Longest a verified token is trusted without re-checking its signature
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', '2'))  # bcrypt threads
+    PASSWORD_HASH_MAX_PENDING = 16  # Hash/verify calls accepted at once before sign-ins get a 503
+    LOGIN_ATTEMPT_WINDOW_SECONDS = 300
+    LOGIN_MAX_ATTEMPTS_PER_EMAIL = 10  # Failed attempts per email from one client address per window
+    LOGIN_MAX_ATTEMPTS_PER_ADDRESS = 30  # Attempts per client address per window
+    # Reverse proxies whose X-Forwarded-For names the client (comma-separated IPs or CIDRs)
+    TRUSTED_PROXIES = [proxy for proxy in os.getenv('TRUSTED_PROXIES', '').split(',') if proxy.strip()]
 
 
 class DevelopmentConfig(Config):
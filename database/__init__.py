@@ -1,5 +1,18 @@
 """Database module for trade and performance storage."""
 
 from .db_manager import DatabaseManager
+from .factory import create_database_manager
+from .migrator import MigrationError, MigrationRunner
+from .query_stats import QueryRegistry
+from .sqlite_manager import SQLiteDatabaseManager
+from .write_queue import WriteBehindQueue
 
-__all__ = ['DatabaseManager']
+__all__ = [
+    'DatabaseManager',
+    'MigrationError',
+    'MigrationRunner',
+    'QueryRegistry',
+    'SQLiteDatabaseManager',
+    'WriteBehindQueue',
+    'create_database_manager',
+]
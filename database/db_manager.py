@@ -3,24 +3,293 @@
 import json
 import logging
 import asyncio
+import zlib
 from datetime import datetime, date
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Tuple
 import asyncpg
+from collections import deque
 from config import get_config
+from utils.equity_curve import coerce_equity_curve, EquityCurve
+from utils.ttl_cache import TTLCache
+from monitoring.tax_lots import (
+    LOT_CLOSED, LOT_OPENED, LOT_REALIZED, LOT_REDUCED, TAX_LOT_METHODS, Lot, TaxLotEngine, trade_fills
+)
+from .write_queue import WriteBehindQueue
+from .migrator import MIGRATION_LOCK_KEY, MigrationRunner
+from .query_stats import QueryRegistry
+from .partitions import (
+    PARTITIONED_TABLES, ensure_month_partitions, expire_month_partitions, legacy_table, move_legacy_rows
+)
 
 logger = logging.getLogger(__name__)
 
+# Write statements shared by the inline and write-behind paths. The order of
+# WRITE_STATEMENTS is the order batches are applied in, so a trade's INSERT
+# always lands before its UPDATE.
+INSERT_TRADE_SQL = """
+    INSERT INTO trades (
+        id, pair, side, entry_price, size, entry_time,
+        stop_loss, take_profit, order_id, confidence_score
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+"""
+
+# Columns a trade contributes to the daily_pair_stats / tag_stats aggregates
+TRADE_STATS_COLUMNS = "user_id, pair, entry_time, exit_price, pnl, pnl_pct, size, entry_price, tags"
+
+# A trade counts towards the aggregates once it is closed
+CLOSED_TRADE_SQL = "exit_price IS NOT NULL AND pnl IS NOT NULL"
+
+# Tail of a WITH statement that applies a ``changes`` CTE of signed trade rows
+# (-1 for the old version of a trade, +1 for the new one) to the aggregates
+AGGREGATE_DELTA_SQL = """
+    daily AS (
+        INSERT INTO daily_pair_stats AS s (
+            day, user_id, pair, trades, wins, losses, total_pnl,
+            gross_profit, gross_loss, total_pnl_pct, volume, tagged_trades
+        )
+        SELECT
+            entry_time::date, COALESCE(user_id, 0), pair,
+            SUM(sign),
+            SUM(sign * (pnl > 0)::int),
+            SUM(sign * (pnl < 0)::int),
+            SUM(sign * pnl),
+            SUM(sign * GREATEST(pnl, 0)),
+            SUM(sign * LEAST(pnl, 0)),
+            SUM(sign * COALESCE(pnl_pct, 0)),
+            SUM(sign * size * entry_price),
+            SUM(sign * (COALESCE(cardinality(tags), 0) > 0)::int)
+        FROM changes
+        GROUP BY 1, 2, 3
+        ON CONFLICT (day, user_id, pair) DO UPDATE SET
+            trades = s.trades + EXCLUDED.trades,
+            wins = s.wins + EXCLUDED.wins,
+            losses = s.losses + EXCLUDED.losses,
+            total_pnl = s.total_pnl + EXCLUDED.total_pnl,
+            gross_profit = s.gross_profit + EXCLUDED.gross_profit,
+            gross_loss = s.gross_loss + EXCLUDED.gross_loss,
+            total_pnl_pct = s.total_pnl_pct + EXCLUDED.total_pnl_pct,
+            volume = s.volume + EXCLUDED.volume,
+            tagged_trades = s.tagged_trades + EXCLUDED.tagged_trades
+    )
+    INSERT INTO tag_stats AS t (user_id, tag, trades, wins, losses, total_pnl, total_pnl_pct)
+    SELECT
+        COALESCE(user_id, 0), tag,
+        SUM(sign),
+        SUM(sign * (pnl > 0)::int),
+        SUM(sign * (pnl < 0)::int),
+        SUM(sign * pnl),
+        SUM(sign * COALESCE(pnl_pct, 0))
+    FROM changes CROSS JOIN LATERAL unnest(tags) AS tag
+    GROUP BY 1, 2
+    ON CONFLICT (user_id, tag) DO UPDATE SET
+        trades = t.trades + EXCLUDED.trades,
+        wins = t.wins + EXCLUDED.wins,
+        losses = t.losses + EXCLUDED.losses,
+        total_pnl = t.total_pnl + EXCLUDED.total_pnl,
+        total_pnl_pct = t.total_pnl_pct + EXCLUDED.total_pnl_pct
+"""
+
+
+def trade_aggregate_update_sql(set_clause: str, where_clause: str) -> str:
+    """Build an UPDATE on trades that also moves the trade's aggregate contribution.
+    
+    The old version of the row is subtracted and the new one added in the same
+    statement, so re-closing a trade or re-tagging it never double counts.
+    """
+    return f"""
+        WITH old AS (
+            SELECT {TRADE_STATS_COLUMNS} FROM trades
+            WHERE {where_clause}
+            FOR UPDATE
+        ), updated AS (
+            UPDATE trades SET {set_clause}
+            WHERE {where_clause}
+            RETURNING {TRADE_STATS_COLUMNS}
+        ), changes AS (
+            SELECT -1 AS sign, * FROM old WHERE {CLOSED_TRADE_SQL}
+            UNION ALL
+            SELECT 1 AS sign, * FROM updated WHERE {CLOSED_TRADE_SQL}
+        ),
+        {AGGREGATE_DELTA_SQL}
+    """
+
+
+# entry_time is part of the key so the update only touches the trade's own partition
+UPDATE_TRADE_SQL = trade_aggregate_update_sql(
+    "exit_price = $1, exit_time = $2, pnl = $3, pnl_pct = $4, exit_reason = $5",
+    "id = $6 AND entry_time = $7"
+)
+
+INSERT_LOG_SQL = """
+    INSERT INTO system_logs (log_level, message, details, created_at)
+    VALUES ($1, $2, $3, $4)
+"""
+
+UPSERT_METRICS_SQL = """
+    INSERT INTO performance_metrics (
+        date, account_balance, daily_pnl, total_trades,
+        winning_trades, losing_trades, win_rate,
+        profit_factor, sharpe_ratio, max_drawdown
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
+    ON CONFLICT (date) DO UPDATE SET
+        account_balance = EXCLUDED.account_balance,
+        daily_pnl = EXCLUDED.daily_pnl,
+        total_trades = EXCLUDED.total_trades,
+        winning_trades = EXCLUDED.winning_trades,
+        losing_trades = EXCLUDED.losing_trades,
+        win_rate = EXCLUDED.win_rate,
+        profit_factor = EXCLUDED.profit_factor,
+        sharpe_ratio = EXCLUDED.sharpe_ratio,
+        max_drawdown = EXCLUDED.max_drawdown
+"""
+
+# Tax lot changes from monitoring.tax_lots.TaxLotEngine; a lot's insert,
+# quantity updates and delete are applied in that order
+INSERT_TAX_LOT_SQL = """
+    INSERT INTO tax_open_lots (id, user_id, method, pair, direction, quantity, price, opened_at, trade_id)
+    VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
+"""
+
+UPDATE_TAX_LOT_SQL = "UPDATE tax_open_lots SET quantity = $1 WHERE id = $2"
+
+DELETE_TAX_LOT_SQL = "DELETE FROM tax_open_lots WHERE id = $1"
+
+INSERT_REALIZED_LOT_SQL = """
+    INSERT INTO tax_realized_lots (
+        user_id, method, pair, direction, quantity, opened_at, closed_at,
+        open_price, close_price, cost_basis, proceeds, gain, term,
+        open_trade_id, close_trade_id
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+"""
+
+# Trade columns needed to replay fills into the tax lot engine
+TAX_TRADE_COLUMNS = "id, user_id, pair, side, size, entry_price, exit_price, entry_time, exit_time"
+
+# Every filled unit either opens a lot or is matched against one, so per pair
+# the trades' filled quantity equals twice the realized quantity plus what is
+# still open, under every matching method
+TAX_FILLED_QUANTITY_SQL = """
+    SELECT pair, SUM(size) + SUM(CASE WHEN exit_price IS NOT NULL AND exit_time IS NOT NULL THEN size ELSE 0 END)
+        AS quantity
+    FROM trades GROUP BY pair
+"""
+TAX_LOT_QUANTITY_SQL = """
+    SELECT method, pair, SUM(quantity) AS quantity FROM (
+        SELECT method, pair, 2 * quantity AS quantity FROM tax_realized_lots
+        UNION ALL
+        SELECT method, pair, quantity FROM tax_open_lots
+    ) lots GROUP BY method, pair
+"""
+
+# Columns returned when listing backtests; the results blob lives in backtest_results
+BACKTEST_SUMMARY_COLUMNS = """
+    id, user_id, name, pair, start_date, end_date,
+    initial_balance, final_balance, total_pnl,
+    total_trades, winning_trades, losing_trades,
+    win_rate, profit_factor, max_drawdown, roi_pct, created_at
+"""
+
+
+def compress_backtest_results(results_json: str) -> Tuple[str, bytes]:
+    """Encode serialized backtest results for backtest_results, returning (encoding, data)."""
+    return 'json+zlib', zlib.compress(results_json.encode('utf-8'), 6)
+
+
+def decompress_backtest_results(encoding: str, data: bytes) -> Any:
+    """Decode a backtest_results blob back into the results dict."""
+    if encoding == 'json+zlib':
+        data = zlib.decompress(data)
+    elif encoding != 'json':
+        raise ValueError(f"Unknown backtest results encoding: {encoding}")
+    return json.loads(bytes(data).decode('utf-8'))
+
+
+WRITE_STATEMENTS = {
+    'insert_trade': INSERT_TRADE_SQL,
+    'update_trade': UPDATE_TRADE_SQL,
+    'log_event': INSERT_LOG_SQL,
+    'performance_metrics': UPSERT_METRICS_SQL,
+    LOT_OPENED: INSERT_TAX_LOT_SQL,
+    LOT_REDUCED: UPDATE_TAX_LOT_SQL,
+    LOT_CLOSED: DELETE_TAX_LOT_SQL,
+    LOT_REALIZED: INSERT_REALIZED_LOT_SQL,
+}
+
+
+def tax_lot_write_args(kind: str, item) -> tuple:
+    """Arguments for the write statement of one tax lot change (captured now, lots keep changing)."""
+    if kind == LOT_OPENED:
+        return (item.id, item.user_id, item.method, item.pair, item.direction,
+                item.quantity, item.price, item.opened_at, item.trade_id)
+    if kind == LOT_REDUCED:
+        return (item.quantity, item.id)
+    if kind == LOT_CLOSED:
+        return (item.id,)
+    return tuple(item)
+
 
 class DatabaseManager:
     """Manages database connections and operations."""
     
+    # Statements behind the write kinds used by _write (overridden per backend)
+    write_statements = WRITE_STATEMENTS
+    
     def __init__(self, config=None):
         self.config = config or get_config()
         self.pool: Optional[asyncpg.Pool] = None
         self.initialized = False
+        
+        # Per-query latency stats, fed by a query logger on every pool connection
+        self.query_registry: Optional[QueryRegistry] = None
+        if getattr(self.config, 'DB_QUERY_STATS', False):
+            self.query_registry = QueryRegistry(
+                slow_query_ms=self.config.DB_SLOW_QUERY_MS,
+                explain=self.explain_query,
+                explain_interval=self.config.DB_EXPLAIN_INTERVAL_SECONDS,
+                max_queries=self.config.DB_QUERY_STATS_MAX
+            )
+            for name, sql in self.write_statements.items():
+                self.query_registry.register(name, sql)
+        
+        # Write-behind queue for trade, log and metrics writes
+        self.write_queue: Optional[WriteBehindQueue] = None
+        if getattr(self.config, 'DB_WRITE_BEHIND', False):
+            self.write_queue = WriteBehindQueue(
+                self.write_statements,
+                batch_size=self.config.DB_WRITE_BATCH_SIZE,
+                flush_interval=self.config.DB_WRITE_FLUSH_INTERVAL_MS / 1000,
+                max_queue_size=self.config.DB_WRITE_QUEUE_MAX,
+                journal_path=getattr(self.config, 'DB_WRITE_JOURNAL_PATH', None) or None,
+                max_retry_backoff=getattr(self.config, 'DB_WRITE_RETRY_MAX_BACKOFF_SECONDS', 60)
+            )
+        
+        # Trade ids reserved from the sequence so queued inserts can return an id immediately
+        self._trade_ids: deque = deque()
+        self._trade_id_lock = asyncio.Lock()
+        
+        # Bumped whenever a trade is closed, so derived caches know to recompute
+        self.closed_trades_version = 0
+        
+        # Open tax lots per method; matched lots are persisted as trades close
+        self.tax_lots = TaxLotEngine(getattr(self.config, 'TAX_LOT_METHODS', TAX_LOT_METHODS))
+        # Open trades' fill details, so closing one needs no lookup
+        self._open_trade_fills: Dict[int, Dict[str, Any]] = {}
+        # Held while fills are matched and while lots are rebuilt, so a rebuild never interleaves with a fill
+        self._tax_lock = asyncio.Lock()
+        # Set when a fill could not be recorded; the lots are rebuilt from the trades
+        self.tax_lots_stale = False
+        self._tax_rebuild_task: Optional[asyncio.Task] = None
+        
+        # User rows keyed by ('id', user_id) plus an ('email', email) -> user_id index
+        self.user_cache: Optional[TTLCache] = None
+        if getattr(self.config, 'USER_CACHE_TTL_SECONDS', 0) > 0:
+            self.user_cache = TTLCache(
+                max_size=self.config.USER_CACHE_MAX_SIZE,
+                ttl=self.config.USER_CACHE_TTL_SECONDS
+            )
     
     async def initialize(self) -> bool:
-        """Initialize database connection pool and create tables."""
+        """Initialize database connection pool and apply pending schema migrations."""
         try:
             self.pool = await asyncpg.create_pool(
                 host=self.config.DB_HOST,
@@ -29,13 +298,26 @@ class DatabaseManager:
                 user=self.config.DB_USER,
                 password=self.config.DB_PASSWORD,
                 min_size=2,
-                max_size=10
+                max_size=10,
+                statement_cache_size=self.config.DB_STATEMENT_CACHE_SIZE,
+                init=self._init_connection
             )
             
             async with self.pool.acquire() as conn:
-                await self._create_tables(conn)
+                applied = await MigrationRunner().migrate(conn)
+                if applied:
+                    logger.info(f"Applied schema migrations: {applied}")
+                await self._move_legacy_rows(conn)
+                await self._maintain_partitions(conn)
+            
+            if self.write_queue:
+                self.write_queue.start(self.pool)
+                # Apply writes journaled while the database was unreachable
+                await self.write_queue.flush()
             
             self.initialized = True
+            await self._backfill_aggregates()
+            await self._load_tax_lots()
             logger.info("Database initialized successfully")
             return True
             
@@ -44,297 +326,170 @@ class DatabaseManager:
             self.initialized = False
             return False
     
-    async def _create_tables(self, conn):
-        """Create database tables if they don't exist."""
-        # Users table for authentication
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                email VARCHAR(255) NOT NULL UNIQUE,
-                password_hash VARCHAR(255) NOT NULL,
-                full_name VARCHAR(255),
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_login TIMESTAMP,
-                onboarding_completed BOOLEAN DEFAULT FALSE,
-                onboarding_completed_at TIMESTAMP,
-                disclaimer_acknowledged_at TIMESTAMP
-            )
-        """)
-        
-        # Add onboarding columns if they don't exist (for existing databases)
-        try:
-            await conn.execute("""
-                ALTER TABLE users 
-                ADD COLUMN IF NOT EXISTS onboarding_completed BOOLEAN DEFAULT FALSE
-            """)
-        except Exception as e:
-            logger.debug(f"onboarding_completed column may already exist: {e}")
-        
-        try:
-            await conn.execute("""
-                ALTER TABLE users 
-                ADD COLUMN IF NOT EXISTS onboarding_completed_at TIMESTAMP
-            """)
-        except Exception as e:
-            logger.debug(f"onboarding_completed_at column may already exist: {e}")
+    async def _init_connection(self, conn):
+        """Set up a new pool connection."""
+        if self.query_registry is not None:
+            conn.add_query_logger(self.query_registry.on_query)
+    
+    async def _explain(self, conn, query: str, args: tuple) -> Any:
+        """Get a query's plan without running it."""
+        plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+        return json.loads(plan) if isinstance(plan, str) else plan
+    
+    async def explain_query(self, query: str, args: tuple = ()) -> Any:
+        """Get the plan for a query on a pool connection."""
+        async with self.pool.acquire() as conn:
+            return await self._explain(conn, query, args)
+    
+    async def _move_legacy_rows(self, conn):
+        """Finish converting tables to partitions by moving their old rows over in batches."""
+        tables = [
+            (table, key) for table, key in PARTITIONED_TABLES.items()
+            if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", legacy_table(table))
+        ]
+        if not tables:
+            return
         
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
         try:
-            await conn.execute("""
-                ALTER TABLE users 
-                ADD COLUMN IF NOT EXISTS disclaimer_acknowledged_at TIMESTAMP
-            """)
-        except Exception as e:
-            logger.debug(f"disclaimer_acknowledged_at column may already exist: {e}")
-        
-        # Trades table - check if user_id column exists, add if not
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS trades (
-                id SERIAL PRIMARY KEY,
-                pair VARCHAR(20) NOT NULL,
-                side VARCHAR(10) NOT NULL,
-                entry_price DECIMAL(20, 8) NOT NULL,
-                exit_price DECIMAL(20, 8),
-                size DECIMAL(20, 8) NOT NULL,
-                entry_time TIMESTAMP NOT NULL,
-                exit_time TIMESTAMP,
-                stop_loss DECIMAL(20, 8),
-                take_profit DECIMAL(20, 8),
-                pnl DECIMAL(20, 8),
-                pnl_pct DECIMAL(10, 4),
-                exit_reason VARCHAR(50),
-                order_id VARCHAR(100),
-                confidence_score DECIMAL(5, 2),
-                notes TEXT,
-                tags TEXT[],
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            for table, key in tables:
+                await move_legacy_rows(conn, table, key, self.config.DB_PARTITION_MOVE_BATCH_SIZE)
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+    
+    async def _maintain_partitions(self, conn) -> Dict[str, Any]:
+        """Create upcoming month partitions and expire old log partitions."""
+        created = 0
+        for table, key in PARTITIONED_TABLES.items():
+            created += await ensure_month_partitions(
+                conn, table, key, datetime.utcnow(), self.config.DB_PARTITION_MONTHS_AHEAD
             )
-        """)
-        
-        # Add journaling columns if they don't exist (for existing databases)
-        try:
-            await conn.execute("""
-                ALTER TABLE trades 
-                ADD COLUMN IF NOT EXISTS notes TEXT
-            """)
-        except Exception as e:
-            logger.debug(f"notes column may already exist: {e}")
-        
-        try:
-            await conn.execute("""
-                ALTER TABLE trades 
-                ADD COLUMN IF NOT EXISTS tags TEXT[]
-            """)
-        except Exception as e:
-            logger.debug(f"tags column may already exist: {e}")
+        expired = await expire_month_partitions(
+            conn, 'system_logs', 'created_at',
+            keep_months=self.config.LOG_RETENTION_MONTHS,
+            archive=self.config.LOG_RETENTION_ARCHIVE
+        )
+        return {'created': created, 'expired': expired}
+    
+    async def maintain_partitions(self) -> Optional[Dict[str, Any]]:
+        """Run partition maintenance (safe to call repeatedly; no-op when up to date)."""
+        if not self.initialized or not self.pool:
+            return None
         
-        # Add user_id column if it doesn't exist (for existing databases)
         try:
-            await conn.execute("""
-                ALTER TABLE trades 
-                ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
-            """)
+            async with self.pool.acquire() as conn:
+                return await self._maintain_partitions(conn)
         except Exception as e:
-            logger.debug(f"user_id column may already exist or users table not ready: {e}")
-            # If users table doesn't exist yet, we'll add it later - no error
-            pass
-        
-        # Performance metrics table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS performance_metrics (
-                id SERIAL PRIMARY KEY,
-                date DATE NOT NULL UNIQUE,
-                account_balance DECIMAL(20, 8) NOT NULL,
-                daily_pnl DECIMAL(20, 8) NOT NULL,
-                total_trades INTEGER NOT NULL,
-                winning_trades INTEGER NOT NULL,
-                losing_trades INTEGER NOT NULL,
-                win_rate DECIMAL(5, 2),
-                profit_factor DECIMAL(10, 4),
-                sharpe_ratio DECIMAL(10, 4),
-                max_drawdown DECIMAL(10, 4),
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # System logs table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS system_logs (
-                id SERIAL PRIMARY KEY,
-                log_level VARCHAR(20) NOT NULL,
-                message TEXT NOT NULL,
-                details JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Advanced orders table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS advanced_orders (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                order_id VARCHAR(255) NOT NULL UNIQUE,
-                order_type VARCHAR(50) NOT NULL,
-                pair VARCHAR(20) NOT NULL,
-                side VARCHAR(10) NOT NULL,
-                size DECIMAL(20, 8) NOT NULL,
-                filled_size DECIMAL(20, 8) DEFAULT 0,
-                status VARCHAR(20) NOT NULL,
-                order_data JSONB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                filled_at TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Grid trading strategies table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS grid_strategies (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                grid_id VARCHAR(255) NOT NULL UNIQUE,
-                pair VARCHAR(20) NOT NULL,
-                lower_price DECIMAL(20, 8) NOT NULL,
-                upper_price DECIMAL(20, 8) NOT NULL,
-                grid_count INTEGER NOT NULL,
-                order_size DECIMAL(20, 8) NOT NULL,
-                side VARCHAR(10) NOT NULL,
-                status VARCHAR(20) NOT NULL,
-                grid_data JSONB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # DCA strategies table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS dca_strategies (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                dca_id VARCHAR(255) NOT NULL UNIQUE,
-                pair VARCHAR(20) NOT NULL,
-                side VARCHAR(10) NOT NULL,
-                amount DECIMAL(20, 8) NOT NULL,
-                interval VARCHAR(20) NOT NULL,
-                total_amount DECIMAL(20, 8),
-                start_price DECIMAL(20, 8),
-                end_price DECIMAL(20, 8),
-                status VARCHAR(20) NOT NULL,
-                total_invested DECIMAL(20, 8) DEFAULT 0,
-                execution_count INTEGER DEFAULT 0,
-                strategy_data JSONB NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                next_execution TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Backtests table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS backtests (
-                id SERIAL PRIMARY KEY,
-                user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-                name VARCHAR(255),
-                pair VARCHAR(20) NOT NULL,
-                start_date TIMESTAMP NOT NULL,
-                end_date TIMESTAMP NOT NULL,
-                initial_balance DECIMAL(20, 8) NOT NULL,
-                final_balance DECIMAL(20, 8) NOT NULL,
-                total_pnl DECIMAL(20, 8) NOT NULL,
-                total_trades INTEGER NOT NULL,
-                winning_trades INTEGER NOT NULL,
-                losing_trades INTEGER NOT NULL,
-                win_rate DECIMAL(5, 2),
-                profit_factor DECIMAL(10, 4),
-                max_drawdown DECIMAL(10, 4),
-                roi_pct DECIMAL(10, 4),
-                results JSONB,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Create indexes
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_user_id ON trades(user_id);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_pair ON trades(pair);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_trades_entry_time ON trades(entry_time);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_performance_date ON performance_metrics(date);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_logs_level ON system_logs(log_level);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_backtests_user_id ON backtests(user_id);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_backtests_created_at ON backtests(created_at);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_advanced_orders_user_id ON advanced_orders(user_id);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_advanced_orders_status ON advanced_orders(status);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_advanced_orders_pair ON advanced_orders(pair);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_strategies_user_id ON grid_strategies(user_id);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_grid_strategies_status ON grid_strategies(status);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_dca_strategies_user_id ON dca_strategies(user_id);
-        """)
-        await conn.execute("""
-            CREATE INDEX IF NOT EXISTS idx_dca_strategies_status ON dca_strategies(status);
-        """)
-        
-        logger.info("Database tables created/verified")
+            logger.error(f"Failed to maintain partitions: {e}", exc_info=True)
+            return None
     
     async def close(self):
-        """Close database connection pool."""
+        """Flush queued writes and close database connection pool."""
+        if self._tax_rebuild_task:
+            await self._tax_rebuild_task
+        if self.write_queue:
+            await self.write_queue.stop()
         if self.pool:
             await self.pool.close()
             logger.info("Database connection pool closed")
     
+    async def flush_writes(self):
+        """Wait until all queued writes have been applied (or journaled while the database is unreachable)."""
+        if self.write_queue:
+            await self.write_queue.flush()
+    
+    def get_write_queue_stats(self) -> Optional[Dict[str, Any]]:
+        """Get write-behind queue metrics (None when writes are applied inline)."""
+        if not self.write_queue:
+            return None
+        stats = self.write_queue.get_stats()
+        stats['reserved_trade_ids'] = len(self._trade_ids)
+        return stats
+    
+    def get_query_stats(self, limit: int = 50, sort: str = 'total_ms') -> Optional[Dict[str, Any]]:
+        """Get per-query call counts, latency histograms and slow-query plans (None when disabled)."""
+        return self.query_registry.get_stats(limit, sort) if self.query_registry is not None else None
+    
+    def get_user_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get user cache hit-rate metrics (None when the cache is disabled)."""
+        return self.user_cache.get_stats() if self.user_cache is not None else None
+    
+    def _cached_user(self, user_id: Optional[int]) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached user row, if present."""
+        if self.user_cache is None or user_id is None:
+            return None
+        user = self.user_cache.get(('id', user_id))
+        return dict(user) if user else None
+    
+    def _cache_user(self, user: Dict[str, Any]):
+        """Cache a user row under its id and email."""
+        if self.user_cache is not None:
+            self.user_cache.set(('id', user['id']), dict(user))
+            self.user_cache.set(('email', user['email']), user['id'])
+    
+    def invalidate_user(self, user_id: int):
+        """Drop a user's cached row after it changes."""
+        if self.user_cache is not None:
+            self.user_cache.invalidate(('id', user_id))
+    
+    async def _write(self, kind: str, args: tuple):
+        """Queue a write, or apply it inline when write-behind is disabled."""
+        if self.write_queue:
+            await self.write_queue.put(kind, args)
+        else:
+            async with self.pool.acquire() as conn:
+                await conn.execute(self.write_statements[kind], *args)
+    
+    async def _next_trade_id(self) -> int:
+        """Get a trade id, reserving a block from the sequence when the local pool runs dry."""
+        if not self._trade_ids:
+            async with self._trade_id_lock:
+                if not self._trade_ids:
+                    async with self.pool.acquire() as conn:
+                        rows = await conn.fetch(
+                            "SELECT nextval(pg_get_serial_sequence('trades', 'id')) AS id FROM generate_series(1, $1)",
+                            max(1, getattr(self.config, 'DB_TRADE_ID_BLOCK_SIZE', 1))
+                        )
+                    self._trade_ids.extend(row['id'] for row in rows)
+        return self._trade_ids.popleft()
+    
     async def save_trade(self, trade_data: Dict[str, Any]) -> Optional[int]:
-        """Save a new trade to the database."""
+        """Save a new trade to the database.
+        
+        With write-behind enabled the id comes from a reserved block and the
+        INSERT is queued, so this only touches Postgres once per id block.
+        """
         if not self.initialized or not self.pool:
             logger.warning("Database not initialized, skipping trade save")
             return None
         
         try:
-            async with self.pool.acquire() as conn:
-                trade_id = await conn.fetchval("""
-                    INSERT INTO trades (
-                        pair, side, entry_price, size, entry_time,
-                        stop_loss, take_profit, order_id, confidence_score
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9)
-                    RETURNING id
-                """,
+            trade_id = await self._next_trade_id()
+            entry_time = trade_data.get('entry_time', datetime.utcnow())
+            fill = {
+                'pair': trade_data['pair'],
+                'side': trade_data['side'],
+                'size': trade_data['size'],
+                'entry_price': trade_data['entry_price'],
+                'entry_time': entry_time
+            }
+            async with self._tax_lock:
+                await self._write('insert_trade', (
+                    trade_id,
                     trade_data['pair'],
                     trade_data['side'],
                     trade_data['entry_price'],
                     trade_data['size'],
-                    trade_data.get('entry_time', datetime.utcnow()),
+                    entry_time,
                     trade_data.get('stop_loss'),
                     trade_data.get('take_profit'),
                     trade_data.get('order_id'),
                     trade_data.get('confidence_score')
-                )
-                logger.debug(f"Saved trade {trade_id} to database")
-                return trade_id
+                ))
+                self._open_trade_fills[trade_id] = fill
+                await self._record_tax_fills(trade_id, fill)
+            logger.debug(f"Saved trade {trade_id} to database")
+            return trade_id
         except Exception as e:
             logger.error(f"Failed to save trade: {e}", exc_info=True)
             return None
@@ -346,109 +501,367 @@ class DatabaseManager:
             return False
         
         try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    UPDATE trades SET
-                        exit_price = $1,
-                        exit_time = $2,
-                        pnl = $3,
-                        pnl_pct = $4,
-                        exit_reason = $5
-                    WHERE id = $6
-                """,
+            # Resolve the trade before queueing the exit, so a lookup can tell a first close from a re-close
+            fill = self._open_trade_fills.pop(trade_id, None)
+            if fill is None:
+                trade = await self._stored_trade(trade_id)
+                if trade is None:
+                    logger.warning(f"Trade {trade_id} not found, skipping update")
+                    return False
+                fill = trade if trade['exit_price'] is None else None
+                entry_time = trade['entry_time']
+            else:
+                entry_time = fill['entry_time']
+            exit_time = exit_data.get('exit_time', datetime.utcnow())
+            async with self._tax_lock:
+                await self._write('update_trade', (
                     exit_data.get('exit_price'),
-                    exit_data.get('exit_time', datetime.utcnow()),
+                    exit_time,
                     exit_data.get('pnl'),
                     exit_data.get('pnl_pct'),
                     exit_data.get('exit_reason'),
-                    trade_id
-                )
-                logger.debug(f"Updated trade {trade_id} with exit data")
-                return True
+                    trade_id,
+                    entry_time
+                ))
+                self.closed_trades_version += 1
+                if fill is not None and exit_data.get('exit_price') is not None:
+                    await self._record_tax_fills(trade_id, {
+                        **fill, 'exit_price': exit_data['exit_price'], 'exit_time': exit_time
+                    }, exit_only=True)
+            logger.debug(f"Updated trade {trade_id} with exit data")
+            return True
         except Exception as e:
             logger.error(f"Failed to update trade {trade_id}: {e}", exc_info=True)
             return False
     
-    async def get_recent_trades(self, limit: int = 50) -> List[Dict[str, Any]]:
-        """Fetch recent trades from database."""
+    async def _record_tax_fills(self, trade_id: int, trade: Dict[str, Any], exit_only: bool = False):
+        """
+        Match a trade's entry (or exit) fill against open tax lots and queue the lot changes.
+        
+        The trade write is already queued, so a failure here leaves the lots
+        behind the trades: they are marked stale and rebuilt from the trades.
+        """
+        try:
+            for time, order, side, quantity, price in trade_fills(trade):
+                if exit_only and order == 0:
+                    continue
+                for kind, item in self.tax_lots.record_fill(
+                    trade.get('user_id'), trade['pair'], side, quantity, price, time, trade_id
+                ):
+                    await self._write(kind, tax_lot_write_args(kind, item))
+        except Exception as e:
+            logger.error(f"Failed to record tax lots for trade {trade_id}, rebuilding them: {e}", exc_info=True)
+            self.tax_lots_stale = True
+            if self._tax_rebuild_task is None or self._tax_rebuild_task.done():
+                self._tax_rebuild_task = asyncio.create_task(self.rebuild_tax_lots())
+    
+    async def _stored_trade(self, trade_id: int) -> Optional[Dict[str, Any]]:
+        """Fill details of a trade this process has not seen open (None if missing)."""
+        await self.flush_writes()
+        async with self.pool.acquire() as conn:
+            row = await conn.fetchrow(f"SELECT {TAX_TRADE_COLUMNS} FROM trades WHERE id = $1", trade_id)
+        return self._row_to_trade(row) if row is not None else None
+    
+    async def _load_tax_lots(self):
+        """Resume the tax lot engine from tax_open_lots, rebuilding from trades if the lots disagree with them."""
+        try:
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch("SELECT * FROM tax_open_lots ORDER BY opened_at, id")
+            self.tax_lots.restore(
+                Lot(row['id'], row['user_id'], row['method'], row['pair'], row['direction'],
+                    float(row['quantity']), float(row['price']), row['opened_at'], row['trade_id'])
+                for row in rows
+            )
+        except Exception as e:
+            logger.error(f"Failed to load tax lots: {e}", exc_info=True)
+            self.tax_lots_stale = True
+        await self.reconcile_tax_lots()
+    
+    async def reconcile_tax_lots(self) -> Optional[Dict[str, Any]]:
+        """
+        Check the persisted tax lots against the trades and rebuild them if they disagree.
+        
+        Per pair and method, the trades' filled quantity must equal twice the
+        realized quantity plus the open quantity (see TAX_FILLED_QUANTITY_SQL).
+        A missed or doubled fill breaks that, as does a method with no lots.
+        
+        Returns:
+            Pairs checked, mismatched (method, pair) keys and whether lots were rebuilt (None on failure)
+        """
+        if not self.initialized or not self.pool:
+            return None
+        
+        try:
+            async with self._tax_lock:
+                await self.flush_writes()
+                async with self.pool.acquire() as conn:
+                    filled = {row['pair']: float(row['quantity']) for row in await conn.fetch(TAX_FILLED_QUANTITY_SQL)}
+                    lots = {(row['method'], row['pair']): float(row['quantity'])
+                            for row in await conn.fetch(TAX_LOT_QUANTITY_SQL)}
+                
+                pairs = set(filled) | {pair for _, pair in lots}
+                mismatched = [
+                    (method, pair) for method in self.tax_lots.methods for pair in sorted(pairs)
+                    if abs(filled.get(pair, 0.0) - lots.get((method, pair), 0.0)) > 1e-9 * max(1.0, filled.get(pair, 0.0))
+                ]
+                rebuilt = False
+                if mismatched or self.tax_lots_stale:
+                    logger.warning(f"Tax lots out of step with trades ({len(mismatched)} method/pair totals differ), rebuilding")
+                    rebuilt = await self._rebuild_tax_lots()
+            return {'pairs': len(pairs), 'mismatched': mismatched, 'rebuilt': rebuilt}
+        except Exception as e:
+            logger.error(f"Failed to reconcile tax lots: {e}", exc_info=True)
+            return None
+    
+    async def rebuild_tax_lots(self) -> bool:
+        """Recompute every tax lot by replaying all trade fills in time order."""
+        if not self.initialized or not self.pool:
+            return False
+        
+        async with self._tax_lock:
+            return await self._rebuild_tax_lots()
+    
+    async def _rebuild_tax_lots(self) -> bool:
+        """Rebuild tax lots (caller holds the tax lock)."""
+        try:
+            await self.flush_writes()
+            fills = []
+            async for trade in self.iter_trades(columns=TAX_TRADE_COLUMNS):
+                for time, order, side, quantity, price in trade_fills(trade):
+                    fills.append((time, order, trade['id'], trade['user_id'], trade['pair'], side, quantity, price))
+            fills.sort(key=lambda fill: fill[:3])
+            
+            engine = TaxLotEngine(self.tax_lots.methods)
+            realized = []
+            for time, _, trade_id, user_id, pair, side, quantity, price in fills:
+                realized.extend(
+                    tuple(item) for kind, item in engine.record_fill(user_id, pair, side, quantity, price, time, trade_id)
+                    if kind == LOT_REALIZED
+                )
+            open_lots = engine.open_lots()
+            
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    await conn.execute("DELETE FROM tax_open_lots")
+                    await conn.execute("DELETE FROM tax_realized_lots")
+                    await conn.executemany(INSERT_REALIZED_LOT_SQL, realized)
+                    await conn.executemany(INSERT_TAX_LOT_SQL, [tax_lot_write_args(LOT_OPENED, lot) for lot in open_lots])
+            
+            self.tax_lots = engine
+            self.tax_lots_stale = False
+            self._open_trade_fills.clear()
+            logger.info(f"Rebuilt tax lots: {len(realized)} realized, {len(open_lots)} open")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to rebuild tax lots: {e}", exc_info=True)
+            return False
+    
+    async def get_realized_lots(self, method: str, start: datetime, end: datetime,
+                                user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Get lots realized between start and end (inclusive) under a matching method."""
         if not self.initialized or not self.pool:
             return []
         
         try:
+            params: List[Any] = [method, start, end]
+            user_clause = ""
+            if user_id:
+                params.append(user_id)
+                user_clause = " AND user_id IN ($4, 0)"
             async with self.pool.acquire() as conn:
-                rows = await conn.fetch("""
-                    SELECT * FROM trades
-                    ORDER BY entry_time DESC
-                    LIMIT $1
-                """, limit)
-                
-                trades = []
-                from decimal import Decimal
-                for row in rows:
-                    trade = dict(row)
-                    # Convert Decimal to float
-                    for key, value in trade.items():
-                        if isinstance(value, Decimal):
-                            trade[key] = float(value)
-                        # Handle tags array
-                        if key == 'tags' and value is not None:
-                            trade[key] = list(value) if not isinstance(value, list) else value
-                        elif key == 'tags' and value is None:
-                            trade[key] = []
-                    trades.append(trade)
-                return trades
+                rows = await conn.fetch(f"""
+                    SELECT * FROM tax_realized_lots
+                    WHERE method = $1 AND closed_at >= $2 AND closed_at <= $3{user_clause}
+                    ORDER BY closed_at, id
+                """, *params)
+            return [self._row_to_trade(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to get realized tax lots: {e}", exc_info=True)
+            return []
+    
+    def _trade_update_sql(self, set_clause: str, where_clause: str) -> str:
+        """SQL for an UPDATE on trades that keeps the trade aggregates in step."""
+        return trade_aggregate_update_sql(set_clause, where_clause)
+    
+    @staticmethod
+    def _row_to_trade(row) -> Dict[str, Any]:
+        """Convert a trades row to a plain dict (Decimals as floats, tags as a list)."""
+        from decimal import Decimal
+        trade = dict(row)
+        for key, value in trade.items():
+            if isinstance(value, Decimal):
+                trade[key] = float(value)
+        if 'tags' in trade:
+            trade['tags'] = list(trade['tags']) if trade['tags'] is not None else []
+        return trade
+    
+    @staticmethod
+    def encode_trade_cursor(trade: Dict[str, Any]) -> str:
+        """Build a keyset pagination cursor from the last trade of a page."""
+        return f"{trade['entry_time'].isoformat()},{trade['id']}"
+    
+    @staticmethod
+    def decode_trade_cursor(cursor: str) -> Tuple[datetime, int]:
+        """Parse a cursor from encode_trade_cursor into an (entry_time, id) key.
+        
+        Raises:
+            ValueError: If the cursor is malformed
+        """
+        entry_time, _, trade_id = cursor.rpartition(',')
+        return datetime.fromisoformat(entry_time), int(trade_id)
+    
+    @staticmethod
+    def _trade_filters(user_id: Optional[int] = None, start_date: Optional[datetime] = None,
+                       end_date: Optional[datetime] = None, closed_only: bool = False,
+                       before: Optional[Tuple[datetime, int]] = None,
+                       after: Optional[Tuple[datetime, int]] = None) -> Tuple[str, List[Any]]:
+        """Build the WHERE clause and parameters shared by the trade queries."""
+        clauses = []
+        params: List[Any] = []
+        
+        if user_id:
+            params.append(user_id)
+            clauses.append(f"(user_id = ${len(params)} OR user_id IS NULL)")
+        if start_date:
+            params.append(start_date)
+            clauses.append(f"entry_time >= ${len(params)}")
+        if end_date:
+            params.append(end_date)
+            clauses.append(f"entry_time <= ${len(params)}")
+        if closed_only:
+            clauses.append("exit_price IS NOT NULL AND pnl IS NOT NULL")
+        # Keyset bounds use a row comparison so (entry_time, id) ties stay stable
+        if before:
+            params.extend(before)
+            clauses.append(f"(entry_time, id) < (${len(params) - 1}, ${len(params)})")
+        if after:
+            params.extend(after)
+            clauses.append(f"(entry_time, id) > (${len(params) - 1}, ${len(params)})")
+        
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        return where, params
+    
+    async def get_recent_trades(self, limit: int = 50, before: Optional[Tuple[datetime, int]] = None,
+                                user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Fetch recent trades from database, newest first.
+        
+        Args:
+            limit: Page size
+            before: Keyset cursor (entry_time, id); only trades older than it are returned
+            user_id: Optional user filter
+        """
+        if not self.initialized or not self.pool:
+            return []
+        
+        try:
+            where, params = self._trade_filters(user_id=user_id, before=before)
+            params.append(limit)
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT * FROM trades{where}
+                    ORDER BY entry_time DESC, id DESC
+                    LIMIT ${len(params)}
+                """, *params)
+                return [self._row_to_trade(row) for row in rows]
         except Exception as e:
             logger.error(f"Failed to fetch recent trades: {e}", exc_info=True)
             return []
     
-    async def get_trades_with_date_range(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None, user_id: Optional[int] = None) -> List[Dict[str, Any]]:
-        """Fetch trades with optional date range filtering."""
+    async def get_trades_with_date_range(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                                         user_id: Optional[int] = None, limit: Optional[int] = None,
+                                         before: Optional[Tuple[datetime, int]] = None) -> List[Dict[str, Any]]:
+        """Fetch trades with optional date range filtering, newest first.
+        
+        Pass ``limit`` (and ``before`` for subsequent pages) to page through
+        large histories; use iter_trades to process every row in bounded memory.
+        """
         if not self.initialized or not self.pool:
             return []
         
         try:
+            where, params = self._trade_filters(user_id, start_date, end_date, before=before)
+            query = f"SELECT * FROM trades{where} ORDER BY entry_time DESC, id DESC"
+            if limit:
+                params.append(limit)
+                query += f" LIMIT ${len(params)}"
+            
             async with self.pool.acquire() as conn:
-                query = "SELECT * FROM trades WHERE 1=1"
-                params = []
-                param_index = 1
-                
-                if user_id:
-                    query += f" AND (user_id = ${param_index} OR user_id IS NULL)"
-                    params.append(user_id)
-                    param_index += 1
-                
-                if start_date:
-                    query += f" AND entry_time >= ${param_index}"
-                    params.append(start_date)
-                    param_index += 1
-                
-                if end_date:
-                    query += f" AND entry_time <= ${param_index}"
-                    params.append(end_date)
-                    param_index += 1
-                
-                query += " ORDER BY entry_time DESC"
-                
                 rows = await conn.fetch(query, *params)
-                trades = []
-                from decimal import Decimal
-                for row in rows:
-                    trade = dict(row)
-                    # Convert Decimal to float
-                    for key, value in trade.items():
-                        if isinstance(value, Decimal):
-                            trade[key] = float(value)
-                        # Handle tags array
-                        if key == 'tags' and value is not None:
-                            trade[key] = list(value) if not isinstance(value, list) else value
-                        elif key == 'tags' and value is None:
-                            trade[key] = []
-                    trades.append(trade)
-                return trades
+                return [self._row_to_trade(row) for row in rows]
         except Exception as e:
             logger.error(f"Failed to fetch trades with date range: {e}", exc_info=True)
             return []
     
+    async def get_closed_trades_by_exit(self, after: Optional[Tuple[datetime, int]] = None,
+                                        user_id: Optional[int] = None, limit: int = 1000,
+                                        columns: str = '*') -> List[Dict[str, Any]]:
+        """Fetch closed trades in exit order, oldest first.
+        
+        Args:
+            after: Keyset cursor (exit_time, id); only trades that closed after it are returned
+            user_id: Optional user filter
+            limit: Page size
+            columns: Trusted SQL column list (must include exit_time and id to page)
+        """
+        if not self.initialized or not self.pool:
+            return []
+        
+        try:
+            where, params = self._trade_filters(user_id=user_id, closed_only=True)
+            where += " AND exit_time IS NOT NULL"
+            if after:
+                params.extend(after)
+                where += f" AND (exit_time, id) > (${len(params) - 1}, ${len(params)})"
+            params.append(limit)
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT {columns} FROM trades{where}
+                    ORDER BY exit_time, id
+                    LIMIT ${len(params)}
+                """, *params)
+                return [self._row_to_trade(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to fetch closed trades: {e}", exc_info=True)
+            return []
+    
+    async def iter_trades(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                          user_id: Optional[int] = None, closed_only: bool = False,
+                          newest_first: bool = False, batch_size: int = 1000,
+                          columns: str = '*') -> AsyncIterator[Dict[str, Any]]:
+        """Stream trades through a server-side cursor.
+        
+        Rows are fetched ``batch_size`` at a time, so memory stays bounded no
+        matter how many trades match. Trades are ordered by (entry_time, id),
+        oldest first unless ``newest_first`` is set. ``columns`` is a trusted
+        SQL column list, never user input.
+        """
+        if not self.initialized or not self.pool:
+            return
+        
+        where, params = self._trade_filters(user_id, start_date, end_date, closed_only=closed_only)
+        direction = 'DESC' if newest_first else 'ASC'
+        query = f"SELECT {columns} FROM trades{where} ORDER BY entry_time {direction}, id {direction}"
+        
+        async with self.pool.acquire() as conn:
+            # asyncpg cursors only live inside a transaction
+            async with conn.transaction(readonly=True):
+                async for row in conn.cursor(query, *params, prefetch=batch_size):
+                    yield self._row_to_trade(row)
+    
+    async def count_trades(self, start_date: Optional[datetime] = None, end_date: Optional[datetime] = None,
+                           user_id: Optional[int] = None) -> int:
+        """Count trades matching the same filters as get_trades_with_date_range."""
+        if not self.initialized or not self.pool:
+            return 0
+        
+        try:
+            where, params = self._trade_filters(user_id, start_date, end_date)
+            async with self.pool.acquire() as conn:
+                return await conn.fetchval(f"SELECT COUNT(*) FROM trades{where}", *params)
+        except Exception as e:
+            logger.error(f"Failed to count trades: {e}", exc_info=True)
+            return 0
+    
     async def update_trade_journal(self, trade_id: int, notes: Optional[str] = None, tags: Optional[List[str]] = None, user_id: Optional[int] = None) -> bool:
         """Update trade notes and/or tags."""
         if not self.initialized or not self.pool:
@@ -475,14 +888,15 @@ class DatabaseManager:
                     return False
                 
                 if user_id:
-                    query = f"UPDATE trades SET {', '.join(set_clauses)} WHERE id = ${param_index} AND (user_id = ${param_index + 1} OR user_id IS NULL)"
+                    where_clause = f"id = ${param_index} AND (user_id = ${param_index + 1} OR user_id IS NULL)"
                     params.append(trade_id)
                     params.append(user_id)
                 else:
-                    query = f"UPDATE trades SET {', '.join(set_clauses)} WHERE id = ${param_index}"
+                    where_clause = f"id = ${param_index}"
                     params.append(trade_id)
                 
-                await conn.execute(query, *params)
+                # Retagging a closed trade moves its contribution between tag_stats rows
+                await conn.execute(self._trade_update_sql(', '.join(set_clauses), where_clause), *params)
                 logger.debug(f"Updated journal for trade {trade_id}")
                 return True
         except Exception as e:
@@ -508,21 +922,7 @@ class DatabaseManager:
                     """, trade_id)
                 
                 if row:
-                    trade = dict(row)
-                    # Convert Decimal to float and handle tags array
-                    from decimal import Decimal
-                    for key, value in trade.items():
-                        if isinstance(value, Decimal):
-                            trade[key] = float(value)
-                        # Tags come as a list from PostgreSQL, ensure it's a proper list
-                        if key == 'tags' and value is not None:
-                            if isinstance(value, list):
-                                trade[key] = value
-                            else:
-                                trade[key] = list(value) if value else []
-                        elif key == 'tags' and value is None:
-                            trade[key] = []
-                    return trade
+                    return self._row_to_trade(row)
                 return None
         except Exception as e:
             logger.error(f"Failed to get trade by ID: {e}", exc_info=True)
@@ -564,74 +964,211 @@ class DatabaseManager:
             logger.error(f"Failed to fetch trades with tags: {e}", exc_info=True)
             return []
     
+    @staticmethod
+    def _stats_user_filter(user_id: Optional[int] = None) -> Tuple[str, List[Any]]:
+        """WHERE clause for aggregate rows of a user plus trades without a user (stored as 0)."""
+        if not user_id:
+            return "", []
+        return " WHERE user_id IN ($1, 0)", [user_id]
+    
     async def get_journal_analytics(self, user_id: Optional[int] = None) -> Dict[str, Any]:
-        """Get analytics for trade journal (tag statistics, pattern recognition)."""
+        """Get analytics for trade journal (tag statistics, pattern recognition).
+        
+        Reads the pre-aggregated tag_stats rows, so the cost depends on the
+        number of distinct tags rather than the number of trades.
+        """
         if not self.initialized or not self.pool:
             return {}
         
         try:
+            where, params = self._stats_user_filter(user_id)
             async with self.pool.acquire() as conn:
-                # Get all trades with tags
-                if user_id:
-                    rows = await conn.fetch("""
-                        SELECT tags, pnl, pnl_pct, exit_reason
-                        FROM trades
-                        WHERE (user_id = $1 OR user_id IS NULL)
-                        AND tags IS NOT NULL
-                        AND array_length(tags, 1) > 0
-                    """, user_id)
-                else:
-                    rows = await conn.fetch("""
-                        SELECT tags, pnl, pnl_pct, exit_reason
-                        FROM trades
-                        WHERE tags IS NOT NULL
-                        AND array_length(tags, 1) > 0
-                    """)
-                
-                # Aggregate tag statistics
-                tag_stats = {}
-                from decimal import Decimal
-                
-                for row in rows:
-                    tags = row['tags'] or []
-                    pnl = float(row['pnl']) if row['pnl'] else 0
-                    pnl_pct = float(row['pnl_pct']) if row['pnl_pct'] else 0
-                    
-                    for tag in tags:
-                        if tag not in tag_stats:
-                            tag_stats[tag] = {
-                                'count': 0,
-                                'wins': 0,
-                                'losses': 0,
-                                'total_pnl': 0.0,
-                                'total_pnl_pct': 0.0,
-                                'avg_pnl_pct': 0.0,
-                                'win_rate': 0.0
-                            }
-                        
-                        tag_stats[tag]['count'] += 1
-                        tag_stats[tag]['total_pnl'] += pnl
-                        tag_stats[tag]['total_pnl_pct'] += pnl_pct
-                        
-                        if pnl > 0:
-                            tag_stats[tag]['wins'] += 1
-                        elif pnl < 0:
-                            tag_stats[tag]['losses'] += 1
-                
-                # Calculate win rates and averages
-                for tag, stats in tag_stats.items():
-                    if stats['count'] > 0:
-                        stats['win_rate'] = (stats['wins'] / stats['count']) * 100
-                        stats['avg_pnl_pct'] = stats['total_pnl_pct'] / stats['count']
-                
-                return {
-                    'tag_statistics': tag_stats,
-                    'total_tagged_trades': len(rows)
+                rows = await conn.fetch(f"""
+                    SELECT tag, SUM(trades) AS trades, SUM(wins) AS wins, SUM(losses) AS losses,
+                           SUM(total_pnl) AS total_pnl, SUM(total_pnl_pct) AS total_pnl_pct
+                    FROM tag_stats{where}
+                    GROUP BY tag
+                    HAVING SUM(trades) > 0
+                """, *params)
+                total_tagged_trades = await conn.fetchval(f"""
+                    SELECT COALESCE(SUM(tagged_trades), 0) FROM daily_pair_stats{where}
+                """, *params)
+            
+            tag_stats = {}
+            for row in rows:
+                count = int(row['trades'])
+                total_pnl_pct = float(row['total_pnl_pct'])
+                tag_stats[row['tag']] = {
+                    'count': count,
+                    'wins': int(row['wins']),
+                    'losses': int(row['losses']),
+                    'total_pnl': float(row['total_pnl']),
+                    'total_pnl_pct': total_pnl_pct,
+                    'avg_pnl_pct': total_pnl_pct / count,
+                    'win_rate': (int(row['wins']) / count) * 100
                 }
+            
+            return {
+                'tag_statistics': tag_stats,
+                'total_tagged_trades': int(total_tagged_trades)
+            }
         except Exception as e:
             logger.error(f"Failed to get journal analytics: {e}", exc_info=True)
             return {}
     
+    async def get_pair_stats(self, user_id: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """Get closed-trade totals per pair from daily_pair_stats."""
+        if not self.initialized or not self.pool:
+            return {}
+        
+        try:
+            where, params = self._stats_user_filter(user_id)
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT pair, SUM(trades) AS trades, SUM(wins) AS wins, SUM(losses) AS losses,
+                           SUM(total_pnl) AS total_pnl, SUM(volume) AS volume
+                    FROM daily_pair_stats{where}
+                    GROUP BY pair
+                    HAVING SUM(trades) > 0
+                """, *params)
+            return {
+                row['pair']: {
+                    'trades': int(row['trades']),
+                    'wins': int(row['wins']),
+                    'losses': int(row['losses']),
+                    'total_pnl': float(row['total_pnl']),
+                    'volume': float(row['volume'])
+                }
+                for row in rows
+            }
+        except Exception as e:
+            logger.error(f"Failed to get pair stats: {e}", exc_info=True)
+            return {}
+    
+    async def get_streak_stats(self, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Get win/loss streaks over closed trades in entry order.
+        
+        Streaks are not additive across days, so they are computed in Postgres
+        with a gaps-and-islands window query instead of in Python.
+        """
+        empty = {'win_streak': 0, 'loss_streak': 0, 'current_streak': 0, 'current_streak_type': None}
+        if not self.initialized or not self.pool:
+            return empty
+        
+        try:
+            where, params = self._trade_filters(user_id=user_id, closed_only=True)
+            async with self.pool.acquire() as conn:
+                row = await conn.fetchrow(f"""
+                    WITH ordered AS (
+                        SELECT entry_time, id, pnl > 0 AS win,
+                               ROW_NUMBER() OVER (ORDER BY entry_time, id)
+                               - ROW_NUMBER() OVER (PARTITION BY pnl > 0 ORDER BY entry_time, id) AS grp
+                        FROM trades{where}
+                    ), streaks AS (
+                        SELECT win, COUNT(*) AS length, MAX(entry_time) AS last_time, MAX(id) AS last_id
+                        FROM ordered
+                        GROUP BY win, grp
+                    ), last_streak AS (
+                        SELECT win, length FROM streaks ORDER BY last_time DESC, last_id DESC LIMIT 1
+                    )
+                    SELECT
+                        COALESCE((SELECT MAX(length) FROM streaks WHERE win), 0) AS win_streak,
+                        COALESCE((SELECT MAX(length) FROM streaks WHERE NOT win), 0) AS loss_streak,
+                        (SELECT length FROM last_streak) AS current_streak,
+                        (SELECT win FROM last_streak) AS current_win
+                """, *params)
+            
+            if not row or row['current_streak'] is None:
+                return empty
+            return {
+                'win_streak': int(row['win_streak']),
+                'loss_streak': int(row['loss_streak']),
+                'current_streak': int(row['current_streak']),
+                'current_streak_type': 'win' if row['current_win'] else 'loss'
+            }
+        except Exception as e:
+            logger.error(f"Failed to get streak stats: {e}", exc_info=True)
+            return empty
+    
+    async def repair_aggregates(self, since: Optional[date] = None) -> bool:
+        """Recompute daily_pair_stats and tag_stats from the trades table.
+        
+        Args:
+            since: Only rebuild daily rows from this entry date on (None rebuilds everything).
+                   tag_stats is not date-keyed and is always rebuilt; it only covers
+                   manually tagged trades, so this stays cheap.
+        """
+        if not self.initialized or not self.pool:
+            return False
+        
+        daily_filter = f"{CLOSED_TRADE_SQL} AND ($1::date IS NULL OR entry_time >= $1::date)"
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.transaction():
+                    # Block concurrent aggregate deltas (not trade writes) so every
+                    # trade is counted exactly once: either in this rebuild or by
+                    # an update that commits after it
+                    await conn.execute("LOCK TABLE daily_pair_stats, tag_stats IN SHARE ROW EXCLUSIVE MODE")
+                    
+                    await conn.execute(
+                        "DELETE FROM daily_pair_stats WHERE $1::date IS NULL OR day >= $1::date", since
+                    )
+                    await conn.execute(f"""
+                        INSERT INTO daily_pair_stats (
+                            day, user_id, pair, trades, wins, losses, total_pnl,
+                            gross_profit, gross_loss, total_pnl_pct, volume, tagged_trades
+                        )
+                        SELECT
+                            entry_time::date, COALESCE(user_id, 0), pair,
+                            COUNT(*),
+                            COUNT(*) FILTER (WHERE pnl > 0),
+                            COUNT(*) FILTER (WHERE pnl < 0),
+                            SUM(pnl),
+                            SUM(GREATEST(pnl, 0)),
+                            SUM(LEAST(pnl, 0)),
+                            SUM(COALESCE(pnl_pct, 0)),
+                            SUM(size * entry_price),
+                            COUNT(*) FILTER (WHERE COALESCE(cardinality(tags), 0) > 0)
+                        FROM trades
+                        WHERE {daily_filter}
+                        GROUP BY 1, 2, 3
+                    """, since)
+                    
+                    await conn.execute("DELETE FROM tag_stats")
+                    await conn.execute(f"""
+                        INSERT INTO tag_stats (user_id, tag, trades, wins, losses, total_pnl, total_pnl_pct)
+                        SELECT
+                            COALESCE(user_id, 0), tag,
+                            COUNT(*),
+                            COUNT(*) FILTER (WHERE pnl > 0),
+                            COUNT(*) FILTER (WHERE pnl < 0),
+                            SUM(pnl),
+                            SUM(COALESCE(pnl_pct, 0))
+                        FROM trades CROSS JOIN LATERAL unnest(tags) AS tag
+                        WHERE {CLOSED_TRADE_SQL}
+                        GROUP BY 1, 2
+                    """)
+            logger.info(f"Rebuilt trade aggregates{f' since {since}' if since else ''}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to repair trade aggregates: {e}", exc_info=True)
+            return False
+    
+    async def _backfill_aggregates(self):
+        """Populate the aggregate tables the first time they are seen empty."""
+        try:
+            async with self.pool.acquire() as conn:
+                needs_backfill = await conn.fetchval(f"""
+                    SELECT NOT EXISTS (SELECT 1 FROM daily_pair_stats)
+                       AND EXISTS (SELECT 1 FROM trades WHERE {CLOSED_TRADE_SQL})
+                """)
+        except Exception as e:
+            logger.error(f"Failed to check trade aggregates: {e}", exc_info=True)
+            return
+        if needs_backfill:
+            logger.info("Backfilling trade aggregates from existing trades...")
+            await self.repair_aggregates()
+    
     async def save_performance_metrics(self, metrics: Dict[str, Any]) -> bool:
         """Save daily performance metrics."""
         if not self.initialized or not self.pool:
@@ -639,37 +1176,20 @@ class DatabaseManager:
             return False
         
         try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO performance_metrics (
-                        date, account_balance, daily_pnl, total_trades,
-                        winning_trades, losing_trades, win_rate,
-                        profit_factor, sharpe_ratio, max_drawdown
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10)
-                    ON CONFLICT (date) DO UPDATE SET
-                        account_balance = EXCLUDED.account_balance,
-                        daily_pnl = EXCLUDED.daily_pnl,
-                        total_trades = EXCLUDED.total_trades,
-                        winning_trades = EXCLUDED.winning_trades,
-                        losing_trades = EXCLUDED.losing_trades,
-                        win_rate = EXCLUDED.win_rate,
-                        profit_factor = EXCLUDED.profit_factor,
-                        sharpe_ratio = EXCLUDED.sharpe_ratio,
-                        max_drawdown = EXCLUDED.max_drawdown
-                """,
-                    metrics.get('date', datetime.utcnow().date()),
-                    metrics.get('account_balance'),
-                    metrics.get('daily_pnl'),
-                    metrics.get('total_trades', 0),
-                    metrics.get('winning_trades', 0),
-                    metrics.get('losing_trades', 0),
-                    metrics.get('win_rate'),
-                    metrics.get('profit_factor'),
-                    metrics.get('sharpe_ratio'),
-                    metrics.get('max_drawdown')
-                )
-                logger.debug("Saved performance metrics to database")
-                return True
+            await self._write('performance_metrics', (
+                metrics.get('date', datetime.utcnow().date()),
+                metrics.get('account_balance'),
+                metrics.get('daily_pnl'),
+                metrics.get('total_trades', 0),
+                metrics.get('winning_trades', 0),
+                metrics.get('losing_trades', 0),
+                metrics.get('win_rate'),
+                metrics.get('profit_factor'),
+                metrics.get('sharpe_ratio'),
+                metrics.get('max_drawdown')
+            ))
+            logger.debug("Saved performance metrics to database")
+            return True
         except Exception as e:
             logger.error(f"Failed to save performance metrics: {e}", exc_info=True)
             return False
@@ -680,16 +1200,13 @@ class DatabaseManager:
             return False
         
         try:
-            async with self.pool.acquire() as conn:
-                await conn.execute("""
-                    INSERT INTO system_logs (log_level, message, details)
-                    VALUES ($1, $2, $3)
-                """,
-                    level,
-                    message,
-                    json.dumps(details) if details else None
-                )
-                return True
+            await self._write('log_event', (
+                level,
+                message,
+                json.dumps(details, default=str) if details else None,
+                datetime.utcnow()
+            ))
+            return True
         except Exception as e:
             logger.error(f"Failed to log event to database: {e}", exc_info=True)
             return False
@@ -718,10 +1235,15 @@ class DatabaseManager:
             return None
     
     async def get_user_by_email(self, email: str) -> Optional[Dict[str, Any]]:
-        """Get user by email."""
+        """Get user by email (served from the user cache when possible)."""
         if not self.initialized or not self.pool:
             return None
         
+        if self.user_cache is not None:
+            user = self._cached_user(self.user_cache.get(('email', email.lower())))
+            if user:
+                return user
+        
         try:
             async with self.pool.acquire() as conn:
                 row = await conn.fetchrow("""
@@ -732,17 +1254,23 @@ class DatabaseManager:
                 """, email.lower())
                 
                 if row:
-                    return dict(row)
+                    user = dict(row)
+                    self._cache_user(user)
+                    return user
                 return None
         except Exception as e:
             logger.error(f"Failed to get user by email: {e}", exc_info=True)
             return None
     
     async def get_user_by_id(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user by ID."""
+        """Get user by ID (served from the user cache when possible)."""
         if not self.initialized or not self.pool:
             return None
         
+        user = self._cached_user(user_id)
+        if user:
+            return user
+        
         try:
             async with self.pool.acquire() as conn:
                 row = await conn.fetchrow("""
@@ -753,7 +1281,9 @@ class DatabaseManager:
                 """, user_id)
                 
                 if row:
-                    return dict(row)
+                    user = dict(row)
+                    self._cache_user(user)
+                    return user
                 return None
         except Exception as e:
             logger.error(f"Failed to get user by ID: {e}", exc_info=True)
@@ -773,7 +1303,10 @@ class DatabaseManager:
                 logger.info(f"💾💾💾 Database connection acquired. About to INSERT backtest with user_id={user_id} (type: {type(user_id)})")
                 
                 # Serialize results to JSON, handling any Infinity/NaN that might have slipped through
-                results_json = backtest_data.get('results', {})
+                # The equity curve is stored separately as a compact binary column
+                results_json = dict(backtest_data.get('results') or {})
+                equity_curve = coerce_equity_curve(results_json.pop('equity_curve', None))
+                equity_curve_blob = equity_curve.encode() if equity_curve is not None else None
                 try:
                     results_json_str = json.dumps(results_json)
                     logger.info(f"💾💾💾 Successfully serialized results to JSON (length: {len(results_json_str)})")
@@ -817,32 +1350,40 @@ class DatabaseManager:
                 
                 logger.info(f"💾💾💾 Inserting with start_date type: {type(start_date)}, end_date type: {type(end_date)}")
                 
-                backtest_id = await conn.fetchval("""
-                    INSERT INTO backtests (
-                        user_id, name, pair, start_date, end_date,
-                        initial_balance, final_balance, total_pnl,
-                        total_trades, winning_trades, losing_trades,
-                        win_rate, profit_factor, max_drawdown, roi_pct, results
-                    ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16)
-                    RETURNING id
-                """,
-                    user_id,  # If None, will be NULL in database
-                    backtest_data.get('name'),
-                    backtest_data.get('pair'),
-                    start_date,  # Now guaranteed to be datetime object
-                    end_date,  # Now guaranteed to be datetime object
-                    backtest_data.get('initial_balance'),
-                    backtest_data.get('final_balance'),
-                    backtest_data.get('total_pnl'),
-                    backtest_data.get('total_trades', 0),
-                    backtest_data.get('winning_trades', 0),
-                    backtest_data.get('losing_trades', 0),
-                    backtest_data.get('win_rate'),
-                    backtest_data.get('profit_factor'),
-                    backtest_data.get('max_drawdown'),
-                    backtest_data.get('roi_pct'),
-                    results_json_str  # Use the already-serialized JSON string
-                )
+                encoding, results_blob = compress_backtest_results(results_json_str)
+                logger.info(f"💾💾💾 Compressed results to {len(results_blob)} bytes ({encoding}), "
+                            f"equity curve to {len(equity_curve_blob or b'')} bytes")
+                
+                async with conn.transaction():
+                    backtest_id = await conn.fetchval("""
+                        INSERT INTO backtests (
+                            user_id, name, pair, start_date, end_date,
+                            initial_balance, final_balance, total_pnl,
+                            total_trades, winning_trades, losing_trades,
+                            win_rate, profit_factor, max_drawdown, roi_pct
+                        ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15)
+                        RETURNING id
+                    """,
+                        user_id,  # If None, will be NULL in database
+                        backtest_data.get('name'),
+                        backtest_data.get('pair'),
+                        start_date,  # Now guaranteed to be datetime object
+                        end_date,  # Now guaranteed to be datetime object
+                        backtest_data.get('initial_balance'),
+                        backtest_data.get('final_balance'),
+                        backtest_data.get('total_pnl'),
+                        backtest_data.get('total_trades', 0),
+                        backtest_data.get('winning_trades', 0),
+                        backtest_data.get('losing_trades', 0),
+                        backtest_data.get('win_rate'),
+                        backtest_data.get('profit_factor'),
+                        backtest_data.get('max_drawdown'),
+                        backtest_data.get('roi_pct')
+                    )
+                    await conn.execute("""
+                        INSERT INTO backtest_results (backtest_id, encoding, data, equity_curve)
+                        VALUES ($1, $2, $3, $4)
+                    """, backtest_id, encoding, results_blob, equity_curve_blob)
                 
                 if backtest_id:
                     logger.info(f"✅✅✅✅✅✅ BACKTEST SAVED TO DATABASE! ID: {backtest_id}, user_id: {user_id}, name: {backtest_data.get('name')}")
@@ -858,7 +1399,7 @@ class DatabaseManager:
             return None
     
     async def get_backtests(self, user_id: Optional[int] = None, limit: int = 50) -> List[Dict[str, Any]]:
-        """Get recent backtests."""
+        """Get recent backtest summaries (without results; see get_backtest_by_id)."""
         if not self.initialized or not self.pool:
             logger.warning(f"🔍 get_backtests: Database not initialized (user_id: {user_id})")
             return []
@@ -868,16 +1409,16 @@ class DatabaseManager:
                 # IMPORTANT: If user_id is provided, also check for NULL user_id backtests
                 # This handles cases where backtests were saved before user_id was properly set
                 if user_id:
-                    rows = await conn.fetch("""
-                        SELECT * FROM backtests
+                    rows = await conn.fetch(f"""
+                        SELECT {BACKTEST_SUMMARY_COLUMNS} FROM backtests
                         WHERE user_id = $1 OR user_id IS NULL
                         ORDER BY created_at DESC
                         LIMIT $2
                     """, user_id, limit)
                     logger.info(f"🔍 get_backtests: Querying with user_id={user_id} (including NULL backtests), found {len(rows)} rows")
                 else:
-                    rows = await conn.fetch("""
-                        SELECT * FROM backtests
+                    rows = await conn.fetch(f"""
+                        SELECT {BACKTEST_SUMMARY_COLUMNS} FROM backtests
                         WHERE user_id IS NULL
                         ORDER BY created_at DESC
                         LIMIT $1
@@ -892,12 +1433,6 @@ class DatabaseManager:
                     for key, value in backtest.items():
                         if isinstance(value, Decimal):
                             backtest[key] = float(value)
-                    # Parse JSON results
-                    if backtest.get('results') and isinstance(backtest['results'], str):
-                        try:
-                            backtest['results'] = json.loads(backtest['results'])
-                        except:
-                            pass
                     results.append(backtest)
                 
                 return results
@@ -914,13 +1449,19 @@ class DatabaseManager:
             async with self.pool.acquire() as conn:
                 if user_id:
                     row = await conn.fetchrow("""
-                        SELECT * FROM backtests
-                        WHERE id = $1 AND user_id = $2
+                        SELECT b.*, r.encoding AS results_encoding, r.data AS results_data,
+                               r.equity_curve AS equity_curve_data
+                        FROM backtests b
+                        LEFT JOIN backtest_results r ON r.backtest_id = b.id
+                        WHERE b.id = $1 AND b.user_id = $2
                     """, backtest_id, user_id)
                 else:
                     row = await conn.fetchrow("""
-                        SELECT * FROM backtests
-                        WHERE id = $1
+                        SELECT b.*, r.encoding AS results_encoding, r.data AS results_data,
+                               r.equity_curve AS equity_curve_data
+                        FROM backtests b
+                        LEFT JOIN backtest_results r ON r.backtest_id = b.id
+                        WHERE b.id = $1
                     """, backtest_id)
                 
                 if row:
@@ -930,12 +1471,12 @@ class DatabaseManager:
                     for key, value in backtest.items():
                         if isinstance(value, Decimal):
                             backtest[key] = float(value)
-                    # Parse JSON results
-                    if backtest.get('results') and isinstance(backtest['results'], str):
-                        try:
-                            backtest['results'] = json.loads(backtest['results'])
-                        except:
-                            pass
+                    encoding = backtest.pop('results_encoding')
+                    data = backtest.pop('results_data')
+                    backtest['results'] = decompress_backtest_results(encoding, data) if data is not None else None
+                    equity_curve_data = backtest.pop('equity_curve_data')
+                    if backtest['results'] is not None and equity_curve_data is not None:
+                        backtest['results']['equity_curve'] = EquityCurve.decode(equity_curve_data)
                     return backtest
                 return None
         except Exception as e:
@@ -954,6 +1495,7 @@ class DatabaseManager:
                     SET last_login = CURRENT_TIMESTAMP
                     WHERE id = $1
                 """, user_id)
+                self.invalidate_user(user_id)
                 return True
         except Exception as e:
             logger.error(f"Failed to update last login: {e}", exc_info=True)
@@ -961,28 +1503,16 @@ class DatabaseManager:
     
     async def get_onboarding_status(self, user_id: int) -> Optional[Dict[str, Any]]:
         """Get user's onboarding status."""
-        if not self.initialized or not self.pool:
+        user = await self.get_user_by_id(user_id)
+        if not user:
             return None
         
-        try:
-            async with self.pool.acquire() as conn:
-                row = await conn.fetchrow("""
-                    SELECT onboarding_completed, onboarding_completed_at, disclaimer_acknowledged_at
-                    FROM users
-                    WHERE id = $1
-                """, user_id)
-                
-                if row:
-                    return {
-                        'completed': row['onboarding_completed'] or False,
-                        'completed_at': row['onboarding_completed_at'].isoformat() if row['onboarding_completed_at'] else None,
-                        'disclaimer_acknowledged': row['disclaimer_acknowledged_at'] is not None,
-                        'disclaimer_acknowledged_at': row['disclaimer_acknowledged_at'].isoformat() if row['disclaimer_acknowledged_at'] else None
-                    }
-                return None
-        except Exception as e:
-            logger.error(f"Failed to get onboarding status: {e}", exc_info=True)
-            return None
+        return {
+            'completed': user['onboarding_completed'] or False,
+            'completed_at': user['onboarding_completed_at'].isoformat() if user['onboarding_completed_at'] else None,
+            'disclaimer_acknowledged': user['disclaimer_acknowledged_at'] is not None,
+            'disclaimer_acknowledged_at': user['disclaimer_acknowledged_at'].isoformat() if user['disclaimer_acknowledged_at'] else None
+        }
     
     async def complete_onboarding(self, user_id: int) -> bool:
         """Mark onboarding as completed for a user."""
@@ -997,6 +1527,7 @@ class DatabaseManager:
                         onboarding_completed_at = CURRENT_TIMESTAMP
                     WHERE id = $1
                 """, user_id)
+                self.invalidate_user(user_id)
                 logger.info(f"Onboarding completed for user {user_id}")
                 return True
         except Exception as e:
@@ -1015,6 +1546,7 @@ class DatabaseManager:
                     SET disclaimer_acknowledged_at = CURRENT_TIMESTAMP
                     WHERE id = $1
                 """, user_id)
+                self.invalidate_user(user_id)
                 logger.info(f"Disclaimer acknowledged for user {user_id}")
                 return True
         except Exception as e:
@@ -1032,8 +1564,8 @@ class DatabaseManager:
         try:
             async with self.pool.acquire() as conn:
                 daily_pnl = await conn.fetchval("""
-                    SELECT COALESCE(SUM(pnl), 0) FROM trades
-                    WHERE DATE(entry_time) = $1
+                    SELECT COALESCE(SUM(total_pnl), 0) FROM daily_pair_stats
+                    WHERE day = $1
                 """, date)
                 return float(daily_pnl) if daily_pnl else 0.0
         except Exception as e:
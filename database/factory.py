@@ -0,0 +1,27 @@
+"""Storage backend selection."""
+
+import logging
+
+from .db_manager import DatabaseManager
+from .sqlite_manager import SQLiteDatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+def resolve_backend(config) -> str:
+    """Resolve the configured DB_BACKEND ('auto' included) to 'postgres' or 'sqlite'."""
+    backend = getattr(config, 'DB_BACKEND', 'postgres')
+    if backend == 'auto':
+        use_sqlite = config.PAPER_TRADING and not getattr(config, 'POSTGRES_CONFIGURED', True)
+        return 'sqlite' if use_sqlite else 'postgres'
+    if backend not in ('postgres', 'sqlite'):
+        raise ValueError(f"Unknown DB_BACKEND '{backend}' (expected postgres, sqlite or auto)")
+    return backend
+
+
+def create_database_manager(config) -> DatabaseManager:
+    """Create the DatabaseManager for the configured storage backend."""
+    if resolve_backend(config) == 'sqlite':
+        logger.info(f"Using embedded SQLite storage at {config.SQLITE_PATH}")
+        return SQLiteDatabaseManager(config)
+    return DatabaseManager(config)
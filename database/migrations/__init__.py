@@ -0,0 +1,6 @@
+"""Schema migrations, applied in version order by database.migrator.
+
+Each module is named ``m<version>_<description>.py`` and defines
+``async def upgrade(conn)``. Applied migrations are checksummed, so never edit
+one that has shipped; add a new migration instead.
+"""
@@ -0,0 +1,244 @@
+"""Baseline schema: every table as of the introduction of versioned migrations.
+
+Written to be safe on databases created by the old create-on-startup code:
+tables use IF NOT EXISTS, late columns are added with ADD COLUMN IF NOT EXISTS
+and plain trades/system_logs tables are converted to monthly partitions.
+"""
+
+from database.partitions import convert_to_partitioned
+
+
+async def upgrade(conn):
+    """Create all tables."""
+    # Users table for authentication
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            email VARCHAR(255) NOT NULL UNIQUE,
+            password_hash VARCHAR(255) NOT NULL,
+            full_name VARCHAR(255),
+            is_active BOOLEAN DEFAULT TRUE,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_login TIMESTAMP,
+            onboarding_completed BOOLEAN DEFAULT FALSE,
+            onboarding_completed_at TIMESTAMP,
+            disclaimer_acknowledged_at TIMESTAMP
+        )
+    """)
+    
+    # Add onboarding columns if they don't exist (for existing databases)
+    await conn.execute("""
+        ALTER TABLE users 
+        ADD COLUMN IF NOT EXISTS onboarding_completed BOOLEAN DEFAULT FALSE
+    """)
+    
+    await conn.execute("""
+        ALTER TABLE users 
+        ADD COLUMN IF NOT EXISTS onboarding_completed_at TIMESTAMP
+    """)
+    
+    await conn.execute("""
+        ALTER TABLE users 
+        ADD COLUMN IF NOT EXISTS disclaimer_acknowledged_at TIMESTAMP
+    """)
+    
+    # Trades table - check if user_id column exists, add if not
+    # Partitioned by month on entry_time (see database/partitions.py)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS trades (
+            id SERIAL,
+            pair VARCHAR(20) NOT NULL,
+            side VARCHAR(10) NOT NULL,
+            entry_price DECIMAL(20, 8) NOT NULL,
+            exit_price DECIMAL(20, 8),
+            size DECIMAL(20, 8) NOT NULL,
+            entry_time TIMESTAMP NOT NULL,
+            exit_time TIMESTAMP,
+            stop_loss DECIMAL(20, 8),
+            take_profit DECIMAL(20, 8),
+            pnl DECIMAL(20, 8),
+            pnl_pct DECIMAL(10, 4),
+            exit_reason VARCHAR(50),
+            order_id VARCHAR(100),
+            confidence_score DECIMAL(5, 2),
+            notes TEXT,
+            tags TEXT[],
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, entry_time)
+        ) PARTITION BY RANGE (entry_time)
+    """)
+    
+    # Add journaling columns if they don't exist (for existing databases)
+    await conn.execute("""
+        ALTER TABLE trades 
+        ADD COLUMN IF NOT EXISTS notes TEXT
+    """)
+    
+    await conn.execute("""
+        ALTER TABLE trades 
+        ADD COLUMN IF NOT EXISTS tags TEXT[]
+    """)
+    
+    # Add user_id column if it doesn't exist (for existing databases)
+    await conn.execute("""
+        ALTER TABLE trades 
+        ADD COLUMN IF NOT EXISTS user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
+    """)
+    
+    # Databases created before partitioning have a plain trades table
+    if await convert_to_partitioned(conn, 'trades', 'entry_time'):
+        # Foreign keys are not carried over by the conversion
+        await conn.execute("""
+            ALTER TABLE trades
+            ADD FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+        """)
+    await conn.execute("CREATE TABLE IF NOT EXISTS trades_default PARTITION OF trades DEFAULT")
+    
+    # Performance metrics table
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS performance_metrics (
+            id SERIAL PRIMARY KEY,
+            date DATE NOT NULL UNIQUE,
+            account_balance DECIMAL(20, 8) NOT NULL,
+            daily_pnl DECIMAL(20, 8) NOT NULL,
+            total_trades INTEGER NOT NULL,
+            winning_trades INTEGER NOT NULL,
+            losing_trades INTEGER NOT NULL,
+            win_rate DECIMAL(5, 2),
+            profit_factor DECIMAL(10, 4),
+            sharpe_ratio DECIMAL(10, 4),
+            max_drawdown DECIMAL(10, 4),
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Aggregates maintained by update_trade (user_id 0 = trades without a user)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS daily_pair_stats (
+            day DATE NOT NULL,
+            user_id INTEGER NOT NULL DEFAULT 0,
+            pair VARCHAR(20) NOT NULL,
+            trades INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            total_pnl DECIMAL(20, 8) NOT NULL DEFAULT 0,
+            gross_profit DECIMAL(20, 8) NOT NULL DEFAULT 0,
+            gross_loss DECIMAL(20, 8) NOT NULL DEFAULT 0,
+            total_pnl_pct DECIMAL(20, 4) NOT NULL DEFAULT 0,
+            volume DECIMAL(24, 8) NOT NULL DEFAULT 0,
+            tagged_trades INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (day, user_id, pair)
+        )
+    """)
+    
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS tag_stats (
+            user_id INTEGER NOT NULL DEFAULT 0,
+            tag TEXT NOT NULL,
+            trades INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            total_pnl DECIMAL(20, 8) NOT NULL DEFAULT 0,
+            total_pnl_pct DECIMAL(20, 4) NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, tag)
+        )
+    """)
+    
+    # System logs table (partitioned by month so old logs can be dropped cheaply)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS system_logs (
+            id SERIAL,
+            log_level VARCHAR(20) NOT NULL,
+            message TEXT NOT NULL,
+            details JSONB,
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """)
+    await convert_to_partitioned(conn, 'system_logs', 'created_at')
+    await conn.execute("CREATE TABLE IF NOT EXISTS system_logs_default PARTITION OF system_logs DEFAULT")
+    
+    # Advanced orders table
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS advanced_orders (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            order_id VARCHAR(255) NOT NULL UNIQUE,
+            order_type VARCHAR(50) NOT NULL,
+            pair VARCHAR(20) NOT NULL,
+            side VARCHAR(10) NOT NULL,
+            size DECIMAL(20, 8) NOT NULL,
+            filled_size DECIMAL(20, 8) DEFAULT 0,
+            status VARCHAR(20) NOT NULL,
+            order_data JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            filled_at TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Grid trading strategies table
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS grid_strategies (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            grid_id VARCHAR(255) NOT NULL UNIQUE,
+            pair VARCHAR(20) NOT NULL,
+            lower_price DECIMAL(20, 8) NOT NULL,
+            upper_price DECIMAL(20, 8) NOT NULL,
+            grid_count INTEGER NOT NULL,
+            order_size DECIMAL(20, 8) NOT NULL,
+            side VARCHAR(10) NOT NULL,
+            status VARCHAR(20) NOT NULL,
+            grid_data JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # DCA strategies table
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS dca_strategies (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            dca_id VARCHAR(255) NOT NULL UNIQUE,
+            pair VARCHAR(20) NOT NULL,
+            side VARCHAR(10) NOT NULL,
+            amount DECIMAL(20, 8) NOT NULL,
+            interval VARCHAR(20) NOT NULL,
+            total_amount DECIMAL(20, 8),
+            start_price DECIMAL(20, 8),
+            end_price DECIMAL(20, 8),
+            status VARCHAR(20) NOT NULL,
+            total_invested DECIMAL(20, 8) DEFAULT 0,
+            execution_count INTEGER DEFAULT 0,
+            strategy_data JSONB NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            next_execution TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    
+    # Backtests table
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS backtests (
+            id SERIAL PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+            name VARCHAR(255),
+            pair VARCHAR(20) NOT NULL,
+            start_date TIMESTAMP NOT NULL,
+            end_date TIMESTAMP NOT NULL,
+            initial_balance DECIMAL(20, 8) NOT NULL,
+            final_balance DECIMAL(20, 8) NOT NULL,
+            total_pnl DECIMAL(20, 8) NOT NULL,
+            total_trades INTEGER NOT NULL,
+            winning_trades INTEGER NOT NULL,
+            losing_trades INTEGER NOT NULL,
+            win_rate DECIMAL(5, 2),
+            profit_factor DECIMAL(10, 4),
+            max_drawdown DECIMAL(10, 4),
+            roi_pct DECIMAL(10, 4),
+            results JSONB,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
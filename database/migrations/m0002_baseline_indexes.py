@@ -0,0 +1,32 @@
+"""Baseline indexes, built concurrently so upgrades don't block writes."""
+
+from database.migrator import create_index_concurrently
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction
+TRANSACTIONAL = False
+
+# (index name, table, columns)
+INDEXES = [
+    ('idx_users_email', 'users', 'email'),
+    ('idx_trades_user_id', 'trades', 'user_id'),
+    ('idx_trades_pair', 'trades', 'pair'),
+    ('idx_trades_entry_time', 'trades', 'entry_time'),
+    ('idx_trades_entry_time_id', 'trades', 'entry_time, id'),
+    ('idx_performance_date', 'performance_metrics', 'date'),
+    ('idx_logs_level', 'system_logs', 'log_level'),
+    ('idx_backtests_user_id', 'backtests', 'user_id'),
+    ('idx_backtests_created_at', 'backtests', 'created_at'),
+    ('idx_advanced_orders_user_id', 'advanced_orders', 'user_id'),
+    ('idx_advanced_orders_status', 'advanced_orders', 'status'),
+    ('idx_advanced_orders_pair', 'advanced_orders', 'pair'),
+    ('idx_grid_strategies_user_id', 'grid_strategies', 'user_id'),
+    ('idx_grid_strategies_status', 'grid_strategies', 'status'),
+    ('idx_dca_strategies_user_id', 'dca_strategies', 'user_id'),
+    ('idx_dca_strategies_status', 'dca_strategies', 'status'),
+]
+
+
+async def upgrade(conn):
+    """Create all baseline indexes."""
+    for name, table, columns in INDEXES:
+        await create_index_concurrently(conn, name, table, columns)
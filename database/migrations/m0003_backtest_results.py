@@ -0,0 +1,34 @@
+"""Move backtest result blobs out of the backtests summary table.
+
+Listing backtests used to drag every row's full trade list and equity curve
+along. Results now live in backtest_results, keyed by backtest id, and are
+only read when a single backtest is opened. Existing results are moved as
+plain JSON; new ones are stored zlib-compressed.
+"""
+
+
+async def upgrade(conn):
+    """Create backtest_results and move existing results into it."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS backtest_results (
+            backtest_id INTEGER PRIMARY KEY REFERENCES backtests(id) ON DELETE CASCADE,
+            encoding VARCHAR(20) NOT NULL,
+            data BYTEA NOT NULL
+        )
+    """)
+    
+    has_results = await conn.fetchval("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'backtests' AND column_name = 'results'
+        )
+    """)
+    if has_results:
+        await conn.execute("""
+            INSERT INTO backtest_results (backtest_id, encoding, data)
+            SELECT id, 'json', convert_to(results::text, 'UTF8')
+            FROM backtests
+            WHERE results IS NOT NULL
+            ON CONFLICT (backtest_id) DO NOTHING
+        """)
+        await conn.execute("ALTER TABLE backtests DROP COLUMN results")
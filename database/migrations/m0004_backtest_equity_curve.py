@@ -0,0 +1,12 @@
+"""Store backtest equity curves as a compact binary column.
+
+Equity curves were part of the JSON results blob, one object per candle.
+They now live in backtest_results.equity_curve as delta-encoded arrays
+(see utils.equity_curve.EquityCurve.encode). Older rows keep their curve in
+the JSON blob and are still readable.
+"""
+
+
+async def upgrade(conn):
+    """Add the equity_curve column to backtest_results."""
+    await conn.execute("ALTER TABLE backtest_results ADD COLUMN IF NOT EXISTS equity_curve BYTEA")
@@ -0,0 +1,49 @@
+"""Store tax lots so tax reports don't replay the trade history.
+
+tax_open_lots holds the lots each matching method (FIFO, LIFO, HIFO) still
+has open, so the lot engine can resume after a restart. tax_realized_lots
+gets one row per matched quantity as trades close; a tax report is a range
+scan over closed_at. Both tables are filled from existing trades the first
+time the database manager starts with them empty.
+"""
+
+
+async def upgrade(conn):
+    """Create tax_open_lots and tax_realized_lots."""
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS tax_open_lots (
+            id BIGINT PRIMARY KEY,
+            user_id INTEGER NOT NULL DEFAULT 0,
+            method VARCHAR(8) NOT NULL,
+            pair VARCHAR(20) NOT NULL,
+            direction VARCHAR(5) NOT NULL,
+            quantity DECIMAL(20, 8) NOT NULL,
+            price DECIMAL(20, 8) NOT NULL,
+            opened_at TIMESTAMP NOT NULL,
+            trade_id INTEGER
+        )
+    """)
+    await conn.execute("""
+        CREATE TABLE IF NOT EXISTS tax_realized_lots (
+            id BIGSERIAL PRIMARY KEY,
+            user_id INTEGER NOT NULL DEFAULT 0,
+            method VARCHAR(8) NOT NULL,
+            pair VARCHAR(20) NOT NULL,
+            direction VARCHAR(5) NOT NULL,
+            quantity DECIMAL(20, 8) NOT NULL,
+            opened_at TIMESTAMP NOT NULL,
+            closed_at TIMESTAMP NOT NULL,
+            open_price DECIMAL(20, 8) NOT NULL,
+            close_price DECIMAL(20, 8) NOT NULL,
+            cost_basis DECIMAL(20, 8) NOT NULL,
+            proceeds DECIMAL(20, 8) NOT NULL,
+            gain DECIMAL(20, 8) NOT NULL,
+            term VARCHAR(5) NOT NULL,
+            open_trade_id INTEGER,
+            close_trade_id INTEGER
+        )
+    """)
+    await conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_tax_realized_lots_method_closed
+        ON tax_realized_lots (method, closed_at)
+    """)
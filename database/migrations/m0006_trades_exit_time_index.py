@@ -0,0 +1,11 @@
+"""Index trades by exit so closed trades can be read incrementally in exit order."""
+
+from database.migrator import create_index_concurrently
+
+# CREATE INDEX CONCURRENTLY cannot run inside a transaction
+TRANSACTIONAL = False
+
+
+async def upgrade(conn):
+    """Create idx_trades_exit_time_id."""
+    await create_index_concurrently(conn, 'idx_trades_exit_time_id', 'trades', 'exit_time, id')
@@ -0,0 +1,208 @@
+"""Versioned schema migrations tracked in a schema_version table."""
+
+import hashlib
+import importlib
+import inspect
+import logging
+import pkgutil
+import re
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MIGRATIONS_PACKAGE = 'database.migrations'
+
+# Migration modules are named m<4-digit version>_<description>.py
+MIGRATION_NAME_RE = re.compile(r'm(\d{4})_(\w+)')
+
+# pg_advisory_lock key so concurrent instances don't migrate at the same time
+MIGRATION_LOCK_KEY = 7_301_985_205
+
+
+class MigrationError(Exception):
+    """Raised when the recorded schema history does not match the migration files."""
+
+
+class Migration:
+    """A single migration module.
+
+    Modules define ``async def upgrade(conn)`` and may set
+    ``TRANSACTIONAL = False`` when they run statements that cannot run inside
+    a transaction (e.g. ``CREATE INDEX CONCURRENTLY``). Non-transactional
+    migrations must be safe to re-run if interrupted.
+    """
+
+    def __init__(self, version: int, name: str, module):
+        self.version = version
+        self.name = name
+        self.module = module
+        self.transactional = getattr(module, 'TRANSACTIONAL', True)
+        with open(inspect.getsourcefile(module), 'rb') as f:
+            self.checksum = hashlib.sha256(f.read()).hexdigest()
+
+    async def upgrade(self, conn):
+        await self.module.upgrade(conn)
+
+    def __repr__(self) -> str:
+        return f"Migration({self.version:04d}_{self.name})"
+
+
+def discover_migrations(package: str = MIGRATIONS_PACKAGE) -> List[Migration]:
+    """Load migration modules from a package, ordered by version."""
+    pkg = importlib.import_module(package)
+    migrations = []
+    for info in pkgutil.iter_modules(pkg.__path__):
+        match = MIGRATION_NAME_RE.fullmatch(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{package}.{info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+
+    migrations.sort(key=lambda migration: migration.version)
+    versions = [migration.version for migration in migrations]
+    if len(set(versions)) != len(versions):
+        raise MigrationError(f"Duplicate migration versions in {package}: {versions}")
+    return migrations
+
+
+class MigrationRunner:
+    """Applies pending migrations and validates already-applied ones.
+
+    When the schema is current, ``migrate`` costs one catalog lookup and one
+    small SELECT: no DDL runs and no locks are taken.
+    """
+
+    def __init__(self, migrations: Optional[List[Migration]] = None):
+        self.migrations = migrations if migrations is not None else discover_migrations()
+
+    async def applied_versions(self, conn) -> Dict[int, str]:
+        """Get applied versions and their checksums (empty if nothing was applied yet)."""
+        if not await conn.fetchval("SELECT to_regclass('schema_version') IS NOT NULL"):
+            return {}
+        rows = await conn.fetch("SELECT version, checksum FROM schema_version")
+        return {row['version']: row['checksum'] for row in rows}
+
+    def pending(self, applied: Dict[int, str]) -> List[Migration]:
+        """
+        Get migrations that still need to run.
+
+        Raises:
+            MigrationError: If an applied migration's file changed or is missing
+        """
+        known = {migration.version for migration in self.migrations}
+        missing = sorted(set(applied) - known)
+        if missing:
+            raise MigrationError(f"Database has migrations that no longer exist: {missing}")
+
+        pending = []
+        for migration in self.migrations:
+            checksum = applied.get(migration.version)
+            if checksum is None:
+                pending.append(migration)
+            elif checksum != migration.checksum:
+                raise MigrationError(
+                    f"Checksum mismatch for applied migration {migration.version:04d}_{migration.name}; "
+                    f"add a new migration instead of editing an applied one"
+                )
+        return pending
+
+    async def migrate(self, conn) -> List[int]:
+        """
+        Apply all pending migrations in order.
+
+        Returns:
+            Versions that were applied (empty when the schema was current)
+        """
+        if not self.pending(await self.applied_versions(conn)):
+            return []
+
+        await conn.execute("SELECT pg_advisory_lock($1)", MIGRATION_LOCK_KEY)
+        try:
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS schema_version (
+                    version INTEGER PRIMARY KEY,
+                    name VARCHAR(255) NOT NULL,
+                    checksum VARCHAR(64) NOT NULL,
+                    applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    duration_ms INTEGER
+                )
+            """)
+            # Another instance may have migrated while we waited for the lock
+            pending = self.pending(await self.applied_versions(conn))
+
+            applied = []
+            for migration in pending:
+                await self._apply(conn, migration)
+                applied.append(migration.version)
+            return applied
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", MIGRATION_LOCK_KEY)
+
+    async def _apply(self, conn, migration: Migration):
+        """Run one migration and record it."""
+        logger.info(f"Applying migration {migration.version:04d}_{migration.name}...")
+        started = time.monotonic()
+
+        async def record():
+            await conn.execute("""
+                INSERT INTO schema_version (version, name, checksum, duration_ms)
+                VALUES ($1, $2, $3, $4)
+            """, migration.version, migration.name, migration.checksum,
+                int((time.monotonic() - started) * 1000))
+
+        if migration.transactional:
+            async with conn.transaction():
+                await migration.upgrade(conn)
+                await record()
+        else:
+            await migration.upgrade(conn)
+            await record()
+
+        logger.info(f"Applied migration {migration.version:04d}_{migration.name} in {time.monotonic() - started:.2f}s")
+
+
+async def create_index_concurrently(conn, name: str, table: str, columns: str):
+    """
+    Build an index without blocking writes to the table.
+
+    Partitioned tables cannot be indexed concurrently directly, so the parent
+    index is created ``ON ONLY`` the parent and each partition is indexed
+    concurrently and attached. Safe to re-run after an interruption.
+    """
+    index = await conn.fetchrow("""
+        SELECT i.indisvalid, c.relkind::text AS relkind
+        FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indexrelid = to_regclass($1)
+    """, name)
+    if index and index['indisvalid']:
+        return
+
+    relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", table)
+    if relkind != 'p':
+        if index:
+            # Left behind by an interrupted concurrent build
+            await conn.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+        await conn.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})")
+        return
+
+    await conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} ({columns})")
+    partitions = await conn.fetch("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass($1)
+    """, table)
+    for partition in partitions:
+        child = partition['relname']
+        # Same naming Postgres uses for indexes it cascades to partitions
+        child_index = f"{child}_{re.sub(r'[^0-9a-zA-Z_]+', '_', columns).strip('_')}_idx"[:63]
+        await create_index_concurrently(conn, child_index, child, columns)
+        attached = await conn.fetchval("""
+            SELECT EXISTS (
+                SELECT 1 FROM pg_inherits
+                WHERE inhparent = to_regclass($1) AND inhrelid = to_regclass($2)
+            )
+        """, name, child_index)
+        if not attached:
+            await conn.execute(f"ALTER INDEX {name} ATTACH PARTITION {child_index}")
@@ -0,0 +1,213 @@
+"""Monthly range partition management for append-mostly tables."""
+
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Tables partitioned by month and the timestamp column they are partitioned on
+PARTITIONED_TABLES = {
+    'trades': 'entry_time',
+    'system_logs': 'created_at',
+}
+
+
+def month_start(value) -> date:
+    """First day of the month containing a date or datetime."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    """Shift a month start by a number of months."""
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of the partition holding a month, e.g. trades_p202405."""
+    return f"{table}_p{month.year:04d}{month.month:02d}"
+
+
+def parse_partition_month(table: str, name: str) -> Optional[date]:
+    """Month of a partition created by partition_name, or None for other tables."""
+    match = re.fullmatch(rf"{re.escape(table)}_p(\d{{4}})(\d{{2}})", name)
+    if not match:
+        return None
+    return date(int(match.group(1)), int(match.group(2)), 1)
+
+
+async def list_month_partitions(conn, table: str) -> List[date]:
+    """Months that currently have an attached partition, oldest first."""
+    rows = await conn.fetch("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass($1)
+    """, table)
+    months = [parse_partition_month(table, row['relname']) for row in rows]
+    return sorted(month for month in months if month)
+
+
+async def create_month_partition(conn, table: str, key: str, month: date) -> bool:
+    """
+    Create the partition for a month if it does not exist yet.
+
+    Rows for that month already sitting in the default partition are moved
+    into the new partition before it is attached, so late or back-dated rows
+    never block partition creation.
+
+    Returns:
+        True if a partition was created
+    """
+    name = partition_name(table, month)
+    if await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", name):
+        return False
+
+    lower = datetime(month.year, month.month, 1)
+    upper = datetime(*add_months(month, 1).timetuple()[:3])
+    async with conn.transaction():
+        await conn.execute(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        await conn.execute(f"""
+            WITH moved AS (
+                DELETE FROM {table}_default
+                WHERE {key} >= $1 AND {key} < $2
+                RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """, lower, upper)
+        await conn.execute(
+            f"ALTER TABLE {table} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lower.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+    logger.info(f"Created partition {name}")
+    return True
+
+
+async def ensure_month_partitions(conn, table: str, key: str, start: date, months_ahead: int) -> int:
+    """Create partitions from ``start``'s month through ``months_ahead`` months from now."""
+    created = 0
+    month = month_start(start)
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+    while month <= last:
+        if await create_month_partition(conn, table, key, month):
+            created += 1
+        month = add_months(month, 1)
+    return created
+
+
+def legacy_table(table: str) -> str:
+    """Name the pre-partitioning table keeps while its rows are moved over."""
+    return f"{table}_unpartitioned"
+
+
+async def convert_to_partitioned(conn, table: str, key: str) -> bool:
+    """
+    Swap a plain table for a monthly range-partitioned table with the same columns.
+
+    Only the schema changes here, so this stays quick inside a migration's
+    transaction: the old table is renamed to ``<table>_unpartitioned``, a
+    partitioned table with the same columns takes its name (keeping the id
+    sequence) and month partitions are created for the existing data. The
+    rows themselves are moved afterwards by ``move_legacy_rows``.
+
+    Returns:
+        True if the table was converted
+    """
+    relkind = await conn.fetchval("SELECT relkind::text FROM pg_class WHERE oid = to_regclass($1)", table)
+    if relkind != 'r':
+        return False
+
+    legacy = legacy_table(table)
+    logger.info(f"Converting {table} to a monthly partitioned table...")
+    async with conn.transaction():
+        sequence = await conn.fetchval("SELECT pg_get_serial_sequence($1, 'id')", table)
+        first = await conn.fetchval(f"SELECT MIN({key}) FROM {table}")
+
+        await conn.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+        await conn.execute(
+            f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            f"PARTITION BY RANGE ({key})"
+        )
+        await conn.execute(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL")
+        # The partition key has to be part of the primary key
+        await conn.execute(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {key})")
+        if sequence:
+            # Hand the id sequence over so dropping the legacy table keeps it
+            await conn.execute(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id")
+        await conn.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+        await ensure_month_partitions(conn, table, key, first or datetime.utcnow(), months_ahead=1)
+    logger.info(f"Converted {table} to a monthly partitioned table; rows are moved from {legacy} next")
+    return True
+
+
+async def move_legacy_rows(conn, table: str, key: str, batch_size: int = 10000) -> int:
+    """
+    Move the rows convert_to_partitioned left in ``<table>_unpartitioned`` into ``table``.
+
+    Each batch is deleted from the legacy table and inserted into the
+    partitioned one in its own transaction, so the move never holds one long
+    transaction and an interrupted move resumes where it stopped. The legacy
+    table is dropped once empty. Run it outside a transaction, before the
+    table is used, and with the migration lock held so only one instance moves.
+
+    Returns:
+        Number of rows moved
+    """
+    legacy = legacy_table(table)
+    if not await conn.fetchval("SELECT to_regclass($1) IS NOT NULL", legacy):
+        return 0
+
+    # The partition key is NOT NULL on the partitioned table
+    await conn.execute(f"UPDATE {legacy} SET {key} = CURRENT_TIMESTAMP WHERE {key} IS NULL")
+    moved = 0
+    while True:
+        async with conn.transaction():
+            count = await conn.fetchval(f"""
+                WITH moved AS (
+                    DELETE FROM {legacy}
+                    WHERE ctid = ANY(ARRAY(SELECT ctid FROM {legacy} LIMIT $1))
+                    RETURNING *
+                ), inserted AS (
+                    INSERT INTO {table} SELECT * FROM moved RETURNING 1
+                )
+                SELECT COUNT(*) FROM inserted
+            """, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+        logger.info(f"Moved {moved} rows from {legacy} into {table}...")
+
+    await conn.execute(f"DROP TABLE {legacy}")
+    logger.info(f"Moved {moved} rows from {legacy} into {table}")
+    return moved
+
+
+async def expire_month_partitions(conn, table: str, key: str, keep_months: int, archive: bool = False) -> List[str]:
+    """
+    Drop (or detach, when archiving) partitions older than ``keep_months`` months.
+
+    Detached partitions stay in the database as ordinary tables that can be
+    dumped and dropped later. Old rows that landed in the default partition
+    are deleted.
+
+    Returns:
+        Names of the partitions that were dropped or detached
+    """
+    cutoff = add_months(month_start(datetime.utcnow()), -keep_months)
+    expired = []
+    for month in await list_month_partitions(conn, table):
+        if month >= cutoff:
+            continue
+        name = partition_name(table, month)
+        if archive:
+            await conn.execute(f"ALTER TABLE {table} DETACH PARTITION {name}")
+        else:
+            await conn.execute(f"DROP TABLE {name}")
+        expired.append(name)
+
+    await conn.execute(f"DELETE FROM {table}_default WHERE {key} < $1", datetime(cutoff.year, cutoff.month, 1))
+    if expired:
+        logger.info(f"{'Detached' if archive else 'Dropped'} {table} partitions: {', '.join(expired)}")
+    return expired
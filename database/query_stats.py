@@ -0,0 +1,225 @@
+"""Per-query call counts, latency histograms and slow-query plans."""
+
+import asyncio
+import bisect
+import logging
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the latency histogram buckets; the last bucket is unbounded
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Statements EXPLAIN can describe; DDL, transaction control and PRAGMAs are skipped
+EXPLAINABLE_RE = re.compile(r'^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b', re.IGNORECASE)
+TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+([\w.]+)', re.IGNORECASE)
+
+# Bucket for queries seen after max_queries distinct statements are tracked
+OTHER_QUERIES = '<other>'
+
+
+def normalize_sql(query: str) -> str:
+    """Collapse whitespace so the same statement always maps to one key."""
+    return ' '.join(query.split())
+
+
+def describe_sql(sql: str) -> str:
+    """Short label for an unregistered statement, e.g. 'select trades'."""
+    verb = sql.split(None, 1)[0].lower() if sql else ''
+    table = TABLE_RE.search(sql)
+    return f"{verb} {table.group(1)}" if table else verb
+
+
+class QueryStats:
+    """Counters and latency histogram for one statement."""
+
+    __slots__ = ('name', 'sql', 'calls', 'errors', 'total_ms', 'max_ms', 'buckets',
+                 'slow_calls', 'plan', 'plan_at', 'plan_ms')
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.slow_calls = 0
+        self.plan: Any = None
+        self.plan_at: Optional[float] = None
+        self.plan_ms: Optional[float] = None
+
+    def record(self, elapsed_ms: float, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Upper bound of the bucket holding the given fraction of calls (None if unbounded)."""
+        if not self.calls:
+            return None
+        target = fraction * self.calls
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+    def to_dict(self) -> Dict[str, Any]:
+        labels = [str(bound) for bound in LATENCY_BUCKETS_MS] + ['+Inf']
+        return {
+            'name': self.name,
+            'sql': self.sql[:500],
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total_ms, 3),
+            'avg_ms': round(self.total_ms / self.calls, 3) if self.calls else None,
+            'max_ms': round(self.max_ms, 3),
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'histogram_ms': dict(zip(labels, self.buckets)),
+            'slow_calls': self.slow_calls,
+            'slow_plan': self.plan,
+            'slow_plan_elapsed_ms': self.plan_ms,
+        }
+
+
+class QueryRegistry:
+    """Registry of named SQL statements plus latency stats for every executed query.
+
+    Statements are registered once by name and always sent with the same
+    text, so asyncpg's per-connection statement cache prepares each of them
+    only once per connection. ``on_query`` is installed as an asyncpg query
+    logger (see ``Connection.add_query_logger``) and records every statement,
+    registered or not. When a statement exceeds ``slow_query_ms`` its plan is
+    captured with ``explain`` in the background, at most once per
+    ``explain_interval`` seconds per statement.
+    """
+
+    def __init__(self, slow_query_ms: float = 200.0,
+                 explain: Optional[Callable[[str, tuple], Awaitable[Any]]] = None,
+                 explain_interval: float = 300.0, max_queries: int = 500,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Initialize the registry.
+
+        Args:
+            slow_query_ms: Latency above which a query counts as slow and gets explained
+            explain: Coroutine function returning the plan for (query, args)
+            explain_interval: Minimum seconds between plans for the same statement
+            max_queries: Distinct statements tracked before the rest are pooled under '<other>'
+            clock: Monotonic time source (overridable for tests)
+        """
+        self.slow_query_ms = slow_query_ms
+        self.explain = explain
+        self.explain_interval = explain_interval
+        self.max_queries = max_queries
+        self.clock = clock
+        self.statements: Dict[str, str] = {}
+        self._names: Dict[str, str] = {}
+        self._stats: Dict[str, QueryStats] = {}
+        self._explain_task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, sql: str) -> str:
+        """Register a named statement and return its SQL unchanged."""
+        self.statements[name] = sql
+        self._names[normalize_sql(sql)] = name
+        return sql
+
+    def sql(self, name: str) -> str:
+        """Get a registered statement by name."""
+        return self.statements[name]
+
+    def on_query(self, record):
+        """Query logger callback: record a LoggedQuery-style object."""
+        if record.query.lstrip()[:7].upper() == 'EXPLAIN':
+            return
+        self.record(record.query, record.elapsed, record.args, record.exception is not None)
+
+    def record(self, query: str, elapsed: float, args: tuple = (), failed: bool = False) -> QueryStats:
+        """
+        Record one execution.
+
+        Args:
+            query: SQL text as sent
+            elapsed: Execution time in seconds
+            args: Bound arguments (used to explain slow queries)
+            failed: Whether the query raised
+
+        Returns:
+            The statement's stats
+        """
+        key = normalize_sql(query)
+        stats = self._stats.get(key)
+        if stats is None:
+            if len(self._stats) >= self.max_queries:
+                key = OTHER_QUERIES
+                stats = self._stats.get(key)
+            if stats is None:
+                name = self._names.get(key) or (key if key == OTHER_QUERIES else describe_sql(key))
+                stats = self._stats[key] = QueryStats(name, key)
+
+        elapsed_ms = elapsed * 1000
+        stats.record(elapsed_ms, failed)
+        if elapsed_ms >= self.slow_query_ms and not failed:
+            stats.slow_calls += 1
+            self._maybe_explain(stats, query, args, elapsed_ms)
+        return stats
+
+    def _maybe_explain(self, stats: QueryStats, query: str, args: tuple, elapsed_ms: float):
+        """Capture a plan for a slow statement unless one is recent or another is running."""
+        if self.explain is None or stats.sql == OTHER_QUERIES or not EXPLAINABLE_RE.match(query):
+            return
+        if ';' in query.strip().rstrip(';'):
+            return  # Multi-statement scripts (e.g. asyncpg's connection reset) can't be explained
+        if stats.plan_at is not None and self.clock() - stats.plan_at < self.explain_interval:
+            return
+        if self._explain_task is not None and not self._explain_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        stats.plan_at = self.clock()
+        self._explain_task = loop.create_task(self._capture_plan(stats, query, args, elapsed_ms))
+
+    async def _capture_plan(self, stats: QueryStats, query: str, args: tuple, elapsed_ms: float):
+        try:
+            stats.plan = await self.explain(query, tuple(args or ()))
+            stats.plan_ms = round(elapsed_ms, 3)
+            logger.warning(f"Slow query ({elapsed_ms:.1f}ms) {stats.name}: {stats.sql[:200]}")
+        except Exception as e:
+            stats.plan = {'error': str(e)}
+            logger.debug(f"Could not explain slow query {stats.name}: {e}")
+
+    def get_stats(self, limit: int = 50, sort: str = 'total_ms') -> Dict[str, Any]:
+        """
+        Get per-statement stats.
+
+        Args:
+            limit: Maximum statements returned
+            sort: Field to sort by, descending (total_ms, calls, max_ms, avg_ms or slow_calls)
+
+        Returns:
+            Totals plus the top statements
+        """
+        queries = [stats.to_dict() for stats in self._stats.values()]
+        queries.sort(key=lambda query: query.get(sort) or 0, reverse=True)
+        return {
+            'slow_query_ms': self.slow_query_ms,
+            'tracked_queries': len(queries),
+            'total_calls': sum(query['calls'] for query in queries),
+            'total_ms': round(sum(query['total_ms'] for query in queries), 3),
+            'slow_calls': sum(query['slow_calls'] for query in queries),
+            'queries': queries[:limit],
+        }
+
+    def reset(self):
+        """Drop all recorded stats (registered statements are kept)."""
+        self._stats.clear()
@@ -0,0 +1,537 @@
+"""Embedded SQLite storage backend for paper trading, development and tests."""
+
+import json
+import logging
+import os
+import sqlite3
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
+
+from monitoring.tax_lots import LOT_CLOSED, LOT_OPENED, LOT_REALIZED, LOT_REDUCED
+
+from .db_manager import (
+    CLOSED_TRADE_SQL, DELETE_TAX_LOT_SQL, INSERT_LOG_SQL, INSERT_REALIZED_LOT_SQL, INSERT_TAX_LOT_SQL,
+    INSERT_TRADE_SQL, UPDATE_TAX_LOT_SQL, UPSERT_METRICS_SQL, DatabaseManager
+)
+from .partitions import add_months, month_start
+from .sqlite_pool import SQLitePool
+
+logger = logging.getLogger(__name__)
+
+
+def _trade_stats_sql(row: str, sign: int) -> str:
+    """Trigger body adding (sign=1) or removing (sign=-1) a closed trade row from the aggregates."""
+    s = '' if sign > 0 else '-'
+    return f"""
+        INSERT INTO daily_pair_stats (
+            day, user_id, pair, trades, wins, losses, total_pnl,
+            gross_profit, gross_loss, total_pnl_pct, volume, tagged_trades
+        ) VALUES (
+            date({row}.entry_time), COALESCE({row}.user_id, 0), {row}.pair,
+            {s}1,
+            {s}({row}.pnl > 0),
+            {s}({row}.pnl < 0),
+            {s}{row}.pnl,
+            {s}MAX({row}.pnl, 0),
+            {s}MIN({row}.pnl, 0),
+            {s}COALESCE({row}.pnl_pct, 0),
+            {s}({row}.size * {row}.entry_price),
+            {s}(COALESCE(json_array_length({row}.tags), 0) > 0)
+        )
+        ON CONFLICT (day, user_id, pair) DO UPDATE SET
+            trades = trades + excluded.trades,
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            total_pnl = total_pnl + excluded.total_pnl,
+            gross_profit = gross_profit + excluded.gross_profit,
+            gross_loss = gross_loss + excluded.gross_loss,
+            total_pnl_pct = total_pnl_pct + excluded.total_pnl_pct,
+            volume = volume + excluded.volume,
+            tagged_trades = tagged_trades + excluded.tagged_trades;
+        INSERT INTO tag_stats (user_id, tag, trades, wins, losses, total_pnl, total_pnl_pct)
+        SELECT
+            COALESCE({row}.user_id, 0), tag.value,
+            {s}1,
+            {s}({row}.pnl > 0),
+            {s}({row}.pnl < 0),
+            {s}{row}.pnl,
+            {s}COALESCE({row}.pnl_pct, 0)
+        FROM json_each({row}.tags) AS tag
+        WHERE true
+        ON CONFLICT (user_id, tag) DO UPDATE SET
+            trades = trades + excluded.trades,
+            wins = wins + excluded.wins,
+            losses = losses + excluded.losses,
+            total_pnl = total_pnl + excluded.total_pnl,
+            total_pnl_pct = total_pnl_pct + excluded.total_pnl_pct;
+    """
+
+
+def _closed(row: str) -> str:
+    return f"{row}.exit_price IS NOT NULL AND {row}.pnl IS NOT NULL"
+
+
+# Schema versions, applied in order and tracked with PRAGMA user_version.
+# Mirrors the Postgres schema: DECIMAL becomes REAL, TEXT[] and JSONB become
+# JSON text, and the aggregates are kept in step by triggers instead of the
+# data-modifying CTEs used on Postgres.
+SQLITE_SCHEMA = [
+    f"""
+    CREATE TABLE users (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT NOT NULL UNIQUE,
+        password_hash TEXT NOT NULL,
+        full_name TEXT,
+        is_active BOOLEAN DEFAULT 1,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_login TIMESTAMP,
+        onboarding_completed BOOLEAN DEFAULT 0,
+        onboarding_completed_at TIMESTAMP,
+        disclaimer_acknowledged_at TIMESTAMP
+    );
+
+    -- Ids are reserved in blocks (see _next_trade_id), like the Postgres sequence
+    CREATE TABLE sequences (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    INSERT INTO sequences (name, value) VALUES ('trades', 0);
+
+    CREATE TABLE trades (
+        id INTEGER PRIMARY KEY,
+        pair TEXT NOT NULL,
+        side TEXT NOT NULL,
+        entry_price REAL NOT NULL,
+        exit_price REAL,
+        size REAL NOT NULL,
+        entry_time TIMESTAMP NOT NULL,
+        exit_time TIMESTAMP,
+        stop_loss REAL,
+        take_profit REAL,
+        pnl REAL,
+        pnl_pct REAL,
+        exit_reason TEXT,
+        order_id TEXT,
+        confidence_score REAL,
+        notes TEXT,
+        tags TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE performance_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        date DATE NOT NULL UNIQUE,
+        account_balance REAL NOT NULL,
+        daily_pnl REAL NOT NULL,
+        total_trades INTEGER NOT NULL,
+        winning_trades INTEGER NOT NULL,
+        losing_trades INTEGER NOT NULL,
+        win_rate REAL,
+        profit_factor REAL,
+        sharpe_ratio REAL,
+        max_drawdown REAL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE daily_pair_stats (
+        day DATE NOT NULL,
+        user_id INTEGER NOT NULL DEFAULT 0,
+        pair TEXT NOT NULL,
+        trades INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        total_pnl REAL NOT NULL DEFAULT 0,
+        gross_profit REAL NOT NULL DEFAULT 0,
+        gross_loss REAL NOT NULL DEFAULT 0,
+        total_pnl_pct REAL NOT NULL DEFAULT 0,
+        volume REAL NOT NULL DEFAULT 0,
+        tagged_trades INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, user_id, pair)
+    );
+
+    CREATE TABLE tag_stats (
+        user_id INTEGER NOT NULL DEFAULT 0,
+        tag TEXT NOT NULL,
+        trades INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        losses INTEGER NOT NULL DEFAULT 0,
+        total_pnl REAL NOT NULL DEFAULT 0,
+        total_pnl_pct REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, tag)
+    );
+
+    CREATE TRIGGER trades_stats_insert AFTER INSERT ON trades
+    WHEN {_closed('NEW')}
+    BEGIN {_trade_stats_sql('NEW', 1)} END;
+
+    CREATE TRIGGER trades_stats_update_old AFTER UPDATE ON trades
+    WHEN {_closed('OLD')}
+    BEGIN {_trade_stats_sql('OLD', -1)} END;
+
+    CREATE TRIGGER trades_stats_update_new AFTER UPDATE ON trades
+    WHEN {_closed('NEW')}
+    BEGIN {_trade_stats_sql('NEW', 1)} END;
+
+    CREATE TRIGGER trades_stats_delete AFTER DELETE ON trades
+    WHEN {_closed('OLD')}
+    BEGIN {_trade_stats_sql('OLD', -1)} END;
+
+    CREATE TABLE system_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        log_level TEXT NOT NULL,
+        message TEXT NOT NULL,
+        details TEXT,
+        created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE advanced_orders (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        order_id TEXT NOT NULL UNIQUE,
+        order_type TEXT NOT NULL,
+        pair TEXT NOT NULL,
+        side TEXT NOT NULL,
+        size REAL NOT NULL,
+        filled_size REAL DEFAULT 0,
+        status TEXT NOT NULL,
+        order_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        filled_at TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE grid_strategies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        grid_id TEXT NOT NULL UNIQUE,
+        pair TEXT NOT NULL,
+        lower_price REAL NOT NULL,
+        upper_price REAL NOT NULL,
+        grid_count INTEGER NOT NULL,
+        order_size REAL NOT NULL,
+        side TEXT NOT NULL,
+        status TEXT NOT NULL,
+        grid_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE dca_strategies (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        dca_id TEXT NOT NULL UNIQUE,
+        pair TEXT NOT NULL,
+        side TEXT NOT NULL,
+        amount REAL NOT NULL,
+        interval TEXT NOT NULL,
+        total_amount REAL,
+        start_price REAL,
+        end_price REAL,
+        status TEXT NOT NULL,
+        total_invested REAL DEFAULT 0,
+        execution_count INTEGER DEFAULT 0,
+        strategy_data TEXT NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        next_execution TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE backtests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+        name TEXT,
+        pair TEXT NOT NULL,
+        start_date TIMESTAMP NOT NULL,
+        end_date TIMESTAMP NOT NULL,
+        initial_balance REAL NOT NULL,
+        final_balance REAL NOT NULL,
+        total_pnl REAL NOT NULL,
+        total_trades INTEGER NOT NULL,
+        winning_trades INTEGER NOT NULL,
+        losing_trades INTEGER NOT NULL,
+        win_rate REAL,
+        profit_factor REAL,
+        max_drawdown REAL,
+        roi_pct REAL,
+        results TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX idx_trades_user_id ON trades(user_id);
+    CREATE INDEX idx_trades_pair ON trades(pair);
+    CREATE INDEX idx_trades_entry_time_id ON trades(entry_time, id);
+    CREATE INDEX idx_performance_date ON performance_metrics(date);
+    CREATE INDEX idx_logs_created_at ON system_logs(created_at);
+    CREATE INDEX idx_logs_level ON system_logs(log_level);
+    CREATE INDEX idx_backtests_user_id ON backtests(user_id);
+    CREATE INDEX idx_backtests_created_at ON backtests(created_at);
+    CREATE INDEX idx_advanced_orders_user_id ON advanced_orders(user_id);
+    CREATE INDEX idx_advanced_orders_status ON advanced_orders(status);
+    CREATE INDEX idx_advanced_orders_pair ON advanced_orders(pair);
+    CREATE INDEX idx_grid_strategies_user_id ON grid_strategies(user_id);
+    CREATE INDEX idx_grid_strategies_status ON grid_strategies(status);
+    CREATE INDEX idx_dca_strategies_user_id ON dca_strategies(user_id);
+    CREATE INDEX idx_dca_strategies_status ON dca_strategies(status);
+    """,
+    # Backtest result blobs move out of the summary table (see m0003_backtest_results)
+    """
+    CREATE TABLE backtest_results (
+        backtest_id INTEGER PRIMARY KEY REFERENCES backtests(id) ON DELETE CASCADE,
+        encoding TEXT NOT NULL,
+        data BLOB NOT NULL
+    );
+    INSERT INTO backtest_results (backtest_id, encoding, data)
+    SELECT id, 'json', CAST(results AS BLOB) FROM backtests WHERE results IS NOT NULL;
+    ALTER TABLE backtests DROP COLUMN results;
+    """,
+    # Binary equity curves (see m0004_backtest_equity_curve)
+    """
+    ALTER TABLE backtest_results ADD COLUMN equity_curve BLOB;
+    """,
+    # Tax lots (see m0005_tax_lots)
+    """
+    CREATE TABLE tax_open_lots (
+        id INTEGER PRIMARY KEY,
+        user_id INTEGER NOT NULL DEFAULT 0,
+        method TEXT NOT NULL,
+        pair TEXT NOT NULL,
+        direction TEXT NOT NULL,
+        quantity REAL NOT NULL,
+        price REAL NOT NULL,
+        opened_at TIMESTAMP NOT NULL,
+        trade_id INTEGER
+    );
+    CREATE TABLE tax_realized_lots (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL DEFAULT 0,
+        method TEXT NOT NULL,
+        pair TEXT NOT NULL,
+        direction TEXT NOT NULL,
+        quantity REAL NOT NULL,
+        opened_at TIMESTAMP NOT NULL,
+        closed_at TIMESTAMP NOT NULL,
+        open_price REAL NOT NULL,
+        close_price REAL NOT NULL,
+        cost_basis REAL NOT NULL,
+        proceeds REAL NOT NULL,
+        gain REAL NOT NULL,
+        term TEXT NOT NULL,
+        open_trade_id INTEGER,
+        close_trade_id INTEGER
+    );
+    CREATE INDEX idx_tax_realized_lots_method_closed ON tax_realized_lots(method, closed_at);
+    """,
+    # Closed trades in exit order (see m0006_trades_exit_time_index)
+    """
+    CREATE INDEX idx_trades_exit_time_id ON trades(exit_time, id);
+    """,
+]
+
+# Trade exits are a plain UPDATE here; the trades_stats_* triggers move the aggregates
+UPDATE_TRADE_SQL = """
+    UPDATE trades SET exit_price = $1, exit_time = $2, pnl = $3, pnl_pct = $4, exit_reason = $5
+    WHERE id = $6 AND entry_time = $7
+"""
+
+SQLITE_WRITE_STATEMENTS = {
+    'insert_trade': INSERT_TRADE_SQL,
+    'update_trade': UPDATE_TRADE_SQL,
+    'log_event': INSERT_LOG_SQL,
+    'performance_metrics': UPSERT_METRICS_SQL,
+    LOT_OPENED: INSERT_TAX_LOT_SQL,
+    LOT_REDUCED: UPDATE_TAX_LOT_SQL,
+    LOT_CLOSED: DELETE_TAX_LOT_SQL,
+    LOT_REALIZED: INSERT_REALIZED_LOT_SQL,
+}
+
+
+class SQLiteDatabaseManager(DatabaseManager):
+    """DatabaseManager backed by an embedded SQLite database in WAL mode.
+
+    Implements the same API (including write-behind batching, keyset paging,
+    cursor streaming and the trade aggregates) without an external server.
+    Queries that are portable between the two backends are inherited; only
+    the Postgres-specific ones are overridden. Meant for single-node paper
+    trading, development, tests and benchmarks.
+    """
+
+    write_statements = SQLITE_WRITE_STATEMENTS
+
+    async def initialize(self) -> bool:
+        """Open the database file and apply any pending schema versions."""
+        path = self.config.SQLITE_PATH
+        try:
+            if path != ':memory:' and os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.pool = await SQLitePool(path, size=self.config.SQLITE_POOL_SIZE, init=self._init_connection).open()
+
+            async with self.pool.acquire() as conn:
+                version = await conn.fetchval("PRAGMA user_version")
+                for index, script in enumerate(SQLITE_SCHEMA[version:], start=version + 1):
+                    await conn.executescript(f"{script}\nPRAGMA user_version = {index};")
+                    logger.info(f"Applied SQLite schema version {index}")
+
+            if self.write_queue:
+                self.write_queue.start(self.pool)
+                await self.write_queue.flush()
+
+            self.initialized = True
+            await self._backfill_aggregates()
+            await self._load_tax_lots()
+            logger.info(f"SQLite database initialized at {path}")
+            return True
+
+        except Exception as e:
+            logger.error(f"Failed to initialize SQLite database: {e}", exc_info=True)
+            self.initialized = False
+            return False
+
+    async def _explain(self, conn, query: str, args: tuple) -> Any:
+        """Get a query's plan as EXPLAIN QUERY PLAN detail lines."""
+        rows = await conn.fetch(f"EXPLAIN QUERY PLAN {query}", *args)
+        return [row['detail'] for row in rows]
+
+    async def maintain_partitions(self) -> Optional[Dict[str, Any]]:
+        """Apply log retention (SQLite has no partitions, so old rows are deleted)."""
+        if not self.initialized or not self.pool:
+            return None
+
+        try:
+            cutoff = add_months(month_start(datetime.utcnow()), -self.config.LOG_RETENTION_MONTHS)
+            async with self.pool.acquire() as conn:
+                status = await conn.execute("DELETE FROM system_logs WHERE created_at < $1", cutoff)
+            return {'created': 0, 'expired': [], 'deleted_logs': int(status.split()[-1])}
+        except Exception as e:
+            logger.error(f"Failed to apply log retention: {e}", exc_info=True)
+            return None
+
+    async def _next_trade_id(self) -> int:
+        """Get a trade id, reserving a block from the sequences table when the local pool runs dry."""
+        if not self._trade_ids:
+            async with self._trade_id_lock:
+                if not self._trade_ids:
+                    block = max(1, getattr(self.config, 'DB_TRADE_ID_BLOCK_SIZE', 1))
+                    async with self.pool.acquire() as conn:
+                        last = await conn.fetchval(
+                            "UPDATE sequences SET value = value + $1 WHERE name = 'trades' RETURNING value", block
+                        )
+                    self._trade_ids.extend(range(last - block + 1, last + 1))
+        return self._trade_ids.popleft()
+
+    def _trade_update_sql(self, set_clause: str, where_clause: str) -> str:
+        """Plain UPDATE; the aggregate triggers handle the trade's contribution."""
+        return f"UPDATE trades SET {set_clause} WHERE {where_clause}"
+
+    @staticmethod
+    def _row_to_trade(row) -> Dict[str, Any]:
+        """Convert a trades row to a plain dict (tags decoded from JSON)."""
+        trade = dict(row)
+        if 'tags' in trade:
+            trade['tags'] = json.loads(trade['tags']) if trade['tags'] else []
+        return trade
+
+    async def get_trades_with_tags(self, tags: List[str], user_id: Optional[int] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get trades that have any of the specified tags."""
+        if not self.initialized or not self.pool:
+            return []
+
+        try:
+            params: List[Any] = [json.dumps(tags)]
+            user_filter = ""
+            if user_id:
+                params.append(user_id)
+                user_filter = "AND (user_id = $2 OR user_id IS NULL)"
+            params.append(limit)
+            async with self.pool.acquire() as conn:
+                rows = await conn.fetch(f"""
+                    SELECT * FROM trades
+                    WHERE EXISTS (
+                        SELECT 1 FROM json_each(trades.tags)
+                        WHERE value IN (SELECT value FROM json_each($1))
+                    )
+                    {user_filter}
+                    ORDER BY entry_time DESC
+                    LIMIT ${len(params)}
+                """, *params)
+                return [self._row_to_trade(row) for row in rows]
+        except Exception as e:
+            logger.error(f"Failed to fetch trades with tags: {e}", exc_info=True)
+            return []
+
+    async def repair_aggregates(self, since: Optional[date] = None) -> bool:
+        """Recompute daily_pair_stats and tag_stats from the trades table.
+
+        Args:
+            since: Only rebuild daily rows from this entry date on (None rebuilds everything)
+        """
+        if not self.initialized or not self.pool:
+            return False
+
+        try:
+            async with self.pool.acquire() as conn:
+                # BEGIN IMMEDIATE holds the write lock, so no trade changes interleave
+                async with conn.transaction():
+                    await conn.execute("DELETE FROM daily_pair_stats WHERE $1 IS NULL OR day >= $1", since)
+                    await conn.execute(f"""
+                        INSERT INTO daily_pair_stats (
+                            day, user_id, pair, trades, wins, losses, total_pnl,
+                            gross_profit, gross_loss, total_pnl_pct, volume, tagged_trades
+                        )
+                        SELECT
+                            date(entry_time), COALESCE(user_id, 0), pair,
+                            COUNT(*),
+                            COUNT(*) FILTER (WHERE pnl > 0),
+                            COUNT(*) FILTER (WHERE pnl < 0),
+                            SUM(pnl),
+                            SUM(MAX(pnl, 0)),
+                            SUM(MIN(pnl, 0)),
+                            SUM(COALESCE(pnl_pct, 0)),
+                            SUM(size * entry_price),
+                            COUNT(*) FILTER (WHERE COALESCE(json_array_length(tags), 0) > 0)
+                        FROM trades
+                        WHERE {CLOSED_TRADE_SQL} AND ($1 IS NULL OR entry_time >= $1)
+                        GROUP BY 1, 2, 3
+                    """, since)
+
+                    await conn.execute("DELETE FROM tag_stats")
+                    await conn.execute(f"""
+                        INSERT INTO tag_stats (user_id, tag, trades, wins, losses, total_pnl, total_pnl_pct)
+                        SELECT
+                            COALESCE(user_id, 0), tag.value,
+                            COUNT(*),
+                            COUNT(*) FILTER (WHERE pnl > 0),
+                            COUNT(*) FILTER (WHERE pnl < 0),
+                            SUM(pnl),
+                            SUM(COALESCE(pnl_pct, 0))
+                        FROM trades, json_each(trades.tags) AS tag
+                        WHERE {CLOSED_TRADE_SQL}
+                        GROUP BY 1, 2
+                    """)
+            logger.info(f"Rebuilt trade aggregates{f' since {since}' if since else ''}")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to repair trade aggregates: {e}", exc_info=True)
+            return False
+
+    async def create_user(self, email: str, password_hash: str, full_name: Optional[str] = None) -> Optional[int]:
+        """Create a new user account."""
+        if not self.initialized or not self.pool:
+            logger.warning("Database not initialized, cannot create user")
+            return None
+
+        try:
+            async with self.pool.acquire() as conn:
+                user_id = await conn.fetchval("""
+                    INSERT INTO users (email, password_hash, full_name)
+                    VALUES ($1, $2, $3)
+                    RETURNING id
+                """, email.lower(), password_hash, full_name)
+                logger.info(f"Created user {user_id} with email {email}")
+                return user_id
+        except sqlite3.IntegrityError:
+            logger.warning(f"User with email {email} already exists")
+            return None
+        except Exception as e:
+            logger.error(f"Failed to create user: {e}", exc_info=True)
+            return None
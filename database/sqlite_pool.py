@@ -0,0 +1,204 @@
+"""Minimal asyncpg-style connection pool over the standard library sqlite3 module."""
+
+import asyncio
+import json
+import re
+import sqlite3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, List, Optional, Sequence
+
+# asyncpg-style $1 placeholders map onto SQLite's numbered ?1 parameters
+_PLACEHOLDER_RE = re.compile(r'\$(\d+)')
+
+# Timestamps are stored as ISO text, which sorts chronologically
+sqlite3.register_adapter(datetime, lambda value: value.isoformat(' '))
+sqlite3.register_adapter(date, lambda value: value.isoformat())
+sqlite3.register_adapter(list, json.dumps)
+sqlite3.register_converter('TIMESTAMP', lambda value: datetime.fromisoformat(value.decode()))
+sqlite3.register_converter('DATE', lambda value: date.fromisoformat(value.decode()[:10]))
+sqlite3.register_converter('BOOLEAN', lambda value: bool(int(value)))
+
+# Same fields as asyncpg's LoggedQuery, so query loggers work with either backend
+LoggedQuery = namedtuple('LoggedQuery', 'query args timeout elapsed exception conn_addr conn_params')
+
+
+def convert_placeholders(query: str) -> str:
+    """Rewrite $N placeholders as ?N."""
+    return _PLACEHOLDER_RE.sub(r'?\1', query)
+
+
+class SQLiteConnection:
+    """One sqlite3 connection driven from its own worker thread.
+
+    Exposes the subset of the asyncpg connection API DatabaseManager uses:
+    execute, executemany, fetch, fetchrow, fetchval, transaction, cursor and
+    add_query_logger.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='sqlite')
+        self._conn: Optional[sqlite3.Connection] = None
+        self._depth = 0
+        self._query_loggers: List[Callable] = []
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    def add_query_logger(self, callback: Callable):
+        """Call ``callback(LoggedQuery)`` after every statement, like asyncpg."""
+        self._query_loggers.append(callback)
+
+    async def _query(self, query: str, args, func):
+        """Run ``func`` on the worker thread, reporting the statement to query loggers."""
+        if not self._query_loggers:
+            return await self._run(func)
+        started = time.monotonic()
+        exception = None
+        try:
+            return await self._run(func)
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            record = LoggedQuery(query, args, None, time.monotonic() - started, exception, self.path, None)
+            for callback in self._query_loggers:
+                callback(record)
+
+    async def open(self):
+        def connect():
+            conn = sqlite3.connect(
+                self.path,
+                detect_types=sqlite3.PARSE_DECLTYPES,
+                isolation_level=None,  # Transactions are explicit, see transaction()
+                check_same_thread=False
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+            conn.execute("PRAGMA foreign_keys = ON")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            return conn
+        self._conn = await self._run(connect)
+
+    async def close(self):
+        if self._conn is not None:
+            await self._run(self._conn.close)
+            self._conn = None
+        self._executor.shutdown(wait=False)
+
+    async def execute(self, query: str, *args) -> str:
+        """Run a statement and return an asyncpg-style status such as 'UPDATE 1'."""
+        def run():
+            cursor = self._conn.execute(convert_placeholders(query), args)
+            return f"{query.split(None, 1)[0].upper()} {max(cursor.rowcount, 0)}"
+        return await self._query(query, args, run)
+
+    async def executescript(self, script: str):
+        """Run several statements in their own transaction (no parameters)."""
+        await self._run(self._conn.executescript, f"BEGIN IMMEDIATE;\n{script}\nCOMMIT;")
+
+    async def executemany(self, query: str, args: Sequence[Sequence[Any]]):
+        """Run a statement for each argument tuple in a single transaction."""
+        async with self.transaction():
+            args = list(args)
+            await self._query(query, args, lambda: self._conn.executemany(convert_placeholders(query), args))
+
+    async def fetch(self, query: str, *args) -> List[sqlite3.Row]:
+        return await self._query(query, args, lambda: self._conn.execute(convert_placeholders(query), args).fetchall())
+
+    async def fetchrow(self, query: str, *args) -> Optional[sqlite3.Row]:
+        return await self._query(query, args, lambda: self._conn.execute(convert_placeholders(query), args).fetchone())
+
+    async def fetchval(self, query: str, *args) -> Any:
+        row = await self.fetchrow(query, *args)
+        return row[0] if row is not None else None
+
+    @asynccontextmanager
+    async def transaction(self, readonly: bool = False):
+        """Open a transaction (a savepoint when nested).
+
+        Write transactions take the database write lock up front with
+        BEGIN IMMEDIATE, so they wait on busy_timeout instead of failing halfway.
+        """
+        savepoint = f"sp{self._depth}"
+        if self._depth:
+            await self._run(self._conn.execute, f"SAVEPOINT {savepoint}")
+        else:
+            await self._run(self._conn.execute, "BEGIN" if readonly else "BEGIN IMMEDIATE")
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            if self._depth:
+                await self._run(self._conn.execute, f"ROLLBACK TO {savepoint}")
+                await self._run(self._conn.execute, f"RELEASE {savepoint}")
+            else:
+                await self._run(self._conn.execute, "ROLLBACK")
+            raise
+        self._depth -= 1
+        if self._depth:
+            await self._run(self._conn.execute, f"RELEASE {savepoint}")
+        else:
+            await self._run(self._conn.execute, "COMMIT")
+
+    async def cursor(self, query: str, *args, prefetch: int = 50) -> AsyncIterator[sqlite3.Row]:
+        """Iterate over a query's rows, fetching ``prefetch`` rows per round trip."""
+        cursor = await self._run(lambda: self._conn.execute(convert_placeholders(query), args))
+        try:
+            while True:
+                rows = await self._run(cursor.fetchmany, prefetch)
+                if not rows:
+                    return
+                for row in rows:
+                    yield row
+        finally:
+            await self._run(cursor.close)
+
+
+class SQLitePool:
+    """Fixed-size pool of SQLite connections to one database file in WAL mode.
+
+    WAL lets readers run alongside the single writer, so API reads are not
+    blocked by trade and log writes. ``:memory:`` databases are private to a
+    connection, so they always get a pool of one.
+    """
+
+    def __init__(self, path: str, size: int = 4,
+                 init: Optional[Callable[[SQLiteConnection], Awaitable[None]]] = None):
+        self.path = path
+        self.size = 1 if path == ':memory:' else max(1, size)
+        self.init = init
+        self._connections: List[SQLiteConnection] = []
+        self._idle: asyncio.Queue = asyncio.Queue()
+
+    async def open(self) -> 'SQLitePool':
+        for _ in range(self.size):
+            conn = SQLiteConnection(self.path)
+            await conn.open()
+            if not self._connections:
+                # journal_mode is persistent, setting it once per file is enough
+                await conn.execute("PRAGMA journal_mode = WAL")
+            if self.init is not None:
+                await self.init(conn)
+            self._connections.append(conn)
+            self._idle.put_nowait(conn)
+        return self
+
+    @asynccontextmanager
+    async def acquire(self):
+        conn = await self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put_nowait(conn)
+
+    async def close(self):
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
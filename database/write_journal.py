@@ -0,0 +1,125 @@
+"""On-disk journal for queued writes the database could not take yet."""
+
+import base64
+import json
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON-safe form of a statement argument (datetimes and bytes are tagged)."""
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'$d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'$b': base64.b64encode(bytes(value)).decode('ascii')}
+    if isinstance(value, (list, tuple)):
+        return [_encode_value(item) for item in value]
+    if hasattr(value, 'item'):  # NumPy scalars
+        return value.item()
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if '$dt' in value:
+            return datetime.fromisoformat(value['$dt'])
+        if '$d' in value:
+            return date.fromisoformat(value['$d'])
+        if '$b' in value:
+            return base64.b64decode(value['$b'])
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    return value
+
+
+def encode_write(kind: str, args: Sequence[Any]) -> str:
+    return json.dumps({'kind': kind, 'args': [_encode_value(arg) for arg in args]})
+
+
+def decode_write(line: str) -> Tuple[str, Tuple]:
+    record = json.loads(line)
+    return record['kind'], tuple(_decode_value(arg) for arg in record['args'])
+
+
+class WriteJournal:
+    """Writes waiting for the database, kept in order in a JSON-lines file.
+
+    The write-behind queue spills batches here when the database stays
+    unreachable, and replays them (oldest first) once it is back, including
+    after a restart. Rows the database rejects outright go to a separate
+    ``.rejected`` file so they can be inspected and replayed by hand instead
+    of being lost.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize the journal.
+
+        Args:
+            path: Journal file (created on first spill; ``<path>.rejected`` holds rejected rows)
+        """
+        self.path = path
+        self.rejected_path = f"{path}.rejected"
+
+    def load(self) -> List[Tuple[str, Tuple]]:
+        """Read every journaled write, oldest first (unreadable lines are moved to the rejected file)."""
+        if not os.path.exists(self.path):
+            return []
+        writes = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    writes.append(decode_write(line))
+                except (ValueError, KeyError) as e:
+                    logger.error(f"Unreadable write journal line, moving it aside: {e}")
+                    self._append(self.rejected_path, [line.rstrip('\n')])
+        return writes
+
+    def save(self, writes: Sequence[Tuple[str, Tuple]]):
+        """Replace the journal with ``writes`` (removes the file when empty)."""
+        if not writes:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for kind, args in writes:
+                f.write(encode_write(kind, args) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def append(self, writes: Sequence[Tuple[str, Tuple]]):
+        """Add writes to the end of the journal."""
+        self._append(self.path, [encode_write(kind, args) for kind, args in writes])
+
+    def reject(self, kind: str, args: Sequence[Any], error: Optional[Exception] = None):
+        """Keep a write the database refused, with the error, for manual replay."""
+        record = json.loads(encode_write(kind, args))
+        record['error'] = str(error) if error else None
+        self._append(self.rejected_path, [json.dumps(record)])
+
+    def _append(self, path: str, lines: Sequence[str]):
+        if not lines:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,344 @@
+"""Write-behind queue that batches database writes off the trading path."""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import asyncpg
+
+from .write_journal import WriteJournal
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning the database is unreachable; anything else is treated as a bad row
+RETRYABLE_ERRORS = (
+    OSError,
+    asyncio.TimeoutError,
+    asyncpg.InterfaceError,
+    asyncpg.exceptions.ConnectionDoesNotExistError,
+    asyncpg.exceptions.CannotConnectNowError,
+    asyncpg.exceptions.TooManyConnectionsError,
+)
+
+
+class WriteBehindQueue:
+    """Buffers write statements and applies them in batches from a background task.
+
+    Each write is a ``(kind, args)`` pair where ``kind`` names one of the
+    registered statements. The drainer waits for the first write, collects more
+    until ``batch_size`` writes are pending or ``flush_interval`` seconds have
+    passed, then runs one ``executemany`` per kind. Kinds are applied in the
+    order they were registered (e.g. trade inserts before trade updates) and
+    writes of the same kind keep their enqueue order, so all writes for a given
+    trade id land in the order they were issued.
+
+    Writes are never dropped. If the database stays unreachable after
+    ``max_retries`` attempts, the unapplied writes move to a backlog (mirrored
+    to the journal file when one is configured) and every later batch joins
+    the end of it, so order is kept. The drainer retries the backlog with
+    exponential backoff, ``flush`` retries it immediately, and a restarted
+    queue picks the journal up again. Rows the database rejects outright are
+    kept in the journal's ``.rejected`` file (or ``rejected`` when there is no
+    journal).
+    """
+
+    def __init__(self, statements: Dict[str, str], batch_size: int = 100,
+                 flush_interval: float = 0.05, max_queue_size: int = 10000,
+                 max_retries: int = 3, journal_path: Optional[str] = None,
+                 retry_backoff: float = 1.0, max_retry_backoff: float = 60.0):
+        """
+        Initialize the write queue.
+
+        Args:
+            statements: Mapping of write kind to SQL, in dependency order
+            batch_size: Maximum writes applied per batch
+            flush_interval: Maximum seconds to wait for a batch to fill
+            max_queue_size: Pending writes before ``put`` applies backpressure
+            max_retries: Attempts per batch on connection errors before it is backlogged
+            journal_path: File keeping backlogged writes across restarts (None keeps them in memory)
+            retry_backoff: Seconds before the first backlog replay after an outage
+            max_retry_backoff: Longest wait between backlog replays
+        """
+        self.statements = statements
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.pool: Optional[asyncpg.Pool] = None
+        self.task: Optional[asyncio.Task] = None
+
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.last_batch_ms = 0.0
+        self.outages = 0
+
+        # Writes waiting for the database, oldest first
+        self.journal = WriteJournal(journal_path) if journal_path else None
+        self.rejected: List[Tuple[str, Tuple]] = []
+        journaled = self.journal.load() if self.journal else []
+        self._backlog: List[Tuple[str, Tuple]] = [
+            (kind, args) for kind, args in journaled if self._known_kind(kind, args)
+        ]
+        self._replay_delay = retry_backoff
+        self._replay_at = 0.0
+        # Serializes applying batches with replaying the backlog
+        self._apply_lock = asyncio.Lock()
+        if self._backlog:
+            logger.warning(f"Write journal holds {len(self._backlog)} writes from a previous run; replaying on start")
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    @property
+    def backlog(self) -> int:
+        """Writes waiting for the database to come back."""
+        return len(self._backlog)
+
+    def start(self, pool: asyncpg.Pool):
+        """Start draining into the given pool."""
+        self.pool = pool
+        if not self.running:
+            self.task = asyncio.create_task(self._drain_loop())
+
+    async def put(self, kind: str, args: Tuple[Any, ...]):
+        """Queue a write. Only waits if the queue is full."""
+        if kind not in self.statements:
+            raise ValueError(f"Unknown write kind: {kind}")
+        await self.queue.put((kind, args))
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+
+    async def flush(self) -> bool:
+        """
+        Wait until every write queued so far has been applied or backlogged, then retry the backlog.
+
+        Returns:
+            True if no writes are left waiting for the database
+        """
+        if self.running:
+            await self.queue.join()
+        elif self.pool and not self.queue.empty():
+            # Drainer is gone (e.g. crashed or stopped); apply what is left inline
+            await self._process(self._take_pending())
+        if self.pool and self._backlog:
+            async with self._apply_lock:
+                await self._replay()
+        return not self._backlog
+
+    async def stop(self):
+        """Flush pending writes and stop the drainer."""
+        await self.flush()
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        if self._backlog:
+            if self.journal:
+                logger.warning(f"{len(self._backlog)} writes left in {self.journal.path} for the next start")
+            else:
+                logger.error(f"Losing {len(self._backlog)} queued writes: database unreachable and no write journal configured")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and throughput metrics."""
+        return {
+            'running': self.running,
+            'depth': self.queue.qsize(),
+            'max_depth': self.max_depth,
+            'backlog': len(self._backlog),
+            'enqueued': self.enqueued,
+            'written': self.written,
+            'failed': self.failed,
+            'outages': self.outages,
+            'batches': self.batches,
+            'last_batch_size': self.last_batch_size,
+            'last_batch_ms': round(self.last_batch_ms, 2)
+        }
+
+    def _known_kind(self, kind: str, args: Tuple) -> bool:
+        """Check a journaled write still names a registered statement (others are set aside)."""
+        if kind in self.statements:
+            return True
+        logger.error(f"Write journal entry has unknown kind '{kind}', setting it aside")
+        self._reject(kind, args, ValueError(f"Unknown write kind: {kind}"))
+        return False
+
+    def _take_pending(self, limit: Optional[int] = None) -> List[Tuple[str, Tuple]]:
+        """Pop up to ``limit`` writes that are already queued without waiting."""
+        batch = []
+        while not self.queue.empty() and (limit is None or len(batch) < limit):
+            batch.append(self.queue.get_nowait())
+        return batch
+
+    async def _collect_batch(self, timeout: Optional[float] = None) -> List[Tuple[str, Tuple]]:
+        """Wait for the first write, then gather more until the batch is full or the interval passes.
+
+        With a ``timeout``, an empty batch is returned if no write arrives in time.
+        """
+        if timeout is None:
+            batch = [await self.queue.get()]
+        else:
+            try:
+                batch = [await asyncio.wait_for(self.queue.get(), timeout=max(0.0, timeout))]
+            except asyncio.TimeoutError:
+                return []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            batch.extend(self._take_pending(self.batch_size - len(batch)))
+            remaining = deadline - time.monotonic()
+            if len(batch) >= self.batch_size or remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _drain_loop(self):
+        """Background task applying queued writes in batches and replaying the backlog."""
+        while True:
+            timeout = self._replay_at - time.monotonic() if self._backlog else None
+            batch = await self._collect_batch(timeout)
+            try:
+                await self._process(batch)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Write queue batch failed unexpectedly: {e}", exc_info=True)
+                self._spill(batch)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def _process(self, batch: List[Tuple[str, Tuple]]):
+        """Apply a batch, or add it behind the backlog (replaying that when due)."""
+        async with self._apply_lock:
+            if not self._backlog:
+                self._spill(await self._apply_batch(batch, self.max_retries))
+                return
+            self._spill(batch)
+            if time.monotonic() >= self._replay_at:
+                await self._replay()
+
+    def _spill(self, writes: List[Tuple[str, Tuple]]):
+        """Add writes the database could not take to the end of the backlog."""
+        if not writes:
+            return
+        if not self._backlog:
+            self.outages += 1
+            self._replay_delay = self.retry_backoff
+            self._replay_at = time.monotonic() + self._replay_delay
+            where = f"journaling to {self.journal.path}" if self.journal else "holding in memory"
+            logger.error(f"Database unreachable, {where} queued writes until it recovers")
+        self._backlog.extend(writes)
+        if self.journal:
+            self.journal.append(writes)
+
+    async def _replay(self):
+        """Apply the backlog oldest first, backing off again if the database is still down."""
+        while self._backlog:
+            chunk = self._backlog[:self.batch_size]
+            # One attempt per replay; the backoff between replays does the waiting
+            unapplied = await self._apply_batch(chunk, 1)
+            self._backlog = unapplied + self._backlog[len(chunk):]
+            if self.journal:
+                self.journal.save(self._backlog)
+            if unapplied:
+                self._replay_delay = min(self._replay_delay * 2, self.max_retry_backoff)
+                self._replay_at = time.monotonic() + self._replay_delay
+                return
+        logger.info("Database reachable again, write backlog replayed")
+
+    async def _apply_batch(self, batch: Sequence[Tuple[str, Tuple]], attempts: int) -> List[Tuple[str, Tuple]]:
+        """
+        Apply a batch, grouped by kind in registration order.
+
+        Returns:
+            Writes left unapplied because the database is unreachable, in apply order
+        """
+        if not batch:
+            return []
+
+        grouped: Dict[str, List[Tuple]] = {kind: [] for kind in self.statements}
+        for kind, args in batch:
+            grouped[kind].append(args)
+
+        started = time.monotonic()
+        unapplied: List[Tuple[str, Tuple]] = []
+        for kind, rows in grouped.items():
+            if not rows:
+                continue
+            if unapplied:
+                # Later kinds may depend on the ones that did not land
+                unapplied.extend((kind, row) for row in rows)
+                continue
+            unapplied.extend((kind, row) for row in await self._execute_rows(kind, rows, attempts))
+
+        self.batches += 1
+        self.last_batch_size = len(batch)
+        self.last_batch_ms = (time.monotonic() - started) * 1000
+        return unapplied
+
+    async def _execute_rows(self, kind: str, rows: List[Tuple], attempts: int) -> List[Tuple]:
+        """
+        Run one executemany for a kind, retrying connection errors and isolating bad rows.
+
+        Returns:
+            Rows not applied because the database is unreachable
+        """
+        sql = self.statements[kind]
+        for attempt in range(1, attempts + 1):
+            try:
+                async with self.pool.acquire() as conn:
+                    await conn.executemany(sql, rows)
+                self.written += len(rows)
+                return []
+            except RETRYABLE_ERRORS as e:
+                if attempt == attempts:
+                    logger.debug(f"{len(rows)} queued '{kind}' writes not applied after {attempt} attempts: {e}")
+                    return rows
+                logger.warning(f"Queued '{kind}' writes failed (attempt {attempt}), retrying: {e}")
+                await asyncio.sleep(0.5 * attempt)
+            except Exception as e:
+                logger.warning(f"Batch of {len(rows)} '{kind}' writes failed, retrying row by row: {e}")
+                break
+
+        # executemany runs in a transaction, so one bad row rolls back the batch.
+        # Re-run each row on its own so only the offending rows are set aside.
+        done = 0
+        try:
+            async with self.pool.acquire() as conn:
+                for row in rows:
+                    try:
+                        await conn.execute(sql, *row)
+                        self.written += 1
+                    except RETRYABLE_ERRORS:
+                        raise
+                    except Exception as e:
+                        self._reject(kind, row, e)
+                    done += 1
+        except RETRYABLE_ERRORS:
+            return rows[done:]
+        return []
+
+    def _reject(self, kind: str, row: Tuple, error: Exception):
+        """Set aside a write the database refused so it can be inspected and replayed by hand."""
+        self.failed += 1
+        if self.journal:
+            self.journal.reject(kind, row, error)
+            where = self.journal.rejected_path
+        else:
+            self.rejected.append((kind, row))
+            where = 'rejected writes'
+        logger.error(f"Queued '{kind}' write {row!r} rejected, kept in {where}: {error}")
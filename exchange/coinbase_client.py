@@ -37,6 +37,8 @@ class CoinbaseClient:
         # WebSocket connection
         self.ws_connection = None
         self.ws_task = None
+        self.poll_task = None
+        self.ws_pairs: List[str] = []
         self.market_data: Dict[str, Dict] = {}
         
         # Session for HTTP requests
@@ -365,6 +367,30 @@ class CoinbaseClient:
             logger.error(f"Failed to cancel order {order_id}: {e}", exc_info=True)
             return False
     
+    async def _get_public_json(self, url: str, params: Dict) -> Optional[Any]:
+        """
+        GET a public endpoint, backing off while the exchange answers 429.
+        
+        The wait honours Retry-After when given, otherwise it doubles from
+        one second, for up to CANDLE_FETCH_MAX_RETRIES retries.
+        
+        Returns:
+            Parsed JSON body, or None for any other non-200 response
+        """
+        for attempt in range(self.config.CANDLE_FETCH_MAX_RETRIES + 1):
+            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    return await response.json()
+                if response.status != 429 or attempt == self.config.CANDLE_FETCH_MAX_RETRIES:
+                    return None
+                try:
+                    delay = float(response.headers.get('Retry-After', ''))
+                except ValueError:
+                    delay = float(2 ** attempt)
+            logger.debug(f"Rate limited fetching {url}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        return None
+    
     async def _fetch_real_candles(self, pair: str, granularity: str, start: datetime, end: datetime) -> List[Dict]:
         """Fetch real historical candle data from Coinbase."""
         if not self.session:
@@ -390,30 +416,29 @@ class CoinbaseClient:
                 'granularity': granularity_seconds
             }
             
-            async with self.session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if not data or (isinstance(data, dict) and 'message' in data):
-                        # API returned error, try without date params (get recent data)
-                        params_simple = {'granularity': granularity_seconds}
-                        async with self.session.get(url, params=params_simple, timeout=aiohttp.ClientTimeout(total=10)) as resp2:
-                            if resp2.status == 200:
-                                data = await resp2.json()
-                    
-                    candles = []
-                    if isinstance(data, list):
-                        for candle in data:
-                            # Coinbase format: [time, low, high, open, close, volume]
-                            if len(candle) >= 6:
-                                candles.append({
-                                    'timestamp': int(candle[0]),
-                                    'low': float(candle[1]),
-                                    'high': float(candle[2]),
-                                    'open': float(candle[3]),
-                                    'close': float(candle[4]),
-                                    'volume': float(candle[5])
-                                })
-                    return sorted(candles, key=lambda x: x['timestamp']) if candles else []
+            data = await self._get_public_json(url, params)
+            if data is not None:
+                if not data or (isinstance(data, dict) and 'message' in data):
+                    # API returned error, try without date params (get recent data)
+                    params_simple = {'granularity': granularity_seconds}
+                    recent = await self._get_public_json(url, params_simple)
+                    if recent is not None:
+                        data = recent
+                
+                candles = []
+                if isinstance(data, list):
+                    for candle in data:
+                        # Coinbase format: [time, low, high, open, close, volume]
+                        if len(candle) >= 6:
+                            candles.append({
+                                'timestamp': int(candle[0]),
+                                'low': float(candle[1]),
+                                'high': float(candle[2]),
+                                'open': float(candle[3]),
+                                'close': float(candle[4]),
+                                'volume': float(candle[5])
+                            })
+                return sorted(candles, key=lambda x: x['timestamp']) if candles else []
         except Exception as e:
             logger.debug(f"Public API candles fetch failed for {pair}: {e}")
             # Try authenticated endpoint if available
@@ -530,27 +555,71 @@ class CoinbaseClient:
     
     async def start_websocket(self, pairs: List[str]):
         """Start WebSocket connection for real-time market data."""
+        self.ws_pairs = list(pairs)
         use_real_data = self.config.USE_REAL_MARKET_DATA or not self.paper_trading
         
         if use_real_data and (self.api_key or not self.paper_trading):
             # Use real WebSocket connection
-            self.ws_task = asyncio.create_task(self._websocket_loop(pairs))
+            self.ws_task = asyncio.create_task(self._websocket_loop())
         else:
             # Use paper trading data generator or public ticker updates
-            self.ws_task = asyncio.create_task(self._paper_websocket_loop(pairs))
+            self.ws_task = asyncio.create_task(self._paper_websocket_loop())
             
             # If using real market data but no auth, poll public API periodically
-            if use_real_data and not self.api_key:
-                asyncio.create_task(self._poll_real_market_data(pairs))
+            if use_real_data and not self.api_key and not (self.poll_task and not self.poll_task.done()):
+                self.poll_task = asyncio.create_task(self._poll_real_market_data())
     
-    async def _poll_real_market_data(self, pairs: List[str]):
+    async def update_subscriptions(self, add: Optional[List[str]] = None, remove: Optional[List[str]] = None):
+        """
+        Add or remove pairs from the running market data feed without restarting it.
+        
+        Args:
+            add: Pairs to start streaming
+            remove: Pairs to stop streaming (their cached market data is dropped)
+        """
+        add = [pair for pair in (add or []) if pair not in self.ws_pairs]
+        remove = [pair for pair in (remove or []) if pair in self.ws_pairs]
+        if not add and not remove:
+            return
+        
+        self.ws_pairs = [pair for pair in self.ws_pairs if pair not in remove] + add
+        for pair in remove:
+            self.market_data.pop(pair, None)
+        
+        if not self.ws_task or self.ws_task.done():
+            await self.start_websocket(self.ws_pairs)
+            return
+        
+        # Paper and polling loops read ws_pairs on every tick; a live socket needs
+        # explicit (un)subscribe messages
+        if self.ws_connection:
+            try:
+                if remove:
+                    await self.ws_connection.send(json.dumps({
+                        'type': 'unsubscribe',
+                        'product_ids': remove,
+                        'channels': ['ticker']
+                    }))
+                if add:
+                    await self.ws_connection.send(json.dumps({
+                        'type': 'subscribe',
+                        'product_ids': add,
+                        'channels': ['ticker']
+                    }))
+            except Exception as e:
+                # The reconnect path resubscribes to the full ws_pairs list
+                logger.warning(f"Failed to update WebSocket subscriptions: {e}")
+        
+        logger.info(f"Market data subscriptions updated (added: {add}, removed: {remove})")
+    
+    async def _poll_real_market_data(self):
         """Poll public API for real market data updates."""
         while True:
             try:
                 await asyncio.sleep(5)  # Update every 5 seconds
-                for pair in pairs:
+                for pair in list(self.ws_pairs):
                     real_data = await self._fetch_real_market_data(pair)
-                    if real_data:
+                    if real_data and pair in self.ws_pairs:
                         self.market_data[pair] = real_data
             except asyncio.CancelledError:
                 break
@@ -558,7 +627,7 @@ class CoinbaseClient:
                 logger.error(f"Error polling market data: {e}", exc_info=True)
                 await asyncio.sleep(10)
     
-    async def _websocket_loop(self, pairs: List[str]):
+    async def _websocket_loop(self):
         """WebSocket loop for live trading."""
         try:
             async with websockets.connect(self.ws_url) as ws:
@@ -566,7 +635,7 @@ class CoinbaseClient:
                 # Subscribe to ticker channels
                 subscribe_msg = {
                     'type': 'subscribe',
-                    'product_ids': pairs,
+                    'product_ids': list(self.ws_pairs),
                     'channels': ['ticker']
                 }
                 await ws.send(json.dumps(subscribe_msg))
@@ -575,24 +644,29 @@ class CoinbaseClient:
                     data = json.loads(message)
                     if data.get('type') == 'ticker':
                         pair = data.get('product_id')
+                        if pair not in self.ws_pairs:
+                            continue
                         self.market_data[pair] = {
                             'price': float(data.get('price', 0)),
                             'volume_24h': float(data.get('volume_24h', 0)),
                             'timestamp': datetime.utcnow()
                         }
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
             logger.error(f"WebSocket error: {e}", exc_info=True)
+            self.ws_connection = None
             await asyncio.sleep(5)
             # Attempt reconnection
-            await self.start_websocket(pairs)
+            await self.start_websocket(self.ws_pairs)
     
-    async def _paper_websocket_loop(self, pairs: List[str]):
+    async def _paper_websocket_loop(self):
         """Simulated WebSocket loop for paper trading."""
         logger.info("Starting paper trading WebSocket simulation")
         while True:
             try:
                 await asyncio.sleep(1)  # Update every second
-                for pair in pairs:
+                for pair in self.ws_pairs:
                     if pair not in self.market_data:
                         base_price = 50000.0 if 'BTC' in pair else 3000.0
                         self.market_data[pair] = {
@@ -620,8 +694,17 @@ class CoinbaseClient:
             except asyncio.CancelledError:
                 pass
         
+        if self.poll_task:
+            self.poll_task.cancel()
+            try:
+                await self.poll_task
+            except asyncio.CancelledError:
+                pass
+            self.poll_task = None
+        
         if self.ws_connection:
             await self.ws_connection.close()
+            self.ws_connection = None
         
         logger.info("WebSocket connection stopped")
     
@@ -5,18 +5,24 @@ import logging
 import os
 import signal
 import sys
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from config import get_config
 from exchange import CoinbaseClient
-from strategy import EMARSIStrategy
-from risk import RiskManager
-from database import DatabaseManager
+from strategy import EMARSIStrategy, MarketSnapshot
+from strategy.market_snapshot import EMPTY_SNAPSHOT
+from risk import RiskManager, Position, PositionBook
+from database import create_database_manager
 from monitoring import PerformanceTracker
 from alerts import AlertManager
 from orders import AdvancedOrderManager
 from api.rest_api import create_app, run_api
+from api.rate_limit import MemoryBucketStore, RateLimitPolicy
 from utils.log_buffer import setup_log_buffer
+from utils.candle_buffer import CandleBuffer, GRANULARITY_SECONDS
+from utils.state_snapshot import StateSnapshotStore
+from utils.broadcaster import Broadcaster
 
 # Configure logging
 logging.basicConfig(
@@ -42,7 +48,7 @@ class TradingBot:
         self.exchange = CoinbaseClient(self.config)
         self.strategy = EMARSIStrategy(self.config)
         self.risk_manager = RiskManager(self.config)
-        self.db = DatabaseManager(self.config)
+        self.db = create_database_manager(self.config)
         self.performance_tracker = PerformanceTracker(self.config)
         self.alert_manager = AlertManager(self.config)
         self.order_manager = AdvancedOrderManager(self.exchange, self.config)
@@ -54,20 +60,43 @@ class TradingBot:
         
         # State
         self.status = 'stopped'  # stopped, running, paused
-        self.positions: List[Dict] = []
+        self.positions = PositionBook()
         self.initial_balance = self.config.ACCOUNT_SIZE
         self.running = False
         self.trading_task: Optional[asyncio.Task] = None
         self.api_task: Optional[asyncio.Task] = None
         self.kill_switch_activated = False
         
-        # Candle data cache
-        self.candle_cache: Dict[str, List[Dict]] = {}
+        # Live events (prices, positions, fills, equity) pushed to dashboard streams
+        self.events = Broadcaster(
+            max_queue=self.config.EVENT_STREAM_QUEUE_SIZE,
+            max_dropped=self.config.EVENT_STREAM_MAX_DROPPED
+        )
+        
+        # Indicators and entry conditions from the last signal evaluation (read by the API)
+        self.market_snapshot: MarketSnapshot = EMPTY_SNAPSHOT
+        
+        # Candle data cache (one ring buffer per pair)
+        self.candle_cache: Dict[str, CandleBuffer] = {}
+        
+        # Pairs removed from TRADING_PAIRS that keep streaming until their positions close
+        self.retained_pairs: Set[str] = set()
         
         # Daily summary tracking
         self.last_summary_date = datetime.utcnow().date()
         self.daily_summary_sent = False
         
+        # Warm restart snapshots
+        self.snapshot_store = StateSnapshotStore(
+            self.config.STATE_SNAPSHOT_PATH,
+            max_age_hours=self.config.STATE_SNAPSHOT_MAX_AGE_HOURS
+        ) if self.config.STATE_SNAPSHOT_ENABLED else None
+        self.last_snapshot_time = 0.0
+        
+        # Periodic database housekeeping (aggregate repair, partitions)
+        self.last_db_maintenance_time = time.monotonic()
+        self.db_maintenance_task: Optional[asyncio.Task] = None
+        
         logger.info("TradingBot initialized")
     
     async def initialize(self):
@@ -78,6 +107,10 @@ class TradingBot:
             # Initialize database
             await self.db.initialize()
             
+            # Restore in-memory state from the last snapshot (before reading balance,
+            # so a restored paper balance is picked up)
+            snapshot = self._restore_snapshot()
+            
             # Initialize exchange connection
             await self.exchange.start_websocket(self.config.TRADING_PAIRS)
             
@@ -87,6 +120,8 @@ class TradingBot:
                 self.initial_balance = self.config.ACCOUNT_SIZE
                 if self.config.PAPER_TRADING:
                     self.exchange.paper_balance = self.initial_balance
+            if snapshot and snapshot.get('initial_balance'):
+                self.initial_balance = snapshot['initial_balance']
             
             logger.info(f"Initial balance: ${self.initial_balance:.2f}")
             logger.info(f"Paper trading: {self.config.PAPER_TRADING}")
@@ -114,45 +149,253 @@ class TradingBot:
             return False
     
     async def reload_trading_pairs(self):
-        """Reload trading pairs dynamically without restarting the bot."""
-        logger.info(f"🔄 Reloading trading pairs: {self.config.TRADING_PAIRS}")
+        """Reload trading pairs dynamically without restarting the bot.
+        
+        Only the difference against the pairs currently streaming is applied:
+        removed pairs are unsubscribed, added pairs are subscribed and
+        bootstrapped, and unchanged pairs keep their feed and candle history.
+        Removed pairs with open positions keep streaming until the last of
+        those positions closes.
+        """
+        new_pairs = list(self.config.TRADING_PAIRS)
+        current_pairs = list(self.exchange.ws_pairs)
+        added = [pair for pair in new_pairs if pair not in current_pairs]
+        removed = [pair for pair in current_pairs if pair not in new_pairs]
+        
+        # Keep price updates flowing for pairs that still have open positions
+        retained = [pair for pair in removed if self.positions.has_pair(pair)]
+        removed = [pair for pair in removed if pair not in retained]
+        self.retained_pairs = set(retained)
+        if retained:
+            logger.info(f"Keeping market data for {retained} until open positions are closed")
+        
+        if not added and not removed:
+            logger.info(f"Trading pairs unchanged: {new_pairs}")
+            return
+        
+        logger.info(f"🔄 Reloading trading pairs (added: {added}, removed: {removed})")
         
         try:
-            # Stop current WebSocket connection
-            if self.exchange.ws and not self.exchange.ws.closed:
-                logger.info("Stopping current WebSocket connection...")
-                await self.exchange.stop_websocket()
+            await self.exchange.update_subscriptions(add=added, remove=removed)
             
-            # Restart WebSocket with new pairs
-            logger.info(f"Starting WebSocket with new pairs: {self.config.TRADING_PAIRS}")
-            await self.exchange.start_websocket(self.config.TRADING_PAIRS)
+            for pair in removed:
+                self.candle_cache.pop(pair, None)
             
-            # Reload candle data for all pairs
-            logger.info("Reloading candle data for all trading pairs...")
-            await self._load_candle_data()
+            if added:
+                await self._load_candle_data(added)
             
-            logger.info(f"✅ Trading pairs reloaded successfully: {self.config.TRADING_PAIRS}")
+            logger.info(f"✅ Trading pairs reloaded successfully: {new_pairs}")
         except Exception as e:
             logger.error(f"❌ Failed to reload trading pairs: {e}", exc_info=True)
             raise
     
-    async def _load_candle_data(self):
-        """Load initial candle data for all trading pairs."""
-        logger.info("Loading candle data...")
+    async def _release_retained_pair(self, pair: str):
+        """Stop streaming a pair removed by a reload once its last open position has closed."""
+        if pair not in self.retained_pairs or self.positions.has_pair(pair):
+            return
         
-        for pair in self.config.TRADING_PAIRS:
-            try:
+        self.retained_pairs.discard(pair)
+        if pair in self.config.TRADING_PAIRS:
+            return  # Added back since the reload
+        try:
+            await self.exchange.update_subscriptions(remove=[pair])
+            self.candle_cache.pop(pair, None)
+            logger.info(f"Stopped market data for {pair}, its last open position is closed")
+        except Exception as e:
+            logger.warning(f"Failed to unsubscribe {pair}: {e}")
+    
+    async def _load_candle_data(self, pairs: Optional[List[str]] = None):
+        """Load initial candle data for trading pairs concurrently.
+        
+        Pairs whose buffer was restored from a snapshot only backfill the gap
+        since their last stored bar; other pairs load the last 24 hours.
+        At most CANDLE_FETCH_CONCURRENCY pairs are fetched at once, and pair
+        fetches start at no more than CANDLE_FETCH_PER_SECOND per second
+        (a token bucket with a one-second burst). The exchange client backs
+        off and retries if it is still rate limited.
+        
+        Args:
+            pairs: Pairs to load (defaults to all configured trading pairs)
+        """
+        pairs = list(pairs if pairs is not None else self.config.TRADING_PAIRS)
+        if not pairs:
+            return
+        
+        logger.info(f"Loading candle data for {len(pairs)} pairs...")
+        started = time.monotonic()
+        semaphore = asyncio.Semaphore(max(1, self.config.CANDLE_FETCH_CONCURRENCY))
+        per_second = self.config.CANDLE_FETCH_PER_SECOND
+        pacer = MemoryBucketStore()
+        charge = [('candles', RateLimitPolicy(per_second, max(1.0, per_second)), 1.0)]
+        
+        async def load(pair: str):
+            async with semaphore:
+                while per_second > 0:
+                    wait = await pacer.take(charge)
+                    if not wait:
+                        break
+                    await asyncio.sleep(wait)
+                await self._load_pair_candles(pair)
+        
+        await asyncio.gather(*(load(pair) for pair in pairs))
+        logger.info(f"Candle data loaded for {len(pairs)} pairs in {time.monotonic() - started:.2f}s")
+    
+    async def _load_pair_candles(self, pair: str):
+        """Load or backfill candle data for a single pair."""
+        try:
+            buffer = self.get_candle_buffer(pair)
+            full_start = datetime.utcnow() - timedelta(hours=24)
+            last = buffer.last()
+            gap_start = datetime.utcfromtimestamp(last['timestamp']) if last else None
+            
+            if gap_start and gap_start > full_start:
                 candles = await self.exchange.get_candles(
                     pair,
                     granularity='ONE_MINUTE',
-                    start=datetime.utcnow() - timedelta(hours=24),
+                    start=gap_start,
                     end=datetime.utcnow()
                 )
-                self.candle_cache[pair] = candles
+                buffer.merge(candles)
+                logger.debug(f"Backfilled {len(candles)} candles for {pair} since {gap_start}")
+            else:
+                candles = await self.exchange.get_candles(
+                    pair,
+                    granularity='ONE_MINUTE',
+                    start=full_start,
+                    end=datetime.utcnow()
+                )
+                buffer.replace(candles)
                 logger.debug(f"Loaded {len(candles)} candles for {pair}")
-            except Exception as e:
-                logger.error(f"Failed to load candles for {pair}: {e}", exc_info=True)
-                self.candle_cache[pair] = []
+        except Exception as e:
+            logger.error(f"Failed to load candles for {pair}: {e}", exc_info=True)
+            self.get_candle_buffer(pair).clear()
+    
+    def _collect_state(self) -> Dict:
+        """Collect in-memory state for a warm restart snapshot."""
+        from orders import OrderStatus
+        open_order_statuses = (OrderStatus.PENDING, OrderStatus.ACTIVE, OrderStatus.PARTIALLY_FILLED)
+        
+        state = {
+            'initial_balance': self.initial_balance,
+            'candles': {pair: buffer.to_list() for pair, buffer in self.candle_cache.items()},
+            'positions': self.positions.to_list(),
+            'performance': self.performance_tracker.get_state(),
+            'risk': {
+                'daily_pnl': self.risk_manager.daily_pnl,
+                'daily_reset_time': self.risk_manager.daily_reset_time
+            },
+            'orders': {
+                order_id: order for order_id, order in self.order_manager.orders.items()
+                if order.status in open_order_statuses
+            },
+            'grids': {
+                grid_id: grid for grid_id, grid in self.grid_manager.grids.items()
+                if grid.status in ('active', 'paused')
+            },
+            'dca': {
+                dca_id: strategy for dca_id, strategy in self.dca_manager.strategies.items()
+                if strategy.status in ('active', 'paused')
+            }
+        }
+        
+        if self.config.PAPER_TRADING:
+            state['paper'] = {
+                'balance': self.exchange.paper_balance,
+                'positions': dict(self.exchange.paper_positions)
+            }
+        
+        return state
+    
+    def _restore_snapshot(self) -> Optional[Dict]:
+        """Restore in-memory state from the last snapshot, if one is available."""
+        if not self.snapshot_store:
+            return None
+        
+        state = self.snapshot_store.load()
+        if not state:
+            return None
+        
+        try:
+            for pair, candles in state.get('candles', {}).items():
+                if pair in self.config.TRADING_PAIRS:
+                    self.get_candle_buffer(pair).replace(candles)
+            
+            self.positions.clear()
+            for position_data in state.get('positions', []):
+                self.positions.add(Position.from_dict(position_data))
+            
+            if state.get('performance'):
+                self.performance_tracker.restore_state(state['performance'])
+            
+            risk_state = state.get('risk') or {}
+            if risk_state:
+                self.risk_manager.daily_pnl = risk_state.get('daily_pnl', 0.0)
+                self.risk_manager.daily_reset_time = risk_state.get('daily_reset_time', self.risk_manager.daily_reset_time)
+                self.risk_manager.reset_daily_metrics()
+            
+            self.order_manager.orders.update(state.get('orders', {}))
+            self.grid_manager.grids.update(state.get('grids', {}))
+            self.dca_manager.strategies.update(state.get('dca', {}))
+            
+            paper_state = state.get('paper')
+            if paper_state and self.config.PAPER_TRADING:
+                self.exchange.paper_balance = paper_state.get('balance', self.exchange.paper_balance)
+                self.exchange.paper_positions.update(paper_state.get('positions', {}))
+            
+            logger.info(
+                f"Restored state snapshot from {state.get('saved_at')}: "
+                f"{len(self.positions)} positions, {len(state.get('candles', {}))} candle buffers, "
+                f"{len(state.get('orders', {}))} orders, {len(state.get('grids', {}))} grids, "
+                f"{len(state.get('dca', {}))} DCA strategies"
+            )
+            return state
+        except Exception as e:
+            logger.error(f"Failed to restore state snapshot, starting cold: {e}", exc_info=True)
+            self.positions.clear()
+            self.candle_cache.clear()
+            return None
+    
+    async def _maybe_save_snapshot(self):
+        """Persist a state snapshot if the snapshot interval has elapsed."""
+        if not self.snapshot_store:
+            return
+        
+        now = time.monotonic()
+        if now - self.last_snapshot_time < self.config.STATE_SNAPSHOT_INTERVAL_SECONDS:
+            return
+        
+        self.last_snapshot_time = now
+        await self.snapshot_store.save(self._collect_state())
+    
+    def _maybe_run_db_maintenance(self):
+        """Periodically repair recent trade aggregates, roll partitions and check tax lots in the background."""
+        now = time.monotonic()
+        if now - self.last_db_maintenance_time < self.config.DB_MAINTENANCE_INTERVAL_SECONDS:
+            return
+        if self.db_maintenance_task and not self.db_maintenance_task.done():
+            return
+        
+        self.last_db_maintenance_time = now
+        self.db_maintenance_task = asyncio.create_task(self._run_db_maintenance())
+    
+    async def _run_db_maintenance(self):
+        """Database housekeeping that should never block the trading loop."""
+        # Yesterday onwards covers trades that closed across the day boundary
+        since = datetime.utcnow().date() - timedelta(days=1)
+        await self.db.repair_aggregates(since)
+        await self.db.maintain_partitions()
+        await self.db.reconcile_tax_lots()
+    
+    def get_candle_buffer(self, pair: str) -> CandleBuffer:
+        """Get the candle buffer for a pair, creating it on first use."""
+        buffer = self.candle_cache.get(pair)
+        if buffer is None:
+            buffer = CandleBuffer(
+                max_size=self.config.CANDLE_HISTORY_DEPTH,
+                granularity_seconds=GRANULARITY_SECONDS['ONE_MINUTE']
+            )
+            self.candle_cache[pair] = buffer
+        return buffer
     
     async def start(self):
         """Start the trading bot."""
@@ -195,6 +438,13 @@ class TradingBot:
         await self.grid_manager.stop_monitoring()
         await self.dca_manager.stop_monitoring()
         
+        # Make sure queued trade/log writes reach the database
+        await self.db.flush_writes()
+        
+        # Final snapshot so the next start can resume where we left off
+        if self.snapshot_store:
+            self.snapshot_store.save_sync(self._collect_state())
+        
         logger.info("Trading bot stopped")
     
     async def kill_switch(self):
@@ -212,7 +462,7 @@ class TradingBot:
         """Close all open positions."""
         closed_count = 0
         
-        for position in self.positions[:]:
+        for position in self.positions:
             try:
                 await self._close_position(position, 'MANUAL_CLOSE')
                 closed_count += 1
@@ -239,7 +489,7 @@ class TradingBot:
                     logger.info(f"Trading loop heartbeat - iteration #{iteration}, status: {self.status}, positions: {len(self.positions)}")
                 
                 # Update candle data periodically
-                if len(self.candle_cache.get(self.config.TRADING_PAIRS[0], [])) < 100:
+                if len(self.candle_cache.get(self.config.TRADING_PAIRS[0], ())) < 100:
                     await self._update_candle_data()
                 
                 # Check and manage existing positions
@@ -267,14 +517,23 @@ class TradingBot:
                 # Generate new signals only if running (not paused)
                 if self.status == 'running':
                     await self._check_signals()
+                else:
+                    self._refresh_market_snapshot()
                 
                 # Update performance metrics
                 balance = await self.exchange.get_account_balance()
                 self.performance_tracker.update_equity_curve(balance)
+                self.events.publish('equity', {'timestamp': datetime.utcnow().isoformat(), 'balance': balance})
                 
                 # Check if we should send daily summary (at end of trading day)
                 await self._check_daily_summary()
                 
+                # Persist state for fast warm restarts
+                await self._maybe_save_snapshot()
+                
+                # Keep trade aggregates consistent and partitions rolling
+                self._maybe_run_db_maintenance()
+                
                 # Wait before next iteration
                 await asyncio.sleep(self.config.LOOP_INTERVAL_SECONDS)
                 
@@ -341,16 +600,8 @@ class TradingBot:
                 )
                 
                 if candles:
-                    # Merge with existing cache
-                    existing = self.candle_cache.get(pair, [])
-                    existing_dict = {c['timestamp']: c for c in existing}
-                    
-                    for candle in candles:
-                        existing_dict[candle['timestamp']] = candle
-                    
-                    # Sort by timestamp and keep last 200
-                    sorted_candles = sorted(existing_dict.values(), key=lambda x: x['timestamp'])
-                    self.candle_cache[pair] = sorted_candles[-200:]
+                    # Merge into the ring buffer (appends new bars, amends the forming bar)
+                    self.get_candle_buffer(pair).merge(candles)
         except Exception as e:
             logger.error(f"Failed to update candle data: {e}", exc_info=True)
             # Send error alert for API failures
@@ -373,14 +624,16 @@ class TradingBot:
         signals_checked = 0
         signals_generated = 0
         signals_above_threshold = 0
+        conditions: Dict[str, Dict] = {}
         
         for pair in self.config.TRADING_PAIRS:
             try:
-                candles = self.candle_cache.get(pair, [])
+                candle_buffer = self.get_candle_buffer(pair)
                 min_candles_needed = max(self.config.EMA_PERIOD, self.config.RSI_PERIOD, self.config.VOLUME_PERIOD) + 1
-                if len(candles) < min_candles_needed:
-                    print(f"[{pair}] ⏭️ Insufficient candles: {len(candles)} < {min_candles_needed} (skipping)", file=sys.stderr, flush=True)
-                    logger.debug(f"[{pair}] Insufficient candles: {len(candles)} < {min_candles_needed}")
+                if len(candle_buffer) < min_candles_needed:
+                    conditions[pair] = self._insufficient_data_conditions(len(candle_buffer))
+                    print(f"[{pair}] ⏭️ Insufficient candles: {len(candle_buffer)} < {min_candles_needed} (skipping)", file=sys.stderr, flush=True)
+                    logger.debug(f"[{pair}] Insufficient candles: {len(candle_buffer)} < {min_candles_needed}")
                     continue
                 
                 signals_checked += 1
@@ -388,16 +641,16 @@ class TradingBot:
                 # Use latest ticker price instead of last candle close if available
                 market_data = await self.exchange.get_market_data([pair])
                 if pair in market_data and market_data[pair].get('price'):
-                    # Update last candle with real-time price
-                    if candles:
-                        candles[-1] = candles[-1].copy()
-                        candles[-1]['close'] = market_data[pair]['price']
-                        candles[-1]['high'] = max(candles[-1].get('high', market_data[pair]['price']), market_data[pair]['price'])
-                        candles[-1]['low'] = min(candles[-1].get('low', market_data[pair]['price']), market_data[pair]['price'])
+                    # Update forming candle with real-time price
+                    candle_buffer.apply_price(market_data[pair]['price'])
+                
+                candles = candle_buffer.to_list()
+                indicators = self.strategy.calculate_indicators(candles)
+                conditions[pair] = self._describe_conditions(indicators)
                 
                 # Generate signal (pass pair name for better logging)
                 print(f"[{pair}] About to call generate_signal() with {len(candles)} candles", file=sys.stderr, flush=True)
-                signal = self.strategy.generate_signal(candles, pair=pair)
+                signal = self.strategy.generate_signal(candles, pair=pair, indicators=indicators)
                 print(f"[{pair}] generate_signal() returned: {signal is not None}", file=sys.stderr, flush=True)
                 
                 if signal:
@@ -415,8 +668,7 @@ class TradingBot:
                         logger.info(f"[{pair}] Signal meets confidence threshold: {signal_conf:.1f}% >= {min_confidence}%")
                         
                         # Check if we already have a position in this pair
-                        existing_position = next((p for p in self.positions if p['pair'] == pair), None)
-                        if existing_position:
+                        if self.positions.has_pair(pair):
                             print(f"[{pair}] ⏭️ Skipping - already have position", file=sys.stderr, flush=True)
                             logger.debug(f"[{pair}] Skipping signal - position already exists")
                             continue
@@ -459,9 +711,39 @@ class TradingBot:
                 print(f"[{pair}] ❌ ERROR checking signal: {e}", file=sys.stderr, flush=True)
                 traceback.print_exc(file=sys.stderr)
                 logger.error(f"Error checking signals for {pair}: {e}", exc_info=True)
+                conditions.setdefault(pair, {'status': 'error', 'message': str(e)})
         
+        self.market_snapshot = MarketSnapshot.build(conditions)
         print(f"[CHECK SIGNALS] Complete: {signals_checked} checked, {signals_generated} generated, {signals_above_threshold} above threshold", file=sys.stderr, flush=True)
     
+    def _insufficient_data_conditions(self, candles_count: int) -> Dict:
+        """Market conditions entry for a pair without enough candles yet."""
+        required = max(self.config.EMA_PERIOD, self.config.RSI_PERIOD, self.config.VOLUME_PERIOD) + 1
+        return {
+            'status': 'insufficient_data',
+            'message': f'Need at least {required} candles, have {candles_count}',
+            'candles_count': candles_count,
+            'required_candles': required
+        }
+    
+    def _describe_conditions(self, indicators: Optional[Dict]) -> Dict:
+        """Market conditions entry for a pair from its indicators."""
+        if not indicators:
+            return {'status': 'error', 'message': 'Failed to calculate indicators'}
+        return self.strategy.describe_conditions(indicators)
+    
+    def _refresh_market_snapshot(self):
+        """Rebuild the market snapshot from the candle buffers while signals aren't being checked."""
+        conditions = {}
+        for pair in self.config.TRADING_PAIRS:
+            candle_buffer = self.get_candle_buffer(pair)
+            required = max(self.config.EMA_PERIOD, self.config.RSI_PERIOD, self.config.VOLUME_PERIOD) + 1
+            if len(candle_buffer) < required:
+                conditions[pair] = self._insufficient_data_conditions(len(candle_buffer))
+            else:
+                conditions[pair] = self._describe_conditions(self.strategy.calculate_indicators(candle_buffer.to_list()))
+        self.market_snapshot = MarketSnapshot.build(conditions)
+    
     async def _open_position(self, pair: str, signal: Dict, size: float):
         """Open a new position."""
         try:
@@ -483,20 +765,17 @@ class TradingBot:
                 return
             
             # Create position record
-            position = {
-                'id': len(self.positions) + 1,
-                'pair': pair,
-                'side': signal['type'],
-                'size': size,
-                'entry_price': signal['price'],
-                'stop_loss': signal['stop_loss'],
-                'take_profit': signal['take_profit'],
-                'entry_time': datetime.utcnow(),
-                'order_id': order_id,
-                'confidence_score': signal['confidence']
-            }
-            
-            self.positions.append(position)
+            position = self.positions.add(Position(
+                pair=pair,
+                side=signal['type'],
+                size=size,
+                entry_price=signal['price'],
+                stop_loss=signal['stop_loss'],
+                take_profit=signal['take_profit'],
+                entry_time=datetime.utcnow(),
+                order_id=order_id,
+                confidence_score=signal['confidence']
+            ))
             
             # Save to database
             trade_data = {
@@ -511,7 +790,19 @@ class TradingBot:
             }
             
             trade_id = await self.db.save_trade(trade_data)
-            position['db_id'] = trade_id
+            position.db_id = trade_id
+            
+            self.events.publish('fills', {
+                'type': 'open',
+                'trade_id': trade_id,
+                'pair': pair,
+                'side': signal['type'],
+                'size': size,
+                'price': signal['price'],
+                'order_id': order_id,
+                'time': position.entry_time.isoformat()
+            })
+            self.events.publish('positions', self.positions.to_list())
             
             logger.info(f"Position opened: {pair} {signal['type']} (ID: {trade_id})")
             
@@ -541,9 +832,18 @@ class TradingBot:
     
     async def _manage_positions(self):
         """Manage existing positions - check exit conditions."""
-        market_data = await self.exchange.get_market_data(self.config.TRADING_PAIRS)
+        # Include pairs removed from the config that still have open positions
+        pairs = list(self.config.TRADING_PAIRS)
+        pairs += [pair for pair in self.positions.pairs() if pair not in pairs]
+        market_data = await self.exchange.get_market_data(pairs)
         
-        for position in self.positions[:]:
+        # Refresh unrealized P&L aggregates
+        self.positions.mark_prices(market_data)
+        self.events.publish('prices', {
+            pair: data['price'] for pair, data in market_data.items() if data.get('price')
+        })
+        
+        for position in self.positions:
             try:
                 pair = position['pair']
                 current_price = market_data.get(pair, {}).get('price', position['entry_price'])
@@ -563,7 +863,7 @@ class TradingBot:
             except Exception as e:
                 logger.error(f"Error managing position {position.get('id')}: {e}", exc_info=True)
     
-    async def _close_position(self, position: Dict, exit_reason: str):
+    async def _close_position(self, position: Position, exit_reason: str):
         """Close a position."""
         try:
             pair = position['pair']
@@ -595,7 +895,7 @@ class TradingBot:
             pnl_pct = (pnl / (entry_price * size)) * 100.0
             
             # Remove from positions
-            self.positions.remove(position)
+            self.positions.remove(position.id)
             
             # Update risk manager
             self.risk_manager.update_daily_pnl(pnl)
@@ -628,6 +928,21 @@ class TradingBot:
                     'exit_reason': exit_reason
                 })
             
+            self.events.publish('fills', {
+                'type': 'close',
+                'trade_id': position.get('db_id'),
+                'pair': pair,
+                'side': side,
+                'size': size,
+                'price': current_price,
+                'pnl': pnl,
+                'pnl_pct': pnl_pct,
+                'exit_reason': exit_reason,
+                'time': trade_data['exit_time'].isoformat()
+            })
+            self.events.publish('positions', self.positions.to_list())
+            await self._release_retained_pair(pair)
+            
             logger.info(f"Position closed: {pair} {side} P&L: ${pnl:.2f} ({pnl_pct:.2f}%)")
             await self.db.log_event('INFO', f'Position closed: {pair} {side}', {
                 'pnl': pnl,
@@ -1,5 +1,7 @@
 """Monitoring module for performance tracking."""
 
 from .performance_tracker import PerformanceTracker
+from .portfolio_analytics import PortfolioAnalytics
+from .tax_lots import TaxLotEngine
 
-__all__ = ['PerformanceTracker']
+__all__ = ['PerformanceTracker', 'PortfolioAnalytics', 'TaxLotEngine']
@@ -230,6 +230,43 @@ class PerformanceTracker:
             }
         }
     
+    def get_state(self) -> Dict:
+        """Get tracker state for persistence."""
+        return {
+            'trades': list(self.trades),
+            'daily_pnl_history': list(self.daily_pnl_history),
+            'equity_curve': list(self.equity_curve),
+            'total_pnl': self.total_pnl,
+            'daily_pnl': self.daily_pnl,
+            'total_trades': self.total_trades,
+            'winning_trades': self.winning_trades,
+            'losing_trades': self.losing_trades,
+            'gross_profit': self.gross_profit,
+            'gross_loss': self.gross_loss,
+            'last_reset_date': self.last_reset_date
+        }
+    
+    def restore_state(self, state: Dict):
+        """Restore tracker state saved by get_state()."""
+        self.trades.clear()
+        self.trades.extend(state.get('trades', []))
+        self.daily_pnl_history.clear()
+        self.daily_pnl_history.extend(state.get('daily_pnl_history', []))
+        self.equity_curve.clear()
+        self.equity_curve.extend(state.get('equity_curve', []))
+        
+        self.total_pnl = state.get('total_pnl', 0.0)
+        self.daily_pnl = state.get('daily_pnl', 0.0)
+        self.total_trades = state.get('total_trades', 0)
+        self.winning_trades = state.get('winning_trades', 0)
+        self.losing_trades = state.get('losing_trades', 0)
+        self.gross_profit = state.get('gross_profit', 0.0)
+        self.gross_loss = state.get('gross_loss', 0.0)
+        self.last_reset_date = state.get('last_reset_date', self.last_reset_date)
+        
+        # Roll over to today if the snapshot was taken on an earlier day
+        self.reset_daily_metrics()
+    
     def get_recent_trades(self, limit: int = 50) -> List[Dict]:
         """Get recent trades."""
         return list(self.trades)[-limit:]
@@ -0,0 +1,190 @@
+"""Per-user portfolio analytics over closed trades, read from aggregates and cached."""
+
+import asyncio
+import logging
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from utils.equity_curve import EquityCurve
+from utils.ttl_cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# Columns read to extend the realized P&L curve
+CURVE_COLUMNS = 'id, exit_time, pnl'
+
+
+def empty_analytics() -> Dict[str, Any]:
+    return {
+        'pnl_by_pair': {},
+        'trades_by_pair': {},
+        'asset_allocation': {},
+        'win_streak': 0,
+        'loss_streak': 0,
+        'current_streak': 0,
+        'current_streak_type': None,
+        'realized_pnl_curve': None,
+        'closed_trades': 0,
+    }
+
+
+def pair_analytics(pair_stats: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Build per-pair P&L, trade counts and allocation from daily_pair_stats totals.
+
+    Args:
+        pair_stats: Output of DatabaseManager.get_pair_stats
+
+    Returns:
+        Dict with pnl_by_pair, trades_by_pair and asset_allocation
+    """
+    total_volume = sum(stats['volume'] for stats in pair_stats.values())
+    pnl_by_pair = {}
+    allocation = {}
+    for pair in sorted(pair_stats):
+        stats = pair_stats[pair]
+        pnl_by_pair[pair] = {
+            'total_pnl': stats['total_pnl'],
+            'total_trades': stats['trades'],
+            'winning_trades': stats['wins'],
+            'losing_trades': stats['losses'],
+            'win_rate': stats['wins'] / stats['trades'] * 100,
+            'total_volume': stats['volume']
+        }
+        if total_volume > 0:
+            allocation[pair] = {'percentage': stats['volume'] / total_volume * 100, 'volume': stats['volume']}
+    return {
+        'pnl_by_pair': pnl_by_pair,
+        'trades_by_pair': {pair: stats['total_trades'] for pair, stats in pnl_by_pair.items()},
+        'asset_allocation': allocation,
+    }
+
+
+class RealizedCurve:
+    """A user's cumulative realized P&L by exit time, extended as trades close.
+
+    Keeps the full-resolution curve and the (exit_time, id) of the last trade
+    it has seen, so an update only reads trades that closed since.
+    """
+
+    def __init__(self):
+        self.curve = EquityCurve()
+        self.cursor: Optional[Tuple[Any, int]] = None
+        self.total = 0.0
+
+    async def update(self, db_manager, user_id: Optional[int] = None, page_size: int = 1000) -> int:
+        """
+        Append trades closed since the last update.
+
+        Returns:
+            Number of trades appended
+        """
+        added = 0
+        while True:
+            page = await db_manager.get_closed_trades_by_exit(
+                after=self.cursor, user_id=user_id, limit=page_size, columns=CURVE_COLUMNS
+            )
+            for trade in page:
+                self.total += float(trade['pnl'])
+                self.curve.append(trade['exit_time'], self.total)
+            if page:
+                self.cursor = (page[-1]['exit_time'], page[-1]['id'])
+                added += len(page)
+            if len(page) < page_size:
+                return added
+
+
+class PortfolioAnalytics:
+    """Caches each user's closed-trade analytics until a trade closes.
+
+    Entries are tagged with the database's ``closed_trades_version`` when
+    they are computed. After a trade closes, per-pair totals are re-read from
+    the daily_pair_stats aggregates and streaks from a single query, while the
+    realized P&L curve only reads the trades that closed since the last
+    update. If the curve's total drifts from the aggregates (e.g. a trade was
+    re-closed) it is rebuilt. Requests in between are a dict lookup, and
+    concurrent misses for the same user share one load.
+    """
+
+    def __init__(self, db_manager, max_users: int = 1000, ttl: float = 3600.0, history_points: int = 200):
+        """
+        Initialize the analytics cache.
+
+        Args:
+            db_manager: Database manager providing the aggregate readers and closed_trades_version
+            max_users: Users kept cached before the least recently used is evicted
+            ttl: Seconds an entry is reused even if no trade closed (bounds staleness from other writers)
+            history_points: Points kept in the realized P&L curve
+        """
+        self.db_manager = db_manager
+        self.history_points = history_points
+        self._cache = TTLCache(max_size=max_users, ttl=ttl)
+        self._curves = TTLCache(max_size=max_users, ttl=ttl)
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.loads = 0
+        self.curve_rebuilds = 0
+
+    async def get(self, user_id: Optional[int] = None) -> Dict[str, Any]:
+        """Get a user's trade analytics, recomputing only after a trade closed."""
+        version = getattr(self.db_manager, 'closed_trades_version', 0)
+        entry = self._cache.get(user_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        pending = self._inflight.get(user_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[user_id] = future
+        try:
+            # Closes may still be in the write-behind queue
+            await self.db_manager.flush_writes()
+            analytics = await self._load(user_id)
+            self.loads += 1
+            self._cache.set(user_id, (version, analytics))
+            future.set_result(analytics)
+            return analytics
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # Waiters re-raise it; don't warn if there are none
+            raise
+        finally:
+            del self._inflight[user_id]
+
+    async def _load(self, user_id: Optional[int]) -> Dict[str, Any]:
+        pair_stats = await self.db_manager.get_pair_stats(user_id)
+        if not pair_stats:
+            self._curves.invalidate(user_id)
+            return empty_analytics()
+
+        streaks = await self.db_manager.get_streak_stats(user_id)
+        total_pnl = sum(stats['total_pnl'] for stats in pair_stats.values())
+        realized = self._curves.get(user_id)
+        if realized is not None:
+            await realized.update(self.db_manager, user_id)
+        if realized is None or abs(realized.total - total_pnl) > 1e-6 * max(1.0, abs(total_pnl)):
+            if realized is not None:
+                logger.info(f"Realized P&L curve for user {user_id} out of step with the aggregates, rebuilding")
+                self.curve_rebuilds += 1
+            realized = RealizedCurve()
+            await realized.update(self.db_manager, user_id)
+        self._curves.set(user_id, realized)
+
+        analytics = pair_analytics(pair_stats)
+        analytics.update(streaks)
+        # Copied, so later appends don't change a curve already served
+        curve = realized.curve.downsample(self.history_points)
+        analytics['realized_pnl_curve'] = EquityCurve.from_arrays(curve.timestamps, curve.balances)
+        analytics['closed_trades'] = sum(stats['trades'] for stats in pair_stats.values())
+        return analytics
+
+    def invalidate(self):
+        """Drop every user's cached analytics."""
+        self._cache.clear()
+        self._curves.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = self._cache.get_stats()
+        stats['loads'] = self.loads
+        stats['curve_rebuilds'] = self.curve_rebuilds
+        return stats
@@ -0,0 +1,219 @@
+"""Tax-lot matching (FIFO, LIFO, HIFO) over trade fills."""
+
+import heapq
+import itertools
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+TAX_LOT_METHODS = ('FIFO', 'LIFO', 'HIFO')
+
+# Lots held longer than this are long-term
+LONG_TERM_DAYS = 365
+
+# Quantities below this are rounding noise, not a remaining lot
+QUANTITY_EPSILON = 1e-12
+
+# Kinds of lot changes emitted for persistence
+LOT_OPENED = 'opened'
+LOT_REDUCED = 'reduced'
+LOT_CLOSED = 'closed'
+LOT_REALIZED = 'realized'
+
+
+class Lot:
+    """An open position fragment: bought (long) or sold short (short) at one price."""
+
+    __slots__ = ('id', 'user_id', 'method', 'pair', 'direction', 'quantity', 'price', 'opened_at', 'trade_id')
+
+    def __init__(self, id: int, user_id: int, method: str, pair: str, direction: str,
+                 quantity: float, price: float, opened_at: datetime, trade_id: Optional[int]):
+        self.id = id
+        self.user_id = user_id
+        self.method = method
+        self.pair = pair
+        self.direction = direction
+        self.quantity = quantity
+        self.price = price
+        self.opened_at = opened_at
+        self.trade_id = trade_id
+
+
+class RealizedLot(NamedTuple):
+    """A matched quantity: the part of an open lot a closing fill consumed."""
+
+    user_id: int
+    method: str
+    pair: str
+    direction: str
+    quantity: float
+    opened_at: datetime
+    closed_at: datetime
+    open_price: float
+    close_price: float
+    cost_basis: float
+    proceeds: float
+    gain: float
+    term: str
+    open_trade_id: Optional[int]
+    close_trade_id: Optional[int]
+
+
+class LotQueue:
+    """Open lots for one side of one asset, released in the method's order.
+
+    FIFO and LIFO are a deque (popleft / pop), so matching is O(1) per lot.
+    HIFO releases the lot with the smallest gain first: the highest-priced
+    long lot or the lowest-priced short lot, kept in a heap (O(log n)).
+    """
+
+    __slots__ = ('method', 'direction', '_lots', '_order')
+
+    def __init__(self, method: str, direction: str):
+        self.method = method
+        self.direction = direction
+        self._lots: Any = [] if method == 'HIFO' else deque()
+        self._order = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._lots)
+
+    def push(self, lot: Lot):
+        if self.method == 'HIFO':
+            key = -lot.price if self.direction == 'long' else lot.price
+            heapq.heappush(self._lots, (key, next(self._order), lot))
+        else:
+            self._lots.append(lot)
+
+    def peek(self) -> Lot:
+        if self.method == 'HIFO':
+            return self._lots[0][2]
+        return self._lots[0] if self.method == 'FIFO' else self._lots[-1]
+
+    def pop(self) -> Lot:
+        if self.method == 'HIFO':
+            return heapq.heappop(self._lots)[2]
+        return self._lots.popleft() if self.method == 'FIFO' else self._lots.pop()
+
+    def __iter__(self):
+        if self.method == 'HIFO':
+            return (entry[2] for entry in self._lots)
+        return iter(self._lots)
+
+
+def _term(opened_at: datetime, closed_at: datetime) -> str:
+    return 'long' if (closed_at - opened_at).days > LONG_TERM_DAYS else 'short'
+
+
+class TaxLotEngine:
+    """Matches buys and sells against open lots, per user, method and asset.
+
+    A buy first covers open short lots and a sell first disposes of open
+    long lots, in the method's order; any remainder opens a new lot. Every
+    configured method is kept up to date on every fill, so a report for any
+    of them reads precomputed rows. Each call returns the lot changes
+    (opened, reduced, closed, realized) for the caller to persist.
+    """
+
+    def __init__(self, methods: Iterable[str] = TAX_LOT_METHODS, first_lot_id: int = 1):
+        """
+        Initialize the engine.
+
+        Args:
+            methods: Matching methods to maintain (subset of TAX_LOT_METHODS)
+            first_lot_id: Id given to the next opened lot
+        """
+        methods = tuple(method.upper() for method in methods)
+        unknown = set(methods) - set(TAX_LOT_METHODS)
+        if unknown:
+            raise ValueError(f"Unknown tax lot methods: {sorted(unknown)}")
+        self.methods = methods
+        self._books: Dict[Tuple[int, str, str, str], LotQueue] = {}
+        self._lot_ids = itertools.count(first_lot_id)
+
+    def _queue(self, user_id: int, method: str, pair: str, direction: str) -> LotQueue:
+        key = (user_id, method, pair, direction)
+        queue = self._books.get(key)
+        if queue is None:
+            queue = self._books[key] = LotQueue(method, direction)
+        return queue
+
+    def restore(self, lots: Iterable[Lot]):
+        """Load persisted open lots (in the order they were opened) and continue their ids."""
+        last_id = 0
+        for lot in lots:
+            if lot.method in self.methods:
+                self._queue(lot.user_id, lot.method, lot.pair, lot.direction).push(lot)
+            last_id = max(last_id, lot.id)
+        self._lot_ids = itertools.count(max(last_id + 1, next(self._lot_ids)))
+
+    def open_lots(self) -> List[Lot]:
+        return [lot for queue in self._books.values() for lot in queue]
+
+    def record_fill(self, user_id: Optional[int], pair: str, side: str, quantity: float,
+                    price: float, time: datetime, trade_id: Optional[int] = None) -> List[Tuple[str, Any]]:
+        """
+        Apply a buy or sell to every method's lots.
+
+        Args:
+            user_id: Owner (None is stored as 0, like the trade aggregates)
+            pair: Asset traded
+            side: 'buy' or 'sell'
+            quantity: Units filled
+            price: Fill price
+            time: Fill time
+            trade_id: Trade the fill belongs to
+
+        Returns:
+            (kind, Lot or RealizedLot) changes in the order they happened
+        """
+        user_id = user_id or 0
+        closing, opening = ('short', 'long') if side == 'buy' else ('long', 'short')
+        changes: List[Tuple[str, Any]] = []
+        for method in self.methods:
+            remaining = quantity
+            queue = self._queue(user_id, method, pair, closing)
+            while remaining > QUANTITY_EPSILON and len(queue):
+                lot = queue.peek()
+                matched = min(lot.quantity, remaining)
+                changes.append((LOT_REALIZED, self._realize(lot, matched, price, time, trade_id)))
+                lot.quantity -= matched
+                remaining -= matched
+                if lot.quantity <= QUANTITY_EPSILON:
+                    queue.pop()
+                    changes.append((LOT_CLOSED, lot))
+                else:
+                    changes.append((LOT_REDUCED, lot))
+            if remaining > QUANTITY_EPSILON:
+                lot = Lot(next(self._lot_ids), user_id, method, pair, opening, remaining, price, time, trade_id)
+                self._queue(user_id, method, pair, opening).push(lot)
+                changes.append((LOT_OPENED, lot))
+        return changes
+
+    @staticmethod
+    def _realize(lot: Lot, quantity: float, price: float, time: datetime,
+                 trade_id: Optional[int]) -> RealizedLot:
+        if lot.direction == 'long':
+            cost_basis, proceeds = quantity * lot.price, quantity * price
+        else:
+            # A short's proceeds come from the opening sale; the cover is its cost
+            cost_basis, proceeds = quantity * price, quantity * lot.price
+        return RealizedLot(
+            lot.user_id, lot.method, lot.pair, lot.direction, quantity,
+            lot.opened_at, time, lot.price, price, cost_basis, proceeds,
+            proceeds - cost_basis, _term(lot.opened_at, time), lot.trade_id, trade_id
+        )
+
+
+def trade_fills(trade: Dict[str, Any]) -> List[Tuple[datetime, int, str, float, float]]:
+    """
+    Get a trade's fills as (time, order, side, quantity, price).
+
+    A LONG trade buys at entry and sells at exit; a SHORT does the reverse.
+    The exit is only included once the trade is closed.
+    """
+    entry_side, exit_side = ('buy', 'sell') if trade['side'].upper() in ('LONG', 'BUY') else ('sell', 'buy')
+    fills = [(trade['entry_time'], 0, entry_side, float(trade['size']), float(trade['entry_price']))]
+    if trade.get('exit_price') is not None and trade.get('exit_time') is not None:
+        fills.append((trade['exit_time'], 1, exit_side, float(trade['size']), float(trade['exit_price'])))
+    return fills
@@ -1,5 +1,6 @@
 """Risk management module."""
 
 from .risk_manager import RiskManager
+from .position_book import Position, PositionBook
 
-__all__ = ['RiskManager']
+__all__ = ['RiskManager', 'Position', 'PositionBook']
@@ -0,0 +1,232 @@
+"""Indexed in-memory book of open positions."""
+
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+
+class Position:
+    """Compact record for a single open position.
+
+    Supports dict-style access (``position['pair']``, ``position.get('stop_loss')``)
+    so existing strategy and risk code can keep treating positions as mappings.
+    """
+
+    __slots__ = (
+        'id', 'pair', 'side', 'size', 'entry_price', 'stop_loss', 'take_profit',
+        'entry_time', 'order_id', 'confidence_score', 'db_id', 'user_id',
+        'mark_price', 'unrealized_pnl'
+    )
+
+    def __init__(self, pair: str, side: str, size: float, entry_price: float,
+                 stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+                 entry_time: Optional[datetime] = None, order_id: Optional[str] = None,
+                 confidence_score: Optional[float] = None, db_id: Optional[int] = None,
+                 user_id: Optional[int] = None, id: Optional[int] = None):
+        self.id = id
+        self.pair = pair
+        self.side = side
+        self.size = size
+        self.entry_price = entry_price
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.entry_time = entry_time or datetime.utcnow()
+        self.order_id = order_id
+        self.confidence_score = confidence_score
+        self.db_id = db_id
+        self.user_id = user_id
+        self.mark_price = entry_price
+        self.unrealized_pnl = 0.0
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Position':
+        """Build a position from a dict (e.g. a restored snapshot)."""
+        position = cls(
+            pair=data['pair'],
+            side=data['side'],
+            size=data['size'],
+            entry_price=data['entry_price'],
+            stop_loss=data.get('stop_loss'),
+            take_profit=data.get('take_profit'),
+            entry_time=data.get('entry_time'),
+            order_id=data.get('order_id'),
+            confidence_score=data.get('confidence_score'),
+            db_id=data.get('db_id'),
+            user_id=data.get('user_id'),
+            id=data.get('id')
+        )
+        if data.get('mark_price'):
+            position.mark_price = data['mark_price']
+            position.unrealized_pnl = position.pnl_at(position.mark_price)
+        return position
+
+    @property
+    def notional(self) -> float:
+        """Position value at entry price."""
+        return (self.size or 0) * (self.entry_price or 0)
+
+    @property
+    def risk_amount(self) -> float:
+        """Amount at risk between entry and stop loss."""
+        if not self.stop_loss or self.stop_loss <= 0:
+            return 0.0
+        if self.side == 'LONG':
+            return self.size * (self.entry_price - self.stop_loss)
+        return self.size * (self.stop_loss - self.entry_price)
+
+    def pnl_at(self, price: float) -> float:
+        """Calculate P&L if the position were closed at the given price."""
+        if self.side == 'LONG':
+            return (price - self.entry_price) * self.size
+        return (self.entry_price - price) * self.size
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Get the position as a plain dict."""
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.__slots__
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Dict-style get."""
+        if key in self.__slots__:
+            return getattr(self, key)
+        return default
+
+    def __repr__(self) -> str:
+        return f"Position(id={self.id}, pair={self.pair}, side={self.side}, size={self.size}, entry_price={self.entry_price})"
+
+
+class PositionBook:
+    """Open positions indexed by id and by pair, with running exposure aggregates.
+
+    Exposure, risk and unrealized P&L totals are maintained incrementally as
+    positions are added, removed or marked to market, so lookups and risk checks
+    are O(1) regardless of how many positions are open.
+    """
+
+    def __init__(self):
+        self._by_id: Dict[int, Position] = {}
+        self._by_pair: Dict[str, Dict[int, Position]] = {}
+        self._next_id = 1
+
+        # Bumped whenever a position is opened or closed (cache invalidation)
+        self.version = 0
+
+        # Running aggregates
+        self.total_exposure = 0.0
+        self.total_risk = 0.0
+        self.unrealized_pnl = 0.0
+
+    def add(self, position: Position) -> Position:
+        """Add a position to the book, assigning an id if it has none."""
+        if position.id is None:
+            position.id = self._next_id
+        if position.id in self._by_id:
+            raise ValueError(f"Position {position.id} already exists")
+        self._next_id = max(self._next_id, position.id + 1)
+
+        self._by_id[position.id] = position
+        self._by_pair.setdefault(position.pair, {})[position.id] = position
+
+        self.total_exposure += position.notional
+        self.total_risk += position.risk_amount
+        self.unrealized_pnl += position.unrealized_pnl
+        self.version += 1
+        return position
+
+    def remove(self, position_id: int) -> Optional[Position]:
+        """Remove a position by id, returning it if it was open."""
+        position = self._by_id.pop(position_id, None)
+        if position is None:
+            return None
+
+        pair_positions = self._by_pair.get(position.pair)
+        if pair_positions is not None:
+            pair_positions.pop(position_id, None)
+            if not pair_positions:
+                del self._by_pair[position.pair]
+
+        self.total_exposure -= position.notional
+        self.total_risk -= position.risk_amount
+        self.unrealized_pnl -= position.unrealized_pnl
+        self.version += 1
+        if not self._by_id:
+            # Reset to exact zero so float drift doesn't accumulate across sessions
+            self.total_exposure = 0.0
+            self.total_risk = 0.0
+            self.unrealized_pnl = 0.0
+        return position
+
+    def get(self, position_id: int) -> Optional[Position]:
+        """Get a position by id."""
+        return self._by_id.get(position_id)
+
+    def get_by_pair(self, pair: str) -> List[Position]:
+        """Get all open positions for a pair."""
+        return list(self._by_pair.get(pair, {}).values())
+
+    def first_for_pair(self, pair: str) -> Optional[Position]:
+        """Get any open position for a pair, or None."""
+        pair_positions = self._by_pair.get(pair)
+        if not pair_positions:
+            return None
+        return next(iter(pair_positions.values()))
+
+    def has_pair(self, pair: str) -> bool:
+        """Check whether there is an open position for a pair."""
+        return pair in self._by_pair
+
+    def pairs(self) -> List[str]:
+        """Get pairs with at least one open position."""
+        return list(self._by_pair.keys())
+
+    def mark_price(self, pair: str, price: float):
+        """Mark all positions in a pair to the given price and update unrealized P&L."""
+        if not price or price <= 0:
+            return
+        for position in self._by_pair.get(pair, {}).values():
+            new_pnl = position.pnl_at(price)
+            self.unrealized_pnl += new_pnl - position.unrealized_pnl
+            position.unrealized_pnl = new_pnl
+            position.mark_price = price
+
+    def mark_prices(self, market_data: Dict[str, Dict]):
+        """Mark every pair with open positions from a market data mapping."""
+        for pair in self._by_pair:
+            price = market_data.get(pair, {}).get('price')
+            if price:
+                self.mark_price(pair, price)
+
+    def clear(self):
+        """Remove all positions."""
+        self._by_id.clear()
+        self._by_pair.clear()
+        self.version += 1
+        self.total_exposure = 0.0
+        self.total_risk = 0.0
+        self.unrealized_pnl = 0.0
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Get all positions as plain dicts."""
+        return [position.to_dict() for position in self._by_id.values()]
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __iter__(self) -> Iterator[Position]:
+        # Iterate over a copy so callers can close positions while looping
+        return iter(list(self._by_id.values()))
+
+    def __contains__(self, position_id: int) -> bool:
+        return position_id in self._by_id
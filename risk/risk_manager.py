@@ -2,8 +2,9 @@
 
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional, Tuple, Union
 from config import get_config
+from .position_book import PositionBook
 
 logger = logging.getLogger(__name__)
 
@@ -80,7 +81,33 @@ class RiskManager:
         
         return position_size
     
-    def validate_trade(self, account_balance: float, positions: List[Dict], 
+    def _total_exposure(self, positions: Union[PositionBook, List[Dict]]) -> float:
+        """Get total notional exposure, using the book's running total when available."""
+        if isinstance(positions, PositionBook):
+            return positions.total_exposure
+        return sum(p.get('size', 0) * p.get('entry_price', 0) for p in positions)
+    
+    def _total_risk(self, positions: Union[PositionBook, List[Dict]]) -> float:
+        """Get total amount at risk to stop losses, using the book's running total when available."""
+        if isinstance(positions, PositionBook):
+            return positions.total_risk
+        
+        total_risk = 0.0
+        for position in positions:
+            size = position.get('size', 0)
+            entry_price = position.get('entry_price', 0)
+            stop_loss = position.get('stop_loss', 0)
+            side = position.get('side', 'LONG')
+            
+            if stop_loss > 0:
+                if side == 'LONG':
+                    risk_per_unit = entry_price - stop_loss
+                else:
+                    risk_per_unit = stop_loss - entry_price
+                total_risk += size * risk_per_unit
+        return total_risk
+    
+    def validate_trade(self, account_balance: float, positions: Union[PositionBook, List[Dict]], 
                       new_position_size: float, entry_price: float) -> Tuple[bool, str]:
         """Validate if a new trade can be opened."""
         self.reset_daily_metrics()
@@ -101,7 +128,7 @@ class RiskManager:
             return False, f"Position size too large: {position_pct:.2f}% > {self.max_position_size_pct}%"
         
         # Check total exposure
-        total_exposure = sum(p.get('size', 0) * p.get('entry_price', 0) for p in positions)
+        total_exposure = self._total_exposure(positions)
         total_exposure += position_value
         exposure_pct = (total_exposure / account_balance) * 100.0
         
@@ -123,27 +150,16 @@ class RiskManager:
         self.daily_pnl += pnl
         logger.debug(f"Daily P&L updated: ${self.daily_pnl:.2f}")
     
-    def get_risk_metrics(self, account_balance: float, positions: List[Dict]) -> Dict:
+    def get_risk_metrics(self, account_balance: float, positions: Union[PositionBook, List[Dict]]) -> Dict:
         """Get current risk exposure metrics."""
         self.reset_daily_metrics()
         
-        total_exposure = sum(p.get('size', 0) * p.get('entry_price', 0) for p in positions)
+        total_exposure = self._total_exposure(positions)
         total_exposure_pct = (total_exposure / account_balance) * 100.0 if account_balance > 0 else 0.0
         
         # Calculate risk exposure (distance to stop loss)
-        total_risk = 0.0
-        for position in positions:
-            size = position.get('size', 0)
-            entry_price = position.get('entry_price', 0)
-            stop_loss = position.get('stop_loss', 0)
-            side = position.get('side', 'LONG')
-            
-            if stop_loss > 0:
-                if side == 'LONG':
-                    risk_per_unit = entry_price - stop_loss
-                else:
-                    risk_per_unit = stop_loss - entry_price
-                total_risk += size * risk_per_unit
+        total_risk = self._total_risk(positions)
+        unrealized_pnl = positions.unrealized_pnl if isinstance(positions, PositionBook) else 0.0
         
         risk_exposure_pct = (total_risk / account_balance) * 100.0 if account_balance > 0 else 0.0
         
@@ -155,6 +171,7 @@ class RiskManager:
             'total_exposure_pct': total_exposure_pct,
             'risk_exposure': total_risk,
             'risk_exposure_pct': risk_exposure_pct,
+            'unrealized_pnl': unrealized_pnl,
             'daily_pnl': self.daily_pnl,
             'daily_loss_limit': self.daily_loss_limit,
             'remaining_daily_capacity': remaining_daily_capacity,
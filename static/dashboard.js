@@ -247,6 +247,7 @@ document.addEventListener('DOMContentLoaded', async () => {
     // Initial load
     updateCurrentPage();
     refreshInterval = setInterval(updateCurrentPage, 5000);
+    connectEventStream();
     
     // Initialize onboarding for new users (after a short delay to let page load)
     setTimeout(() => {
@@ -256,6 +257,24 @@ document.addEventListener('DOMContentLoaded', async () => {
     }, 1500);
 });
 
+// Live updates: refresh as soon as positions change instead of waiting for the next poll
+let eventStream = null;
+let streamRefreshTimer = null;
+
+function connectEventStream() {
+    if (typeof EventSource === 'undefined' || eventStream) return;
+    eventStream = new EventSource(buildAuthedUrl(`${API_BASE}/stream?topics=positions,fills`));
+    const refreshSoon = () => {
+        // Coalesce bursts (a fill is followed by a positions event)
+        clearTimeout(streamRefreshTimer);
+        streamRefreshTimer = setTimeout(updateCurrentPage, 250);
+    };
+    eventStream.addEventListener('fills', refreshSoon);
+    eventStream.addEventListener('positions', (event) => {
+        if (event.lastEventId !== '0') refreshSoon();  // id 0 is the snapshot sent on connect
+    });
+}
+
 function navigateToPage(page) {
     // Settings and Help are standalone pages, redirect to them
     if (page === 'settings') {
@@ -1,5 +1,6 @@
 """Strategy module for trading signals."""
 
 from .ema_rsi_strategy import EMARSIStrategy
+from .market_snapshot import MarketSnapshot
 
-__all__ = ['EMARSIStrategy']
+__all__ = ['EMARSIStrategy', 'MarketSnapshot']
@@ -99,6 +99,8 @@ class EMARSIStrategy:
             'price': prices[-1],
             'ema': ema,
             'rsi': rsi,
+            'volume': current_volume,
+            'volume_avg': volume_avg,
             'volume_ratio': current_volume / volume_avg if volume_avg > 0 else 1.0
         }
     
@@ -149,6 +151,77 @@ class EMARSIStrategy:
         
         return min(100.0, max(0.0, confidence))
     
+    def describe_conditions(self, indicators: Dict) -> Dict:
+        """
+        Describe how close current indicators are to a LONG or SHORT entry.
+        
+        Args:
+            indicators: Output of calculate_indicators
+        
+        Returns:
+            Per-side checks, confidence scores and what is blocking a trade
+            (ignoring open positions, which change between evaluations)
+        """
+        price = indicators['price']
+        ema = indicators['ema']
+        rsi = indicators['rsi']
+        volume_ratio = indicators['volume_ratio']
+        
+        long_checks = {
+            'price_above_ema': price > ema,
+            'rsi_in_range': self.rsi_long_min <= rsi <= self.rsi_long_max,
+            'volume_sufficient': volume_ratio >= self.volume_multiplier
+        }
+        short_checks = {
+            'price_below_ema': price < ema,
+            'rsi_in_range': self.rsi_short_min <= rsi <= self.rsi_short_max,
+            'volume_sufficient': volume_ratio >= self.volume_multiplier
+        }
+        
+        sides = {}
+        for side, checks, rsi_min, rsi_max in (
+            ('LONG', long_checks, self.rsi_long_min, self.rsi_long_max),
+            ('SHORT', short_checks, self.rsi_short_min, self.rsi_short_max)
+        ):
+            conditions_met = all(checks.values())
+            confidence = self.calculate_confidence_score(indicators, side)
+            sides[side] = {
+                'conditions_met': conditions_met,
+                'confidence': confidence,
+                'meets_threshold': conditions_met and confidence >= self.min_confidence,
+                'checks': checks,
+                'rsi_range': f'{rsi_min}-{rsi_max}',
+                'volume_required': f'{self.volume_multiplier}x average'
+            }
+        
+        blockers = []
+        if not sides['LONG']['meets_threshold'] and not sides['SHORT']['meets_threshold']:
+            blockers.append('No valid signal meets confidence threshold')
+        for checks in (long_checks, short_checks):
+            price_ok, rsi_ok, volume_ok = checks.values()
+            if price_ok and rsi_ok and not volume_ok:
+                blockers.append(f'Volume too low: {volume_ratio:.2f}x (need {self.volume_multiplier}x)')
+        
+        return {
+            'status': 'analyzing',
+            'indicators': {
+                'price': price,
+                'ema': ema,
+                'rsi': rsi,
+                'volume_ratio': volume_ratio,
+                'volume_avg': indicators.get('volume_avg', 0),
+                'current_volume': indicators.get('volume', 0)
+            },
+            'long_signal': sides['LONG'],
+            'short_signal': sides['SHORT'],
+            'requirements': {
+                'min_confidence': self.min_confidence,
+                'volume_multiplier': self.volume_multiplier
+            },
+            'blockers': blockers,
+            'ready_to_trade': sides['LONG']['meets_threshold'] or sides['SHORT']['meets_threshold']
+        }
+    
     def calculate_exit_levels(self, entry_price: float, signal_type: str, confidence: float) -> Tuple[float, float]:
         """Calculate take profit and stop loss levels based on confidence."""
         # Higher confidence = wider take profit, tighter stop loss
@@ -239,8 +312,9 @@ class EMARSIStrategy:
         self.rsi_values_today.append(rsi)
         self.volume_ratios_today.append(volume_ratio)
     
-    def generate_signal(self, candles: List[Dict], pair: str = "") -> Optional[Dict]:
-        """Generate trading signal based on indicators."""
+    def generate_signal(self, candles: List[Dict], pair: str = "",
+                        indicators: Optional[Dict] = None) -> Optional[Dict]:
+        """Generate trading signal based on indicators (pass ``indicators`` if already calculated for ``candles``)."""
         import sys
         
         # Log immediately to verify method is being called
@@ -251,8 +325,9 @@ class EMARSIStrategy:
             print(f"    [{pair}] ❌ Insufficient candles: {len(candles)} < {min_candles_needed} (returning None)", file=sys.stderr, flush=True)
             return None
         
-        print(f"    [{pair}] Calculating indicators...", file=sys.stderr, flush=True)
-        indicators = self.calculate_indicators(candles)
+        if indicators is None:
+            print(f"    [{pair}] Calculating indicators...", file=sys.stderr, flush=True)
+            indicators = self.calculate_indicators(candles)
         if not indicators:
             print(f"    [{pair}] ❌ calculate_indicators() returned None (returning None)", file=sys.stderr, flush=True)
             return None
@@ -0,0 +1,28 @@
+"""Immutable per-pair indicator snapshot published by the trading engine."""
+
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Mapping, NamedTuple, Optional
+
+
+class MarketSnapshot(NamedTuple):
+    """Indicators and entry conditions for every pair from one signal evaluation.
+
+    The engine builds a new snapshot each time it evaluates signals and
+    swaps it in as a whole; snapshots and their per-pair dicts are never
+    modified afterwards, so API handlers can read them without locks,
+    copies or recomputation.
+    """
+
+    pairs: Mapping[str, Dict]
+    evaluated_at: Optional[datetime]
+
+    @classmethod
+    def build(cls, pairs: Dict[str, Dict], evaluated_at: Optional[datetime] = None) -> 'MarketSnapshot':
+        return cls(MappingProxyType(dict(pairs)), evaluated_at or datetime.utcnow())
+
+    def get(self, pair: str) -> Optional[Dict]:
+        return self.pairs.get(pair)
+
+
+EMPTY_SNAPSHOT = MarketSnapshot(MappingProxyType({}), None)
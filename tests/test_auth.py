@@ -0,0 +1,165 @@
+"""Tests for token verification caching and route classification."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import jwt
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+from multidict import CIMultiDict
+
+from api.client_address import TrustedProxies
+from api.rest_api import TradingBotAPI
+from api.route_policy import ROUTE_API, ROUTE_PAGE, ROUTE_PUBLIC, ROUTE_ROOT, ROUTE_STATIC, classify_route
+from auth import auth_manager as auth_module
+from auth.auth_manager import AuthManager
+from auth.login_limiter import LoginLimiter
+from utils.bounded_executor import BoundedExecutor, ExecutorBusy
+
+
+@pytest.fixture
+def auth():
+    manager = AuthManager()
+    manager.secret_key = 'auth-test-secret-key-0123456789abcdef'
+    return manager
+
+
+@pytest.mark.parametrize('path, route', [
+    ('/static/js/dashboard.js', ROUTE_STATIC),
+    ('/favicon.ico', ROUTE_STATIC),
+    ('/', ROUTE_ROOT),
+    ('/api/auth/signin', ROUTE_PUBLIC),
+    ('/api/test/trading-health', ROUTE_PUBLIC),
+    ('/landing', ROUTE_PUBLIC),
+    ('/api/positions', ROUTE_API),
+    ('/api', ROUTE_API),
+    ('/dashboard', ROUTE_PAGE),
+])
+def test_classify_route(path, route):
+    """Test that paths land in the same class the prefix checks gave them."""
+    assert classify_route(path) == route
+
+
+def test_verified_token_is_cached(auth, monkeypatch):
+    """Test that a token is only decoded once while cached."""
+    token = auth.generate_token(7, 'user@example.com')
+    calls = []
+    decode = jwt.decode
+    monkeypatch.setattr(auth_module.jwt, 'decode', lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+    assert auth.verify_token(token)['user_id'] == 7
+    assert auth.verify_token(token)['email'] == 'user@example.com'
+    assert len(calls) == 1
+    assert auth.get_token_cache_stats()['hits'] == 1
+
+
+def test_cached_token_honors_exp(auth, monkeypatch):
+    """Test that a cached token stops verifying once it expires."""
+    token = auth.generate_token(7, 'user@example.com')
+    assert auth.verify_token(token) is not None
+
+    later = time.time() + auth.token_expiry_hours * 3600 + 1
+    monkeypatch.setattr(auth_module.time, 'time', lambda: later)
+    assert auth.verify_token(token) is None
+    assert len(auth.token_cache) == 0
+
+
+def test_invalid_tokens_and_key_rotation(auth):
+    """Test that bad tokens aren't cached and a new key drops cached tokens."""
+    assert auth.verify_token('not-a-token') is None
+    assert len(auth.token_cache) == 0
+
+    token = auth.generate_token(7, 'user@example.com')
+    assert auth.verify_token(token) is not None
+    auth.secret_key = 'rotated-secret-key-0123456789abcdefgh'
+    assert auth.verify_token(token) is None
+
+
+def test_login_limiter_sliding_window():
+    """Test that attempts past the limit wait for the oldest to age out."""
+    now = [0.0]
+    limiter = LoginLimiter(max_attempts=2, window=60, clock=lambda: now[0])
+
+    assert limiter.hit('a@example.com') == 0
+    now[0] = 10
+    assert limiter.hit('a@example.com') == 0
+    now[0] = 20
+    assert limiter.hit('a@example.com') == pytest.approx(40)
+    assert limiter.hit('b@example.com') == 0
+
+    now[0] = 61
+    assert limiter.hit('a@example.com') == 0
+    limiter.reset('a@example.com')
+    assert limiter.retry_after('a@example.com') == 0
+
+
+@pytest.mark.asyncio
+async def test_password_pool_rejects_when_full():
+    """Test that calls past max_pending fail fast instead of queueing."""
+    pool = BoundedExecutor(max_workers=1, max_pending=1)
+    release = threading.Event()
+    blocked = asyncio.ensure_future(pool.run(release.wait))
+    await asyncio.sleep(0)
+
+    with pytest.raises(ExecutorBusy):
+        await pool.run(time.sleep, 0)
+    release.set()
+    assert await blocked is True
+    assert pool.get_stats()['rejected'] == 1
+    pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_password_hashing_off_loop(auth):
+    """Test that async hashing round-trips through the pool."""
+    hashed = await auth.hash_password_async('correct horse')
+    assert await auth.verify_password_async('correct horse', hashed)
+    assert not await auth.verify_password_async('wrong horse', hashed)
+
+
+@pytest.mark.asyncio
+async def test_signin_rate_limited():
+    """Test that repeated sign-ins for one email get a 429 with Retry-After."""
+    async def get_user_by_email(email):
+        return None
+
+    api = TradingBotAPI(db_manager=SimpleNamespace(initialized=True, get_user_by_email=get_user_by_email))
+    api.auth_manager.email_limiter.max_attempts = 2
+    async with TestClient(TestServer(api.app)) as client:
+        credentials = {'email': 'user@example.com', 'password': 'hunter22'}
+        for _ in range(2):
+            response = await client.post('/api/auth/signin', json=credentials)
+            assert response.status == 401
+        response = await client.post('/api/auth/signin', json=credentials)
+        assert response.status == 429
+        assert int(response.headers['Retry-After']) > 0
+
+
+def test_failed_logins_do_not_lock_out_other_addresses(auth):
+    """Test that an email's failures count per address and only failures count."""
+    auth.email_limiter.max_attempts = 2
+    for _ in range(5):
+        assert auth.check_login_rate('203.0.113.9', 'user@example.com') == 0  # Successful sign-ins
+    for _ in range(2):
+        assert auth.check_login_rate('203.0.113.66', 'user@example.com') == 0
+        auth.record_login_failure('203.0.113.66', 'user@example.com')
+
+    assert auth.check_login_rate('203.0.113.66', 'user@example.com') > 0
+    assert auth.check_login_rate('203.0.113.9', 'user@example.com') == 0
+
+
+def test_client_address_behind_trusted_proxy():
+    """Test that X-Forwarded-For is only believed when it comes from a trusted proxy."""
+    def request(remote, forwarded=None):
+        headers = CIMultiDict({'X-Forwarded-For': forwarded} if forwarded else {})
+        return SimpleNamespace(remote=remote, headers=headers)
+
+    proxies = TrustedProxies(['10.0.0.0/8', '127.0.0.1'])
+    assert proxies.client_address(request('10.0.0.5', '198.51.100.7')) == '198.51.100.7'
+    # Client-supplied hops left of the first untrusted one are ignored
+    assert proxies.client_address(request('10.0.0.5', '6.6.6.6, 198.51.100.7, 10.0.0.9')) == '198.51.100.7'
+    assert proxies.client_address(request('203.0.113.1', '198.51.100.7')) == '203.0.113.1'
+    assert proxies.client_address(request('10.0.0.5')) == '10.0.0.5'
+    assert TrustedProxies().client_address(request('10.0.0.5', '198.51.100.7')) == '10.0.0.5'
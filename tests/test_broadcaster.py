@@ -0,0 +1,87 @@
+"""Tests for the live event broadcaster and the /api/stream endpoint."""
+
+import asyncio
+import threading
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.rest_api import TradingBotAPI
+from utils.broadcaster import Broadcaster
+
+
+@pytest.mark.asyncio
+async def test_fans_out_by_topic():
+    """Test that each client only receives the topics it subscribed to."""
+    broadcaster = Broadcaster()
+    prices = broadcaster.subscribe(['prices'])
+    everything = broadcaster.subscribe()
+
+    broadcaster.publish('prices', {'BTC-USD': 50000.0})
+    broadcaster.publish('fills', {'pair': 'BTC-USD'})
+
+    assert [frame.split(b'\n')[1] for frame in await prices.next_frames(timeout=1)] == [b'event: prices']
+    assert len(await everything.next_frames(timeout=1)) == 2
+
+
+@pytest.mark.asyncio
+async def test_slow_client_drops_oldest_then_disconnects():
+    """Test that a client that never reads loses old events and is eventually closed, without affecting others."""
+    broadcaster = Broadcaster(max_queue=3, max_dropped=5)
+    slow = broadcaster.subscribe()
+    fast = broadcaster.subscribe()
+
+    for i in range(5):
+        broadcaster.publish('equity', {'balance': i})
+        assert len(await fast.next_frames(timeout=1)) == 1
+    frames = await slow.next_frames(timeout=1)
+    assert len(frames) == 3 and b'"balance":4' in frames[-1]
+    assert slow.dropped == 2
+
+    for i in range(10):
+        broadcaster.publish('equity', {'balance': i})
+        await fast.next_frames(timeout=1)
+    assert slow.closed and not fast.closed
+    # The stream loop reads once more after the close before unsubscribing
+    assert await slow.next_frames(timeout=1) == []
+    dropped = broadcaster.get_stats()['dropped']
+    broadcaster.unsubscribe(slow)
+    stats = broadcaster.get_stats()
+    assert stats['disconnected_slow_clients'] == 1
+    assert stats['dropped'] == dropped and stats['clients'] == 1
+
+    broadcaster.unsubscribe(fast)
+    assert broadcaster.get_stats()['disconnected_slow_clients'] == 1
+
+
+@pytest.mark.asyncio
+async def test_publish_from_another_thread():
+    """Test that events published off the event loop (e.g. from logging) are delivered."""
+    broadcaster = Broadcaster()
+    subscription = broadcaster.subscribe(['logs'])
+    thread = threading.Thread(target=broadcaster.publish, args=('logs', {'message': 'hi'}))
+    thread.start()
+    thread.join()
+    frames = await subscription.next_frames(timeout=1)
+    assert b'"message":"hi"' in frames[0]
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_sends_events():
+    """Test that /api/stream delivers published events as server-sent events."""
+    api = TradingBotAPI()
+    api.auth_manager.secret_key = 'stream-test-secret-key-0123456789abcdef'
+    token = api.auth_manager.generate_token(1, 'user@example.com')
+    async with TestClient(TestServer(api.app)) as client:
+        bad = await client.get('/api/stream', params={'token': token, 'topics': 'nope'})
+        assert bad.status == 400
+
+        response = await client.get('/api/stream', params={'token': token, 'topics': 'fills'})
+        assert response.headers['Content-Type'] == 'text/event-stream'
+        assert await response.content.readuntil(b'\n\n') == b'retry: 3000\n\n'
+
+        while not api.broadcaster.get_stats()['clients']:
+            await asyncio.sleep(0.01)
+        api.broadcaster.publish('fills', {'pair': 'ETH-USD', 'type': 'open'})
+        frame = await asyncio.wait_for(response.content.readuntil(b'\n\n'), timeout=2)
+        assert b'event: fills' in frame and b'"pair":"ETH-USD"' in frame
+        response.close()
@@ -0,0 +1,72 @@
+"""Tests for candle ring buffer."""
+
+import pytest
+from utils.candle_buffer import CandleBuffer
+
+
+def make_candle(bar: int, close: float = 100.0):
+    """Build a one-minute candle for the given bar number."""
+    return {
+        'timestamp': 1000020 + bar * 60,
+        'open': close,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': 1000.0
+    }
+
+
+@pytest.fixture
+def buffer():
+    """Create a small candle buffer."""
+    return CandleBuffer(max_size=5, granularity_seconds=60)
+
+
+def test_append_and_evict(buffer):
+    """Test that new bars append and the oldest bar is evicted at depth."""
+    buffer.merge(make_candle(i) for i in range(8))
+
+    assert len(buffer) == 5
+    assert buffer[0]['timestamp'] == make_candle(3)['timestamp']
+    assert buffer.last()['timestamp'] == make_candle(7)['timestamp']
+
+
+def test_amend_forming_bar(buffer):
+    """Test that a candle for the current bar replaces it instead of appending."""
+    buffer.merge([make_candle(0), make_candle(1)])
+    buffer.upsert(make_candle(1, close=105.0))
+
+    assert len(buffer) == 2
+    assert buffer.last()['close'] == 105.0
+
+
+def test_late_correction(buffer):
+    """Test that corrections to closed bars inside the window are applied."""
+    buffer.merge(make_candle(i) for i in range(5))
+    assert buffer.upsert(make_candle(2, close=90.0))
+
+    assert len(buffer) == 5
+    assert buffer[2]['close'] == 90.0
+    # Bars older than the window are ignored once the buffer is full
+    buffer.upsert(make_candle(5))
+    assert not buffer.upsert(make_candle(0, close=1.0))
+
+
+def test_apply_price(buffer):
+    """Test live price patching of the forming bar."""
+    buffer.merge([make_candle(0), make_candle(1)])
+    snapshot = buffer.to_list()
+
+    buffer.apply_price(110.0)
+
+    assert buffer.last()['close'] == 110.0
+    assert buffer.last()['high'] == 110.0
+    assert buffer.last()['low'] == 99.0
+    # Earlier snapshots are not mutated
+    assert snapshot[-1]['close'] == 100.0
+
+
+def test_apply_price_empty(buffer):
+    """Test live price patching on an empty buffer is a no-op."""
+    assert buffer.apply_price(100.0) is None
+    assert len(buffer) == 0
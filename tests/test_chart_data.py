@@ -0,0 +1,123 @@
+"""Tests for chart series built from the candle store."""
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from api.chart_data import ChartDataService, ChartSeries, aggregate, candles_to_columns, parse_chart_time
+from strategy.ema_rsi_strategy import EMARSIStrategy
+from utils.candle_buffer import CandleBuffer
+
+NOW = 1_700_000_000 - 1_700_000_000 % 3600
+
+
+def make_candles(count: int, end: int = NOW, seconds: int = 60):
+    rng = np.random.default_rng(7)
+    closes = 100 + np.cumsum(rng.normal(0, 0.5, count))
+    return [
+        {'timestamp': end - (count - i) * seconds, 'open': float(c) - 0.1, 'high': float(c) + 0.5,
+         'low': float(c) - 0.5, 'close': float(c), 'volume': float(10 + i % 7)}
+        for i, c in enumerate(closes)
+    ]
+
+
+class FakeExchange:
+    def __init__(self):
+        self.calls = []
+
+    async def get_candles(self, pair, granularity, start, end):
+        self.calls.append((pair, granularity, start, end))
+        return make_candles(int((end - start).total_seconds()) // 3600, end=int(end.timestamp()), seconds=3600)
+
+
+@pytest.fixture
+def bot():
+    buffer = CandleBuffer(max_size=300, granularity_seconds=60)
+    buffer.merge(make_candles(300))
+    return SimpleNamespace(candle_cache={'BTC-USD': buffer}, strategy=EMARSIStrategy(), exchange=FakeExchange())
+
+
+def test_aggregate_ohlcv():
+    """Test that minute bars merge into candles aligned to the bucket."""
+    columns = candles_to_columns(make_candles(10, end=NOW + 300))
+    merged = aggregate(columns, 300)
+    assert merged['time'].tolist() == [NOW - 300, NOW]
+    assert merged['open'][0] == columns['open'][0] and merged['close'][1] == columns['close'][-1]
+    assert merged['high'][1] == columns['high'][5:].max()
+    assert merged['volume'].sum() == columns['volume'].sum()
+
+
+@pytest.mark.asyncio
+async def test_local_series_matches_strategy(bot):
+    """Test that indicator series end on the values the strategy trades on."""
+    service = ChartDataService(bot)
+    series = await service.get_series('BTC-USD', '1m', end=NOW, limit=100)
+    assert len(series) == 100 and series.source == 'local'
+
+    expected = bot.strategy.calculate_indicators(bot.candle_cache['BTC-USD'].to_list())
+    latest = series.last()
+    assert latest['ema'] == pytest.approx(expected['ema'])
+    assert latest['rsi'] == pytest.approx(expected['rsi'])
+    assert latest['volume_avg'] == pytest.approx(expected['volume_avg'])
+
+    # Cached until the buffer changes
+    await service.get_series('BTC-USD', '5m', end=NOW, limit=8)
+    builds = service.builds
+    await service.get_series('BTC-USD', '5m', end=NOW, limit=5)
+    assert service.builds == builds
+    bot.candle_cache['BTC-USD'].apply_price(150.0)
+    assert (await service.get_series('BTC-USD', '5m', end=NOW, limit=5)).last()['close'] == 150.0
+    assert service.builds == builds + 1
+
+
+@pytest.mark.asyncio
+async def test_long_ranges_are_fetched_and_downsampled(bot):
+    """Test the exchange fallback, range queries and resolution-aware downsampling."""
+    service = ChartDataService(bot)
+    series = await service.get_series('BTC-USD', '1h', start=NOW - 500 * 3600, end=NOW, points=100)
+    assert series.source == 'exchange'
+    assert len(series) <= 100 and series.resolution % 3600 == 0 and series.resolution > 3600
+    assert not np.isnan(series.columns['ema']).any()
+
+    await service.get_series('BTC-USD', '1h', start=NOW - 500 * 3600, end=NOW)
+    assert len(bot.exchange.calls) == 1
+
+    with pytest.raises(ValueError):
+        await service.get_series('BTC-USD', '3h')
+
+
+def test_binary_round_trip():
+    columns = candles_to_columns(make_candles(5))
+    columns.update({'ema': np.full(5, np.nan), 'rsi': np.arange(5.0), 'volume_avg': np.ones(5)})
+    series = ChartSeries(columns, 60)
+    decoded = ChartSeries.decode(series.encode(), 60)
+    assert decoded.columns['time'].tolist() == columns['time'].tolist()
+    assert decoded.to_json() == series.to_json()
+    assert series.to_json()['ema'] == [None] * 5
+
+
+def test_parse_chart_time():
+    assert parse_chart_time('1700000000') == 1_700_000_000
+    assert parse_chart_time('2023-11-14T22:13:20Z') == 1_700_000_000
+    assert parse_chart_time(None) is None
+
+
+@pytest.mark.asyncio
+async def test_default_end_is_wall_clock_epoch(monkeypatch):
+    """Test that the default window ends now regardless of the host's timezone."""
+    monkeypatch.setenv('TZ', 'Europe/Berlin')
+    time.tzset()
+    try:
+        now = int(time.time())
+        buffer = CandleBuffer(max_size=300, granularity_seconds=60)
+        buffer.merge(make_candles(300, end=now - now % 60 + 60))
+        bot = SimpleNamespace(candle_cache={'BTC-USD': buffer}, strategy=EMARSIStrategy(), exchange=FakeExchange())
+
+        series = await ChartDataService(bot).get_series('BTC-USD', '1m', limit=100)
+        assert len(series) == 100
+        assert now - series.last()['time'] < 60
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
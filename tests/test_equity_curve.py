@@ -0,0 +1,113 @@
+"""Tests for the array-backed equity curve."""
+
+import json
+import numpy as np
+import pytest
+from aiohttp.test_utils import make_mocked_request
+from datetime import datetime, timedelta
+
+from api.rest_api import TradingBotAPI
+from database import SQLiteDatabaseManager
+from tests.test_sqlite_backend import SQLiteConfig
+from utils.equity_curve import EquityCurve, lttb_indices
+
+
+def make_curve(points=5000):
+    curve = EquityCurve(capacity=16)
+    start = datetime(2024, 1, 1)
+    for i in range(points):
+        curve.append(start + timedelta(minutes=i), 10000.0 + 50.0 * np.sin(i / 200.0) + (i // 250) * 1.37)
+    return curve
+
+
+def test_append_grows_arrays():
+    """Test that appending past the preallocated capacity keeps every point."""
+    curve = make_curve(1000)
+    assert len(curve) == 1000
+    assert curve.timestamps[1] - curve.timestamps[0] == 60_000
+    assert curve.to_points()[0] == {'timestamp': '2024-01-01T00:00:00', 'balance': curve.balances[0]}
+
+
+def test_encode_round_trip_is_compact():
+    """Test that the binary encoding restores the curve to the cent and is far smaller than JSON."""
+    curve = make_curve()
+    blob = curve.encode()
+    restored = EquityCurve.decode(blob)
+
+    assert (restored.timestamps == curve.timestamps).all()
+    assert np.abs(restored.balances - curve.balances).max() <= 0.005
+    assert len(blob) * 10 < len(str(curve.to_points()))
+
+
+def test_lttb_keeps_endpoints_and_extremes():
+    """Test that downsampling keeps the first and last points and the peak of a spike."""
+    x = np.arange(1000)
+    y = np.zeros(1000)
+    y[437] = 100.0
+    indices = lttb_indices(x, y, 50)
+
+    assert len(indices) == 50
+    assert indices[0] == 0 and indices[-1] == 999
+    assert 437 in indices
+    assert (np.diff(indices) > 0).all()
+
+
+def test_downsample_short_curve_is_unchanged():
+    """Test that curves already below the requested resolution are returned as-is."""
+    curve = make_curve(10)
+    assert curve.downsample(100) is curve
+    assert len(make_curve(5000).downsample(300)) == 300
+
+
+def test_max_drawdown():
+    """Test drawdown measured from the running peak, starting at the initial balance."""
+    curve = EquityCurve.from_arrays([1, 2, 3, 4], [1000.0, 1200.0, 900.0, 1100.0])
+    assert curve.max_drawdown(1000.0) == 25.0
+    assert EquityCurve().max_drawdown(1000.0) == 0.0
+
+
+def test_naive_times_are_utc(monkeypatch):
+    """Test that naive datetimes map to UTC epochs and back, whatever the local zone."""
+    import time
+    monkeypatch.setenv('TZ', 'America/New_York')
+    time.tzset()
+    try:
+        curve = EquityCurve()
+        curve.append(datetime(2024, 1, 1), 1.0)
+        curve.append('2024-01-01T01:00:00+01:00', 2.0)
+        assert curve.timestamps.tolist() == [1_704_067_200_000, 1_704_067_200_000]
+        assert curve.to_points()[0]['timestamp'] == '2024-01-01T00:00:00'
+    finally:
+        monkeypatch.delenv('TZ')
+        time.tzset()
+
+
+@pytest.mark.asyncio
+async def test_results_endpoint_validates_points(tmp_path):
+    """Test that the backtest results endpoint downsamples to ?points= and rejects bad values with 400."""
+    config = SQLiteConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    db = SQLiteDatabaseManager(config)
+    assert await db.initialize()
+    try:
+        backtest_id = await db.save_backtest({
+            'name': 'curve', 'pair': 'BTC-USD',
+            'start_date': datetime(2024, 1, 1), 'end_date': datetime(2024, 2, 1),
+            'initial_balance': 10000.0, 'final_balance': 10100.0, 'total_pnl': 100.0,
+            'results': {'equity_curve': make_curve(500)}
+        })
+        api = TradingBotAPI(db_manager=db)
+
+        async def get(backtest, query=''):
+            request = make_mocked_request('GET', f'/api/backtest/results/{backtest}{query}', match_info={'id': str(backtest)})
+            response = await api.get_backtest_results(request)
+            return response.status, json.loads(response.body)
+
+        status, body = await get(backtest_id, '?points=50')
+        assert status == 200 and len(body['backtest']['results']['equity_curve']) == 50
+        for query in ('?points=abc', '?points=0', '?points=1.5'):
+            status, body = await get(backtest_id, query)
+            assert status == 400, query
+        assert (await get('abc'))[0] == 400
+    finally:
+        await db.close()
@@ -66,3 +66,60 @@ async def test_paper_order_placement(exchange_client):
     except Exception as e:
         # May fail if insufficient balance in some edge cases
         pass
+
+
+class FakeResponse:
+    """aiohttp response double."""
+
+    def __init__(self, status, body=None, headers=None):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def json(self):
+        return self.body
+
+
+class FakeSession:
+    """aiohttp session double replaying queued responses."""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.mark.asyncio
+async def test_candles_back_off_when_rate_limited(exchange_client, monkeypatch):
+    """Test that 429 responses are retried after Retry-After or a doubling delay."""
+    from datetime import datetime, timedelta
+
+    delays = []
+
+    async def sleep(delay):
+        delays.append(delay)
+
+    monkeypatch.setattr(asyncio, 'sleep', sleep)
+    exchange_client.session = FakeSession([
+        FakeResponse(429, headers={'Retry-After': '3'}),
+        FakeResponse(429),
+        FakeResponse(200, [[1700000060, 1, 3, 2, 2.5, 10], [1700000000, 1, 3, 2, 2.5, 10]]),
+    ])
+    end = datetime.utcnow()
+    candles = await exchange_client._fetch_real_candles('BTC-USD', 'ONE_MINUTE', end - timedelta(hours=1), end)
+
+    assert delays == [3.0, 2.0]
+    assert [candle['timestamp'] for candle in candles] == [1700000000, 1700000060]
+
+    exchange_client.session = FakeSession([FakeResponse(429)] * (exchange_client.config.CANDLE_FETCH_MAX_RETRIES + 1))
+    assert await exchange_client._fetch_real_candles('BTC-USD', 'ONE_MINUTE', end - timedelta(hours=1), end) == []
+    assert exchange_client.session.calls == exchange_client.config.CANDLE_FETCH_MAX_RETRIES + 1
@@ -0,0 +1,101 @@
+"""Tests for the engine-published market conditions snapshot."""
+
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from api.rest_api import TradingBotAPI
+from config import get_config
+from risk import Position, PositionBook
+from strategy import EMARSIStrategy, MarketSnapshot
+
+
+def make_candles(count: int = 100):
+    """Steadily rising candles (price above EMA, RSI high)."""
+    return [{
+        'timestamp': 1000000 + i * 60,
+        'open': 50000.0 + i * 10,
+        'high': 50000.0 + i * 10 + 50,
+        'low': 50000.0 + i * 10 - 50,
+        'close': 50000.0 + i * 10 + 20,
+        'volume': 1000000 + i * 10000
+    } for i in range(count)]
+
+
+class NoExchange:
+    """Exchange stand-in that fails the test if the endpoint calls it."""
+
+    def __getattr__(self, name):
+        raise AssertionError(f"market conditions endpoint called exchange.{name}")
+
+
+def test_describe_conditions_matches_indicators():
+    """Test that described conditions agree with the strategy's own checks."""
+    strategy = EMARSIStrategy(get_config())
+    indicators = strategy.calculate_indicators(make_candles())
+    conditions = strategy.describe_conditions(indicators)
+
+    assert conditions['status'] == 'analyzing'
+    assert conditions['indicators']['price'] == indicators['price']
+    assert conditions['indicators']['current_volume'] == indicators['volume']
+    assert conditions['long_signal']['checks']['price_above_ema'] is True
+    assert conditions['short_signal']['checks']['price_below_ema'] is False
+    long_signal = conditions['long_signal']
+    assert long_signal['confidence'] == strategy.calculate_confidence_score(indicators, 'LONG')
+    assert conditions['ready_to_trade'] == (long_signal['meets_threshold'] or conditions['short_signal']['meets_threshold'])
+
+
+def test_generate_signal_reuses_indicators():
+    """Test that passing precomputed indicators gives the same signal."""
+    strategy = EMARSIStrategy(get_config())
+    candles = make_candles()
+    indicators = strategy.calculate_indicators(candles)
+    assert strategy.generate_signal(candles, indicators=indicators) == strategy.generate_signal(candles)
+
+
+def test_snapshot_is_read_only():
+    """Test that a published snapshot can't be modified."""
+    source = {'BTC-USD': {'status': 'pending'}}
+    snapshot = MarketSnapshot.build(source)
+    source['ETH-USD'] = {'status': 'pending'}
+
+    assert snapshot.get('ETH-USD') is None
+    assert snapshot.evaluated_at is not None
+    with pytest.raises(TypeError):
+        snapshot.pairs['BTC-USD'] = {}
+
+
+@pytest.mark.asyncio
+async def test_endpoint_serves_snapshot_without_exchange():
+    """Test that /api/market-conditions reads the snapshot and applies open positions."""
+    config = get_config()
+    strategy = EMARSIStrategy(config)
+    pairs = ['BTC-USD', 'ETH-USD', 'SOL-USD']
+    analyzing = strategy.describe_conditions(strategy.calculate_indicators(make_candles()))
+    positions = PositionBook()
+    positions.add(Position('BTC-USD', 'LONG', 0.1, 50000.0, stop_loss=49500.0, take_profit=50500.0))
+    bot = SimpleNamespace(
+        config=SimpleNamespace(TRADING_PAIRS=pairs, MAX_POSITIONS=config.MAX_POSITIONS),
+        status='running',
+        positions=positions,
+        exchange=NoExchange(),
+        market_snapshot=MarketSnapshot.build({
+            'BTC-USD': analyzing,
+            'ETH-USD': {'status': 'insufficient_data', 'candles_count': 3, 'required_candles': 51},
+        })
+    )
+    api = TradingBotAPI(bot)
+
+    response = await api.get_market_conditions(None)
+    body = json.loads(response.body)
+
+    btc = body['conditions']['BTC-USD']
+    assert btc['has_position'] is True
+    assert btc['ready_to_trade'] is False
+    assert btc['blockers'][0] == 'Already has position in BTC-USD'
+    assert 'Already has position in BTC-USD' not in analyzing['blockers']
+    assert body['conditions']['ETH-USD']['status'] == 'insufficient_data'
+    assert body['conditions']['SOL-USD']['status'] == 'pending'
+    assert body['summary']['pairs_with_data'] == 1
+    assert body['evaluated_at'] == bot.market_snapshot.evaluated_at.isoformat()
@@ -0,0 +1,36 @@
+"""Tests for the versioned migration runner."""
+
+import pytest
+from database.migrator import MigrationError, MigrationRunner, discover_migrations
+
+
+def test_discover_migrations_in_order():
+    """Test migrations are discovered in version order with checksums."""
+    migrations = discover_migrations()
+
+    assert [migration.version for migration in migrations][:2] == [1, 2]
+    assert migrations[0].name == 'baseline_schema'
+    assert migrations[0].transactional
+    assert not migrations[1].transactional
+    assert all(len(migration.checksum) == 64 for migration in migrations)
+
+
+def test_pending_skips_applied_migrations():
+    """Test only migrations missing from schema_version are pending."""
+    migrations = discover_migrations()
+    runner = MigrationRunner(migrations)
+
+    assert runner.pending({}) == migrations
+    applied = {migration.version: migration.checksum for migration in migrations}
+    assert runner.pending(applied) == []
+    assert runner.pending({1: migrations[0].checksum}) == migrations[1:]
+
+
+def test_pending_rejects_edited_or_unknown_migrations():
+    """Test checksum mismatches and unknown versions fail validation."""
+    runner = MigrationRunner(discover_migrations())
+
+    with pytest.raises(MigrationError):
+        runner.pending({1: 'not-the-checksum'})
+    with pytest.raises(MigrationError):
+        runner.pending({9999: 'from-a-newer-release'})
@@ -0,0 +1,132 @@
+"""Tests for reloading trading pairs on a running bot."""
+
+import asyncio
+import time
+
+import pytest
+
+from main import TradingBot
+from risk import Position
+from utils.candle_buffer import CandleBuffer
+
+
+class FakeExchange:
+    """Exchange double tracking market data subscriptions."""
+
+    def __init__(self, pairs):
+        self.ws_pairs = list(pairs)
+        self.updates = []
+
+    async def update_subscriptions(self, add=None, remove=None):
+        add, remove = list(add or []), list(remove or [])
+        self.updates.append((add, remove))
+        self.ws_pairs = [pair for pair in self.ws_pairs if pair not in remove] + add
+
+    async def get_market_data(self, pairs):
+        return {pair: {'price': 110.0} for pair in pairs}
+
+    async def place_order(self, *args):
+        return {'order_id': 'close'}
+
+
+@pytest.fixture
+def bot(monkeypatch):
+    bot = TradingBot()
+    bot.exchange = FakeExchange(['BTC-USD', 'ETH-USD', 'SOL-USD'])
+    for pair in bot.exchange.ws_pairs:
+        bot.candle_cache[pair] = CandleBuffer()
+    bot.loaded = []
+
+    async def load_candle_data(pairs=None):
+        bot.loaded.extend(pairs)
+
+    async def send_trade_alert(trade):
+        pass
+
+    monkeypatch.setattr(bot, '_load_candle_data', load_candle_data)
+    monkeypatch.setattr(bot.alert_manager, 'send_trade_alert', send_trade_alert)
+    return bot
+
+
+def open_position(bot, pair, id):
+    bot.positions.add(Position(pair, 'LONG', 1.0, 100.0, id=id))
+    return bot.positions.get(id)
+
+
+@pytest.mark.asyncio
+async def test_reload_applies_only_the_difference(bot, monkeypatch):
+    """Test that added pairs are subscribed and loaded, removed pairs dropped and the rest kept."""
+    monkeypatch.setattr(bot.config, 'TRADING_PAIRS', ['BTC-USD', 'ETH-USD', 'ADA-USD'])
+    await bot.reload_trading_pairs()
+
+    assert bot.exchange.updates == [(['ADA-USD'], ['SOL-USD'])]
+    assert bot.loaded == ['ADA-USD']
+    assert set(bot.candle_cache) == {'BTC-USD', 'ETH-USD'}
+
+    await bot.reload_trading_pairs()
+    assert len(bot.exchange.updates) == 1
+
+
+@pytest.mark.asyncio
+async def test_retained_pair_unsubscribed_when_last_position_closes(bot, monkeypatch):
+    """Test that a removed pair with open positions streams until the last one closes."""
+    first, second = open_position(bot, 'SOL-USD', 1), open_position(bot, 'SOL-USD', 2)
+    monkeypatch.setattr(bot.config, 'TRADING_PAIRS', ['BTC-USD', 'ETH-USD'])
+    await bot.reload_trading_pairs()
+
+    assert bot.exchange.updates == []
+    assert bot.retained_pairs == {'SOL-USD'}
+
+    await bot._close_position(first, 'TP')
+    assert bot.exchange.updates == [] and 'SOL-USD' in bot.candle_cache
+
+    await bot._close_position(second, 'TP')
+    assert bot.exchange.updates == [([], ['SOL-USD'])]
+    assert bot.exchange.ws_pairs == ['BTC-USD', 'ETH-USD']
+    assert 'SOL-USD' not in bot.candle_cache and not bot.retained_pairs
+
+
+@pytest.mark.asyncio
+async def test_retained_pair_added_back_keeps_streaming(bot, monkeypatch):
+    """Test that a retained pair re-added by a later reload is not unsubscribed on close."""
+    position = open_position(bot, 'SOL-USD', 1)
+    monkeypatch.setattr(bot.config, 'TRADING_PAIRS', ['BTC-USD', 'ETH-USD'])
+    await bot.reload_trading_pairs()
+    monkeypatch.setattr(bot.config, 'TRADING_PAIRS', ['BTC-USD', 'ETH-USD', 'SOL-USD'])
+    await bot.reload_trading_pairs()
+
+    await bot._close_position(position, 'TP')
+    assert bot.exchange.updates == []
+    assert 'SOL-USD' in bot.exchange.ws_pairs and not bot.retained_pairs
+
+
+class TimedExchange:
+    """Exchange double recording when candle requests start and how many overlap."""
+
+    def __init__(self):
+        self.starts = []
+        self.in_flight = self.peak = 0
+
+    async def get_candles(self, pair, granularity, start, end):
+        self.starts.append(time.monotonic())
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        return []
+
+
+@pytest.mark.asyncio
+async def test_bootstrap_paces_requests_per_second(monkeypatch):
+    """Test that bootstrap fetches stay under both the concurrency and per-second limits."""
+    bot = TradingBot()
+    bot.exchange = TimedExchange()
+    monkeypatch.setattr(bot.config, 'CANDLE_FETCH_CONCURRENCY', 3)
+    monkeypatch.setattr(bot.config, 'CANDLE_FETCH_PER_SECOND', 20.0)
+    await bot._load_candle_data([f'PAIR{i}-USD' for i in range(24)])
+
+    starts = bot.exchange.starts
+    assert len(starts) == 24 and bot.exchange.peak <= 3
+    # A bucket of 20 refilling at 20/s holds 24 tokens only 0.2s after the first start
+    assert starts[23] - starts[0] >= 0.19
+    assert all(later - earlier >= 0.04 for earlier, later in zip(starts[21:], starts[22:]))
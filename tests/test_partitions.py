@@ -0,0 +1,94 @@
+"""Tests for monthly partition helpers."""
+
+import os
+from datetime import date, datetime
+
+import pytest
+import pytest_asyncio
+
+from database.partitions import (
+    add_months, convert_to_partitioned, create_month_partition, legacy_table, list_month_partitions,
+    month_start, move_legacy_rows, partition_name, parse_partition_month
+)
+
+# Partition DDL needs a real Postgres server, e.g. postgresql://postgres@localhost/tradingbot_test
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+
+
+@pytest_asyncio.fixture
+async def pg():
+    """Connection working in a scratch schema that is dropped afterwards."""
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    import asyncpg
+    conn = await asyncpg.connect(TEST_DATABASE_URL)
+    await conn.execute("DROP SCHEMA IF EXISTS partition_tests CASCADE")
+    await conn.execute("CREATE SCHEMA partition_tests")
+    await conn.execute("SET search_path TO partition_tests")
+    yield conn
+    await conn.execute("DROP SCHEMA partition_tests CASCADE")
+    await conn.close()
+
+
+def test_add_months_across_years():
+    """Test month arithmetic wraps across year boundaries."""
+    assert add_months(date(2024, 11, 1), 2) == date(2025, 1, 1)
+    assert add_months(date(2024, 1, 1), -1) == date(2023, 12, 1)
+    assert add_months(date(2024, 5, 1), 0) == date(2024, 5, 1)
+
+
+def test_month_start():
+    """Test datetimes map to the first day of their month."""
+    assert month_start(datetime(2024, 2, 29, 23, 59)) == date(2024, 2, 1)
+
+
+def test_partition_name_round_trip():
+    """Test partition names encode and decode their month."""
+    name = partition_name('system_logs', date(2024, 3, 1))
+
+    assert name == 'system_logs_p202403'
+    assert parse_partition_month('system_logs', name) == date(2024, 3, 1)
+    # Default partitions and other tables' partitions are not month partitions
+    assert parse_partition_month('system_logs', 'system_logs_default') is None
+    assert parse_partition_month('trades', name) is None
+
+
+@pytest.mark.asyncio
+async def test_create_month_partition_moves_default_rows(pg):
+    """Test that a new month partition takes over its rows from the default partition."""
+    await pg.execute("""
+        CREATE TABLE events (id SERIAL, created_at TIMESTAMP NOT NULL, PRIMARY KEY (id, created_at))
+        PARTITION BY RANGE (created_at)
+    """)
+    await pg.execute("CREATE TABLE events_default PARTITION OF events DEFAULT")
+    await pg.executemany("INSERT INTO events (created_at) VALUES ($1)", [
+        (datetime(2024, 3, 1),), (datetime(2024, 3, 31, 23, 59),), (datetime(2024, 4, 1),)
+    ])
+
+    assert await create_month_partition(pg, 'events', 'created_at', date(2024, 3, 1))
+    assert not await create_month_partition(pg, 'events', 'created_at', date(2024, 3, 1))
+    assert await list_month_partitions(pg, 'events') == [date(2024, 3, 1)]
+    assert await pg.fetchval("SELECT COUNT(*) FROM events_p202403") == 2
+    assert await pg.fetchval("SELECT COUNT(*) FROM events_default") == 1
+
+
+@pytest.mark.asyncio
+async def test_convert_to_partitioned_moves_rows_in_batches(pg):
+    """Test converting a plain table: schema swap first, then rows moved batch by batch."""
+    await pg.execute("CREATE TABLE events (id SERIAL PRIMARY KEY, created_at TIMESTAMP, note TEXT)")
+    rows = [(datetime(2024, 1 + i % 3, 1 + i), f"event {i}") for i in range(24)] + [(None, 'undated')]
+    await pg.executemany("INSERT INTO events (created_at, note) VALUES ($1, $2)", rows)
+
+    assert await convert_to_partitioned(pg, 'events', 'created_at')
+    assert not await convert_to_partitioned(pg, 'events', 'created_at')
+    assert await pg.fetchval("SELECT COUNT(*) FROM events") == 0
+    assert {date(2024, 1, 1), date(2024, 2, 1), date(2024, 3, 1)} <= set(await list_month_partitions(pg, 'events'))
+
+    assert await move_legacy_rows(pg, 'events', 'created_at', batch_size=10) == 25
+    assert await pg.fetchval("SELECT to_regclass($1)", legacy_table('events')) is None
+    assert await pg.fetchval("SELECT COUNT(*) FROM events_p202402") == 8
+    assert await pg.fetchval("SELECT COUNT(*) FROM events WHERE created_at IS NULL") == 0
+    assert await move_legacy_rows(pg, 'events', 'created_at') == 0
+
+    # The id sequence carries on past the moved rows
+    assert await pg.fetchval("INSERT INTO events (created_at) VALUES ($1) RETURNING id", datetime(2024, 3, 2)) == 26
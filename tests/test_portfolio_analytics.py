@@ -0,0 +1,80 @@
+"""Tests for cached, incrementally updated portfolio analytics."""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from database import SQLiteDatabaseManager
+from monitoring.portfolio_analytics import PortfolioAnalytics, pair_analytics
+from tests.test_sqlite_backend import SQLiteConfig, close_trade
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    config = SQLiteConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    manager = SQLiteDatabaseManager(config)
+    assert await manager.initialize()
+    yield manager
+    await manager.close()
+
+
+def test_pair_analytics():
+    """Test per-pair totals and allocation from aggregate rows."""
+    analytics = pair_analytics({
+        'BTC-USD': {'trades': 4, 'wins': 2, 'losses': 2, 'total_pnl': 4.0, 'volume': 400.0},
+        'ETH-USD': {'trades': 2, 'wins': 1, 'losses': 1, 'total_pnl': -1.0, 'volume': 200.0},
+    })
+
+    btc = analytics['pnl_by_pair']['BTC-USD']
+    assert btc['total_pnl'] == 4 and btc['total_trades'] == 4
+    assert btc['winning_trades'] == 2 and btc['losing_trades'] == 2 and btc['win_rate'] == 50.0
+    assert analytics['asset_allocation']['ETH-USD']['percentage'] == pytest.approx(100 / 3)
+    assert analytics['trades_by_pair'] == {'BTC-USD': 4, 'ETH-USD': 2}
+
+
+@pytest.mark.asyncio
+async def test_empty_history(db):
+    analytics = await PortfolioAnalytics(db).get()
+    assert analytics['pnl_by_pair'] == {} and analytics['current_streak_type'] is None
+
+
+@pytest.mark.asyncio
+async def test_curve_extends_as_trades_close(db):
+    """Test that analytics are reused until a trade closes, then only new closes are read."""
+    start = datetime(2024, 1, 1, 9)
+    for i, pnl in enumerate([5, -2, 3]):
+        await close_trade(db, start + timedelta(minutes=i), pnl)
+    analytics = PortfolioAnalytics(db)
+
+    first = await analytics.get()
+    assert first['closed_trades'] == 3
+    assert first['realized_pnl_curve'].balances.tolist() == [5, 3, 6]
+    assert await analytics.get() is first
+    assert analytics.loads == 1
+
+    reads = []
+    get_closed = db.get_closed_trades_by_exit
+
+    async def counting(**kwargs):
+        page = await get_closed(**kwargs)
+        reads.extend(trade['id'] for trade in page)
+        return page
+    db.get_closed_trades_by_exit = counting
+
+    new_id = await close_trade(db, start + timedelta(minutes=5), 4, pair='ETH-USD')
+    second = await analytics.get()
+    assert analytics.loads == 2 and reads == [new_id]
+    assert second['closed_trades'] == 4
+    assert second['pnl_by_pair']['ETH-USD']['total_pnl'] == 4
+    assert (second['current_streak'], second['win_streak']) == (2, 2)
+    assert second['realized_pnl_curve'].balances.tolist() == [5, 3, 6, 10]
+    assert first['realized_pnl_curve'].balances.tolist() == [5, 3, 6]
+    assert analytics.get_stats()['curve_rebuilds'] == 0
+
+    # Re-closing a trade changes its P&L without a new close, so the curve is rebuilt
+    await db.update_trade(new_id, {'exit_price': 101.0, 'pnl': 1.0, 'pnl_pct': 1.0})
+    third = await analytics.get()
+    assert third['realized_pnl_curve'].balances[-1] == 7
+    assert analytics.get_stats()['curve_rebuilds'] == 1
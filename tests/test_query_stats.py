@@ -0,0 +1,89 @@
+"""Tests for the query registry and per-query latency stats."""
+
+import asyncio
+import pytest
+import pytest_asyncio
+from datetime import datetime
+from config import Config
+from database import QueryRegistry, SQLiteDatabaseManager
+
+
+def test_records_calls_and_histogram():
+    """Test that whitespace variants of a statement share one entry with a latency histogram."""
+    registry = QueryRegistry(slow_query_ms=1000)
+    registry.register('user_by_id', "SELECT * FROM users WHERE id = $1")
+    registry.record("SELECT * FROM users\n    WHERE id = $1", 0.0004, (1,))
+    registry.record("SELECT * FROM users WHERE id = $1", 0.003, (2,))
+    registry.record("SELECT * FROM users WHERE id = $1", 0.003, (3,), failed=True)
+
+    [query] = registry.get_stats()['queries']
+    assert query['name'] == 'user_by_id'
+    assert query['calls'] == 3 and query['errors'] == 1
+    assert query['histogram_ms']['0.5'] == 1 and query['histogram_ms']['5'] == 2
+    assert query['p50_ms'] == 5 and query['slow_calls'] == 0
+
+
+def test_unregistered_queries_are_labelled_and_capped():
+    """Test that ad-hoc SQL gets a verb/table label and tracking stops at max_queries."""
+    registry = QueryRegistry(max_queries=2)
+    registry.record("UPDATE trades SET notes = $1 WHERE id = $2", 0.001)
+    registry.record("DELETE FROM advanced_orders WHERE order_id = $1", 0.001)
+    registry.record("SELECT 1", 0.001)
+
+    names = {query['name'] for query in registry.get_stats()['queries']}
+    assert names == {'update trades', 'delete advanced_orders', '<other>'}
+
+
+@pytest.mark.asyncio
+async def test_slow_query_is_explained_once_per_interval():
+    """Test that a slow statement's plan is captured in the background and rate limited."""
+    explained = []
+
+    async def explain(query, args):
+        explained.append((query, args))
+        return ['SCAN trades']
+
+    now = [0.0]
+    registry = QueryRegistry(slow_query_ms=10, explain=explain, explain_interval=60, clock=lambda: now[0])
+    registry.record("SELECT * FROM trades WHERE pair = $1", 0.05, ('BTC-USD',))
+    await asyncio.sleep(0)
+    registry.record("SELECT * FROM trades WHERE pair = $1", 0.05, ('ETH-USD',))
+    registry.record("BEGIN", 0.05)
+    await asyncio.sleep(0)
+
+    assert explained == [("SELECT * FROM trades WHERE pair = $1", ('BTC-USD',))]
+    slow = registry.get_stats(sort='slow_calls')['queries'][0]
+    assert slow['slow_calls'] == 2 and slow['slow_plan'] == ['SCAN trades']
+
+
+class QueryStatsConfig(Config):
+    """SQLite configuration that explains every query."""
+    DB_BACKEND = 'sqlite'
+    DB_WRITE_BEHIND = False
+    DB_QUERY_STATS = True
+    DB_SLOW_QUERY_MS = 0
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    config = QueryStatsConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    manager = SQLiteDatabaseManager(config)
+    assert await manager.initialize()
+    yield manager
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_database_manager_reports_query_stats(db):
+    """Test that queries through the pool are recorded under their registered names."""
+    await db.save_trade({'pair': 'BTC-USD', 'side': 'LONG', 'entry_price': 100.0, 'size': 1.0,
+                         'entry_time': datetime(2024, 1, 1)})
+    await asyncio.sleep(0.05)  # One plan is captured at a time
+    await db.get_recent_trades(limit=10)
+    await asyncio.sleep(0.05)
+
+    queries = db.get_query_stats(limit=100)['queries']
+    assert [query['calls'] for query in queries if query['name'] == 'insert_trade'] == [1]
+    # Unregistered statements on one table share a label, so check each of them
+    assert any(query['name'].startswith('select trades') and query['slow_plan'] for query in queries)
@@ -0,0 +1,165 @@
+"""Tests for token-bucket API rate limiting."""
+
+import logging
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.client_address import TrustedProxies
+from api.rate_limit import MemoryBucketStore, RateLimitPolicy, RequestRateLimiter
+
+ROUTES = {
+    '/api/backtest/run': {'cost': 5, 'per_minute': 2, 'burst': 1},
+    '/api/ai/': {'cost': 3},
+    '/api/ai/status': {'cost': 1},
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FailingStore:
+    async def take(self, charges):
+        raise ConnectionError("store down")
+
+
+class FlakyStore(MemoryBucketStore):
+    """Shared store double that can be taken down, counting the calls it receives."""
+
+    def __init__(self, clock):
+        super().__init__(clock=clock)
+        self.down = False
+        self.calls = 0
+
+    async def take(self, charges):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("store down")
+        return await super().take(charges)
+
+
+def make_limiter(clock, store=None):
+    return RequestRateLimiter(RateLimitPolicy.per_minute(60, 10), ROUTES, store=store, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_bucket_refills_over_time():
+    """Test burst capacity, the wait reported when empty and refill."""
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    for _ in range(10):
+        assert await limiter.check('user:1', '/api/status') == 0
+    assert await limiter.check('user:1', '/api/status') == pytest.approx(1.0)
+    assert await limiter.check('user:2', '/api/status') == 0
+
+    clock.now += 2
+    assert await limiter.check('user:1', '/api/status') == 0
+    assert (limiter.allowed, limiter.limited) == (12, 1)
+
+
+@pytest.mark.asyncio
+async def test_route_costs_and_limits():
+    """Test cost weights, longest-prefix routes and all-or-nothing charges."""
+    clock = FakeClock()
+    limiter = make_limiter(clock)
+    assert limiter.route_for('/api/ai/status') == '/api/ai/status'
+    assert limiter.route_for('/api/ai/guidance') == '/api/ai/'
+    assert limiter.route_for('/api/trades') is None
+
+    assert await limiter.check('user:1', '/api/backtest/run') == 0
+    # The route's own bucket refuses the second backtest, and the refusal costs nothing
+    assert await limiter.check('user:1', '/api/backtest/run') == pytest.approx(30.0)
+    assert await limiter.check('user:1', '/api/ai/guidance') == 0
+    assert await limiter.check('user:1', '/api/status') == 0
+    assert await limiter.check('user:1', '/api/ai/guidance') == pytest.approx(2.0)
+
+
+@pytest.mark.asyncio
+async def test_shared_store_failure_falls_back_to_memory():
+    limiter = make_limiter(FakeClock(), store=FailingStore())
+    assert await limiter.check('user:1', '/api/status') == 0
+    assert limiter.store_errors == 1 and len(limiter.memory) == 1
+
+
+@pytest.mark.asyncio
+async def test_store_outage_backs_off_and_logs_once(caplog):
+    """Test that a down store is retried with growing delays, warned about once, then used again."""
+    clock = FakeClock()
+    store = FlakyStore(clock)
+    limiter = RequestRateLimiter(RateLimitPolicy.per_minute(600, 100), store=store, clock=clock,
+                                 store_retry=1.0, max_store_retry=4.0)
+    store.down = True
+
+    with caplog.at_level(logging.INFO, logger='api.rate_limit'):
+        for _ in range(20):
+            assert await limiter.check('user:1', '/api/status') == 0
+            clock.now += 0.5
+        assert store.calls == 4  # First failure, then retries after 1, 2 and 4 seconds
+        assert limiter.get_stats()['store_down']
+
+        store.down = False
+        clock.now += 4
+        await limiter.check('user:1', '/api/status')
+        assert store.calls == 5 and not limiter.get_stats()['store_down']
+
+    messages = [record.getMessage() for record in caplog.records]
+    assert sum('store failed' in message for message in messages) == 1
+    assert sum('recovered' in message for message in messages) == 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_returns_429_per_user():
+    """Test that the middleware limits per signed-in user and sets Retry-After."""
+    limiter = RequestRateLimiter(RateLimitPolicy.per_minute(6, 2), clock=FakeClock())
+
+    @web.middleware
+    async def fake_auth(request, handler):
+        if 'X-User' in request.headers:
+            request['user_id'] = int(request.headers['X-User'])
+        return await handler(request)
+
+    async def ok(request):
+        return web.json_response({'ok': True})
+
+    app = web.Application(middlewares=[fake_auth, limiter.middleware()])
+    app.router.add_get('/api/status', ok)
+    app.router.add_get('/landing', ok)
+
+    async with TestClient(TestServer(app)) as client:
+        for _ in range(2):
+            assert (await client.get('/api/status', headers={'X-User': '1'})).status == 200
+        limited = await client.get('/api/status', headers={'X-User': '1'})
+        assert limited.status == 429
+        assert limited.headers['Retry-After'] == '10'
+        assert (await limited.json())['retry_after'] == 10
+
+        assert (await client.get('/api/status', headers={'X-User': '2'})).status == 200
+        assert (await client.get('/api/status')).status == 200
+        for _ in range(3):
+            assert (await client.get('/landing', headers={'X-User': '1'})).status == 200
+
+
+@pytest.mark.asyncio
+async def test_middleware_keys_signed_out_clients_by_forwarded_address():
+    """Test that clients behind a trusted proxy get separate buckets."""
+    proxies = TrustedProxies(['127.0.0.1'])
+    limiter = RequestRateLimiter(RateLimitPolicy.per_minute(6, 1), clock=FakeClock(),
+                                 client_address=proxies.client_address)
+
+    async def ok(request):
+        return web.json_response({'ok': True})
+
+    app = web.Application(middlewares=[limiter.middleware()])
+    app.router.add_get('/api/status', ok)
+
+    async with TestClient(TestServer(app)) as client:
+        first = {'X-Forwarded-For': '203.0.113.5'}
+        assert (await client.get('/api/status', headers=first)).status == 200
+        assert (await client.get('/api/status', headers=first)).status == 429
+        assert (await client.get('/api/status', headers={'X-Forwarded-For': '203.0.113.6'})).status == 200
@@ -0,0 +1,87 @@
+"""Tests for the ETag response cache middleware."""
+
+import asyncio
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.response_cache import ResponseCache
+
+
+class FakeState:
+    """Counts handler calls and exposes a version like the position book."""
+
+    def __init__(self):
+        self.calls = 0
+        self.version = 0
+
+
+def make_app(state: FakeState, ttl: float = 60) -> web.Application:
+    @web.middleware
+    async def fake_auth(request, handler):
+        request['user_id'] = int(request.headers.get('X-User', '1'))
+        return await handler(request)
+
+    async def positions(request):
+        state.calls += 1
+        await asyncio.sleep(0.01)
+        return web.json_response({'user': request['user_id'], 'version': state.version})
+
+    async def close_all(request):
+        return web.json_response({'closed': 0})
+
+    cache = ResponseCache({'/api/positions': ttl}, version=lambda: state.version)
+    app = web.Application(middlewares=[fake_auth, cache.middleware()])
+    app.router.add_get('/api/positions', positions)
+    app.router.add_post('/api/close-all', close_all)
+    return app
+
+
+@pytest.mark.asyncio
+async def test_cached_per_user_with_304():
+    """Test that repeat polls hit the cache, users are kept apart and matching ETags get a 304."""
+    state = FakeState()
+    async with TestClient(TestServer(make_app(state))) as client:
+        first = await client.get('/api/positions')
+        etag = first.headers['ETag']
+        assert (await first.json())['user'] == 1
+
+        again = await client.get('/api/positions')
+        assert again.headers['ETag'] == etag
+        assert state.calls == 1
+
+        not_modified = await client.get('/api/positions', headers={'If-None-Match': etag})
+        assert not_modified.status == 304
+        assert await not_modified.read() == b''
+
+        other = await client.get('/api/positions', headers={'X-User': '2'})
+        assert (await other.json())['user'] == 2
+        assert state.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_render_once():
+    """Test that simultaneous requests for the same key share one handler call."""
+    state = FakeState()
+    async with TestClient(TestServer(make_app(state))) as client:
+        responses = await asyncio.gather(*(client.get('/api/positions') for _ in range(10)))
+        assert {response.status for response in responses} == {200}
+        assert state.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_invalidated_by_state_version_and_writes():
+    """Test that a position change or a successful POST makes cached responses stale."""
+    state = FakeState()
+    async with TestClient(TestServer(make_app(state))) as client:
+        etag = (await client.get('/api/positions')).headers['ETag']
+
+        state.version += 1
+        changed = await client.get('/api/positions', headers={'If-None-Match': etag})
+        assert changed.status == 200
+        assert (await changed.json())['version'] == 1
+        assert state.calls == 2
+
+        await client.post('/api/close-all')
+        await client.get('/api/positions')
+        assert state.calls == 3
@@ -2,6 +2,7 @@
 
 import pytest
 from risk.risk_manager import RiskManager
+from risk.position_book import Position, PositionBook
 from config import get_config
 
 
@@ -99,3 +100,54 @@ def test_get_risk_metrics(risk_manager):
     assert 'risk_exposure' in metrics
     assert 'daily_pnl' in metrics
     assert 'open_positions' in metrics
+
+
+def test_position_book_indexes():
+    """Test position book lookups by id and pair."""
+    book = PositionBook()
+    btc = book.add(Position('BTC-USD', 'LONG', 0.5, 50000.0, stop_loss=49900.0))
+    eth = book.add(Position('ETH-USD', 'SHORT', 2.0, 3000.0, stop_loss=3030.0))
+    
+    assert btc.id != eth.id
+    assert book.get(btc.id) is btc
+    assert book.has_pair('BTC-USD')
+    assert book.first_for_pair('ETH-USD') is eth
+    
+    book.remove(btc.id)
+    assert not book.has_pair('BTC-USD')
+    assert len(book) == 1
+
+
+def test_position_book_aggregates():
+    """Test running exposure, risk and unrealized P&L totals."""
+    book = PositionBook()
+    btc = book.add(Position('BTC-USD', 'LONG', 0.5, 50000.0, stop_loss=49900.0))
+    book.add(Position('ETH-USD', 'SHORT', 2.0, 3000.0, stop_loss=3030.0))
+    
+    assert book.total_exposure == pytest.approx(0.5 * 50000.0 + 2.0 * 3000.0)
+    assert book.total_risk == pytest.approx(0.5 * 100.0 + 2.0 * 30.0)
+    
+    book.mark_prices({'BTC-USD': {'price': 50100.0}, 'ETH-USD': {'price': 2990.0}})
+    assert book.unrealized_pnl == pytest.approx(50.0 + 20.0)
+    
+    book.remove(btc.id)
+    assert book.total_exposure == pytest.approx(6000.0)
+    assert book.unrealized_pnl == pytest.approx(20.0)
+
+
+def test_risk_metrics_with_position_book(risk_manager):
+    """Test risk metrics match between a position book and a list of dicts."""
+    account_balance = 100000.0
+    position_dicts = [
+        {'pair': 'BTC-USD', 'size': 0.5, 'entry_price': 50000.0, 'stop_loss': 49900.0, 'side': 'LONG'}
+    ]
+    book = PositionBook()
+    for p in position_dicts:
+        book.add(Position.from_dict(p))
+    
+    from_list = risk_manager.get_risk_metrics(account_balance, position_dicts)
+    from_book = risk_manager.get_risk_metrics(account_balance, book)
+    
+    assert from_book['total_exposure'] == pytest.approx(from_list['total_exposure'])
+    assert from_book['risk_exposure'] == pytest.approx(from_list['risk_exposure'])
+    assert from_book['open_positions'] == 1
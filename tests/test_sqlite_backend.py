@@ -0,0 +1,154 @@
+"""Tests for the embedded SQLite storage backend."""
+
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from config import Config
+from database import SQLiteDatabaseManager, create_database_manager
+from database.factory import resolve_backend
+from utils.equity_curve import EquityCurve
+
+
+class SQLiteConfig(Config):
+    """Test configuration pointing at a temporary SQLite file."""
+    DB_BACKEND = 'sqlite'
+    DB_WRITE_BEHIND = True
+    DB_TRADE_ID_BLOCK_SIZE = 3
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    config = SQLiteConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    manager = SQLiteDatabaseManager(config)
+    assert await manager.initialize()
+    yield manager
+    await manager.close()
+
+
+async def close_trade(db, entry_time, pnl, pair='BTC-USD'):
+    trade_id = await db.save_trade({
+        'pair': pair, 'side': 'LONG', 'entry_price': 100.0, 'size': 2.0, 'entry_time': entry_time
+    })
+    await db.update_trade(trade_id, {'exit_price': 100.0 + pnl, 'pnl': pnl, 'pnl_pct': pnl, 'exit_reason': 'TP'})
+    return trade_id
+
+
+def test_resolve_backend():
+    """Test that auto selects SQLite only for paper trading without a Postgres server."""
+    config = SQLiteConfig()
+    config.DB_BACKEND = 'auto'
+    config.PAPER_TRADING, config.POSTGRES_CONFIGURED = True, False
+    assert resolve_backend(config) == 'sqlite'
+    assert isinstance(create_database_manager(config), SQLiteDatabaseManager)
+
+    config.POSTGRES_CONFIGURED = True
+    assert resolve_backend(config) == 'postgres'
+
+
+@pytest.mark.asyncio
+async def test_trades_round_trip_and_aggregates(db):
+    """Test queued trade writes, keyset paging and trigger-maintained aggregates."""
+    start = datetime(2024, 1, 1, 9)
+    ids = [await close_trade(db, start + timedelta(minutes=i), pnl) for i, pnl in enumerate([5, -2, 3, 4])]
+    await db.flush_writes()
+
+    assert ids == sorted(set(ids))
+    page = await db.get_recent_trades(limit=3)
+    assert [trade['id'] for trade in page] == ids[::-1][:3]
+    older = await db.get_recent_trades(limit=3, before=(page[-1]['entry_time'], page[-1]['id']))
+    assert [trade['id'] for trade in older] == ids[:1]
+    assert [trade['id'] async for trade in db.iter_trades(closed_only=True, batch_size=2)] == ids
+
+    stats = (await db.get_pair_stats())['BTC-USD']
+    assert (stats['trades'], stats['wins'], stats['losses'], stats['total_pnl']) == (4, 3, 1, 10.0)
+    assert await db.get_daily_pnl(start.date()) == 10.0
+    assert (await db.get_streak_stats())['current_streak'] == 2
+
+    # Re-closing a trade moves its contribution instead of double counting
+    await db.update_trade(ids[1], {'exit_price': 101.0, 'pnl': 1.0, 'pnl_pct': 1.0})
+    await db.flush_writes()
+    stats = (await db.get_pair_stats())['BTC-USD']
+    assert (stats['trades'], stats['wins'], stats['losses'], stats['total_pnl']) == (4, 4, 0, 13.0)
+
+
+@pytest.mark.asyncio
+async def test_journal_tags_and_repair(db):
+    """Test tag aggregates follow retagging and match a full rebuild."""
+    trade_id = await close_trade(db, datetime(2024, 1, 2), 5)
+    await db.flush_writes()
+
+    assert await db.update_trade_journal(trade_id, notes='clean breakout', tags=['breakout', 'scalp'])
+    assert (await db.get_trade_by_id(trade_id))['tags'] == ['breakout', 'scalp']
+    assert await db.update_trade_journal(trade_id, tags=['scalp'])
+
+    analytics = await db.get_journal_analytics()
+    assert set(analytics['tag_statistics']) == {'scalp'}
+    assert analytics['total_tagged_trades'] == 1
+    assert [trade['id'] for trade in await db.get_trades_with_tags(['scalp', 'other'])] == [trade_id]
+
+    assert await db.repair_aggregates()
+    assert await db.get_journal_analytics() == analytics
+
+
+@pytest.mark.asyncio
+async def test_users_and_backtests(db):
+    """Test user, onboarding and backtest persistence."""
+    user_id = await db.create_user('Trader@Example.com', 'hash', 'Trader')
+    assert await db.create_user('trader@example.com', 'hash') is None
+
+    assert (await db.get_user_by_email('trader@example.com'))['id'] == user_id
+    assert await db.complete_onboarding(user_id)
+    status = await db.get_onboarding_status(user_id)
+    assert status['completed'] is True and status['completed_at']
+
+    backtest_id = await db.save_backtest({
+        'name': 'test', 'pair': 'BTC-USD',
+        'start_date': datetime(2024, 1, 1), 'end_date': datetime(2024, 2, 1),
+        'initial_balance': 1000.0, 'final_balance': 1100.0, 'total_pnl': 100.0,
+        'results': {'trades': [{'pnl': 100.0}]}
+    }, user_id)
+    backtest = await db.get_backtest_by_id(backtest_id, user_id)
+    assert backtest['results'] == {'trades': [{'pnl': 100.0}]}
+    assert backtest['start_date'] == datetime(2024, 1, 1)
+
+
+@pytest.mark.asyncio
+async def test_backtest_list_omits_results(db):
+    """Test that listing backtests returns summaries while the detail view decompresses results."""
+    results = {'trades': [{'pnl': float(i)} for i in range(500)]}
+    backtest_id = await db.save_backtest({
+        'name': 'big', 'pair': 'ETH-USD',
+        'start_date': datetime(2024, 1, 1), 'end_date': datetime(2024, 2, 1),
+        'initial_balance': 1000.0, 'final_balance': 900.0, 'total_pnl': -100.0,
+        'results': results
+    })
+
+    listed = await db.get_backtests(limit=5)
+    assert [backtest['id'] for backtest in listed] == [backtest_id]
+    assert 'results' not in listed[0]
+    assert listed[0]['total_pnl'] == -100.0
+    assert (await db.get_backtest_by_id(backtest_id))['results'] == results
+
+
+@pytest.mark.asyncio
+async def test_backtest_equity_curve_stored_as_binary(db):
+    """Test that the equity curve is kept out of the JSON blob and read back as arrays."""
+    curve = EquityCurve()
+    for minute in range(2000):
+        curve.append(datetime(2024, 1, 1) + timedelta(minutes=minute), 1000.0 + (minute // 100) * 2.5)
+    backtest_id = await db.save_backtest({
+        'name': 'curve', 'pair': 'BTC-USD',
+        'start_date': datetime(2024, 1, 1), 'end_date': datetime(2024, 1, 2),
+        'initial_balance': 1000.0, 'final_balance': 1047.5, 'total_pnl': 47.5,
+        'results': {'trades': [], 'equity_curve': curve}
+    })
+
+    async with db.pool.acquire() as conn:
+        stored = await conn.fetchrow("SELECT data, equity_curve FROM backtest_results WHERE backtest_id = $1", backtest_id)
+    assert b'equity_curve' not in stored['data']
+    assert len(stored['equity_curve']) < 500
+
+    loaded = (await db.get_backtest_by_id(backtest_id))['results']['equity_curve']
+    assert (loaded.timestamps == curve.timestamps).all()
+    assert (loaded.balances == curve.balances).all()
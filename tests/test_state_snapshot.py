@@ -0,0 +1,132 @@
+"""Tests for warm restart state snapshots."""
+
+import gzip
+import json
+import pickle
+import pytest
+from datetime import datetime, timedelta
+from utils.state_snapshot import StateSnapshotStore
+from grid_trading.dca_manager import DCAStrategy
+from grid_trading.grid_manager import GridStrategy
+from orders.order_types import OrderStatus, TrailingStopOrder
+from monitoring.performance_tracker import PerformanceTracker
+from risk.position_book import Position, PositionBook
+from config import get_config
+
+
+@pytest.fixture
+def store(tmp_path):
+    """Create a snapshot store in a temporary directory."""
+    return StateSnapshotStore(str(tmp_path / 'bot_state.snapshot'))
+
+
+def test_round_trip(store):
+    """Test that a saved snapshot loads back unchanged."""
+    book = PositionBook()
+    book.add(Position('BTC-USD', 'LONG', 0.5, 50000.0, stop_loss=49900.0))
+    state = {
+        'candles': {'BTC-USD': [{'timestamp': 1000020, 'close': 50000.0}]},
+        'positions': book.to_list()
+    }
+
+    assert store.save_sync(state)
+    loaded = store.load()
+
+    assert loaded['candles'] == state['candles']
+    restored = PositionBook()
+    for position_data in loaded['positions']:
+        restored.add(Position.from_dict(position_data))
+    assert restored.has_pair('BTC-USD')
+    assert restored.total_exposure == pytest.approx(book.total_exposure)
+
+
+def test_missing_snapshot(store):
+    """Test loading when no snapshot exists."""
+    assert store.load() is None
+
+
+def test_stale_snapshot_ignored(store, monkeypatch):
+    """Test that snapshots older than max age are ignored."""
+    store.max_age = timedelta(minutes=5)
+    store.save_sync({'candles': {}})
+
+    import utils.state_snapshot as state_snapshot
+    real_datetime = state_snapshot.datetime
+
+    class FutureDatetime(real_datetime):
+        @classmethod
+        def utcnow(cls):
+            return real_datetime.utcnow() + timedelta(hours=1)
+
+    monkeypatch.setattr(state_snapshot, 'datetime', FutureDatetime)
+    assert store.load() is None
+
+
+def test_corrupt_snapshot_ignored(store):
+    """Test that an unreadable snapshot file is ignored."""
+    with open(store.path, 'wb') as f:
+        f.write(b'not a snapshot')
+
+    assert store.load() is None
+
+
+def test_pickle_snapshot_never_unpickled(store):
+    """Test that a pickle payload (e.g. an old or tampered snapshot) is rejected without being loaded."""
+    class Exploit:
+        def __reduce__(self):
+            return (exec, ("raise SystemExit('unpickled')",))
+
+    with open(store.path, 'wb') as f:
+        f.write(gzip.compress(pickle.dumps({'version': 2, 'state': Exploit()})))
+
+    assert store.load() is None
+
+
+def test_schema_mismatch_ignored(store):
+    """Test that a snapshot whose sections don't match the schema is ignored."""
+    store.save_sync({'positions': []})
+    with open(store.path, 'rb') as f:
+        envelope = json.loads(gzip.decompress(f.read()))
+    envelope['state']['positions'] = [{'pair': 'BTC-USD', 'side': 'LONG', 'size': 'lots', 'entry_price': 1.0}]
+    with open(store.path, 'wb') as f:
+        f.write(gzip.compress(json.dumps(envelope).encode()))
+
+    assert store.load() is None
+
+
+def test_strategy_objects_round_trip(store):
+    """Test that orders, grids and DCA strategies come back as their own types."""
+    order = TrailingStopOrder('o1', 'BTC-USD', 'SELL', 0.5, trailing_percent=2.0, initial_price=50000.0)
+    order.status = OrderStatus.ACTIVE
+    order.update_price(51000.0)
+    grid = GridStrategy('g1', 'ETH-USD', 2000.0, 2200.0, grid_count=4, order_size=0.1)
+    grid.levels[0].filled, grid.levels[0].filled_at = True, datetime(2024, 1, 1, 12)
+    dca = DCAStrategy('d1', 'BTC-USD', 'BUY', amount=100.0, interval='daily')
+    dca.record_execution(50000.0, 0.002)
+
+    assert store.save_sync({'orders': {'o1': order}, 'grids': {'g1': grid}, 'dca': {'d1': dca},
+                            'risk': {'daily_pnl': -5.0, 'daily_reset_time': datetime(2024, 1, 1)}})
+    loaded = store.load()
+
+    restored = loaded['orders']['o1']
+    assert isinstance(restored, TrailingStopOrder) and restored.status is OrderStatus.ACTIVE
+    assert restored.to_dict() == order.to_dict()
+    assert loaded['grids']['g1'].to_dict() == grid.to_dict()
+    assert loaded['dca']['d1'].to_dict() == dca.to_dict()
+    assert loaded['risk']['daily_reset_time'] == datetime(2024, 1, 1)
+
+
+def test_performance_tracker_state(store):
+    """Test performance tracker aggregates survive a save/restore cycle."""
+    tracker = PerformanceTracker(get_config())
+    tracker.record_trade({'pair': 'BTC-USD', 'pnl': 25.0, 'exit_time': datetime.utcnow()})
+    tracker.record_trade({'pair': 'ETH-USD', 'pnl': -10.0, 'exit_time': datetime.utcnow()})
+
+    store.save_sync({'performance': tracker.get_state()})
+    restored = PerformanceTracker(get_config())
+    restored.restore_state(store.load()['performance'])
+
+    assert restored.total_trades == 2
+    assert restored.total_pnl == pytest.approx(15.0)
+    assert restored.calculate_win_rate() == pytest.approx(50.0)
+    assert len(restored.get_recent_trades()) == 2
@@ -0,0 +1,75 @@
+"""Tests for fingerprinted, precompressed static asset serving."""
+
+import gzip
+
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from api.static_assets import IMMUTABLE_CACHE_CONTROL, StaticAssetStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    (tmp_path / 'app.js').write_text('console.log("hello");\n' * 100)
+    (tmp_path / 'icon.png').write_bytes(b'\x89PNG' + bytes(range(256)) * 4)
+    (tmp_path / 'page.html').write_text(
+        '<link href="/static/app.js"><img src=\'/static/icon.png\'><img src="/static/missing.png">'
+    )
+    return StaticAssetStore(str(tmp_path)).load()
+
+
+def make_app(store: StaticAssetStore) -> web.Application:
+    async def serve_static(request):
+        asset, immutable = store.lookup(request.path)
+        if asset is None:
+            raise web.HTTPNotFound()
+        return store.response(request, asset, immutable)
+
+    app = web.Application()
+    app.router.add_get('/static/{name:.+}', serve_static)
+    return app
+
+
+def test_pages_reference_fingerprinted_urls(store):
+    """Test that HTML asset references are rewritten to content-hashed URLs."""
+    page = store.get('page.html').bodies['identity'].decode()
+    app_url = store.url_for('app.js')
+
+    assert app_url.startswith('/static/app.') and app_url.endswith('.js') and app_url != '/static/app.js'
+    assert f'"{app_url}"' in page
+    assert f"'{store.url_for('icon.png')}'" in page
+    assert '"/static/missing.png"' in page
+
+
+def test_only_compressible_assets_are_compressed(store):
+    """Test that text assets get a gzip variant and images don't."""
+    assert set(store.get('app.js').bodies) >= {'identity', 'gzip'}
+    assert set(store.get('icon.png').bodies) == {'identity'}
+
+
+@pytest.mark.asyncio
+async def test_serves_negotiated_and_cached_responses(store):
+    """Test encoding negotiation, immutable caching of fingerprinted URLs and 304s."""
+    async with TestClient(TestServer(make_app(store))) as client:
+        url = store.url_for('app.js')
+        response = await client.get(url, headers={'Accept-Encoding': 'gzip'}, auto_decompress=False)
+        assert response.status == 200
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+        assert response.headers['Vary'] == 'Accept-Encoding'
+        assert gzip.decompress(await response.read()) == store.get('app.js').bodies['identity']
+
+        plain = await client.get('/static/app.js', headers={'Accept-Encoding': 'identity'})
+        assert 'Content-Encoding' not in plain.headers
+        assert plain.headers['Cache-Control'] == 'no-cache'
+
+        revalidated = await client.get('/static/app.js', headers={
+            'Accept-Encoding': 'identity', 'If-None-Match': plain.headers['ETag']
+        })
+        assert revalidated.status == 304
+
+        refused = await client.get(url, headers={'Accept-Encoding': 'gzip;q=0'}, auto_decompress=False)
+        assert 'Content-Encoding' not in refused.headers
+
+        assert (await client.get('/static/nope.js')).status == 404
@@ -0,0 +1,153 @@
+"""Tests for the FIFO/LIFO/HIFO tax lot engine and its persisted lots."""
+
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+
+from database import SQLiteDatabaseManager
+from monitoring.tax_lots import LOT_OPENED, LOT_REALIZED, TaxLotEngine
+from tests.test_sqlite_backend import SQLiteConfig
+
+YEAR = (datetime(2024, 1, 1), datetime(2024, 12, 31, 23, 59, 59))
+
+
+def make_db(tmp_path, write_behind=True) -> SQLiteDatabaseManager:
+    config = SQLiteConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    config.DB_WRITE_BEHIND = write_behind
+    return SQLiteDatabaseManager(config)
+
+
+async def open_trade(db, entry_time, price, size=1.0, side='LONG'):
+    return await db.save_trade({
+        'pair': 'BTC-USD', 'side': side, 'entry_price': price, 'size': size, 'entry_time': entry_time
+    })
+
+
+async def exit_trade(db, trade_id, exit_time, price, pnl):
+    await db.update_trade(trade_id, {'exit_price': price, 'exit_time': exit_time, 'pnl': pnl, 'pnl_pct': pnl})
+
+
+@pytest_asyncio.fixture
+async def db(tmp_path):
+    manager = make_db(tmp_path)
+    assert await manager.initialize()
+    yield manager
+    await manager.close()
+
+
+def realized(changes):
+    return [item for kind, item in changes if kind == LOT_REALIZED]
+
+
+@pytest.mark.parametrize('method, expected', [
+    ('FIFO', [(1.0, 100.0), (0.5, 120.0)]),
+    ('LIFO', [(1.0, 110.0), (0.5, 120.0)]),
+    ('HIFO', [(1.0, 120.0), (0.5, 110.0)]),
+])
+def test_matching_order(method, expected):
+    """Test that a sell consumes (partially) the lots the method picks."""
+    engine = TaxLotEngine([method])
+    start = datetime(2024, 1, 1)
+    for i, price in enumerate([100.0, 120.0, 110.0]):
+        engine.record_fill(1, 'BTC-USD', 'buy', 1.0, price, start + timedelta(days=i))
+
+    lots = realized(engine.record_fill(1, 'BTC-USD', 'sell', 1.5, 130.0, start + timedelta(days=10)))
+    assert [(lot.quantity, lot.open_price) for lot in lots] == expected
+    assert sum(lot.gain for lot in lots) == pytest.approx(sum(q * (130.0 - p) for q, p in expected))
+    assert sorted(lot.quantity for lot in engine.open_lots()) == [0.5, 1.0]
+
+
+def test_shorts_and_terms():
+    """Test that buys cover short lots first and holding period sets the term."""
+    engine = TaxLotEngine(['FIFO'])
+    opened = datetime(2023, 1, 1)
+    engine.record_fill(None, 'ETH-USD', 'sell', 2.0, 50.0, opened)
+
+    changes = engine.record_fill(None, 'ETH-USD', 'buy', 3.0, 40.0, opened + timedelta(days=400))
+    (lot,) = realized(changes)
+    assert (lot.direction, lot.quantity, lot.gain, lot.term) == ('short', 2.0, 20.0, 'long')
+    assert lot.user_id == 0
+    (remainder,) = [item for kind, item in changes if kind == LOT_OPENED]
+    assert (remainder.direction, remainder.quantity, remainder.price) == ('long', 1.0, 40.0)
+
+
+@pytest.mark.asyncio
+async def test_lots_persist_as_trades_close(db):
+    """Test that closing trades writes realized rows for every method."""
+    start = datetime(2024, 3, 1)
+    closed_id = await open_trade(db, start, 100.0, size=2.0)
+    await exit_trade(db, closed_id, start + timedelta(hours=2), 110.0, 20.0)
+    open_id = await open_trade(db, start + timedelta(hours=1), 90.0)
+    await db.flush_writes()
+
+    for method in ('FIFO', 'LIFO', 'HIFO'):
+        (lot,) = await db.get_realized_lots(method, *YEAR)
+        assert (lot['quantity'], lot['open_price'], lot['close_price'], lot['gain']) == (2.0, 100.0, 110.0, 20.0)
+        assert (lot['open_trade_id'], lot['close_trade_id']) == (closed_id, closed_id)
+    async with db.pool.acquire() as conn:
+        rows = await conn.fetch("SELECT trade_id, quantity FROM tax_open_lots")
+    assert [(row['trade_id'], row['quantity']) for row in rows] == [(open_id, 1.0)] * 3
+
+
+@pytest.mark.asyncio
+async def test_restore_and_rebuild(tmp_path):
+    """Test that open lots survive a restart and are rebuilt for existing trades."""
+    manager = make_db(tmp_path, write_behind=False)
+    assert await manager.initialize()
+    start = datetime(2024, 5, 1)
+    first = await open_trade(manager, start, 100.0)
+    second = await open_trade(manager, start + timedelta(hours=1), 98.0, size=2.0)
+    await exit_trade(manager, second, start + timedelta(hours=2), 97.0, -2.0)
+    await manager.close()
+
+    # A restarted manager closes the trade it did not open
+    manager = make_db(tmp_path, write_behind=False)
+    assert await manager.initialize()
+    assert len(manager.tax_lots.open_lots()) == 3
+    await exit_trade(manager, first, start + timedelta(hours=3), 105.0, 5.0)
+    fifo = [lot['gain'] for lot in await manager.get_realized_lots('FIFO', *YEAR)]
+    lifo = [lot['gain'] for lot in await manager.get_realized_lots('LIFO', *YEAR)]
+    assert fifo == [-3.0, -1.0, 7.0]  # The first exit sells the older 100.0 lot
+    assert lifo == [-2.0, 5.0]
+
+    # Dropping the lots makes the next start rebuild them from the trades
+    async with manager.pool.acquire() as conn:
+        await conn.execute("DELETE FROM tax_realized_lots")
+        await conn.execute("DELETE FROM tax_open_lots")
+    await manager.close()
+    manager = make_db(tmp_path, write_behind=False)
+    assert await manager.initialize()
+    assert [lot['gain'] for lot in await manager.get_realized_lots('FIFO', *YEAR)] == fifo
+    assert manager.tax_lots.open_lots() == []
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_and_failed_fills(db, monkeypatch):
+    """Test that lots drifting from the trades are rebuilt, including after a fill fails to record."""
+    start = datetime(2024, 6, 1)
+    first = await open_trade(db, start, 100.0)
+    await exit_trade(db, first, start + timedelta(hours=1), 110.0, 10.0)
+    assert (await db.reconcile_tax_lots())['mismatched'] == []
+
+    # A lost realized row breaks the quantity balance for every method it was written under
+    async with db.pool.acquire() as conn:
+        await conn.execute("DELETE FROM tax_realized_lots WHERE method = 'LIFO'")
+    report = await db.reconcile_tax_lots()
+    assert report['mismatched'] == [('LIFO', 'BTC-USD')] and report['rebuilt']
+    assert len(await db.get_realized_lots('LIFO', *YEAR)) == 1
+
+    # A fill that fails to match marks the lots stale and rebuilds them from the trades
+    def fail(*args, **kwargs):
+        raise RuntimeError('matching failed')
+    monkeypatch.setattr(db.tax_lots, 'record_fill', fail)
+    second = await open_trade(db, start + timedelta(hours=2), 120.0)
+    assert second is not None and db.tax_lots_stale
+    await db._tax_rebuild_task
+    assert not db.tax_lots_stale
+    await exit_trade(db, second, start + timedelta(hours=3), 125.0, 5.0)
+    await db.flush_writes()
+    assert [lot['gain'] for lot in await db.get_realized_lots('FIFO', *YEAR)] == [10.0, 5.0]
+    assert (await db.reconcile_tax_lots())['mismatched'] == []
@@ -0,0 +1,123 @@
+"""Tests for the incrementally maintained trade aggregates and their repair path."""
+
+import os
+from datetime import date, datetime
+from urllib.parse import urlparse
+
+import pytest
+import pytest_asyncio
+
+from config import Config
+from database import DatabaseManager, SQLiteDatabaseManager
+from tests.test_sqlite_backend import SQLiteConfig, close_trade
+
+# The Postgres delta CTE needs a real server, e.g. postgresql://postgres@localhost/tradingbot_test
+TEST_DATABASE_URL = os.getenv('TEST_DATABASE_URL')
+SCRATCH_DATABASE = 'tradingbot_aggregate_tests'
+
+# Deltas can leave rows at zero trades (e.g. a removed tag); readers skip them and a rebuild drops them
+DAILY_ROWS_SQL = """
+    SELECT day, user_id, pair, trades, wins, losses, total_pnl, gross_profit, gross_loss, volume, tagged_trades
+    FROM daily_pair_stats WHERE trades <> 0 ORDER BY day, user_id, pair
+"""
+TAG_ROWS_SQL = """
+    SELECT user_id, tag, trades, wins, losses, total_pnl
+    FROM tag_stats WHERE trades <> 0 ORDER BY user_id, tag
+"""
+
+
+class PostgresConfig(Config):
+    """Configuration pointing at a scratch Postgres database."""
+    DB_BACKEND = 'postgres'
+    DB_WRITE_BEHIND = False
+
+
+async def postgres_manager():
+    if not TEST_DATABASE_URL:
+        pytest.skip('TEST_DATABASE_URL is not set')
+    import asyncpg
+    admin = await asyncpg.connect(TEST_DATABASE_URL)
+    await admin.execute(f"DROP DATABASE IF EXISTS {SCRATCH_DATABASE}")
+    await admin.execute(f"CREATE DATABASE {SCRATCH_DATABASE}")
+    await admin.close()
+
+    url = urlparse(TEST_DATABASE_URL)
+    config = PostgresConfig()
+    config.DB_HOST, config.DB_PORT = url.hostname or 'localhost', url.port or 5432
+    config.DB_USER, config.DB_PASSWORD = url.username or 'postgres', url.password or ''
+    config.DB_NAME = SCRATCH_DATABASE
+    return DatabaseManager(config)
+
+
+async def drop_scratch_database():
+    import asyncpg
+    admin = await asyncpg.connect(TEST_DATABASE_URL)
+    await admin.execute(f"DROP DATABASE IF EXISTS {SCRATCH_DATABASE}")
+    await admin.close()
+
+
+@pytest_asyncio.fixture(params=['sqlite', 'postgres'])
+async def db(request, tmp_path):
+    if request.param == 'sqlite':
+        config = SQLiteConfig()
+        config.SQLITE_PATH = str(tmp_path / 'bot.db')
+        manager = SQLiteDatabaseManager(config)
+    else:
+        manager = await postgres_manager()
+    assert await manager.initialize()
+    yield manager
+    await manager.close()
+    if request.param == 'postgres':
+        await drop_scratch_database()
+
+
+async def aggregate_rows(db):
+    await db.flush_writes()
+    async with db.pool.acquire() as conn:
+        daily = [tuple(row) for row in await conn.fetch(DAILY_ROWS_SQL)]
+        tags = [tuple(row) for row in await conn.fetch(TAG_ROWS_SQL)]
+    return daily, tags
+
+
+@pytest.mark.asyncio
+async def test_updates_move_trade_contributions(db):
+    """Test that re-closing and re-tagging replace a trade's contribution and match a rebuild."""
+    first = await close_trade(db, datetime(2024, 1, 1, 9), 5)
+    second = await close_trade(db, datetime(2024, 1, 1, 10), -2, pair='ETH-USD')
+    await close_trade(db, datetime(2024, 1, 2, 9), 3)
+    await db.flush_writes()
+
+    await db.update_trade(first, {'exit_price': 101.0, 'pnl': -1.0, 'pnl_pct': -1.0})
+    assert await db.update_trade_journal(second, tags=['breakout', 'scalp'])
+    assert await db.update_trade_journal(second, tags=['scalp'])
+    await db.flush_writes()
+
+    btc = (await db.get_pair_stats())['BTC-USD']
+    assert (btc['trades'], btc['wins'], btc['losses'], btc['total_pnl']) == (2, 1, 1, 2.0)
+    analytics = await db.get_journal_analytics()
+    assert set(analytics['tag_statistics']) == {'scalp'}
+    assert analytics['total_tagged_trades'] == 1
+
+    maintained = await aggregate_rows(db)
+    assert await db.repair_aggregates()
+    assert await aggregate_rows(db) == maintained
+
+
+@pytest.mark.asyncio
+async def test_repair_since_and_backfill(db):
+    """Test that a dated repair only rebuilds later days and empty aggregates are backfilled."""
+    await close_trade(db, datetime(2024, 1, 1, 9), 5)
+    await close_trade(db, datetime(2024, 1, 3, 9), 4)
+    expected = await aggregate_rows(db)
+
+    async with db.pool.acquire() as conn:
+        await conn.execute("UPDATE daily_pair_stats SET trades = 99")
+    assert await db.repair_aggregates(since=date(2024, 1, 2))
+    daily, _ = await aggregate_rows(db)
+    assert [row[3] for row in daily] == [99, 1]
+
+    async with db.pool.acquire() as conn:
+        await conn.execute("DELETE FROM daily_pair_stats")
+        await conn.execute("DELETE FROM tag_stats")
+    await db._backfill_aggregates()
+    assert await aggregate_rows(db) == expected
@@ -0,0 +1,114 @@
+"""Tests for streaming trade export."""
+
+import pytest
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timedelta
+from database import SQLiteDatabaseManager
+from api.trade_export import iter_trade_pages, write_trade_export, export_filename
+from tests.test_sqlite_backend import SQLiteConfig
+
+
+class BufferResponse:
+    """Response double collecting written chunks."""
+
+    def __init__(self):
+        self.chunks = []
+
+    async def write(self, data):
+        self.chunks.append(bytes(data))
+
+    @property
+    def body(self):
+        return b''.join(self.chunks)
+
+
+def make_trade(i):
+    """Build a trade row as returned by DatabaseManager.get_trades_with_date_range."""
+    return {
+        'id': i,
+        'pair': 'BTC-USD',
+        'side': 'LONG',
+        'entry_price': 50000.0 + i,
+        'exit_price': None,
+        'size': 0.1,
+        'entry_time': datetime(2024, 1, 1) + timedelta(minutes=i),
+        'pnl': None,
+        'tags': ['scalp']
+    }
+
+
+async def remaining_trades(count):
+    for i in range(1, count):
+        yield make_trade(i)
+
+
+@pytest.mark.asyncio
+async def test_csv_export_in_chunks():
+    """Test that CSV export writes a header plus every row across several chunks."""
+    response = BufferResponse()
+    count = await write_trade_export(response, make_trade(0), remaining_trades(25), 'csv', batch_size=10)
+
+    rows = list(csv.DictReader(io.StringIO(response.body.decode())))
+    assert count == 25
+    assert len(rows) == 25
+    assert rows[0]['entry_time'] == '2024-01-01T00:00:00'
+    assert len(response.chunks) > 3
+
+
+@pytest.mark.asyncio
+async def test_gzip_json_export():
+    """Test that gzipped JSON export decompresses to a valid array."""
+    response = BufferResponse()
+    await write_trade_export(response, make_trade(0), remaining_trades(5), 'json', compress=True)
+
+    trades = json.loads(gzip.decompress(response.body))
+    assert [trade['id'] for trade in trades] == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_parquet_export():
+    """Test that Parquet export reads back with typed columns, one row group per batch."""
+    pq = pytest.importorskip('pyarrow.parquet')
+    response = BufferResponse()
+    count = await write_trade_export(response, make_trade(0), remaining_trades(25), 'parquet', batch_size=10)
+
+    parquet = pq.ParquetFile(io.BytesIO(response.body))
+    table = parquet.read()
+    assert count == 25 and parquet.num_row_groups == 3
+    assert table.column('id').to_pylist() == list(range(25))
+    assert table.column('entry_time').to_pylist()[1] == datetime(2024, 1, 1, 0, 1)
+    assert table.column('tags').to_pylist()[0] == ['scalp']
+
+
+@pytest.mark.asyncio
+async def test_export_pages_release_connections(tmp_path):
+    """Test that export pages through trades without holding a connection between pages."""
+    config = SQLiteConfig()
+    config.SQLITE_PATH = str(tmp_path / 'bot.db')
+    db = SQLiteDatabaseManager(config)
+    assert await db.initialize()
+    try:
+        start = datetime(2024, 1, 1)
+        # Two trades share an entry time, so paging must break ties on id
+        times = [start, start + timedelta(minutes=1), start + timedelta(minutes=1), start + timedelta(minutes=2), start + timedelta(minutes=3)]
+        ids = [await db.save_trade({'pair': 'BTC-USD', 'side': 'LONG', 'entry_price': 100.0, 'size': 1.0, 'entry_time': t})
+               for t in times]
+        await db.flush_writes()
+
+        exported = []
+        async for trade in iter_trade_pages(db, page_size=2):
+            assert db.pool._idle.qsize() == db.pool.size
+            exported.append(trade['id'])
+        assert exported == ids[::-1]
+        assert [trade['id'] async for trade in iter_trade_pages(db, start_date=times[3], page_size=2)] == ids[:2:-1]
+    finally:
+        await db.close()
+
+
+def test_export_filename():
+    """Test download filenames include the date range and compression suffix."""
+    assert export_filename('csv') == 'trades_export.csv'
+    assert export_filename('json', start_date=datetime(2024, 1, 1), compressed=True) == 'trades_export_20240101_to_now.json.gz'
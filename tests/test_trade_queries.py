@@ -0,0 +1,38 @@
+"""Tests for trade query building and keyset pagination cursors."""
+
+import pytest
+from datetime import datetime
+from database.db_manager import DatabaseManager
+
+
+def test_cursor_round_trip():
+    """Test that a page cursor decodes back to its (entry_time, id) key."""
+    trade = {'entry_time': datetime(2024, 3, 1, 12, 30, 15, 250000), 'id': 4812}
+    cursor = DatabaseManager.encode_trade_cursor(trade)
+
+    assert DatabaseManager.decode_trade_cursor(cursor) == (trade['entry_time'], 4812)
+
+
+def test_invalid_cursor():
+    """Test that malformed cursors are rejected."""
+    with pytest.raises(ValueError):
+        DatabaseManager.decode_trade_cursor('not-a-cursor')
+
+
+def test_trade_filters_keyset():
+    """Test that filters number their parameters in order and use a row comparison for keyset bounds."""
+    start = datetime(2024, 1, 1)
+    before = (datetime(2024, 2, 1), 99)
+    where, params = DatabaseManager._trade_filters(user_id=7, start_date=start, closed_only=True, before=before)
+
+    assert where == (
+        " WHERE (user_id = $1 OR user_id IS NULL) AND entry_time >= $2"
+        " AND exit_price IS NOT NULL AND pnl IS NOT NULL"
+        " AND (entry_time, id) < ($3, $4)"
+    )
+    assert params == [7, start, before[0], 99]
+
+
+def test_trade_filters_empty():
+    """Test that no filters produce no WHERE clause."""
+    assert DatabaseManager._trade_filters() == ("", [])
@@ -0,0 +1,56 @@
+"""Tests for the TTL + LRU cache."""
+
+from utils.ttl_cache import TTLCache
+
+
+class FakeClock:
+    """Manually advanced time source."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    """Test that entries are served until their TTL passes."""
+    clock = FakeClock()
+    cache = TTLCache(max_size=10, ttl=30, clock=clock)
+    cache.set('user', {'id': 1})
+
+    clock.now = 29
+    assert cache.get('user') == {'id': 1}
+    clock.now = 30
+    assert cache.get('user') is None
+    assert cache.get_stats()['expirations'] == 1
+
+
+def test_least_recently_used_is_evicted():
+    """Test that a full cache evicts the entry used longest ago."""
+    cache = TTLCache(max_size=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_invalidate_and_hit_rate():
+    """Test invalidation and hit-rate accounting."""
+    cache = TTLCache(max_size=10, ttl=60)
+    assert cache.get_stats()['hit_rate'] is None
+
+    cache.set('a', 1)
+    cache.get('a')
+    assert cache.invalidate('a')
+    assert not cache.invalidate('a')
+    cache.get('a')
+
+    stats = cache.get_stats()
+    assert (stats['hits'], stats['misses'], stats['invalidations']) == (1, 1, 1)
+    assert stats['hit_rate'] == 0.5
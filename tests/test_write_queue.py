@@ -0,0 +1,155 @@
+"""Tests for the write-behind database queue."""
+
+import pytest
+import asyncio
+from datetime import datetime
+from database.write_queue import WriteBehindQueue
+
+
+class RecordingConnection:
+    """Connection double that records executed statements."""
+
+    def __init__(self, calls, fail_on=None):
+        self.calls = calls
+        self.fail_on = fail_on
+
+    async def executemany(self, sql, rows):
+        if self.fail_on is not None and any(self.fail_on in row for row in rows):
+            raise ValueError('bad row')
+        self.calls.append((sql, list(rows)))
+
+    async def execute(self, sql, *args):
+        if self.fail_on is not None and self.fail_on in args:
+            raise ValueError('bad row')
+        self.calls.append((sql, [args]))
+
+
+class RecordingPool:
+    """Pool double handing out recording connections."""
+
+    def __init__(self, fail_on=None, down_for=0):
+        self.calls = []
+        self.fail_on = fail_on
+        self.down_for = down_for  # Connection attempts refused before the database "comes back"
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                if pool.down_for > 0:
+                    pool.down_for -= 1
+                    raise OSError('connection refused')
+                return RecordingConnection(pool.calls, pool.fail_on)
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+STATEMENTS = {'insert': 'INSERT', 'update': 'UPDATE'}
+
+
+@pytest.mark.asyncio
+async def test_batches_in_dependency_order():
+    """Test that queued writes are batched and inserts land before updates."""
+    pool = RecordingPool()
+    queue = WriteBehindQueue(STATEMENTS, batch_size=10, flush_interval=0.05)
+    queue.start(pool)
+
+    await queue.put('update', (1, 'closed'))
+    await queue.put('insert', (1,))
+    await queue.put('insert', (2,))
+    await queue.put('update', (2, 'closed'))
+    await queue.stop()
+
+    assert pool.calls == [
+        ('INSERT', [(1,), (2,)]),
+        ('UPDATE', [(1, 'closed'), (2, 'closed')])
+    ]
+    stats = queue.get_stats()
+    assert stats['written'] == 4
+    assert stats['batches'] == 1
+    assert stats['depth'] == 0
+
+
+@pytest.mark.asyncio
+async def test_bad_row_is_isolated():
+    """Test that one failing row does not drop the rest of its batch."""
+    pool = RecordingPool(fail_on='bad')
+    queue = WriteBehindQueue(STATEMENTS, batch_size=10, flush_interval=0.01)
+    queue.start(pool)
+
+    await queue.put('insert', ('good',))
+    await queue.put('insert', ('bad',))
+    await queue.put('insert', ('also good',))
+    await queue.stop()
+
+    assert [call[1] for call in pool.calls] == [[('good',)], [('also good',)]]
+    assert queue.get_stats()['failed'] == 1
+    assert queue.rejected == [('insert', ('bad',))]
+
+
+@pytest.mark.asyncio
+async def test_writes_survive_outage(tmp_path):
+    """Test that writes outlasting the retries are journaled and replayed in order."""
+    journal = str(tmp_path / 'writes.journal')
+    pool = RecordingPool(down_for=100)
+    queue = WriteBehindQueue(STATEMENTS, batch_size=10, flush_interval=0.01, max_retries=2,
+                             journal_path=journal, retry_backoff=0.01, max_retry_backoff=0.02)
+    queue.start(pool)
+
+    opened = datetime(2024, 1, 1, 12, 30)
+    await queue.put('insert', (1, opened))
+    assert not await queue.flush()
+    await queue.put('update', (1, 'closed'))
+    await queue.put('insert', (2, opened))
+    assert not await queue.flush()
+    assert queue.get_stats()['backlog'] == 3
+    await queue.stop()
+
+    # A restarted queue picks the journal up and replays it once the database is back
+    pool.down_for = 0
+    queue = WriteBehindQueue(STATEMENTS, journal_path=journal)
+    assert queue.backlog == 3
+    queue.start(pool)
+    assert await queue.flush()
+    await queue.stop()
+
+    assert pool.calls == [
+        ('INSERT', [(1, opened), (2, opened)]),
+        ('UPDATE', [(1, 'closed')])
+    ]
+    assert WriteBehindQueue(STATEMENTS, journal_path=journal).backlog == 0
+
+
+@pytest.mark.asyncio
+async def test_drainer_replays_backlog_with_backoff():
+    """Test that the drainer retries the backlog by itself once the database recovers."""
+    pool = RecordingPool(down_for=4)
+    queue = WriteBehindQueue(STATEMENTS, batch_size=10, flush_interval=0.01, max_retries=1,
+                             retry_backoff=0.01, max_retry_backoff=0.02)
+    queue.start(pool)
+
+    for trade_id in range(3):
+        await queue.put('insert', (trade_id,))
+    await queue.queue.join()
+    for _ in range(100):
+        if not queue.backlog:
+            break
+        await asyncio.sleep(0.01)
+    await queue.stop()
+
+    assert [row for _, rows in pool.calls for row in rows] == [(0,), (1,), (2,)]
+    stats = queue.get_stats()
+    assert (stats['written'], stats['failed'], stats['outages']) == (3, 0, 1)
+
+
+@pytest.mark.asyncio
+async def test_unknown_kind_rejected():
+    """Test that only registered statements can be queued."""
+    queue = WriteBehindQueue(STATEMENTS)
+
+    with pytest.raises(ValueError):
+        await queue.put('delete', (1,))
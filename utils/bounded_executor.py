@@ -0,0 +1,61 @@
+"""Thread pool with a cap on queued work, for CPU-heavy calls made from async code."""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict
+
+
+class ExecutorBusy(RuntimeError):
+    """Raised when a BoundedExecutor already has max_pending calls queued or running."""
+
+
+class BoundedExecutor:
+    """Runs blocking functions on a small dedicated thread pool.
+
+    At most ``max_workers`` calls run at once and at most ``max_pending``
+    are accepted (running plus queued); further calls fail fast with
+    ExecutorBusy instead of piling up behind the pool. Keeping the pool
+    separate from the event loop's default executor means a burst of work
+    here can't delay other threaded I/O.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 16, thread_name_prefix: str = 'worker'):
+        """
+        Initialize the executor.
+
+        Args:
+            max_workers: Threads running calls concurrently
+            max_pending: Calls accepted at once, running or waiting
+            thread_name_prefix: Name prefix for the pool's threads
+        """
+        self.max_workers = max_workers
+        self.max_pending = max(max_pending, max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        """Run ``func(*args)`` on the pool, raising ExecutorBusy if the queue is full."""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise ExecutorBusy(f"{self.pending} calls already pending")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool size and queue metrics."""
+        return {
+            'max_workers': self.max_workers,
+            'max_pending': self.max_pending,
+            'pending': self.pending,
+            'completed': self.completed,
+            'rejected': self.rejected,
+        }
@@ -0,0 +1,140 @@
+"""In-process fan-out of live events to streaming clients."""
+
+import asyncio
+import itertools
+import json
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# Topics clients can subscribe to
+EVENT_TOPICS = ('prices', 'positions', 'fills', 'equity', 'logs')
+
+
+def encode_event(event_id: int, topic: str, data: Any) -> bytes:
+    """Encode one event as a server-sent events frame."""
+    payload = json.dumps(data, default=str, separators=(',', ':'))
+    return f"id: {event_id}\nevent: {topic}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class Subscription:
+    """One client's bounded queue of encoded events.
+
+    When the client falls behind and the queue is full, the oldest event is
+    dropped. A client that keeps dropping events past ``max_dropped`` without
+    catching up is closed, so its stream ends and the browser reconnects.
+    """
+
+    def __init__(self, topics: Set[str], max_queue: int, max_dropped: int):
+        self.topics = topics
+        self.max_dropped = max_dropped
+        self._queue: deque = deque(maxlen=max_queue)
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.closed_slow = False  # Closed for lagging past max_dropped
+        self.dropped = 0
+        self.lagging = 0  # Drops since the client last drained its queue
+
+    def push(self, frame: bytes):
+        """Queue a frame without blocking the publisher."""
+        if self.closed:
+            return
+        if len(self._queue) == self._queue.maxlen:
+            self.dropped += 1
+            self.lagging += 1
+            if self.lagging > self.max_dropped:
+                self.closed_slow = True
+                self.close()
+                return
+        self._queue.append(frame)
+        self._ready.set()
+
+    def close(self):
+        self.closed = True
+        self._queue.clear()
+        self._ready.set()
+
+    async def next_frames(self, timeout: float) -> List[bytes]:
+        """Wait for queued frames and take them all (empty on timeout or close)."""
+        if not self._queue and not self.closed:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        frames = list(self._queue)
+        self._queue.clear()
+        self._ready.clear()
+        self.lagging = 0
+        return frames
+
+
+class Broadcaster:
+    """Publishes events to every subscribed client.
+
+    ``publish`` never waits on clients: each event is JSON-encoded once and
+    appended to every matching subscription's bounded queue, and each client's
+    own stream task drains its queue. A slow browser only loses its own oldest
+    events. ``publish`` may be called from other threads (e.g. logging).
+    """
+
+    def __init__(self, max_queue: int = 256, max_dropped: int = 1024):
+        """
+        Initialize the broadcaster.
+
+        Args:
+            max_queue: Events buffered per client before the oldest are dropped
+            max_dropped: Consecutive drops after which a lagging client is disconnected
+        """
+        self.max_queue = max_queue
+        self.max_dropped = max_dropped
+        self._subscribers: Set[Subscription] = set()
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.published = 0
+        self.disconnected_slow = 0
+        self.dropped = 0  # Drops of clients that have unsubscribed
+
+    def subscribe(self, topics: Optional[Iterable[str]] = None) -> Subscription:
+        """Register a client for the given topics (all topics when None)."""
+        self._loop = asyncio.get_running_loop()
+        subscription = Subscription(set(topics or EVENT_TOPICS), self.max_queue, self.max_dropped)
+        self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            self.dropped += subscription.dropped
+            if subscription.closed_slow:
+                self.disconnected_slow += 1
+        subscription.close()
+
+    def publish(self, topic: str, data: Any):
+        """Send an event to every client subscribed to ``topic``."""
+        if not self._subscribers or self._loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._deliver(topic, data)
+        elif not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._deliver, topic, data)
+
+    def _deliver(self, topic: str, data: Any):
+        subscribers = [sub for sub in self._subscribers if topic in sub.topics]
+        if not subscribers:
+            return
+        frame = encode_event(next(self._ids), topic, data)
+        self.published += 1
+        for subscription in subscribers:
+            subscription.push(frame)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get client counts and drop metrics."""
+        return {
+            'clients': len(self._subscribers),
+            'published': self.published,
+            'dropped': self.dropped + sum(sub.dropped for sub in self._subscribers),
+            'disconnected_slow_clients': self.disconnected_slow,
+        }
@@ -0,0 +1,149 @@
+"""Fixed-depth ring buffer for per-pair candle history."""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+# Granularity names used by the exchange client mapped to bar length in seconds
+GRANULARITY_SECONDS = {
+    'ONE_MINUTE': 60,
+    'FIVE_MINUTE': 300,
+    'FIFTEEN_MINUTE': 900,
+    'ONE_HOUR': 3600,
+    'SIX_HOUR': 21600,
+    'ONE_DAY': 86400
+}
+
+
+class CandleBuffer:
+    """Ring buffer of OHLCV candles for a single pair, keyed by bar index.
+
+    Candles are kept in ascending bar order. Appending a new bar and amending
+    the forming (last) bar are O(1); the oldest bar is evicted automatically
+    once the buffer reaches its configured depth.
+    """
+
+    def __init__(self, max_size: int = 200, granularity_seconds: int = 60):
+        """
+        Initialize the candle buffer.
+
+        Args:
+            max_size: Maximum number of bars to keep (history depth)
+            granularity_seconds: Bar length in seconds, used to derive bar indexes
+        """
+        self.max_size = max_size
+        self.granularity_seconds = granularity_seconds
+        self._candles: deque = deque(maxlen=max_size)
+        self._last_bar: Optional[int] = None
+
+    def bar_index(self, timestamp: int) -> int:
+        """Get the bar index for a candle timestamp (seconds since epoch)."""
+        return int(timestamp) // self.granularity_seconds
+
+    def upsert(self, candle: Dict) -> bool:
+        """
+        Insert a candle or replace the existing candle for the same bar.
+
+        Args:
+            candle: Candle dict with at least a 'timestamp' key
+
+        Returns:
+            True if the candle was stored, False if it is older than the buffer window
+        """
+        bar = self.bar_index(candle['timestamp'])
+
+        if self._last_bar is None or bar > self._last_bar:
+            self._candles.append(candle)
+            self._last_bar = bar
+            return True
+
+        if bar == self._last_bar:
+            self._candles[-1] = candle
+            return True
+
+        # Late correction of an already-closed bar: walk back from the newest bar.
+        # Updates from the exchange only ever touch the last few bars, so this stays short.
+        for i in range(len(self._candles) - 1, -1, -1):
+            existing_bar = self.bar_index(self._candles[i]['timestamp'])
+            if existing_bar == bar:
+                self._candles[i] = candle
+                return True
+            if existing_bar < bar:
+                if len(self._candles) < self.max_size:
+                    self._candles.insert(i + 1, candle)
+                    return True
+                return False
+
+        # Older than everything we hold - only keep it if there is room at the front
+        if len(self._candles) < self.max_size:
+            self._candles.appendleft(candle)
+            return True
+        return False
+
+    def merge(self, candles: Iterable[Dict]) -> int:
+        """
+        Merge a batch of candles (ascending timestamps) into the buffer.
+
+        Returns:
+            Number of candles stored
+        """
+        stored = 0
+        for candle in candles:
+            if self.upsert(candle):
+                stored += 1
+        return stored
+
+    def replace(self, candles: Iterable[Dict]):
+        """Replace the buffer contents with a fresh batch of candles."""
+        self.clear()
+        self.merge(candles)
+
+    def apply_price(self, price: float) -> Optional[Dict]:
+        """
+        Patch the forming bar with a live price.
+
+        Updates close and widens high/low of the last bar. The bar dict is replaced
+        rather than mutated so snapshots handed out earlier stay unchanged.
+
+        Returns:
+            The amended candle, or None if the buffer is empty or price is invalid
+        """
+        if not self._candles or not price or price <= 0:
+            return None
+
+        last = self._candles[-1]
+        amended = dict(last)
+        amended['close'] = price
+        amended['high'] = max(last.get('high', price), price)
+        amended['low'] = min(last.get('low', price), price)
+        self._candles[-1] = amended
+        return amended
+
+    def last(self) -> Optional[Dict]:
+        """Get the most recent (forming) candle."""
+        return self._candles[-1] if self._candles else None
+
+    def to_list(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Get candles as a list in ascending time order.
+
+        Args:
+            limit: Only return the most recent N candles (None = all)
+        """
+        if limit is not None and limit < len(self._candles):
+            return list(self._candles)[-limit:]
+        return list(self._candles)
+
+    def clear(self):
+        """Remove all candles from the buffer."""
+        self._candles.clear()
+        self._last_bar = None
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._candles)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self._candles[index]
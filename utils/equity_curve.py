@@ -0,0 +1,187 @@
+"""Array-backed equity curve with compact binary encoding and LTTB downsampling."""
+
+import struct
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Header: magic, format version, point count
+_HEADER = struct.Struct('<4sBI')
+_MAGIC = b'EQCV'
+_FORMAT_VERSION = 1
+
+
+def _to_epoch_ms(timestamp) -> int:
+    """Convert a datetime, ISO string or epoch milliseconds to epoch milliseconds (naive times are UTC)."""
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return int(round(timestamp.timestamp() * 1000))
+    return int(timestamp)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """
+    Pick the points that best preserve a series' shape (Largest-Triangle-Three-Buckets).
+
+    Args:
+        x: Monotonic x values
+        y: y values
+        threshold: Number of points to keep
+
+    Returns:
+        Sorted indices of the kept points (always includes the first and last point)
+    """
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        areas = np.abs(
+            (x[a] - avg_x) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y - y[a])
+        )
+        a = start + int(np.argmax(areas))
+        indices[i + 1] = a
+    indices[-1] = n - 1
+    return indices
+
+
+class EquityCurve:
+    """Balance over time stored as two growable NumPy arrays.
+
+    Timestamps are epoch milliseconds (int64) and balances float64. Appending
+    is amortized O(1), so a backtest records one point per candle without
+    building a dict per point.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        """
+        Initialize an empty curve.
+
+        Args:
+            capacity: Points preallocated before the arrays have to grow
+        """
+        capacity = max(1, capacity)
+        self._timestamps = np.empty(capacity, dtype=np.int64)
+        self._balances = np.empty(capacity, dtype=np.float64)
+        self._size = 0
+
+    @classmethod
+    def from_arrays(cls, timestamps: Iterable[int], balances: Iterable[float]) -> 'EquityCurve':
+        """Build a curve from epoch-millisecond timestamps and balances."""
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        balances = np.asarray(balances, dtype=np.float64)
+        if timestamps.shape != balances.shape:
+            raise ValueError("timestamps and balances must have the same length")
+        curve = cls(capacity=len(timestamps))
+        curve._timestamps[:len(timestamps)] = timestamps
+        curve._balances[:len(balances)] = balances
+        curve._size = len(timestamps)
+        return curve
+
+    @classmethod
+    def from_points(cls, points: List[Dict]) -> 'EquityCurve':
+        """Build a curve from a list of {'timestamp', 'balance'} dicts."""
+        return cls.from_arrays(
+            [_to_epoch_ms(point['timestamp']) for point in points],
+            [point['balance'] for point in points]
+        )
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Epoch-millisecond timestamps (a view, do not modify)."""
+        return self._timestamps[:self._size]
+
+    @property
+    def balances(self) -> np.ndarray:
+        """Balances (a view, do not modify)."""
+        return self._balances[:self._size]
+
+    def append(self, timestamp, balance: float):
+        """Add a point, doubling the arrays when they are full."""
+        if self._size == len(self._timestamps):
+            capacity = len(self._timestamps) * 2
+            self._timestamps = np.resize(self._timestamps, capacity)
+            self._balances = np.resize(self._balances, capacity)
+        self._timestamps[self._size] = _to_epoch_ms(timestamp)
+        self._balances[self._size] = balance
+        self._size += 1
+
+    def max_drawdown(self, initial_balance: float) -> float:
+        """Get the largest peak-to-trough drop in percent, with initial_balance as the first peak."""
+        if not self._size:
+            return 0.0
+        peaks = np.maximum.accumulate(np.maximum(self.balances, initial_balance))
+        return float(np.max((peaks - self.balances) / peaks) * 100.0)
+
+    def downsample(self, points: int) -> 'EquityCurve':
+        """Get a curve of at most ``points`` points that keeps the curve's shape (LTTB)."""
+        if points >= self._size:
+            return self
+        indices = lttb_indices(self.timestamps, self.balances, points)
+        return EquityCurve.from_arrays(self.timestamps[indices], self.balances[indices])
+
+    def to_points(self) -> List[Dict]:
+        """Get the curve as a list of {'timestamp': naive UTC ISO string, 'balance'} dicts."""
+        return [
+            {'timestamp': datetime.fromtimestamp(ts / 1000, timezone.utc).replace(tzinfo=None).isoformat(),
+             'balance': balance}
+            for ts, balance in zip(self.timestamps.tolist(), self.balances.tolist())
+        ]
+
+    def encode(self) -> bytes:
+        """
+        Serialize the curve to a compact binary blob.
+
+        Timestamps and balances (rounded to cents) are delta-encoded as int64
+        and zlib-compressed. Candle intervals are regular and the balance only
+        moves when a trade closes, so the deltas are mostly repeated values.
+        """
+        ts_deltas = np.diff(self.timestamps, prepend=np.int64(0))
+        cents = np.round(self.balances * 100.0).astype(np.int64)
+        balance_deltas = np.diff(cents, prepend=np.int64(0))
+        payload = ts_deltas.astype('<i8').tobytes() + balance_deltas.astype('<i8').tobytes()
+        return _HEADER.pack(_MAGIC, _FORMAT_VERSION, self._size) + zlib.compress(payload, 6)
+
+    @classmethod
+    def decode(cls, data: bytes) -> 'EquityCurve':
+        """Rebuild a curve from ``encode`` output."""
+        data = bytes(data)
+        magic, version, size = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Unsupported equity curve blob (magic={magic!r}, version={version})")
+        payload = np.frombuffer(zlib.decompress(data[_HEADER.size:]), dtype='<i8')
+        if len(payload) != size * 2:
+            raise ValueError(f"Equity curve blob has {len(payload)} values, expected {size * 2}")
+        timestamps = np.cumsum(payload[:size])
+        balances = np.cumsum(payload[size:]) / 100.0
+        return cls.from_arrays(timestamps, balances)
+
+
+def coerce_equity_curve(curve) -> Optional[EquityCurve]:
+    """Get an EquityCurve from an EquityCurve or a legacy list of point dicts."""
+    if curve is None or isinstance(curve, EquityCurve):
+        return curve
+    return EquityCurve.from_points(curve)
@@ -3,7 +3,7 @@
 import logging
 from datetime import datetime
 from collections import deque
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 
 
 class InMemoryLogHandler(logging.Handler):
@@ -19,6 +19,7 @@ class InMemoryLogHandler(logging.Handler):
         super().__init__()
         self.logs = deque(maxlen=max_size)  # Use deque with maxlen for automatic rotation
         self.max_size = max_size
+        self.listeners: List[Callable[[Dict], None]] = []  # Called with each new entry (live log streaming)
     
     def emit(self, record: logging.LogRecord):
         """Emit a log record to the in-memory buffer."""
@@ -67,6 +68,8 @@ class InMemoryLogHandler(logging.Handler):
             }
             
             self.logs.append(log_entry)
+            for listener in self.listeners:
+                listener(log_entry)
         except Exception:
             # Ignore errors in logging handler to prevent infinite loops
             pass
@@ -94,6 +97,16 @@ class InMemoryLogHandler(logging.Handler):
         
         return logs
     
+    def add_listener(self, listener: Callable[[Dict], None]):
+        """Call ``listener(log_entry)`` for every new log entry."""
+        if listener not in self.listeners:
+            self.listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[Dict], None]):
+        """Stop calling a listener added with add_listener."""
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+    
     def clear(self):
         """Clear all logs from the buffer."""
         self.logs.clear()
@@ -0,0 +1,383 @@
+"""Compact on-disk snapshots of in-memory bot state for fast warm restarts."""
+
+import asyncio
+import gzip
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from grid_trading.dca_manager import DCAStrategy
+from grid_trading.grid_manager import GridLevel, GridStrategy
+from orders.order_types import (
+    BracketOrder, IcebergOrder, OCOOrder, OrderStatus, OrderType, StopLimitOrder, TrailingStopOrder
+)
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the snapshot changes incompatibly
+SNAPSHOT_VERSION = 2
+
+
+class SnapshotError(ValueError):
+    """Raised when state does not match the snapshot schema."""
+
+
+class Record:
+    """Dict with a fixed set of typed fields.
+
+    Fields not in the schema are dropped and missing ones stay missing;
+    required fields must be present and not None.
+    """
+
+    def __init__(self, fields: Dict[str, Any], required: Iterable[str] = ()):
+        self.fields = fields
+        self.required = frozenset(required)
+
+
+class ListOf:
+    """List whose items all share one schema."""
+
+    def __init__(self, item: Any):
+        self.item = item
+
+
+class MapOf:
+    """Dict with string keys whose values all share one schema."""
+
+    def __init__(self, value: Any):
+        self.value = value
+
+
+class Instance:
+    """Objects restored attribute by attribute from explicit field lists.
+
+    The class name is stored with the fields and must be one of the listed
+    classes, so a snapshot can only ever produce these types.
+    """
+
+    def __init__(self, *classes: Tuple[type, Dict[str, Any]]):
+        self.classes = {cls.__name__: (cls, fields) for cls, fields in classes}
+
+
+def encode_value(value: Any, schema: Any, path: str = 'state') -> Any:
+    """Convert a value to JSON-safe data following its schema."""
+    if value is None:
+        return None
+    if isinstance(schema, Record):
+        return {name: encode_value(value[name], field, f"{path}.{name}")
+                for name, field in schema.fields.items() if name in value}
+    if isinstance(schema, ListOf):
+        return [encode_value(item, schema.item, f"{path}[{i}]") for i, item in enumerate(value)]
+    if isinstance(schema, MapOf):
+        return {str(key): encode_value(item, schema.value, f"{path}.{key}") for key, item in value.items()}
+    if isinstance(schema, Instance):
+        cls, fields = schema.classes.get(type(value).__name__, (None, None))
+        if cls is not type(value):
+            raise SnapshotError(f"{path}: {type(value).__name__} is not a snapshot type")
+        data = {name: encode_value(getattr(value, name), field, f"{path}.{name}") for name, field in fields.items()}
+        data['type'] = cls.__name__
+        return data
+    if isinstance(schema, type) and issubclass(schema, Enum):
+        return schema(value).value
+    if schema is datetime or schema is date:
+        return value.isoformat() if isinstance(value, (datetime, date)) else str(value)
+    if schema is bool:
+        return bool(value)
+    return schema(value)
+
+
+def decode_value(data: Any, schema: Any, path: str = 'state') -> Any:
+    """Rebuild a value from JSON data, checking it against its schema."""
+    if data is None:
+        return None
+    if isinstance(schema, Record):
+        record = _expect(data, dict, path)
+        missing = [name for name in schema.required if record.get(name) is None]
+        if missing:
+            raise SnapshotError(f"{path}: missing {', '.join(sorted(missing))}")
+        return {name: decode_value(record[name], field, f"{path}.{name}")
+                for name, field in schema.fields.items() if name in record}
+    if isinstance(schema, ListOf):
+        items = _expect(data, list, path)
+        return [decode_value(item, schema.item, f"{path}[{i}]") for i, item in enumerate(items)]
+    if isinstance(schema, MapOf):
+        items = _expect(data, dict, path)
+        return {key: decode_value(item, schema.value, f"{path}.{key}") for key, item in items.items()}
+    if isinstance(schema, Instance):
+        record = _expect(data, dict, path)
+        if record.get('type') not in schema.classes:
+            raise SnapshotError(f"{path}: unknown type {record.get('type')!r}")
+        cls, fields = schema.classes[record['type']]
+        obj = cls.__new__(cls)
+        for name, field in fields.items():
+            setattr(obj, name, decode_value(record.get(name), field, f"{path}.{name}"))
+        return obj
+    if isinstance(schema, type) and issubclass(schema, Enum):
+        try:
+            return schema(data)
+        except ValueError:
+            raise SnapshotError(f"{path}: {data!r} is not a {schema.__name__}")
+    if schema is datetime or schema is date:
+        try:
+            return schema.fromisoformat(_expect(data, str, path))
+        except ValueError:
+            raise SnapshotError(f"{path}: {data!r} is not an ISO {schema.__name__}")
+    if schema is float:
+        if isinstance(data, bool) or not isinstance(data, (int, float)):
+            raise SnapshotError(f"{path}: expected a number, got {type(data).__name__}")
+        return float(data)
+    if schema is int and isinstance(data, bool):
+        raise SnapshotError(f"{path}: expected int, got bool")
+    return _expect(data, schema, path)
+
+
+def _expect(data: Any, kind: type, path: str) -> Any:
+    if not isinstance(data, kind):
+        raise SnapshotError(f"{path}: expected {kind.__name__}, got {type(data).__name__}")
+    return data
+
+
+CANDLE_SCHEMA = Record({
+    'timestamp': int,
+    'open': float,
+    'high': float,
+    'low': float,
+    'close': float,
+    'volume': float,
+}, required=('timestamp',))
+
+# Position.to_dict() output
+POSITION_SCHEMA = Record({
+    'id': int,
+    'pair': str,
+    'side': str,
+    'size': float,
+    'entry_price': float,
+    'stop_loss': float,
+    'take_profit': float,
+    'entry_time': datetime,
+    'order_id': str,
+    'confidence_score': float,
+    'db_id': int,
+    'user_id': int,
+    'mark_price': float,
+    'unrealized_pnl': float,
+}, required=('pair', 'side', 'size', 'entry_price'))
+
+# PerformanceTracker.get_state() output
+TRACKER_SCHEMA = Record({
+    'trades': ListOf(Record({
+        'id': int,
+        'pair': str,
+        'side': str,
+        'entry_price': float,
+        'exit_price': float,
+        'size': float,
+        'pnl': float,
+        'pnl_pct': float,
+        'exit_reason': str,
+        'entry_time': datetime,
+        'exit_time': datetime,
+        'confidence_score': float,
+    })),
+    'daily_pnl_history': ListOf(Record({'date': date, 'daily_pnl': float, 'total_trades': int})),
+    'equity_curve': ListOf(Record({'timestamp': datetime, 'balance': float})),
+    'total_pnl': float,
+    'daily_pnl': float,
+    'total_trades': int,
+    'winning_trades': int,
+    'losing_trades': int,
+    'gross_profit': float,
+    'gross_loss': float,
+    'last_reset_date': date,
+})
+
+ORDER_FIELDS = {
+    'order_id': str,
+    'order_type': OrderType,
+    'pair': str,
+    'side': str,
+    'size': float,
+    'status': OrderStatus,
+    'created_at': datetime,
+    'filled_size': float,
+    'filled_at': datetime,
+}
+
+ORDER_SCHEMA = Instance(
+    (TrailingStopOrder, {**ORDER_FIELDS, 'trailing_percent': float, 'initial_price': float,
+                         'highest_price': float, 'lowest_price': float, 'current_stop_price': float}),
+    (OCOOrder, {**ORDER_FIELDS, 'stop_loss_price': float, 'take_profit_price': float, 'triggered_order': str}),
+    (BracketOrder, {**ORDER_FIELDS, 'entry_price': float, 'stop_loss_price': float, 'take_profit_price': float,
+                    'entry_filled': bool, 'stop_loss_active': bool, 'take_profit_active': bool}),
+    (StopLimitOrder, {**ORDER_FIELDS, 'stop_price': float, 'limit_price': float, 'stop_triggered': bool}),
+    (IcebergOrder, {**ORDER_FIELDS, 'total_size': float, 'visible_size': float, 'limit_price': float,
+                    'remaining_size': float, 'current_chunk_size': float}),
+)
+
+GRID_SCHEMA = Instance((GridStrategy, {
+    'grid_id': str,
+    'pair': str,
+    'lower_price': float,
+    'upper_price': float,
+    'grid_count': int,
+    'order_size': float,
+    'side': str,
+    'grid_spacing': float,
+    'levels': ListOf(Instance((GridLevel, {
+        'price': float,
+        'side': str,
+        'order_id': str,
+        'filled': bool,
+        'filled_at': datetime,
+        'filled_price': float,
+    }))),
+    'status': str,
+    'created_at': datetime,
+}))
+
+DCA_SCHEMA = Instance((DCAStrategy, {
+    'dca_id': str,
+    'pair': str,
+    'side': str,
+    'amount': float,
+    'interval': str,
+    'total_amount': float,
+    'start_price': float,
+    'end_price': float,
+    'status': str,
+    'created_at': datetime,
+    'next_execution': datetime,
+    'total_invested': float,
+    'executions': ListOf(Record({'timestamp': datetime, 'price': float, 'size': float, 'amount': float})),
+}))
+
+# Everything TradingBot._collect_state() writes
+BOT_STATE_SCHEMA = Record({
+    'initial_balance': float,
+    'candles': MapOf(ListOf(CANDLE_SCHEMA)),
+    'positions': ListOf(POSITION_SCHEMA),
+    'performance': TRACKER_SCHEMA,
+    'risk': Record({'daily_pnl': float, 'daily_reset_time': datetime}),
+    'orders': MapOf(ORDER_SCHEMA),
+    'grids': MapOf(GRID_SCHEMA),
+    'dca': MapOf(DCA_SCHEMA),
+    'paper': Record({
+        'balance': float,
+        'positions': MapOf(Record({'size': float, 'avg_price': float}, required=('size', 'avg_price'))),
+    }),
+})
+
+
+class StateSnapshotStore:
+    """Reads and writes gzip-compressed JSON snapshots of bot state.
+
+    State is encoded against an explicit schema, and loading only ever
+    rebuilds plain values, enums and the object types the schema lists, so a
+    tampered or corrupt file is rejected rather than executed. Snapshots are
+    written atomically (temp file + rename) so a crash mid-write never leaves
+    a truncated file behind.
+    """
+
+    def __init__(self, path: str, max_age_hours: float = 24.0, schema: Record = BOT_STATE_SCHEMA):
+        """
+        Initialize the snapshot store.
+
+        Args:
+            path: Snapshot file path
+            max_age_hours: Snapshots older than this are ignored on load
+            schema: Schema of the state dict
+        """
+        self.path = path
+        self.max_age = timedelta(hours=max_age_hours)
+        self.schema = schema
+        self.last_saved_at: Optional[datetime] = None
+        self.last_size_bytes = 0
+
+    def encode(self, state: Dict[str, Any]) -> bytes:
+        """Serialize a state dict to a snapshot payload."""
+        envelope = {
+            'version': SNAPSHOT_VERSION,
+            'saved_at': datetime.utcnow().isoformat(),
+            'state': encode_value(state, self.schema)
+        }
+        return json.dumps(envelope, separators=(',', ':')).encode('utf-8')
+
+    def _write(self, payload: bytes):
+        """Compress and atomically write a payload to disk."""
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        compressed = gzip.compress(payload, compresslevel=1)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_size_bytes = len(compressed)
+
+    def save_sync(self, state: Dict[str, Any]) -> bool:
+        """Write a snapshot synchronously (used on shutdown)."""
+        try:
+            self._write(self.encode(state))
+            self.last_saved_at = datetime.utcnow()
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write state snapshot: {e}", exc_info=True)
+            return False
+
+    async def save(self, state: Dict[str, Any]) -> bool:
+        """
+        Write a snapshot without blocking the event loop on disk I/O.
+
+        The state is encoded on the calling thread so it is captured consistently;
+        compression and the file write run in the default executor.
+        """
+        try:
+            payload = self.encode(state)
+            loop = asyncio.get_event_loop()
+            await loop.run_in_executor(None, self._write, payload)
+            self.last_saved_at = datetime.utcnow()
+            logger.debug(f"State snapshot saved ({self.last_size_bytes} bytes)")
+            return True
+        except Exception as e:
+            logger.error(f"Failed to write state snapshot: {e}", exc_info=True)
+            return False
+
+    def load(self) -> Optional[Dict[str, Any]]:
+        """
+        Load the most recent snapshot.
+
+        Returns:
+            The saved state dict with 'saved_at' added, or None if there is no usable snapshot
+        """
+        if not os.path.exists(self.path):
+            return None
+
+        try:
+            with open(self.path, 'rb') as f:
+                envelope = json.loads(gzip.decompress(f.read()))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable state snapshot {self.path}: {e}")
+            return None
+
+        if not isinstance(envelope, dict) or envelope.get('version') != SNAPSHOT_VERSION:
+            logger.warning(f"Ignoring state snapshot with unsupported version: {envelope.get('version') if isinstance(envelope, dict) else None}")
+            return None
+
+        try:
+            saved_at = decode_value(envelope.get('saved_at'), datetime, 'saved_at')
+            state = decode_value(envelope.get('state') or {}, self.schema)
+        except SnapshotError as e:
+            logger.warning(f"Ignoring invalid state snapshot {self.path}: {e}")
+            return None
+
+        if not saved_at or datetime.utcnow() - saved_at > self.max_age:
+            logger.info(f"Ignoring stale state snapshot from {saved_at}")
+            return None
+
+        state['saved_at'] = saved_at
+        return state